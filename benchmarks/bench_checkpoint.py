@@ -0,0 +1,87 @@
+"""
+Checkpoint write latency per step, and whether it stays flat as the history grows.
+
+Replays a synthetic N-step trace offline with a SQLiteCheckpointer attached, timing every
+save_checkpoint() call (serialize on the loop + SQLite write in a worker thread). Each step
+adds one history item of roughly --page-kib of DOM text, the way a real run grows.
+
+    python benchmarks/bench_checkpoint.py --steps 100 --page-kib 8
+"""
+import io
+import os
+import gzip
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import contextlib
+
+from langgraph_browser_agent import nodes
+from langgraph_browser_agent.checkpoint import SQLiteCheckpointer
+from langgraph_browser_agent.metrics import percentile
+from langgraph_browser_agent.trace import TRACE_FORMAT, TRACE_VERSION, ReplayAgent, load_trace
+
+
+def write_trace(path, steps, page_kib):
+    filler = ('<div>lorem ipsum dolor sit amet</div>' * (page_kib * 1024 // 36 + 1))[:page_kib * 1024]
+    lines = [{
+        'format': TRACE_FORMAT, 'version': TRACE_VERSION, 'task': 'benchmark', 'graph_mode': 'fast', 'max_steps': steps,
+        'settings': {'max_failures': 3, 'final_response_after_failure': False, 'step_timeout': 30},
+    }]
+    for step in range(steps):
+        last = step == steps - 1
+        page = {'url': f'https://example.com/{step}', 'title': f'Page {step}', 'tabs': [], 'dom': filler}
+        action = {'done': {'text': 'ok'}} if last else {'click': {'index': step}}
+        result = {'is_done': True, 'success': True, 'extracted_content': 'ok'} if last else {'extracted_content': filler[:512]}
+        for phase, data in (('prepare_context', page), ('get_next_action', {'memory': filler[:256], 'action': [action]}),
+                            ('execute_actions', [result]), ('evaluate_result', None)):
+            lines.append({'step': step, 'phase': phase, 'duration': 0.0, 'data': data, 'error': None, 'timed_out': False})
+    with gzip.open(path, 'wt') as f:
+        f.writelines(json.dumps(line) + '\n' for line in lines)
+
+
+async def run(trace, db_path):
+    latencies = []
+    save = nodes.save_checkpoint
+
+    async def timed_save(agent_instance):
+        start = time.perf_counter()
+        await save(agent_instance)
+        latencies.append(time.perf_counter() - start)
+
+    agent = ReplayAgent(trace, graph_mode='fast')
+    agent.checkpointer = SQLiteCheckpointer(db_path)
+    agent.thread_id = 'bench'
+    nodes.save_checkpoint = timed_save
+    try:
+        await agent.run()
+    finally:
+        nodes.save_checkpoint = save
+        agent.checkpointer.close()
+    return latencies, agent.checkpointer.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--steps', type=int, default=100)
+    parser.add_argument('--page-kib', type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        trace_path = os.path.join(tmp, 'bench.trace.gz')
+        write_trace(trace_path, args.steps, args.page_kib)
+        with contextlib.redirect_stdout(io.StringIO()):
+            latencies, stats = asyncio.run(run(load_trace(trace_path), os.path.join(tmp, 'bench.db')))
+
+    tenth = max(len(latencies) // 10, 1)
+    first, last = latencies[:tenth], latencies[-tenth:]
+    print(f'{stats.writes} checkpoints, {stats.bytes_written / 1024:.0f} KiB written, {stats.failures} failures')
+    print(f'per step: p50 {percentile(latencies, 50) * 1e3:.2f} ms, p95 {percentile(latencies, 95) * 1e3:.2f} ms, '
+          f'max {max(latencies) * 1e3:.2f} ms')
+    print(f'serialize {stats.total_serialize_time / stats.writes * 1e3:.2f} ms + write {stats.total_write_time / stats.writes * 1e3:.2f} ms on average')
+    print(f'first {tenth} steps p50 {percentile(first, 50) * 1e3:.2f} ms vs last {tenth} steps p50 {percentile(last, 50) * 1e3:.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
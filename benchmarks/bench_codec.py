@@ -0,0 +1,146 @@
+"""
+Size and encode/decode time of the binary codec against the JSON path.
+
+Builds a BrowserAgentState with a realistic DOM and a PNG screenshot, and an AgentHistoryList
+whose steps revisit the same few pages, then encodes both with:
+
+  json        json.dumps of the pydantic/JSON dumps (what persistence used so far)
+  json+zlib   the same, zlib compressed
+  codec       msgpack with interned strings and raw screenshot bytes
+  codec+zlib / codec+zstd   the same, compressed (zstd needs the zstandard package)
+
+    python benchmarks/bench_codec.py --steps 100 --repeats 20
+"""
+import io
+import json
+import time
+import zlib
+import random
+import argparse
+
+from browser_use.agent.views import ActionResult, AgentHistory, AgentHistoryList, AgentOutput, StepMetadata
+from browser_use.browser.views import BrowserStateHistory, BrowserStateSummary, TabInfo
+from browser_use.tools.registry.views import ActionModel
+
+from langgraph_browser_agent.codec import Codec
+from langgraph_browser_agent.trace import ReplayedDOMState, dump_browser_state
+
+
+class BenchAction(ActionModel):
+    click: dict | None = None
+    input_text: dict | None = None
+
+
+BenchOutput = AgentOutput.type_with_custom_actions(BenchAction)
+PAGES = [f'https://shop.example.com/{path}' for path in ('', 'search?q=laptop', 'product/1234', 'cart', 'checkout')]
+
+
+def screenshot_base64(width=1280, height=720):
+    import base64
+    from PIL import Image, ImageDraw
+
+    image = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(image)
+    rng = random.Random(0)
+    for _ in range(300):
+        x, y = rng.randrange(width), rng.randrange(height)
+        draw.rectangle((x, y, x + rng.randrange(20, 200), y + rng.randrange(10, 40)), fill=tuple(rng.randrange(256) for _ in range(3)))
+        draw.text((x + 4, y + 4), 'Add to cart', fill='black')
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+def dom_text(elements=400):
+    rng = random.Random(1)
+    return '\n'.join(
+        f'[{i}]<{rng.choice(["a", "button", "input", "div"])} class="product-card item-{i % 20}">'
+        f'{rng.choice(["Add to cart", "View details", "Laptop 15 inch", "Free shipping", "Compare"])} />'
+        for i in range(elements)
+    )
+
+
+def make_state():
+    return {
+        'task': 'Buy the cheapest 15 inch laptop',
+        'browser_state_summary': BrowserStateSummary(
+            dom_state=ReplayedDOMState(dom_text()), url=PAGES[2], title='Laptop 15 inch - Shop',
+            tabs=[TabInfo(url=page, title='Shop', target_id=f'{i:016X}') for i, page in enumerate(PAGES[:3])],
+            screenshot=screenshot_base64(),
+        ),
+        'last_model_output': BenchOutput(
+            evaluation_previous_goal='Opened the product page', memory='Comparing laptop prices', next_goal='Add to cart',
+            action=[BenchAction(click={'index': 42})],
+        ),
+        'last_result': [ActionResult(extracted_content='Clicked button with index 42: Add to cart', long_term_memory='Added laptop to cart')],
+    }
+
+
+def make_history(steps):
+    items = []
+    for step in range(steps):
+        page = PAGES[step % len(PAGES)]
+        items.append(AgentHistory(
+            model_output=BenchOutput(
+                evaluation_previous_goal='Success - the page loaded', memory='Comparing laptop prices across the shop',
+                next_goal='Open the next product', action=[BenchAction(click={'index': step})],
+            ),
+            result=[ActionResult(extracted_content=f'Clicked button with index {step}: View details', long_term_memory='Opened product details')],
+            state=BrowserStateHistory(url=page, title='Laptop 15 inch - Shop', tabs=[], interacted_element=[None], screenshot_path=None),
+            metadata=StepMetadata(step_number=step, step_start_time=1000.0 + step, step_end_time=1001.5 + step),
+        ))
+    return AgentHistoryList(history=items, usage=None)
+
+
+def state_dump(state):
+    return {
+        'task': state['task'],
+        'browser_state_summary': dump_browser_state(state['browser_state_summary'], include_screenshot=True),
+        'last_model_output': state['last_model_output'].model_dump(mode='json', exclude_unset=True),
+        'last_result': [r.model_dump(mode='json', exclude_none=True) for r in state['last_result']],
+    }
+
+
+def encoders():
+    yield 'json', (lambda obj: json.dumps(obj).encode()), (lambda data: json.loads(data))
+    yield 'json+zlib', (lambda obj: zlib.compress(json.dumps(obj).encode())), (lambda data: json.loads(zlib.decompress(data)))
+    for compression in (None, 'zlib', 'zstd'):
+        try:
+            codec = Codec(compression=compression)
+        except ImportError:
+            continue
+        yield f'codec+{compression}' if compression else 'codec', codec.dumps, Codec.loads
+
+
+def measure(obj, encode, decode, repeats):
+    encoded = encode(obj)
+    encode_times, decode_times = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        encode(obj)
+        encode_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        decode(encoded)
+        decode_times.append(time.perf_counter() - start)
+    return len(encoded), min(encode_times), min(decode_times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--steps', type=int, default=100)
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    # Both paths start from the same dicts, so the timings compare serialization only
+    payloads = {'state': state_dump(make_state()), f'history ({args.steps} steps)': make_history(args.steps).model_dump()}
+    for name, obj in payloads.items():
+        print(name)
+        baseline = None
+        for label, encode, decode in encoders():
+            size, encode_s, decode_s = measure(obj, encode, decode, args.repeats)
+            baseline = baseline or size
+            print(f'  {label:<11} {size / 1024:9.1f} KiB ({size / baseline:6.1%})  encode {encode_s * 1e3:7.2f} ms  decode {decode_s * 1e3:7.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
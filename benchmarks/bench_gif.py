@@ -0,0 +1,104 @@
+"""
+Event-loop stalls from history GIF generation: create_history_gif at run end vs StreamingGifWriter.
+
+Builds a synthetic N-step history of --width x --height screenshots with goal overlays, then
+simulates a run on the event loop (each step awaits --step-ms) while a heartbeat task records
+the longest time the loop was unable to run it:
+
+  at-end     browser-use's create_history_gif() called on the loop after the last step
+  streaming  StreamingGifWriter.add_history() after every step, finish() at run end
+
+    python benchmarks/bench_gif.py --steps 30 --width 1280 --height 720
+"""
+import os
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+
+from PIL import Image
+from browser_use.agent.gif import create_history_gif
+from browser_use.agent.views import ActionResult, AgentHistory, AgentHistoryList, AgentOutput
+from browser_use.browser.views import BrowserStateHistory
+from browser_use.tools.registry.views import ActionModel
+
+from langgraph_browser_agent.gif import StreamingGifWriter
+
+
+class ClickAction(ActionModel):
+    click: dict | None = None
+
+
+BenchOutput = AgentOutput.type_with_custom_actions(ClickAction)
+
+
+def make_items(directory, steps, size):
+    items = []
+    rng = random.Random(0)
+    for step in range(steps):
+        path = os.path.join(directory, f'{step}.png')
+        image = Image.new('RGB', size, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+        # Some page-like structure so frames do not quantize trivially
+        for _ in range(40):
+            x, y = rng.randrange(size[0] - 200), rng.randrange(size[1] - 40)
+            image.paste((rng.randrange(256), rng.randrange(256), rng.randrange(256)), (x, y, x + 200, y + 40))
+        image.save(path)
+        items.append(AgentHistory(
+            model_output=BenchOutput(next_goal=f'Open result {step}', action=[ClickAction(click={'index': step})]),
+            result=[ActionResult()],
+            state=BrowserStateHistory(url=f'https://example.com/{step}', title='Example', tabs=[], interacted_element=[None], screenshot_path=path),
+            metadata=None,
+        ))
+    return items
+
+
+async def heartbeat(stalls, interval=0.005):
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        stalls.append(time.perf_counter() - start - interval)
+
+
+async def simulate(items, output_path, step_seconds, streaming):
+    stalls = []
+    beat = asyncio.create_task(heartbeat(stalls))
+    history = AgentHistoryList(history=[], usage=None)
+    writer = StreamingGifWriter(output_path, task='benchmark') if streaming else None
+    for item in items:
+        await asyncio.sleep(step_seconds)
+        history.history.append(item)
+        if writer is not None:
+            writer.add_history(history)
+    end = time.perf_counter()
+    if writer is not None:
+        await writer.finish(history)
+    else:
+        create_history_gif(task='benchmark', history=history, output_path=output_path)
+    run_end_latency = time.perf_counter() - end
+    await asyncio.sleep(0.01)
+    beat.cancel()
+    return max(stalls), run_end_latency, writer.stats if writer is not None else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--steps', type=int, default=30)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--step-ms', type=float, default=500, help='simulated time per agent step')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        items = make_items(tmp, args.steps, (args.width, args.height))
+        for name, streaming in (('at-end', False), ('streaming', True)):
+            output_path = os.path.join(tmp, f'{name}.gif')
+            max_stall, latency, stats = asyncio.run(simulate(items, output_path, args.step_ms / 1000, streaming))
+            line = f'{name:>9}: max loop stall {max_stall * 1e3:8.1f} ms   GIF ready {latency * 1e3:8.1f} ms after the last step'
+            if stats is not None:
+                line += f'   (encode {stats.avg_frame_time * 1e3:.1f} ms/frame off-loop, {stats.loop_time * 1e3:.2f} ms on-loop total)'
+            print(line + f'   {os.path.getsize(output_path) / 1024:.0f} KiB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Per-agent construction cost of LangGraphBrowserAgent.
+
+"per-instance compile" reproduces the old behaviour, where every agent built its own closures
+and compiled its own StateGraph; "shared graph" is the current LangGraphBrowserAgent, which
+reuses one compiled graph and receives the agent through the run config.
+
+    python benchmarks/bench_graph_construction.py --agents 1000
+"""
+import gc
+import time
+import argparse
+import tracemalloc
+from unittest.mock import Mock
+
+from langgraph_browser_agent import LangGraphBrowserAgent
+from langgraph_browser_agent.graph import build_browser_agent_workflow, get_browser_agent_graph
+
+
+# One stand-in browser-use Agent for every wrapper, so Mock bookkeeping stays out of the timings
+ORIGINAL_AGENT = Mock()
+
+
+def per_instance_compile():
+    agent = LangGraphBrowserAgent(ORIGINAL_AGENT)
+    agent.graph = build_browser_agent_workflow().compile()
+    return agent
+
+
+def shared_graph():
+    return LangGraphBrowserAgent(ORIGINAL_AGENT)
+
+
+def measure(factory, count):
+    gc.collect()
+    start = time.perf_counter()
+    for _ in range(count):
+        factory()
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    agents = [factory() for _ in range(min(count, 200))]
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / count, retained / len(agents)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--agents', type=int, default=500)
+    args = parser.parse_args()
+
+    # Pay the one-off compile before timing
+    get_browser_agent_graph()
+
+    for name, factory in (('per-instance compile', per_instance_compile), ('shared graph', shared_graph)):
+        per_agent, retained = measure(factory, args.agents)
+        print(f'{name:>22}: {per_agent * 1e6:10.1f} us/agent  {retained / 1024:8.1f} KiB retained/agent')
+
+
+if __name__ == '__main__':
+    main()
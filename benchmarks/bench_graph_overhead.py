@@ -0,0 +1,225 @@
+"""
+Latency the LangGraph layer adds on top of the browser-use calls it drives.
+
+Every scenario runs a create_standalone_graph()-style mock agent (AsyncMock _prepare_context,
+_get_next_action, ...) for N steps, so all measured time is graph, routing and node bookkeeping.
+The "baseline" mode calls the same mocked methods from a plain asyncio loop, like Agent.run.
+
+per_node_us times the graph's own nodes, so in fast mode it reports the fused gate/step nodes.
+Each scenario runs in a fresh process so peak RSS is per scenario. Results are written as JSON;
+pass --compare with an earlier file to flag regressions.
+
+    python benchmarks/bench_graph_overhead.py --steps 10 100 1000 --output bench_output.json
+    python benchmarks/bench_graph_overhead.py --compare bench_output.json
+"""
+import gc
+import io
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import resource
+import tracemalloc
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+MODES = ('baseline', 'verbose', 'fast')
+
+
+def _initial_state():
+    return {'task': 'benchmark', 'browser_state_summary': None, 'last_model_output': None, 'last_result': None}
+
+
+async def _baseline_loop(mock_agent, steps):
+    agent = mock_agent.original_agent
+    for _ in range(steps):
+        browser_state_summary = await agent._prepare_context(None)
+        await agent._get_next_action(browser_state_summary)
+        await agent._execute_actions()
+        await agent._post_process()
+        await agent._finalize(browser_state_summary)
+        if agent.history.is_done():
+            break
+
+
+def _timed_graph(mode, node_times):
+    """Compile a private copy of the graph whose node functions record their wall time"""
+    from langgraph_browser_agent import graph as graph_module
+
+    patched = {}
+    for name in dir(graph_module):
+        fn = getattr(graph_module, name)
+        if name.endswith('_node') and asyncio.iscoroutinefunction(fn):
+            patched[name] = fn
+            setattr(graph_module, name, _timed(name[:-len('_node')], fn, node_times))
+        elif name.endswith('_node') and callable(fn):
+            patched[name] = fn
+            setattr(graph_module, name, _timed_sync(name[:-len('_node')], fn, node_times))
+    try:
+        build = graph_module.build_fast_browser_agent_workflow if mode == 'fast' else graph_module.build_browser_agent_workflow
+        return build().compile()
+    finally:
+        for name, fn in patched.items():
+            setattr(graph_module, name, fn)
+
+
+def _timed(name, fn, node_times):
+    async def wrapper(state, agent_instance):
+        start = time.perf_counter()
+        try:
+            return await fn(state, agent_instance)
+        finally:
+            node_times.setdefault(name, []).append(time.perf_counter() - start)
+    wrapper.__name__ = fn.__name__
+    return wrapper
+
+
+def _timed_sync(name, fn, node_times):
+    def wrapper(state, agent_instance):
+        start = time.perf_counter()
+        try:
+            return fn(state, agent_instance)
+        finally:
+            node_times.setdefault(name, []).append(time.perf_counter() - start)
+    wrapper.__name__ = fn.__name__
+    return wrapper
+
+
+async def _run_once(mode, steps, node_times=None):
+    from langgraph_browser_agent.graph import AGENT_CONFIG_KEY, SUPERSTEPS_PER_STEP, create_mock_agent_instance, get_browser_agent_graph
+
+    mock_agent = create_mock_agent_instance(done_after=steps, max_steps=steps)
+    if mode == 'baseline':
+        await _baseline_loop(mock_agent, steps)
+        return mock_agent
+    graph = _timed_graph(mode, node_times) if node_times is not None else get_browser_agent_graph(mode)
+    config = {
+        'recursion_limit': steps * SUPERSTEPS_PER_STEP[mode] + 10,
+        'configurable': {AGENT_CONFIG_KEY: mock_agent},
+    }
+    await graph.ainvoke(_initial_state(), config)
+    return mock_agent
+
+
+async def _timed_run(mode, steps):
+    start = time.perf_counter()
+    await _run_once(mode, steps)
+    return time.perf_counter() - start
+
+
+def run_scenario(mode, steps, repeats):
+    """Measure one (mode, steps) pair; runs inside a fresh worker process"""
+    # Nodes print progress on every phase; keep the terminal out of the measurement
+    with contextlib.redirect_stdout(io.StringIO()) as sink:
+        asyncio.run(_run_once(mode, min(steps, 5)))  # warm up imports and graph compilation
+
+        walls = []
+        for _ in range(repeats):
+            sink.seek(0)
+            sink.truncate()
+            gc.collect()
+            walls.append(asyncio.run(_timed_run(mode, steps)))
+
+        node_times = {}
+        if mode != 'baseline':
+            asyncio.run(_run_once(mode, steps, node_times))
+
+        sink.seek(0)
+        sink.truncate()
+        gc.collect()
+        gen0_before = gc.get_stats()[0]['collections']
+        tracemalloc.start()
+        asyncio.run(_run_once(mode, steps))
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        gen0_collections = gc.get_stats()[0]['collections'] - gen0_before
+
+    wall = min(walls)
+    return {
+        'mode': mode,
+        'steps': steps,
+        'wall_s': wall,
+        'per_step_us': wall / steps * 1e6,
+        'per_node_us': {name: sum(times) / len(times) * 1e6 for name, times in sorted(node_times.items())},
+        'node_calls_per_step': {name: len(times) / steps for name, times in sorted(node_times.items())},
+        'traced_peak_bytes_per_step': peak / steps,
+        'retained_bytes_per_step': current / steps,
+        'gc_gen0_collections_per_step': gen0_collections / steps,
+        'peak_rss_kib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def _metadata():
+    from importlib.metadata import version, PackageNotFoundError
+
+    def pkg_version(name):
+        try:
+            return version(name)
+        except PackageNotFoundError:
+            return None
+
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'langgraph': pkg_version('langgraph'),
+        'langgraph-browser-agent': pkg_version('langgraph-browser-agent'),
+    }
+
+
+def compare(previous, current, threshold):
+    """Print per-step latency changes against an earlier run; return True if any regressed"""
+    before = {(r['mode'], r['steps']): r for r in previous['results']}
+    regressed = False
+    for result in current['results']:
+        old = before.get((result['mode'], result['steps']))
+        if old is None:
+            continue
+        change = result['per_step_us'] / old['per_step_us'] - 1.0
+        flag = 'REGRESSION' if change > threshold else ''
+        regressed = regressed or bool(flag)
+        print(f"{result['mode']:>8} {result['steps']:>6} steps: {old['per_step_us']:9.1f} -> {result['per_step_us']:9.1f} us/step ({change:+.1%}) {flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--steps', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', default='bench_output.json')
+    parser.add_argument('--compare', help='earlier JSON output to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='relative slowdown reported as a regression')
+    args = parser.parse_args()
+
+    results = []
+    ctx = multiprocessing.get_context('spawn')
+    for steps in args.steps:
+        for mode in args.modes:
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                result = pool.submit(run_scenario, mode, steps, args.repeats).result()
+            results.append(result)
+            print(f"{mode:>8} {steps:>6} steps: {result['per_step_us']:9.1f} us/step  "
+                  f"{result['traced_peak_bytes_per_step'] / 1024:7.1f} KiB peak/step  rss {result['peak_rss_kib'] / 1024:.0f} MiB")
+
+    baseline = {r['steps']: r['per_step_us'] for r in results if r['mode'] == 'baseline'}
+    for result in results:
+        if result['steps'] in baseline:
+            result['overhead_vs_baseline_us'] = result['per_step_us'] - baseline[result['steps']]
+
+    report = {'meta': _metadata(), 'results': results}
+    regressed = False
+    if args.compare:
+        with open(args.compare) as f:
+            regressed = compare(json.load(f), report, args.threshold)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Wrote {args.output}')
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Tail latency of get_next_action LLM calls with and without LLMHedger.
+
+A fake LLM answers after a log-normal delay (median --median-ms) and, with probability
+--stall-rate, stalls for --stall-ms more, like a slow provider replica. Runs --calls
+sequential calls per scenario and prints p50/p95/p99 latency, how often the hedge
+fired and won, extra requests sent, and the hedger's own estimate of the time saved.
+
+    python benchmarks/bench_hedge.py --calls 300 --median-ms 40 --stall-rate 0.03
+"""
+import time
+import random
+import asyncio
+import argparse
+
+from langgraph_browser_agent.hedge import LLMHedger
+from langgraph_browser_agent.metrics import percentile
+
+
+class FakeLLM:
+    model = 'fake'
+
+    def __init__(self, rng, median, sigma, stall_rate, stall):
+        self.rng = rng
+        self.median = median
+        self.sigma = sigma
+        self.stall_rate = stall_rate
+        self.stall = stall
+        self.requests = 0
+
+    async def ainvoke(self, messages, output_format=None, **kwargs):
+        self.requests += 1
+        delay = self.median * self.rng.lognormvariate(0, self.sigma)
+        if self.rng.random() < self.stall_rate:
+            delay += self.stall
+        await asyncio.sleep(delay)
+        return 'completion'
+
+
+async def run(args, hedged):
+    llm = FakeLLM(random.Random(0), args.median_ms / 1e3, args.sigma, args.stall_rate, args.stall_ms / 1e3)
+    hedger = LLMHedger(quantile=args.quantile, initial_delay=args.median_ms * 3 / 1e3, min_samples=20) if hedged else None
+    latencies = []
+    for _ in range(args.calls):
+        start = time.perf_counter()
+        if hedger is None:
+            await llm.ainvoke([])
+        else:
+            await hedger.ainvoke(llm, [])
+        latencies.append(time.perf_counter() - start)
+    return latencies, llm.requests, hedger
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=300)
+    parser.add_argument('--median-ms', type=float, default=40)
+    parser.add_argument('--sigma', type=float, default=0.3)
+    parser.add_argument('--stall-rate', type=float, default=0.03)
+    parser.add_argument('--stall-ms', type=float, default=400)
+    parser.add_argument('--quantile', type=float, default=95)
+    args = parser.parse_args()
+
+    for name, hedged in (('single', False), ('hedged', True)):
+        latencies, requests, hedger = asyncio.run(run(args, hedged))
+        line = (f'{name:>7}: p50 {percentile(latencies, 50) * 1e3:6.1f} ms  p95 {percentile(latencies, 95) * 1e3:6.1f} ms  '
+                f'p99 {percentile(latencies, 99) * 1e3:6.1f} ms  requests {requests / args.calls:.2f}/call')
+        if hedger is not None:
+            stats = hedger.stats
+            line += (f'  hedged {stats.hedge_rate:.1%}, hedge won {stats.hedge_win_rate:.1%}, '
+                     f'estimated saving {stats.time_saved * 1e3:.0f} ms total')
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
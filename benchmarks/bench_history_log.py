@@ -0,0 +1,92 @@
+"""
+Peak RSS of a long run's AgentHistoryList: every item in memory vs a HistoryLog window.
+
+Simulates N finalized steps whose history items carry --kib of extracted page text, checks
+is_done() after every step the way the graph does, then walks the whole history once at the
+end (urls() and final_result(), as the final output and GIF generation do). Each scenario runs
+in a fresh process:
+
+  in-memory  browser-use's plain list; every item stays referenced for the whole run
+  log        a HistoryLog keeping the last --window items; the rest are read back from disk
+             one at a time
+
+    python benchmarks/bench_history_log.py --steps 2000 --kib 32
+"""
+import time
+import random
+import string
+import argparse
+import resource
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from browser_use.agent.views import ActionResult, AgentHistory, AgentHistoryList, AgentOutput
+from browser_use.browser.views import BrowserStateHistory
+from browser_use.tools.registry.views import ActionModel
+
+from langgraph_browser_agent.history_log import HistoryLog, SpilledHistoryList
+
+
+class BenchAction(ActionModel):
+    extract: dict | None = None
+    done: dict | None = None
+
+
+BenchOutput = AgentOutput.type_with_custom_actions(BenchAction)
+
+
+def history_item(step, kib, last):
+    text = ''.join(random.Random(step).choices(string.ascii_letters + ' ', k=kib * 1024))
+    action = BenchAction(done={'text': 'finished'}) if last else BenchAction(extract={'query': f'section {step}'})
+    return AgentHistory(
+        model_output=BenchOutput(next_goal='read the next section', action=[action]),
+        result=[ActionResult(is_done=last, success=True if last else None, extracted_content=text)],
+        state=BrowserStateHistory(url=f'https://example.com/{step}', title=f'Page {step}', tabs=[],
+                                  interacted_element=[None], screenshot_path=None),
+        metadata=None,
+    )
+
+
+def run_scenario(name, steps, kib, window):
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with tempfile.TemporaryDirectory() as root:
+        history = AgentHistoryList(history=[], usage=None)
+        log = None
+        if name == 'log':
+            log = HistoryLog(root, window=window)
+            history = SpilledHistoryList(history=log.open('bench', BenchOutput), usage=None)
+        start = time.perf_counter()
+        for step in range(steps):
+            history.add_item(history_item(step, kib, step == steps - 1))
+            history.is_done()
+        step_time = (time.perf_counter() - start) / steps
+        start = time.perf_counter()
+        urls = history.urls()
+        result = history.final_result()
+        walk_time = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return name, len(urls), result, (peak - before) / 1024, step_time, walk_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--steps', type=int, default=2000)
+    parser.add_argument('--kib', type=int, default=32, help='extracted text per step')
+    parser.add_argument('--window', type=int, default=50)
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')
+    results = []
+    for name in ('in-memory', 'log'):
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            results.append(pool.submit(run_scenario, name, args.steps, args.kib, args.window).result())
+    assert results[0][1:3] == results[1][1:3], 'scenarios saw different histories'
+    for name, _, _, rss_mib, step_time, walk_time in results:
+        print(f'{name:>10}: peak RSS growth {rss_mib:8.1f} MiB   add+is_done {step_time * 1e3:6.2f} ms/step   '
+              f'full walk {walk_time:6.2f} s')
+    print(f'RSS reduction: {results[0][3] / max(results[1][3], 0.1):.0f}x')
+
+
+if __name__ == '__main__':
+    main()
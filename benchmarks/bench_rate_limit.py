@@ -0,0 +1,106 @@
+"""
+Throughput and per-priority latency of many agents sharing one LLM provider, with and without
+an LLMRateLimiter.
+
+A stand-in provider answers after --latency-ms and rejects with a 429 any request past
+--provider-rps in a sliding one-second window. --agents agents (a quarter interactive, the rest
+batch) each make --calls get_next_action requests. Each request is retried on a 429 after an
+exponential backoff with jitter, up to --retries times, like a provider client would. Prints
+wall time, completed and failed calls, total 429s, and p50/p95 call latency per priority,
+queue wait included.
+
+    python benchmarks/bench_rate_limit.py --agents 40 --calls 5 --provider-rps 20
+"""
+import time
+import random
+import asyncio
+import argparse
+from collections import deque
+
+from browser_use.llm.exceptions import ModelRateLimitError
+
+from langgraph_browser_agent.ratelimit import LLMRateLimiter
+from langgraph_browser_agent.metrics import percentile
+
+
+class StandInProvider:
+    model = 'stand-in'
+
+    def __init__(self, requests_per_second, latency):
+        self.requests_per_second = requests_per_second
+        self.latency = latency
+        self.rejected = 0
+        self._recent = deque()
+
+    async def ainvoke(self, messages, output_format=None, **kwargs):
+        now = time.monotonic()
+        while self._recent and now - self._recent[0] > 1.0:
+            self._recent.popleft()
+        if len(self._recent) >= self.requests_per_second:
+            self.rejected += 1
+            raise ModelRateLimitError('Too many requests', model=self.model)
+        self._recent.append(now)
+        await asyncio.sleep(self.latency)
+        return 'completion'
+
+
+async def call(provider, limiter, priority, retries, rng):
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            await limiter.acquire(priority)
+        try:
+            return await provider.ainvoke([])
+        except ModelRateLimitError:
+            if limiter is not None:
+                limiter.rate_limited()
+            if attempt == retries:
+                raise
+            await asyncio.sleep(0.1 * 2 ** attempt * (1 + rng.random()))
+
+
+async def agent(provider, limiter, priority, args, rng, latencies, failures):
+    for _ in range(args.calls):
+        start = time.perf_counter()
+        try:
+            await call(provider, limiter, priority, args.retries, rng)
+            latencies[priority].append(time.perf_counter() - start)
+        except ModelRateLimitError:
+            failures[priority] += 1
+
+
+async def run(args, limited):
+    provider = StandInProvider(args.provider_rps, args.latency_ms / 1e3)
+    # A burst of one plus 90% of the provider's rate stays under it in any one-second window
+    requests_per_minute = args.provider_rps * 60 * 0.9
+    limiter = LLMRateLimiter(requests_per_minute, burst_seconds=60 / requests_per_minute, cooldown=1.0) if limited else None
+    rng = random.Random(0)
+    latencies = {'interactive': [], 'batch': []}
+    failures = {'interactive': 0, 'batch': 0}
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        agent(provider, limiter, 'interactive' if i % 4 == 0 else 'batch', args, rng, latencies, failures)
+        for i in range(args.agents)
+    ))
+    return time.perf_counter() - start, latencies, failures, provider.rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--agents', type=int, default=40)
+    parser.add_argument('--calls', type=int, default=5)
+    parser.add_argument('--provider-rps', type=int, default=20)
+    parser.add_argument('--latency-ms', type=float, default=50)
+    parser.add_argument('--retries', type=int, default=3)
+    args = parser.parse_args()
+
+    for name, limited in (('unlimited', False), ('limited', True)):
+        wall, latencies, failures, rejected = asyncio.run(run(args, limited))
+        completed = sum(len(values) for values in latencies.values())
+        print(f'{name:>9}: {wall:6.2f} s  completed {completed:4d}  failed {sum(failures.values()):4d}  429s {rejected:5d}')
+        for priority, values in latencies.items():
+            print(f'{"":>11}{priority:>11}: p50 {percentile(values, 50):6.2f} s  p95 {percentile(values, 95):6.2f} s  '
+                  f'failed {failures[priority]}')
+
+
+if __name__ == '__main__':
+    main()
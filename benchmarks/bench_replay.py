@@ -0,0 +1,57 @@
+"""
+Graph, history and serialization overhead measured on a recorded trace.
+
+Record a real run with LangGraphBrowserAgent(agent, trace_recorder=TraceRecorder('run.trace.gz')),
+then replay it here offline: no browser, no LLM, same graph topology. Per repeat this reports
+the replay wall time per step and the cost of dumping the resulting AgentHistoryList.
+
+    python benchmarks/bench_replay.py run.trace.gz --mode fast --repeats 20
+    python benchmarks/bench_replay.py run.trace.gz --realtime   # reproduce the recorded timing
+"""
+import io
+import json
+import time
+import asyncio
+import argparse
+import contextlib
+
+from langgraph_browser_agent.trace import ReplayAgent, load_trace
+from langgraph_browser_agent.metrics import percentile
+
+
+async def replay_once(trace, mode, realtime):
+    start = time.perf_counter()
+    history = await ReplayAgent(trace, graph_mode=mode, realtime=realtime).run()
+    replay_s = time.perf_counter() - start
+    start = time.perf_counter()
+    dumped = json.dumps(history.model_dump())
+    return replay_s, time.perf_counter() - start, len(history.history), len(dumped)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('trace')
+    parser.add_argument('--mode', choices=('verbose', 'fast'), default=None, help='defaults to the recorded graph mode')
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--realtime', action='store_true', help='sleep for each recorded phase duration')
+    args = parser.parse_args()
+
+    trace = load_trace(args.trace)
+    replays, dumps = [], []
+    # Nodes print progress on every phase; keep the terminal out of the measurement
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(args.repeats):
+            replay_s, dump_s, steps, size = asyncio.run(replay_once(trace, args.mode, args.realtime))
+            replays.append(replay_s)
+            dumps.append(dump_s)
+
+    events = list(trace.iter_events())
+    recorded = sum(event['duration'] for event in events)
+    print(f"trace: {trace.steps} steps, {len(events)} phases, {recorded:.2f}s recorded phase time")
+    print(f"replay: p50 {percentile(replays, 50) * 1e3:.2f} ms, p95 {percentile(replays, 95) * 1e3:.2f} ms "
+          f"({percentile(replays, 50) / max(steps, 1) * 1e6:.1f} us/step over {steps} history items)")
+    print(f"history dump: p50 {percentile(dumps, 50) * 1e3:.2f} ms for {size / 1024:.1f} KiB of JSON")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Disk use, write/read time and peak RSS of a vision-enabled run's screenshots: browser-use's own
+ScreenshotService vs a ScreenshotStore.
+
+Simulates N steps that each capture a screenshot (incompressible bytes of --kib size, with
+--repeat-every steps showing an unchanged page), stored through each service's
+store_screenshot() as the agent does, then reads every screenshot back once through
+get_screenshot() the way history.screenshots() and GIF generation do. Each scenario runs in a
+fresh process:
+
+  service  browser-use's ScreenshotService: one step_<n>.png file per step in the agent's directory
+  store    a content-addressed ScreenshotStore: unchanged pages share one file
+
+Both keep only file paths in the history, so peak RSS is expected to match; the difference is
+in the bytes written and kept on disk.
+
+    python benchmarks/bench_screenshot_store.py --steps 200 --kib 400
+"""
+import time
+import base64
+import random
+import asyncio
+import argparse
+import resource
+import tempfile
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from browser_use.screenshots.service import ScreenshotService
+
+from langgraph_browser_agent.screenshots import ScreenshotStore
+
+
+def screenshot(step, kib, repeat_every):
+    # An unchanged page produces the same pixels as the previous capture
+    seed = step - step % repeat_every if repeat_every > 1 else step
+    return base64.b64encode(random.Random(seed).randbytes(kib * 1024)).decode()
+
+
+def disk_usage(root):
+    return sum(path.stat().st_size for path in Path(root).rglob('*.png'))
+
+
+async def run(name, root, steps, kib, repeat_every):
+    service = ScreenshotService(root) if name == 'service' else ScreenshotStore(root)
+    start = time.perf_counter()
+    handles = [await service.store_screenshot(screenshot(step, kib, repeat_every), step) for step in range(steps)]
+    write_time = time.perf_counter() - start
+    start = time.perf_counter()
+    checksum = 0
+    for handle in handles:
+        checksum += len(await service.get_screenshot(handle))
+    read_time = time.perf_counter() - start
+    return checksum, write_time, read_time
+
+
+def run_scenario(name, steps, kib, repeat_every):
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with tempfile.TemporaryDirectory() as root:
+        checksum, write_time, read_time = asyncio.run(run(name, root, steps, kib, repeat_every))
+        disk = disk_usage(root)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return name, checksum, (peak - before) / 1024, disk / 1024 / 1024, write_time, read_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--steps', type=int, default=200)
+    parser.add_argument('--kib', type=int, default=400, help='raw screenshot size')
+    parser.add_argument('--repeat-every', type=int, default=4, help='every Nth screenshot starts a new page')
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')
+    results = []
+    for name in ('service', 'store'):
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            results.append(pool.submit(run_scenario, name, args.steps, args.kib, args.repeat_every).result())
+    assert results[0][1] == results[1][1], 'scenarios read back different screenshots'
+    for name, _, rss_mib, disk_mib, write_time, read_time in results:
+        print(f'{name:>8}: disk {disk_mib:7.1f} MiB   peak RSS growth {rss_mib:6.1f} MiB   '
+              f'store {write_time * 1e3 / args.steps:6.2f} ms/step   read all {read_time:6.2f} s')
+    print(f'Disk reduction: {results[0][3] / max(results[1][3], 0.01):.1f}x')
+
+
+if __name__ == '__main__':
+    main()
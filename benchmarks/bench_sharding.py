@@ -0,0 +1,69 @@
+"""
+Throughput of ShardedExecutor versus worker process count.
+
+Each task is a LangGraphBrowserAgent stand-in that burns CPU on JSON round trips, roughly the
+shape of DOM serialization and AgentOutput validation, so the numbers show how far throughput
+scales with cores before the parent's result handling becomes the bottleneck. Timings include
+worker startup (each spawned process imports browser-use), so use enough tasks to amortize it.
+
+    python benchmarks/bench_sharding.py --tasks 64 --max-processes 8
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+from unittest.mock import Mock
+
+from langgraph_browser_agent import LangGraphBrowserAgent, ShardedExecutor, TaskSpec
+
+
+class CpuBoundAgent(LangGraphBrowserAgent):
+    def __init__(self, steps):
+        super().__init__(Mock())
+        self.steps = steps
+
+    async def run(self, **kwargs):
+        tree = {'children': [{'tag': 'div', 'text': 'x' * 64, 'index': i} for i in range(2000)]}
+        for _ in range(self.steps):
+            json.loads(json.dumps(tree))
+            await asyncio.sleep(0)
+        history = Mock()
+        history.history = [None] * self.steps
+        history.is_done.return_value = True
+        history.final_result.return_value = None
+        history.model_dump.return_value = {}
+        return history
+
+
+def build_agent(spec):
+    return CpuBoundAgent(spec.agent_kwargs['steps'])
+
+
+async def measure(processes, tasks, steps):
+    specs = [TaskSpec(task=str(i), factory=build_agent, agent_kwargs={'steps': steps}) for i in range(tasks)]
+    executor = ShardedExecutor(processes=processes)
+    start = time.perf_counter()
+    async for _ in executor.run(specs):
+        pass
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=32)
+    parser.add_argument('--steps', type=int, default=300)
+    parser.add_argument('--max-processes', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    baseline = None
+    processes = 1
+    while processes <= args.max_processes:
+        elapsed = asyncio.run(measure(processes, args.tasks, args.steps))
+        baseline = baseline or elapsed
+        print(f'{processes:>3} processes: {args.tasks / elapsed * 60:8.1f} tasks/min  speedup x{baseline / elapsed:.2f}')
+        processes *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -7,13 +7,88 @@ without altering behavior.
 
 from .agent import LangGraphBrowserAgent
 from .state import BrowserAgentState
-from .graph import create_browser_agent_graph, create_standalone_graph
+from .graph import create_browser_agent_graph, create_standalone_graph, get_browser_agent_graph
+from .pool import BrowserSessionPool, PoolStats
+from .batch import BatchRunner, BatchResult, BatchStats, run_many
+from .sharding import ShardedExecutor, ShardResult, TaskSpec
+from .instrumentation import NodeMetrics
+from .cache import DecisionCache, MemoryDecisionCache, SQLiteDecisionCache, CacheStats
+from .trace import TraceRecorder, ReplayAgent, load_trace, replay_trace
+from .checkpoint import StepCheckpointer, SQLiteCheckpointer, Checkpoint, CheckpointStats
+from .codec import Codec, encode_state, decode_state, encode_history, decode_history
+from .screenshots import ScreenshotStore, ScreenshotStoreStats
+from .gif import StreamingGifWriter, GifStats
+from .timeouts import PhaseBudgets, AdaptiveTimeouts, TimeoutDecision
+from .hedge import LLMHedger, HedgeStats
+from .streaming import ActionStreamParser, StreamingStats
+from .compaction import MessageCompactor, CompactionStats
+from .pruning import DOMPruner, PruningStats, PruneReport
+from .teardown import BackgroundTeardown, TeardownStats
+from .startup import StartupReport
+from .steps import StepRecord, StepStreamStats
+from .history_log import HistoryLog, HistoryLogStats, load_history
+from .ratelimit import LLMRateLimiter, RateLimitStats, QueueWaitStats
 
 __all__ = [
     "LangGraphBrowserAgent",
     "BrowserAgentState",
     "create_browser_agent_graph",
     "create_standalone_graph",
+    "get_browser_agent_graph",
+    "BrowserSessionPool",
+    "PoolStats",
+    "BatchRunner",
+    "BatchResult",
+    "BatchStats",
+    "run_many",
+    "ShardedExecutor",
+    "ShardResult",
+    "TaskSpec",
+    "NodeMetrics",
+    "DecisionCache",
+    "MemoryDecisionCache",
+    "SQLiteDecisionCache",
+    "CacheStats",
+    "TraceRecorder",
+    "ReplayAgent",
+    "load_trace",
+    "replay_trace",
+    "StepCheckpointer",
+    "SQLiteCheckpointer",
+    "Checkpoint",
+    "CheckpointStats",
+    "Codec",
+    "encode_state",
+    "decode_state",
+    "encode_history",
+    "decode_history",
+    "ScreenshotStore",
+    "ScreenshotStoreStats",
+    "StreamingGifWriter",
+    "GifStats",
+    "PhaseBudgets",
+    "AdaptiveTimeouts",
+    "TimeoutDecision",
+    "LLMHedger",
+    "HedgeStats",
+    "ActionStreamParser",
+    "StreamingStats",
+    "MessageCompactor",
+    "CompactionStats",
+    "DOMPruner",
+    "PruningStats",
+    "PruneReport",
+    "BackgroundTeardown",
+    "TeardownStats",
+    "StartupReport",
+    "StepRecord",
+    "StepStreamStats",
+    "HistoryLog",
+    "HistoryLogStats",
+    "load_history",
+    "LLMRateLimiter",
+    "RateLimitStats",
+    "QueueWaitStats",
 ]
 
 
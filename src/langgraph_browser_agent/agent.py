@@ -1,17 +1,53 @@
 import time
 import asyncio
 from pathlib import Path
+from typing import AsyncIterator
 
 from browser_use.agent.views import ActionResult, AgentHistoryList, AgentHistory, BrowserStateHistory
+from browser_use.browser.events import _get_timeout
 
 from .state import BrowserAgentState
-from .graph import create_browser_agent_graph
+from .graph import get_browser_agent_graph, AGENT_CONFIG_KEY, SUPERSTEPS_PER_STEP
+from .pipeline import discard_prefetch
+from .cache import CACHE_MODES
+from .checkpoint import restore_checkpoint
+from .gif import StreamingGifWriter
+from .timeouts import PhaseBudgets, AdaptiveTimeouts
+from .hedge import LLMHedger
+from .streaming import StreamingStats, discard_dispatch
+from .compaction import MessageCompactor, CompactionStats
+from .pruning import DOMPruner, PruningStats
+from .teardown import BackgroundTeardown
+from .startup import start_run, mark_first_step
+from .steps import StepRecord, run_graph, stream_steps
+from .history_log import HistoryLog, close_history, spill_history
+from .ratelimit import LLMRateLimiter
 
 
 class LangGraphBrowserAgent:
     """LangGraph version of the browser-use Agent"""
 
-    def __init__(self, original_agent):
+    def __init__(
+        self,
+        original_agent,
+        session_pool=None,
+        graph_mode: str = "verbose",
+        metrics=None,
+        pipelined: bool = False,
+        decision_cache=None,
+        trace_recorder=None,
+        checkpointer=None,
+        screenshot_store=None,
+        adaptive_timeouts: AdaptiveTimeouts | None = None,
+        hedger: LLMHedger | None = None,
+        streaming_llm=None,
+        compactor: MessageCompactor | None = None,
+        pruner: DOMPruner | None = None,
+        teardown: BackgroundTeardown | None = None,
+        history_log: HistoryLog | None = None,
+        rate_limiter: LLMRateLimiter | None = None,
+        priority: str | None = None,
+    ):
         self.original_agent = original_agent
         self.browser_session = original_agent.browser_session
         self.tools = original_agent.tools
@@ -27,10 +63,99 @@ class LangGraphBrowserAgent:
         self.last_error = None
         self.ended_due_to_break = False
         self.step_timed_out = False
+        # Per-phase caps inside step_timeout; phases are cancelled when they run out
+        self.phase_budgets = None
+        # Optional AdaptiveTimeouts replacing both, per step, with values learned per domain and model
+        self.adaptive_timeouts = adaptive_timeouts
+        self._configured_timeouts = (30, None)
+        self._timeout_key = ('', '')
 
         self.signal_handler = None
 
-        self.graph = create_browser_agent_graph(self)
+        # Optional BrowserSessionPool; when set, run() leases a warm session instead of launching one
+        self.session_pool = session_pool
+        self._leased_session = None
+
+        # Optional NodeMetrics; usually one instance shared by every agent in the process
+        self.metrics = metrics
+
+        # Pipelined mode captures the next step's browser state during finalize/on_step_end
+        self.pipelined = pipelined
+        self._prefetch = None
+
+        # Optional DecisionCache answering get_next_action from earlier runs; may be shared
+        self.decision_cache = decision_cache
+        self.cache_mode = "use"
+
+        # Optional LLMHedger racing a duplicate request against a slow get_next_action LLM call
+        self.hedger = hedger
+
+        # Optional LLMRateLimiter shared by every agent in the process; each get_next_action LLM
+        # request waits for it, queued by this agent's priority class
+        self.rate_limiter = rate_limiter
+        self.priority = priority
+        if rate_limiter is not None:
+            self.priority = priority or rate_limiter.default_priority
+            rate_limiter.rank(self.priority)
+
+        # Optional streaming source (astream(messages, output_format) yielding JSON text); actions are
+        # dispatched to the browser as soon as each one is complete, while the model is still generating
+        self.streaming_llm = streaming_llm
+        self.streaming_stats = StreamingStats() if streaming_llm is not None else None
+        self._dispatch = None
+
+        # Optional MessageCompactor summarizing older history between steps once it crosses a token
+        # threshold; it replaces browser-use's own compaction inside _prepare_context
+        self.compactor = compactor
+        self.compaction_stats = None
+        self._compacted_tokens = 0
+        if compactor is not None:
+            original_agent.settings.message_compaction = None
+
+        # Optional DOMPruner shrinking each step's element tree before the messages are built from it
+        self.pruner = pruner
+        self.pruning_stats = None
+
+        # Optional BackgroundTeardown; run() then returns as soon as the graph ends and the
+        # end-of-run logging, event bus shutdown and browser close continue in the background
+        self.teardown = teardown
+        self._teardown_task = None
+
+        # Startup phase durations and time-to-first-step of the latest run
+        self.startup_report = None
+
+        # Set by astream_steps(): the bounded buffer finalized steps are streamed into, and its counters
+        self._step_sink = None
+        self.step_stream_stats = None
+
+        # Optional TraceRecorder capturing each phase's outcome for offline replay_trace()
+        self.trace_recorder = trace_recorder
+
+        # Optional StepCheckpointer; saves after every finalized step so run(thread_id=...) can resume
+        self.checkpointer = checkpointer
+        self.thread_id = None
+        self._checkpointed_items = 0
+
+        # Optional ScreenshotStore replacing browser-use's per-agent screenshot directory;
+        # history then holds content-addressed handles that are deduplicated across steps and agents.
+        # Each run stores through its own lease, which keeps the run's screenshots from being
+        # pruned until its teardown is over
+        self.screenshot_store = screenshot_store
+        self._screenshot_lease = None
+        if screenshot_store is not None:
+            original_agent.screenshot_service = screenshot_store
+
+        # Optional HistoryLog; the history then keeps only its latest items in memory and
+        # appends every item to a per-run file on disk as it is added
+        self.history_log = history_log
+
+        # Created per run when settings.generate_gif is set; frames are encoded as steps finalize
+        self.gif_writer = None
+
+        # Compiled once per process and shared; this agent is passed in through the run config.
+        # graph_mode="fast" runs the fused topology with ~2 supersteps per agent step.
+        self.graph_mode = graph_mode
+        self.graph = get_browser_agent_graph(graph_mode)
 
     async def run(
         self,
@@ -38,9 +163,39 @@ class LangGraphBrowserAgent:
         step_timeout: int = 30,
         on_step_start=None,
         on_step_end=None,
+        cache_mode: str = "use",
+        thread_id: str | None = None,
+        resume: bool = True,
+        phase_budgets: PhaseBudgets | None = None,
     ) -> AgentHistoryList:
+        run_start = time.perf_counter()
+        if cache_mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode {cache_mode!r}, expected one of {CACHE_MODES}")
+        if self._teardown_task is not None:
+            # The previous run's teardown still owns this agent's session, event bus and GIF writer
+            await asyncio.gather(self._teardown_task, return_exceptions=True)
+            self._teardown_task = None
+        self.cache_mode = cache_mode
+        if self.screenshot_store is not None:
+            self._screenshot_lease = self.original_agent.screenshot_service = self.screenshot_store.lease()
+
+        checkpoint = None
+        if self.checkpointer is not None:
+            self.thread_id = thread_id or self.original_agent.task_id
+            self._checkpointed_items = 0
+            if resume:
+                checkpoint = self.checkpointer.load(self.thread_id)
 
         self.original_agent.settings.step_timeout = step_timeout
+        self.phase_budgets = phase_budgets
+        self._configured_timeouts = (step_timeout, phase_budgets)
+
+        self.gif_writer = None
+        if self.original_agent.settings.generate_gif:
+            output_path: str = 'agent_history.gif'
+            if isinstance(self.original_agent.settings.generate_gif, str):
+                output_path = self.original_agent.settings.generate_gif
+            self.gif_writer = StreamingGifWriter(output_path, task=self.original_agent.task, metrics=self.metrics)
     
         loop = asyncio.get_event_loop()
         agent_run_error: str | None = None
@@ -65,31 +220,8 @@ class LangGraphBrowserAgent:
         self.signal_handler.register()
 
         try:
-            await self.original_agent._log_agent_run()
-
-            self.original_agent.logger.debug(
-                f'🔧 Agent setup: Agent Session ID {self.original_agent.session_id[-4:]}, Task ID {self.original_agent.task_id[-4:]}, Browser Session ID {self.original_agent.browser_session.id[-4:] if self.original_agent.browser_session else "None"} {"(connecting via CDP)" if (self.original_agent.browser_session and self.original_agent.browser_session.cdp_url) else "(launching local browser)"}'
-            )
-
-            self.original_agent._session_start_time = time.time()
-            self.original_agent._task_start_time = self.original_agent._session_start_time
-
-            if not self.original_agent.state.session_initialized:
-                if self.original_agent.enable_cloud_sync:
-                    self.original_agent.logger.debug('📡 Dispatching CreateAgentSessionEvent...')
-                    from browser_use.agent.cloud_events import CreateAgentSessionEvent
-                    self.original_agent.eventbus.dispatch(CreateAgentSessionEvent.from_agent(self.original_agent))
-                    await asyncio.sleep(0.2)
-                self.original_agent.state.session_initialized = True
-
-            if self.original_agent.enable_cloud_sync:
-                self.original_agent.logger.debug('📡 Dispatching CreateAgentTaskEvent...')
-                from browser_use.agent.cloud_events import CreateAgentTaskEvent
-                self.original_agent.eventbus.dispatch(CreateAgentTaskEvent.from_agent(self.original_agent))
-
-            await self.original_agent.browser_session.start()
-            await self.original_agent._execute_initial_actions()
-            self.original_agent._log_first_step_startup()
+            # A resumed run already has its initial actions in the restored history
+            self.startup_report = await start_run(self, run_initial_actions=checkpoint is None)
             self.original_agent.logger.debug(f'🔄 Starting main execution loop with max {max_steps} steps...')
 
             # Initialize agent attributes for this run
@@ -99,17 +231,37 @@ class LangGraphBrowserAgent:
             self.last_error = None
             self.ended_due_to_break = False
             self.step_timed_out = False
+            if self.compactor is not None:
+                self.compaction_stats = CompactionStats()
+                self._compacted_tokens = 0
+            if self.pruner is not None:
+                self.pruning_stats = PruningStats()
+            if checkpoint is not None:
+                restore_checkpoint(self, checkpoint)
+                if self._screenshot_lease is not None:
+                    self._screenshot_lease.pin(item.state.screenshot_path for item in self.original_agent.history.history if item.state)
+            spill_history(self)
 
             initial_state: BrowserAgentState = {
                 'task': self.original_agent.task,
                 'browser_state_summary': None,
-                'last_model_output': None,
-                'last_result': None
+                'last_model_output': self.original_agent.state.last_model_output if checkpoint is not None else None,
+                'last_result': self.original_agent.state.last_result if checkpoint is not None else None,
             }
 
-            # Create config for graph execution
-            config = {"recursion_limit": max_steps * 15}
-            final_state = await self.graph.ainvoke(initial_state, config)
+            # Create config for graph execution; a resumed run only gets the steps it has left
+            config = {
+                "recursion_limit": max(max_steps - self.current_step, 1) * SUPERSTEPS_PER_STEP[self.graph_mode],
+                "configurable": {AGENT_CONFIG_KEY: self},
+            }
+            if self.trace_recorder is not None:
+                self.trace_recorder.start(self, max_steps)
+            if checkpoint is not None and self.original_agent.history.is_done():
+                self.original_agent.logger.info(f'💾 {self.thread_id!r} already finished, returning its history')
+                self.ended_due_to_break = True
+            else:
+                mark_first_step(self, self.startup_report, run_start)
+                await run_graph(self, initial_state, config)
 
             if self.ended_due_to_break:
                 pass
@@ -152,41 +304,111 @@ class LangGraphBrowserAgent:
             raise e
 
         finally:
-            await self.original_agent.token_cost_service.log_usage_summary()
+            discard_prefetch(self)
+            discard_dispatch(self)
+            if self.trace_recorder is not None:
+                self.trace_recorder.close()
+            await close_history(self)
             self.signal_handler.unregister()
-            if not self.original_agent._force_exit_telemetry_logged:
-                try:
-                    self.original_agent._log_agent_event(max_steps=max_steps, agent_run_error=agent_run_error)
-                except Exception as log_e:
-                    self.original_agent.logger.error(f'Failed to log telemetry event: {log_e}', exc_info=True)
+            if self.teardown is not None:
+                # The history is final; the rest only releases resources and reports the run
+                self._teardown_task = self.teardown.submit(
+                    self._teardown(max_steps, agent_run_error), name=f'Teardown of task {self.original_agent.task_id}'
+                )
             else:
-                self.original_agent.logger.debug('Telemetry for force exit (SIGINT) was logged by custom exit callback.')
-
-            if self.original_agent.enable_cloud_sync:
-                from browser_use.agent.cloud_events import UpdateAgentTaskEvent
-                self.original_agent.eventbus.dispatch(UpdateAgentTaskEvent.from_agent(self.original_agent))
-
-            if self.original_agent.settings.generate_gif:
-                output_path: str = 'agent_history.gif'
-                if isinstance(self.original_agent.settings.generate_gif, str):
-                    output_path = self.original_agent.settings.generate_gif
-                from browser_use.agent.gif import create_history_gif
-                create_history_gif(task=self.original_agent.task, history=self.original_agent.history, output_path=output_path)
-                if Path(output_path).exists():
-                    from browser_use.agent.cloud_events import CreateAgentOutputFileEvent
-                    output_event = await CreateAgentOutputFileEvent.from_agent_and_file(self.original_agent, output_path)
-                    self.original_agent.eventbus.dispatch(output_event)
-
-            if self.original_agent.enable_cloud_sync and hasattr(self.original_agent, 'cloud_sync') and self.original_agent.cloud_sync is not None:
-                if self.original_agent.cloud_sync.auth_task and not self.original_agent.cloud_sync.auth_task.done():
-                    try:
-                        await asyncio.wait_for(self.original_agent.cloud_sync.auth_task, timeout=1.0)
-                    except TimeoutError:
-                        self.original_agent.logger.debug('Cloud authentication started - continuing in background')
-                    except Exception as e:
-                        self.original_agent.logger.debug(f'Cloud authentication error: {e}')
-
-            await self.original_agent.eventbus.stop(timeout=3.0)
+                await self._teardown(max_steps, agent_run_error)
+
+    async def astream_steps(self, buffer: int = 8, **run_kwargs) -> AsyncIterator[StepRecord]:
+        """Run the agent, yielding a StepRecord as each step is finalized.
+
+        Takes run()'s keyword arguments. At most `buffer` records are held for a slow consumer;
+        past that the graph waits for it. The history is on original_agent.history afterwards;
+        breaking out of the loop early cancels the run.
+        """
+        if buffer < 1:
+            raise ValueError('astream_steps buffer must be at least 1')
+        async for record in stream_steps(self, self.run(**run_kwargs), buffer):
+            yield record
+
+    async def _teardown(self, max_steps: int, agent_run_error: str | None) -> None:
+        """End-of-run work that does not change the returned history"""
+        try:
+            await self._end_run(max_steps, agent_run_error)
+        finally:
+            # The GIF writer was the last reader of this run's screenshots
+            if self._screenshot_lease is not None:
+                self._screenshot_lease.release()
+                self._screenshot_lease = None
+
+    async def _end_run(self, max_steps: int, agent_run_error: str | None) -> None:
+        if self.adaptive_timeouts is not None and self.adaptive_timeouts.path is not None:
+            try:
+                await asyncio.to_thread(self.adaptive_timeouts.save)
+            except Exception as e:
+                self.original_agent.logger.error(f'⏱️ Failed to save adaptive timeouts to {self.adaptive_timeouts.path}: {e}')
+        await self.original_agent.token_cost_service.log_usage_summary()
+        if not self.original_agent._force_exit_telemetry_logged:
+            try:
+                self.original_agent._log_agent_event(max_steps=max_steps, agent_run_error=agent_run_error)
+            except Exception as log_e:
+                self.original_agent.logger.error(f'Failed to log telemetry event: {log_e}', exc_info=True)
+        else:
+            self.original_agent.logger.debug('Telemetry for force exit (SIGINT) was logged by custom exit callback.')
+
+        if self.original_agent.enable_cloud_sync:
+            from browser_use.agent.cloud_events import UpdateAgentTaskEvent
+            self.original_agent.eventbus.dispatch(UpdateAgentTaskEvent.from_agent(self.original_agent))
+
+        if self.gif_writer is not None:
+            # Frames were encoded off-loop as steps finalized; this only flushes the tail
+            output_path = self.gif_writer.output_path
+            await self.gif_writer.finish(self.original_agent.history)
+            if Path(output_path).exists():
+                from browser_use.agent.cloud_events import CreateAgentOutputFileEvent
+                output_event = await CreateAgentOutputFileEvent.from_agent_and_file(self.original_agent, output_path)
+                self.original_agent.eventbus.dispatch(output_event)
+
+        if self.original_agent.enable_cloud_sync and hasattr(self.original_agent, 'cloud_sync') and self.original_agent.cloud_sync is not None:
+            if self.original_agent.cloud_sync.auth_task and not self.original_agent.cloud_sync.auth_task.done():
+                try:
+                    await asyncio.wait_for(self.original_agent.cloud_sync.auth_task, timeout=1.0)
+                except TimeoutError:
+                    self.original_agent.logger.debug('Cloud authentication started - continuing in background')
+                except Exception as e:
+                    self.original_agent.logger.debug(f'Cloud authentication error: {e}')
+
+        await self.original_agent.eventbus.stop(timeout=3.0)
+        if self._leased_session is not None:
+            await self._return_browser_session()
+        else:
             await self.original_agent.close()
 
+    async def _lease_browser_session(self):
+        """Swap the agent's own (unstarted) browser session for a warm one from the pool"""
+        session = await self.session_pool.acquire()
+        previous = self.original_agent.browser_session
+        if previous is not None and hasattr(previous, 'llm_screenshot_size'):
+            session.llm_screenshot_size = previous.llm_screenshot_size
+        self._leased_session = session
+        self.original_agent.browser_session = session
+        self.browser_session = session
+
+    async def _return_browser_session(self):
+        """Hand the leased session back to the pool instead of closing it, as Agent.close() leaves a keep_alive session"""
+        session, self._leased_session = self._leased_session, None
+        try:
+            # Keeps the handlers (the pool's among them); the next dispatch starts a fresh queue
+            await session.event_bus.stop(clear=False, timeout=_get_timeout('TIMEOUT_BrowserSessionEventBusStopOnAgentClose', 1.0))
+            session.event_bus.event_queue = None
+            session.event_bus._on_idle = None
+        except Exception as e:
+            self.original_agent.logger.debug(f'Error stopping browser session event bus: {e}')
+        skill_service = getattr(self.original_agent, 'skill_service', None)
+        if skill_service is not None:
+            try:
+                await skill_service.close()
+            except Exception as e:
+                self.original_agent.logger.debug(f'Error closing skill service: {e}')
+        await self.session_pool.release(session)
+
 
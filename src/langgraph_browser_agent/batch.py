@@ -0,0 +1,167 @@
+import time
+import asyncio
+import inspect
+import logging
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Iterable, Optional
+
+from browser_use.agent.views import AgentHistoryList
+
+from .agent import LangGraphBrowserAgent
+from .metrics import percentile
+
+
+logger = logging.getLogger(__name__)
+
+_WORKER_DONE = object()
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one task in a batch; exactly one of `history` / `error` is set"""
+    index: int
+    history: Optional[AgentHistoryList] = None
+    error: Optional[BaseException] = None
+    duration: float = 0.0
+    steps: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class BatchStats:
+    """Aggregate throughput of a batch"""
+    completed: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    latencies: list = field(default_factory=list)
+    step_counts: list = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return self.completed + self.failed
+
+    @property
+    def tasks_per_minute(self) -> float:
+        return self.total / self.elapsed * 60.0 if self.elapsed > 0 else 0.0
+
+    @property
+    def p50_latency(self) -> float:
+        return percentile(self.latencies, 50)
+
+    @property
+    def p95_latency(self) -> float:
+        return percentile(self.latencies, 95)
+
+    @property
+    def total_steps(self) -> int:
+        return sum(self.step_counts)
+
+    @property
+    def avg_steps(self) -> float:
+        return self.total_steps / len(self.step_counts) if self.step_counts else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            'completed': self.completed,
+            'failed': self.failed,
+            'elapsed': self.elapsed,
+            'tasks_per_minute': self.tasks_per_minute,
+            'p50_latency': self.p50_latency,
+            'p95_latency': self.p95_latency,
+            'total_steps': self.total_steps,
+            'avg_steps': self.avg_steps,
+        }
+
+
+class BatchRunner:
+    """Drives many LangGraphBrowserAgent runs on one event loop with bounded concurrency.
+
+    A task is a browser-use Agent, a LangGraphBrowserAgent, or a zero-argument (sync or async)
+    factory returning either; factories are only called once a concurrency slot is free, so
+    large batches do not build every agent up front.
+    """
+
+    def __init__(self, concurrency: int = 4, session_pool=None, **run_kwargs: Any):
+        if concurrency < 1:
+            raise ValueError('BatchRunner concurrency must be at least 1')
+        self.concurrency = concurrency
+        self.session_pool = session_pool
+        self.run_kwargs = run_kwargs
+        self.stats = BatchStats()
+
+    async def run(self, tasks: Iterable) -> AsyncIterator[BatchResult]:
+        """Yield a BatchResult for every task as soon as that task finishes"""
+        self.stats = BatchStats()
+        batch_start = time.perf_counter()
+        pending = iter(enumerate(tasks))
+        # Bounded, so a slow consumer holds the workers back instead of results piling up in memory
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+        stopping = False
+
+        # `concurrency` workers pull from the shared iterator, which bounds the number of live runs
+        async def worker():
+            try:
+                for index, task in pending:
+                    await results.put(await self._run_one(index, task))
+            finally:
+                if not stopping:
+                    await results.put(_WORKER_DONE)
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        remaining = len(workers)
+        try:
+            while remaining:
+                result = await results.get()
+                if result is _WORKER_DONE:
+                    remaining -= 1
+                    continue
+                self.stats.elapsed = time.perf_counter() - batch_start
+                yield result
+        finally:
+            # Reached early when the consumer stops iterating; abandon in-flight runs
+            stopping = True
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.stats.elapsed = time.perf_counter() - batch_start
+
+    async def _run_one(self, index: int, task) -> BatchResult:
+        start = time.perf_counter()
+        result = BatchResult(index=index)
+        try:
+            agent = await self._resolve_agent(task)
+            result.history = await agent.run(**self.run_kwargs)
+            result.steps = len(result.history.history)
+        except Exception as e:
+            logger.error(f'Batch task {index} failed: {e}')
+            result.error = e
+        result.duration = time.perf_counter() - start
+
+        if result.ok:
+            self.stats.completed += 1
+            self.stats.step_counts.append(result.steps)
+        else:
+            self.stats.failed += 1
+        self.stats.latencies.append(result.duration)
+        return result
+
+    async def _resolve_agent(self, task) -> LangGraphBrowserAgent:
+        if isinstance(task, LangGraphBrowserAgent):
+            return task
+        if callable(task):
+            task = task()
+            if inspect.isawaitable(task):
+                task = await task
+            if isinstance(task, LangGraphBrowserAgent):
+                return task
+        return LangGraphBrowserAgent(task, session_pool=self.session_pool)
+
+
+async def run_many(tasks: Iterable, concurrency: int = 4, session_pool=None, **run_kwargs: Any) -> AsyncIterator[BatchResult]:
+    """Convenience wrapper: `async for result in run_many(tasks, concurrency=8): ...`"""
+    runner = BatchRunner(concurrency=concurrency, session_pool=session_pool, **run_kwargs)
+    async for result in runner.run(tasks):
+        yield result
@@ -0,0 +1,306 @@
+import re
+import json
+import time
+import sqlite3
+import asyncio
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+
+
+# "use" reads and writes, "refresh" skips lookups but stores fresh decisions, "off" bypasses the cache
+CACHE_MODES = ("use", "refresh", "off")
+
+# Bump when the key derivation changes so stale on-disk entries are never served
+KEY_VERSION = 1
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+@dataclass
+class CacheStats:
+    """Counters describing how a DecisionCache has been used"""
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    expired: int = 0
+    evictions: int = 0
+    errors: int = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data['lookups'] = self.lookups
+        data['hit_rate'] = self.hit_rate
+        return data
+
+
+def _normalize(text) -> str:
+    return _WHITESPACE.sub(' ', text).strip() if isinstance(text, str) else ''
+
+
+def page_fingerprint(browser_state_summary, include_attributes=None) -> dict:
+    """The parts of a BrowserStateSummary the LLM decides on, minus volatile fields (screenshot, events, tab ids)"""
+    dom_state = getattr(browser_state_summary, 'dom_state', None)
+    try:
+        dom = dom_state.llm_representation(include_attributes=include_attributes) if dom_state is not None else ''
+    except Exception:
+        dom = ''
+    tabs = getattr(browser_state_summary, 'tabs', None) or []
+    return {
+        'url': _normalize(getattr(browser_state_summary, 'url', None)),
+        'title': _normalize(getattr(browser_state_summary, 'title', None)),
+        'tabs': [[_normalize(getattr(tab, 'url', None)), _normalize(getattr(tab, 'title', None))] for tab in tabs],
+        'dom': _normalize(dom),
+    }
+
+
+def recent_actions(agent, window: int) -> list:
+    """The actions (and whether they failed) of the last `window` history items"""
+    if window <= 0:
+        return []
+    recent = []
+    for item in agent.history.history[-window:]:
+        model_output = getattr(item, 'model_output', None)
+        actions = [action.model_dump(mode='json', exclude_unset=True) for action in model_output.action] if model_output else []
+        errors = [result.error is not None for result in (item.result or [])]
+        recent.append({'actions': actions, 'errors': errors})
+    return recent
+
+
+class DecisionCache(ABC):
+    """Content-addressed store of AgentOutput decisions, keyed by task, page state and recent actions.
+
+    Subclasses implement clear/_get/_set/_delete over JSON-serializable dicts, and set
+    `blocking` if those do I/O, so alookup/astore run them on a worker thread. Entries older
+    than `ttl` seconds are treated as misses. One instance can be shared by many agents.
+    """
+
+    blocking = False
+
+    def __init__(self, ttl: float | None = None, history_window: int = 3):
+        self.ttl = ttl
+        self.history_window = history_window
+        self.stats = CacheStats()
+
+    def make_key(self, agent, browser_state_summary) -> str:
+        settings = getattr(agent, 'settings', None)
+        action_model = getattr(agent, 'ActionModel', None)
+        payload = {
+            'v': KEY_VERSION,
+            'task': _normalize(agent.task),
+            'model': str(getattr(agent.llm, 'model', '')),
+            'actions': sorted(getattr(action_model, 'model_fields', {}) or {}),
+            'page': page_fingerprint(browser_state_summary, getattr(settings, 'include_attributes', None)),
+            'history': recent_actions(agent, self.history_window),
+        }
+        encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    def lookup(self, key: str) -> dict | None:
+        value, expired = self._count(self._get(key))
+        if expired:
+            self._delete(key)
+        return value
+
+    async def alookup(self, key: str) -> dict | None:
+        """lookup() with a blocking backend's I/O off the event loop"""
+        value, expired = self._count(await self._call(self._get, key))
+        if expired:
+            await self._call(self._delete, key)
+        return value
+
+    def store(self, key: str, value: dict) -> None:
+        self._set(key, value, time.time())
+        self.stats.stores += 1
+
+    async def astore(self, key: str, value: dict) -> None:
+        """store() with a blocking backend's I/O off the event loop"""
+        await self._call(self._set, key, value, time.time())
+        self.stats.stores += 1
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+    @abstractmethod
+    def _get(self, key: str):
+        ...
+
+    @abstractmethod
+    def _set(self, key: str, value: dict, stored_at: float) -> None:
+        ...
+
+    @abstractmethod
+    def _delete(self, key: str) -> None:
+        ...
+
+    def _count(self, entry) -> tuple[dict | None, bool]:
+        """Count a lookup's outcome; returns its value and whether the entry expired"""
+        if entry is None:
+            self.stats.misses += 1
+            return None, False
+        stored_at, value = entry
+        if self.ttl is not None and time.time() - stored_at > self.ttl:
+            self.stats.expired += 1
+            self.stats.misses += 1
+            return None, True
+        self.stats.hits += 1
+        return value, False
+
+    async def _call(self, method, *args):
+        if self.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+
+class MemoryDecisionCache(DecisionCache):
+    """In-process LRU cache; the least recently used entry is evicted past `max_entries`"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float | None = 3600.0, history_window: int = 3):
+        if max_entries < 1:
+            raise ValueError('MemoryDecisionCache max_entries must be at least 1')
+        super().__init__(ttl=ttl, history_window=history_window)
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _set(self, key, value, stored_at):
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _delete(self, key):
+        self._entries.pop(key, None)
+
+
+class SQLiteDecisionCache(DecisionCache):
+    """On-disk cache that survives restarts and can be shared by processes (WAL mode)"""
+
+    blocking = True
+
+    def __init__(self, path: str, ttl: float | None = None, history_window: int = 3):
+        super().__init__(ttl=ttl, history_window=history_window)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS decisions (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)'
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM decisions').fetchone()[0]
+
+    def prune(self) -> int:
+        """Delete expired entries; returns how many were removed"""
+        if self.ttl is None:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM decisions WHERE stored_at < ?', (time.time() - self.ttl,))
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM decisions')
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _get(self, key):
+        with self._lock:
+            row = self._conn.execute('SELECT stored_at, value FROM decisions WHERE key = ?', (key,)).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def _set(self, key, value, stored_at):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO decisions (key, value, stored_at) VALUES (?, ?, ?)',
+                (key, json.dumps(value, separators=(',', ':')), stored_at),
+            )
+
+    def _delete(self, key):
+        with self._lock:
+            self._conn.execute('DELETE FROM decisions WHERE key = ?', (key,))
+
+
+async def get_next_action_with_cache(agent_instance, browser_state_summary):
+    """Run _get_next_action, answering the LLM call from agent_instance.decision_cache when possible.
+
+    Only the model call is replaced: callbacks, conversation saving and the pause/stop checks
+    in _get_next_action run as usual on a hit.
+    """
+    agent = agent_instance.original_agent
+    cache = agent_instance.decision_cache
+    mode = agent_instance.cache_mode
+    if cache is None or mode == 'off' or browser_state_summary is None:
+        return await agent._get_next_action(browser_state_summary)
+
+    try:
+        key = cache.make_key(agent, browser_state_summary)
+    except Exception as e:
+        cache.stats.errors += 1
+        agent.logger.debug(f'Decision cache key failed, calling the LLM: {e}')
+        return await agent._get_next_action(browser_state_summary)
+
+    get_model_output = agent._get_model_output_with_retry
+
+    async def cached_model_output(input_messages):
+        if mode == 'use':
+            cached = await _safe(cache.alookup, key, cache, agent)
+            if cached is not None:
+                try:
+                    model_output = agent.AgentOutput.model_validate(cached)
+                    agent.logger.debug(f'🗃️ Step {agent_instance.current_step}: decision cache hit')
+                    return model_output
+                except Exception as e:
+                    # Schema drifted since the entry was written; fall through to the LLM and overwrite it
+                    cache.stats.errors += 1
+                    agent.logger.debug(f'Cached decision no longer validates: {e}')
+        model_output = await get_model_output(input_messages)
+        await _safe(cache.astore, key, cache, agent, model_output.model_dump(mode='json', exclude_unset=True))
+        return model_output
+
+    agent._get_model_output_with_retry = cached_model_output
+    try:
+        return await agent._get_next_action(browser_state_summary)
+    finally:
+        agent._get_model_output_with_retry = get_model_output
+
+
+async def _safe(method, key, cache, agent, *args):
+    # A broken cache backend must never fail the step
+    try:
+        return await method(key, *args)
+    except Exception as e:
+        cache.stats.errors += 1
+        agent.logger.debug(f'Decision cache {method.__name__} failed: {e}')
+        return None
@@ -0,0 +1,221 @@
+import json
+import time
+import sqlite3
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, asdict
+
+
+
+@dataclass
+class Checkpoint:
+    """Everything needed to continue a run after the last finalized step"""
+    thread_id: str
+    step: int
+    task: str
+    agent_state: dict
+    last_model_output: dict | None
+    history: list = field(default_factory=list)
+    updated_at: float = 0.0
+
+
+@dataclass
+class CheckpointStats:
+    """Counters and timings for checkpoint writes"""
+    writes: int = 0
+    failures: int = 0
+    bytes_written: int = 0
+    history_items_written: int = 0
+    total_serialize_time: float = 0.0
+    total_write_time: float = 0.0
+    max_write_time: float = 0.0
+
+    @property
+    def avg_write_time(self) -> float:
+        """Mean serialize + write latency per checkpoint, in seconds"""
+        return (self.total_serialize_time + self.total_write_time) / self.writes if self.writes else 0.0
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data['avg_write_time'] = self.avg_write_time
+        return data
+
+
+class StepCheckpointer(ABC):
+    """Persists a run at step boundaries so LangGraphBrowserAgent.run(thread_id=...) can resume it.
+
+    Only new history items are written per step, so write cost stays flat as the run grows.
+    Subclasses implement _write/load/delete.
+    """
+
+    def __init__(self):
+        self.stats = CheckpointStats()
+
+    @abstractmethod
+    def load(self, thread_id: str) -> Checkpoint | None:
+        ...
+
+    @abstractmethod
+    def delete(self, thread_id: str) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+    @abstractmethod
+    def _write(self, thread_id: str, step: int, task: str, agent_state: str, last_model_output: str | None,
+               history_start: int, history_items: list[str]) -> None:
+        ...
+
+
+class SQLiteCheckpointer(StepCheckpointer):
+    """Local checkpointer: one row per thread plus one row per history item, in WAL mode"""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        # Committed checkpoints survive a process crash; only an OS crash can lose the latest one
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS checkpoints ('
+            'thread_id TEXT PRIMARY KEY, step INTEGER NOT NULL, task TEXT NOT NULL, agent_state TEXT NOT NULL, '
+            'last_model_output TEXT, history_length INTEGER NOT NULL, updated_at REAL NOT NULL)'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS history_items ('
+            'thread_id TEXT NOT NULL, idx INTEGER NOT NULL, item TEXT NOT NULL, PRIMARY KEY (thread_id, idx))'
+        )
+
+    def load(self, thread_id):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT step, task, agent_state, last_model_output, history_length, updated_at FROM checkpoints WHERE thread_id = ?',
+                (thread_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            items = self._conn.execute(
+                'SELECT item FROM history_items WHERE thread_id = ? AND idx < ? ORDER BY idx',
+                (thread_id, row[4]),
+            ).fetchall()
+        return Checkpoint(
+            thread_id=thread_id,
+            step=row[0],
+            task=row[1],
+            agent_state=json.loads(row[2]),
+            last_model_output=json.loads(row[3]) if row[3] else None,
+            history=[json.loads(item) for (item,) in items],
+            updated_at=row[5],
+        )
+
+    def delete(self, thread_id):
+        with self._lock:
+            self._conn.execute('BEGIN')
+            self._conn.execute('DELETE FROM history_items WHERE thread_id = ?', (thread_id,))
+            self._conn.execute('DELETE FROM checkpoints WHERE thread_id = ?', (thread_id,))
+            self._conn.execute('COMMIT')
+
+    def threads(self) -> list[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute('SELECT thread_id FROM checkpoints ORDER BY updated_at')]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _write(self, thread_id, step, task, agent_state, last_model_output, history_start, history_items):
+        history_length = history_start + len(history_items)
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO history_items (thread_id, idx, item) VALUES (?, ?, ?)',
+                    [(thread_id, history_start + i, item) for i, item in enumerate(history_items)],
+                )
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO checkpoints '
+                    '(thread_id, step, task, agent_state, last_model_output, history_length, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (thread_id, step, task, agent_state, last_model_output, history_length, time.time()),
+                )
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, separators=(',', ':'), default=str)
+
+
+async def save_checkpoint(agent_instance) -> None:
+    """Persist the agent after a finalized step, if it has a StepCheckpointer; never fails the step"""
+    checkpointer = agent_instance.checkpointer
+    if checkpointer is None:
+        return
+    agent = agent_instance.original_agent
+    stats = checkpointer.stats
+    start = time.perf_counter()
+    try:
+        # Serialize on the loop: the agent state keeps changing once the next step starts
+        history = agent.history.history
+        history_start = min(agent_instance._checkpointed_items, len(history))
+        items = [_dumps(item.model_dump()) for item in history[history_start:]]
+        agent_state = _dumps(agent.state.model_dump(mode='json', exclude={'last_model_output'}))
+        last_model_output = agent.state.last_model_output
+        model_output = _dumps(last_model_output.model_dump(mode='json', exclude_unset=True)) if last_model_output else None
+        serialized = time.perf_counter()
+        stats.total_serialize_time += serialized - start
+
+        await asyncio.to_thread(
+            checkpointer._write, agent_instance.thread_id, agent_instance.current_step, agent.task,
+            agent_state, model_output, history_start, items,
+        )
+        write_time = time.perf_counter() - serialized
+    except Exception as e:
+        stats.failures += 1
+        agent.logger.error(f'💾 Checkpoint for step {agent_instance.current_step} failed: {e}')
+        return
+
+    agent_instance._checkpointed_items = history_start + len(items)
+    stats.writes += 1
+    stats.total_write_time += write_time
+    stats.max_write_time = max(stats.max_write_time, time.perf_counter() - start)
+    stats.history_items_written += len(items)
+    stats.bytes_written += len(agent_state) + len(model_output or '') + sum(len(item) for item in items)
+
+    if agent_instance.metrics is not None:
+        agent_instance.metrics.observe('checkpoint', time.perf_counter() - start)
+
+
+def restore_checkpoint(agent_instance, checkpoint: Checkpoint) -> None:
+    """Load a Checkpoint back into a freshly constructed LangGraphBrowserAgent and its browser-use Agent"""
+    from browser_use.agent.views import AgentHistoryList, AgentState
+
+    agent = agent_instance.original_agent
+    if checkpoint.task != agent.task:
+        raise ValueError(
+            f'Checkpoint {checkpoint.thread_id!r} was written for a different task: {checkpoint.task!r}'
+        )
+
+    state = AgentState.model_validate(checkpoint.agent_state)
+    if checkpoint.last_model_output is not None:
+        state.last_model_output = agent.AgentOutput.model_validate(checkpoint.last_model_output)
+    # Resuming means continuing, even if the run was stopped or paused when it was saved
+    state.paused = False
+    state.stopped = False
+    agent.state = state
+    # The message manager keeps its own reference to the state it was built with
+    agent._message_manager.state = state.message_manager_state
+    if state.file_system_state is not None:
+        from browser_use.filesystem.file_system import FileSystem
+        agent.file_system = FileSystem.from_state(state.file_system_state)
+        agent._message_manager.file_system = agent.file_system
+
+    agent.history = AgentHistoryList.load_from_dict({'history': checkpoint.history}, agent.AgentOutput)
+    agent_instance.current_step = checkpoint.step
+    agent_instance._checkpointed_items = len(checkpoint.history)
+    agent.logger.info(f'💾 Resumed {checkpoint.thread_id!r} after step {checkpoint.step}')
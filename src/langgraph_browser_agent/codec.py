@@ -0,0 +1,182 @@
+import base64
+import binascii
+import struct
+import zlib
+from collections import Counter
+
+import ormsgpack
+from browser_use.agent.views import ActionResult, AgentHistoryList
+
+from .trace import dump_browser_state, load_browser_state
+
+
+MAGIC = b'LGBC'
+FORMAT_VERSION = 1
+COMPRESSIONS = (None, 'zstd', 'zlib')
+
+# Ext type codes inside the msgpack body
+_EXT_INTERNED = 1
+_EXT_BASE64 = 2
+
+# Fields whose string values are base64 images, stored as raw bytes instead
+BASE64_FIELDS = frozenset({'screenshot'})
+
+_HEADER = struct.Struct('>4sBBI')  # magic, version, compression, interned table length
+
+
+def _compressor(compression: str | None, level: int):
+    if compression is None:
+        return None, None
+    if compression == 'zlib':
+        return (lambda data: zlib.compress(data, level if level >= 0 else 6)), zlib.decompress
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError('zstd compression requires the zstandard package: pip install zstandard') from e
+        compressor = zstandard.ZstdCompressor(level=level if level >= 0 else 3)
+        decompressor = zstandard.ZstdDecompressor()
+        return compressor.compress, decompressor.decompress
+    raise ValueError(f'Unknown compression {compression!r}, expected one of {COMPRESSIONS}')
+
+
+class Codec:
+    """Compact binary encoding for JSON-like agent data (msgpack, interned strings, raw screenshots).
+
+    Strings of at least `intern_min_length` characters that occur more than once (URLs, titles,
+    repeated DOM text) are written once into a table and referenced by index. Base64 values of
+    BASE64_FIELDS are stored as raw bytes. The whole frame is optionally zstd or zlib compressed.
+    """
+
+    def __init__(self, compression: str | None = None, level: int = -1, intern_min_length: int = 8):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f'Unknown compression {compression!r}, expected one of {COMPRESSIONS}')
+        self.compression = compression
+        self.level = level
+        self.intern_min_length = intern_min_length
+        self._compress, _ = _compressor(compression, level)
+
+    def dumps(self, obj) -> bytes:
+        counts = Counter()
+        self._count(obj, counts)
+        table = [text for text, count in counts.items() if count > 1]
+        index = {text: i for i, text in enumerate(table)}
+        table_blob = ormsgpack.packb(table)
+        body = ormsgpack.packb(self._intern(obj, index, None))
+        payload = table_blob + body
+        if self._compress is not None:
+            payload = self._compress(payload)
+        return _HEADER.pack(MAGIC, FORMAT_VERSION, COMPRESSIONS.index(self.compression), len(table_blob)) + payload
+
+    @staticmethod
+    def loads(data: bytes):
+        """Decode anything written by dumps(), whatever compression it used"""
+        if len(data) < _HEADER.size:
+            raise ValueError('Truncated codec frame')
+        magic, version, compression, table_length = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError('Not a langgraph-browser-agent codec frame')
+        if version != FORMAT_VERSION:
+            raise ValueError(f'Unsupported codec version {version}, expected {FORMAT_VERSION}')
+        if compression >= len(COMPRESSIONS):
+            raise ValueError(f'Unknown compression id {compression}')
+        payload = memoryview(data)[_HEADER.size:]
+        _, decompress = _compressor(COMPRESSIONS[compression], -1)
+        if decompress is not None:
+            payload = memoryview(decompress(payload))
+        table = ormsgpack.unpackb(payload[:table_length])
+
+        def ext_hook(code, value):
+            if code == _EXT_INTERNED:
+                return table[int.from_bytes(value, 'big')]
+            if code == _EXT_BASE64:
+                return base64.b64encode(value).decode('ascii')
+            raise ValueError(f'Unknown codec ext type {code}')
+
+        return ormsgpack.unpackb(payload[table_length:], ext_hook=ext_hook)
+
+    def _count(self, obj, counts: Counter) -> None:
+        min_length = self.intern_min_length
+
+        def walk(value):
+            kind = type(value)
+            if kind is str:
+                if len(value) >= min_length:
+                    counts[value] += 1
+            elif kind is dict:
+                for key, item in value.items():
+                    if type(item) is str:
+                        if len(item) >= min_length and key not in BASE64_FIELDS:
+                            counts[item] += 1
+                    elif type(item) in (dict, list, tuple):
+                        walk(item)
+            elif kind is list or kind is tuple:
+                for item in value:
+                    walk(item)
+
+        walk(obj)
+
+    def _intern(self, obj, index: dict, key):
+        refs = {text: ormsgpack.Ext(_EXT_INTERNED, i.to_bytes(max(1, (i.bit_length() + 7) // 8), 'big')) for text, i in index.items()}
+
+        def walk(value, key):
+            kind = type(value)
+            if kind is str:
+                if key in BASE64_FIELDS:
+                    raw = _raw_base64(value)
+                    if raw is not None:
+                        return ormsgpack.Ext(_EXT_BASE64, raw)
+                return refs.get(value, value)
+            if kind is dict:
+                return {k: walk(v, k) for k, v in value.items()}
+            if kind is list or kind is tuple:
+                return [walk(v, None) for v in value]
+            return value
+
+        return walk(obj, key)
+
+
+def _raw_base64(text: str) -> bytes | None:
+    """Decode canonical base64 only, so that decoding gives back the identical string"""
+    try:
+        raw = base64.b64decode(text, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    return raw if base64.b64encode(raw).decode('ascii') == text else None
+
+
+def encode_state(state, codec: Codec | None = None) -> bytes:
+    """Encode a BrowserAgentState dict; the summary keeps the DOM as the text the LLM was shown"""
+    summary = state.get('browser_state_summary')
+    model_output = state.get('last_model_output')
+    last_result = state.get('last_result')
+    return (codec or Codec()).dumps({
+        'task': state.get('task'),
+        'browser_state_summary': dump_browser_state(summary, include_screenshot=True) if summary is not None else None,
+        'last_model_output': model_output.model_dump(mode='json', exclude_unset=True) if model_output is not None else None,
+        'last_result': [result.model_dump(mode='json', exclude_none=True) for result in last_result] if last_result is not None else None,
+    })
+
+
+def decode_state(data: bytes, output_model):
+    """Decode encode_state() output; `output_model` is the agent's AgentOutput type (agent.AgentOutput)"""
+    obj = Codec.loads(data)
+    summary = obj['browser_state_summary']
+    model_output = obj['last_model_output']
+    last_result = obj['last_result']
+    return {
+        'task': obj['task'],
+        'browser_state_summary': load_browser_state(summary) if summary is not None else None,
+        'last_model_output': output_model.model_validate(model_output) if model_output is not None else None,
+        'last_result': [ActionResult.model_validate(result) for result in last_result] if last_result is not None else None,
+    }
+
+
+def encode_history(history, codec: Codec | None = None) -> bytes:
+    """Encode an AgentHistoryList (the same content as history.model_dump())"""
+    return (codec or Codec()).dumps(history.model_dump())
+
+
+def decode_history(data: bytes, output_model):
+    """Decode encode_history() output into an AgentHistoryList, like AgentHistoryList.load_from_dict"""
+    return AgentHistoryList.load_from_dict(Codec.loads(data), output_model)
@@ -0,0 +1,155 @@
+import time
+from collections import deque
+from dataclasses import dataclass, field, asdict
+
+from browser_use.agent.views import AgentStepInfo, MessageCompactionSettings
+
+from .metrics import percentile
+
+
+@dataclass
+class CompactionStats:
+    """Prompt history size and what compaction saved, for one run"""
+    compactions: int = 0
+    failures: int = 0  # threshold crossed but the summary call failed or returned nothing
+    consecutive_failures: int = 0
+    next_attempt_step: int = 0  # after a failure, no summary is attempted before this step
+    tokens_removed: int = 0  # history tokens replaced by summaries, summed over compactions
+    prompt_tokens_saved: int = 0  # estimated prompt tokens not sent, summed over the steps after each compaction
+    compaction_time: float = 0.0
+    history_tokens: deque = field(default_factory=lambda: deque(maxlen=1000))  # per step, before compaction
+
+    @property
+    def p95_history_tokens(self) -> float:
+        return percentile(self.history_tokens, 95) if self.history_tokens else 0.0
+
+    @property
+    def max_history_tokens(self) -> int:
+        return max(self.history_tokens, default=0)
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data['history_tokens'] = list(self.history_tokens)
+        data['p95_history_tokens'] = self.p95_history_tokens
+        data['max_history_tokens'] = self.max_history_tokens
+        return data
+
+
+class MessageCompactor:
+    """Summarizes older agent history between steps once it crosses a token threshold.
+
+    After every step, the message manager's history items are estimated at `chars_per_token`.
+    Above `trigger_tokens`, the graph's compact_messages node has browser-use's summarizer fold
+    everything but the first item and the last `keep_last` steps into its compacted memory
+    block, using `compaction_llm` (default: the agent's page extraction LLM, then its LLM).
+    `min_steps_between` spaces compactions out. After a failed or empty summary the next attempt
+    waits `retry_after` steps, doubling with each further failure up to `max_retry_after`, so a
+    summarizer that is down is not called again every step. The agent's own in-prepare_context compaction
+    is turned off while a compactor is set, so history is summarized in one place. Holds no
+    per-run state; share one instance across agents.
+    """
+
+    def __init__(
+        self,
+        trigger_tokens: int = 10000,
+        keep_last: int = 6,
+        min_steps_between: int = 1,
+        summary_max_chars: int = 6000,
+        compaction_llm=None,
+        include_read_state: bool = False,
+        chars_per_token: float = 4.0,
+        retry_after: int = 2,
+        max_retry_after: int = 32,
+    ):
+        self.trigger_tokens = trigger_tokens
+        self.keep_last = keep_last
+        self.min_steps_between = min_steps_between
+        self.summary_max_chars = summary_max_chars
+        self.compaction_llm = compaction_llm
+        self.include_read_state = include_read_state
+        self.chars_per_token = chars_per_token
+        self.retry_after = retry_after
+        self.max_retry_after = max_retry_after
+
+    def settings(self) -> MessageCompactionSettings:
+        return MessageCompactionSettings(
+            compact_every_n_steps=self.min_steps_between,
+            trigger_token_count=self.trigger_tokens,
+            chars_per_token=self.chars_per_token,
+            keep_last_items=self.keep_last,
+            summary_max_chars=self.summary_max_chars,
+            include_read_state=self.include_read_state,
+            compaction_llm=self.compaction_llm,
+        )
+
+    def history_tokens(self, message_manager) -> int:
+        """Estimated tokens of the history items, measured the way browser-use's trigger measures them"""
+        text = '\n'.join(item.to_string() for item in message_manager.state.agent_history_items).strip()
+        return int(len(text) / self.chars_per_token)
+
+    def memory_tokens(self, message_manager) -> int:
+        return int(len(message_manager.state.compacted_memory or '') / self.chars_per_token)
+
+    def backoff(self, consecutive_failures: int) -> int:
+        """Steps to wait before retrying after `consecutive_failures` failed summaries in a row"""
+        return min(self.retry_after * 2 ** (consecutive_failures - 1), self.max_retry_after)
+
+
+def observe_history_size(agent_instance) -> None:
+    """Record the prompt history size at the end of a step, and the tokens earlier compactions kept out of it"""
+    compactor = agent_instance.compactor
+    if compactor is None:
+        return
+    message_manager = agent_instance.original_agent._message_manager
+    stats = agent_instance.compaction_stats
+    stats.history_tokens.append(compactor.history_tokens(message_manager) + compactor.memory_tokens(message_manager))
+    stats.prompt_tokens_saved += agent_instance._compacted_tokens
+
+
+def needs_compaction(agent_instance) -> bool:
+    """Whether the history crossed the agent's MessageCompactor threshold, if it has one"""
+    compactor = agent_instance.compactor
+    if compactor is None:
+        return False
+    message_manager = agent_instance.original_agent._message_manager
+    if agent_instance.current_step < agent_instance.compaction_stats.next_attempt_step:
+        return False
+    steps_since = agent_instance.current_step - (message_manager.state.last_compaction_step or 0)
+    return steps_since >= compactor.min_steps_between and compactor.history_tokens(message_manager) >= compactor.trigger_tokens
+
+
+async def compact_messages(agent_instance) -> bool:
+    """Summarize the agent's older history with its MessageCompactor; True if it was compacted"""
+    compactor = agent_instance.compactor
+    if compactor is None:
+        return False
+    agent = agent_instance.original_agent
+    message_manager = agent._message_manager
+    stats = agent_instance.compaction_stats
+    before = compactor.history_tokens(message_manager) + compactor.memory_tokens(message_manager)
+    if compactor.compaction_llm is not None:
+        # Idempotent; makes the summary calls count towards the run's token cost
+        agent.token_cost_service.register_llm(compactor.compaction_llm)
+    llm = compactor.compaction_llm or agent.settings.page_extraction_llm or agent.llm
+    step_info = AgentStepInfo(step_number=agent_instance.current_step, max_steps=agent_instance.max_steps)
+
+    start = time.perf_counter()
+    compacted = await message_manager.maybe_compact_messages(llm=llm, settings=compactor.settings(), step_info=step_info)
+    stats.compaction_time += time.perf_counter() - start
+    if not compacted:
+        stats.failures += 1
+        stats.consecutive_failures += 1
+        stats.next_attempt_step = agent_instance.current_step + compactor.backoff(stats.consecutive_failures)
+        return False
+    stats.consecutive_failures = 0
+
+    after = compactor.history_tokens(message_manager) + compactor.memory_tokens(message_manager)
+    removed = max(before - after, 0)
+    stats.compactions += 1
+    stats.tokens_removed += removed
+    agent_instance._compacted_tokens += removed
+    agent.logger.info(
+        f'🗜️ Compacted message history at step {agent_instance.current_step}: ~{before} -> ~{after} tokens '
+        f'(kept the last {compactor.keep_last} steps)'
+    )
+    return True
@@ -0,0 +1,218 @@
+import io
+import os
+import time
+import base64
+import asyncio
+import logging
+import platform
+from dataclasses import dataclass, asdict
+from concurrent.futures import ThreadPoolExecutor
+
+from .instrumentation import NodeMetrics
+
+
+logger = logging.getLogger(__name__)
+
+# Same preference order as browser_use.agent.gif.create_history_gif
+FONT_OPTIONS = (
+    'PingFang', 'STHeiti Medium', 'Microsoft YaHei', 'SimHei', 'SimSun', 'Noto Sans CJK SC',
+    'WenQuanYi Micro Hei', 'Helvetica', 'Arial', 'DejaVuSans', 'Verdana',
+)
+
+
+@dataclass
+class GifStats:
+    """Frame counts and timings for one StreamingGifWriter"""
+    frames: int = 0
+    skipped: int = 0
+    errors: int = 0
+    encode_time: float = 0.0
+    max_frame_time: float = 0.0
+    loop_time: float = 0.0
+    finish_time: float = 0.0
+
+    @property
+    def avg_frame_time(self) -> float:
+        return self.encode_time / self.frames if self.frames else 0.0
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data['avg_frame_time'] = self.avg_frame_time
+        return data
+
+
+class StreamingGifWriter:
+    """Builds the run's history GIF one step at a time on a worker thread.
+
+    Produces the same frames as browser-use's create_history_gif (task frame, goal and step
+    overlays, placeholder and new-tab screenshots skipped), but each frame is decoded,
+    quantized and LZW-encoded straight into the file as soon as its step is finalized. The
+    event loop only queues history items (loop_time); finish() writes the GIF trailer, so
+    the end of a run no longer blocks the loop while the whole history is encoded.
+    Frames are encoded by a single worker so they stay in step order.
+    """
+
+    def __init__(
+        self,
+        output_path: str = 'agent_history.gif',
+        task: str = '',
+        duration: int = 3000,
+        show_goals: bool = True,
+        show_task: bool = True,
+        font_size: int = 40,
+        title_font_size: int = 56,
+        margin: int = 40,
+        line_spacing: float = 1.5,
+        metrics=None,
+    ):
+        self.output_path = output_path
+        self.task = task
+        self.duration = duration
+        self.show_goals = show_goals
+        self.show_task = show_task
+        self.font_size = font_size
+        self.title_font_size = title_font_size
+        self.margin = margin
+        self.line_spacing = line_spacing
+        self.metrics = metrics
+        self.stats = GifStats()
+
+        self._queued = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='gif-writer')
+        self._partial_path = f'{output_path}.partial'
+        # Worker-thread state
+        self._file = None
+        self._size = None
+        self._fonts = None
+        self._task_frame_done = not (show_task and task)
+
+    def add_history(self, history) -> int:
+        """Queue the history items added since the last call; returns how many were queued"""
+        start = time.perf_counter()
+        items = history.history[self._queued:]
+        for offset, item in enumerate(items):
+            self._executor.submit(self._encode_item, item, self._queued + offset + 1)
+        self._queued += len(items)
+        self.stats.loop_time += time.perf_counter() - start
+        return len(items)
+
+    async def finish(self, history=None) -> bool:
+        """Queue any remaining items, wait for the encoder and write the trailer; True if a GIF was written"""
+        if history is not None:
+            self.add_history(history)
+        start = time.perf_counter()
+        future = self._executor.submit(self._close)
+        self.stats.loop_time += time.perf_counter() - start
+        try:
+            return await asyncio.wrap_future(future)
+        finally:
+            self._executor.shutdown(wait=False)
+
+    # Worker thread
+
+    def _encode_item(self, item, step_number: int) -> None:
+        start = time.perf_counter()
+        try:
+            written = self._write_item(item, step_number)
+        except Exception as e:
+            self.stats.errors += 1
+            logger.error(f'🎞️ Failed to add step {step_number} to {self.output_path}: {e}')
+            return
+        if not written:
+            self.stats.skipped += 1
+            return
+        duration = time.perf_counter() - start
+        self.stats.encode_time += duration
+        self.stats.max_frame_time = max(self.stats.max_frame_time, duration)
+        if isinstance(self.metrics, NodeMetrics):
+            self.metrics.observe('gif_frame', duration)
+
+    def _write_item(self, item, step_number: int) -> bool:
+        from PIL import Image
+        from browser_use.agent.gif import _add_overlay_to_image, _create_task_frame
+        from browser_use.browser.views import PLACEHOLDER_4PX_SCREENSHOT
+        from browser_use.utils import is_new_tab_page
+
+        screenshot_b64 = item.state.get_screenshot() if item.state else None
+        if not screenshot_b64 or screenshot_b64 == PLACEHOLDER_4PX_SCREENSHOT:
+            return False
+        regular_font, title_font = self._load_fonts()
+        if not self._task_frame_done:
+            self._task_frame_done = True
+            self._write_frame(_create_task_frame(self.task, screenshot_b64, title_font, regular_font, None, self.line_spacing))
+        if is_new_tab_page(item.state.url):
+            return False
+
+        image = Image.open(io.BytesIO(base64.b64decode(screenshot_b64)))
+        if self.show_goals and item.model_output:
+            overlay = _add_overlay_to_image(
+                image=image,
+                step_number=step_number,
+                goal_text=item.model_output.current_state.next_goal,
+                regular_font=regular_font,
+                title_font=title_font,
+                margin=self.margin,
+            )
+            image.close()
+            image = overlay
+        try:
+            self._write_frame(image)
+        finally:
+            image.close()
+        self.stats.frames += 1
+        return True
+
+    def _write_frame(self, image) -> None:
+        from PIL import Image, GifImagePlugin
+
+        rgb = image.convert('RGB')
+        if self._size is None:
+            self._size = rgb.size
+        elif rgb.size != self._size:
+            # The logical screen is fixed by the first frame
+            rgb = rgb.resize(self._size)
+        frame = rgb.convert('P', palette=Image.Palette.ADAPTIVE)
+        if self._file is None:
+            self._file = open(self._partial_path, 'wb')
+            header, _ = GifImagePlugin.getheader(frame, info={'loop': 0, 'duration': self.duration})
+            self._file.writelines(header)
+        self._file.writelines(GifImagePlugin.getdata(frame, duration=self.duration, include_color_table=True))
+
+    def _load_fonts(self):
+        if self._fonts is None:
+            from PIL import ImageFont
+            from browser_use.config import CONFIG
+
+            for font_name in FONT_OPTIONS:
+                if platform.system() == 'Windows':
+                    font_name = os.path.join(CONFIG.WIN_FONT_DIR, font_name + '.ttf')
+                try:
+                    self._fonts = (ImageFont.truetype(font_name, self.font_size), ImageFont.truetype(font_name, self.title_font_size))
+                    break
+                except OSError:
+                    continue
+            else:
+                self._fonts = (ImageFont.load_default(), ImageFont.load_default())
+        return self._fonts
+
+    def _close(self) -> bool:
+        start = time.perf_counter()
+        try:
+            if self._file is None:
+                logger.warning('No images found in history to create GIF')
+                return False
+            self._file.write(b';')
+            self._file.close()
+            self._file = None
+            os.replace(self._partial_path, self.output_path)
+            logger.info(f'Created GIF at {self.output_path}')
+            return True
+        finally:
+            self.stats.finish_time = time.perf_counter() - start
+
+
+def queue_gif_frames(agent_instance) -> None:
+    """Hand newly finalized history items to the agent's StreamingGifWriter, if it has one"""
+    writer = agent_instance.gif_writer
+    if writer is not None:
+        writer.add_history(agent_instance.original_agent.history)
@@ -1,7 +1,11 @@
+import inspect
+
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.types import StreamWriter
 
 from .state import BrowserAgentState
+from .steps import set_stream_writer
 from .nodes import (
     check_paused_node,
     check_consecutive_failures_node,
@@ -12,113 +16,93 @@ from .nodes import (
     history_is_done_actions_node,
     on_step_start_node,
     on_step_end_node,
+    compact_messages_node,
     prepare_context_node,
     get_next_action_node,
     execute_actions_node,
     evaluate_result_node,
     finalize_step_node,
     handle_error_node,
+    gate_node,
+    step_node,
 )
 from .routes import (
     route_paused,
     route_consecutive_failures,
     route_stopped,
     route_completion,
+    route_step_end,
     route_on_timeout_or_error,
+    route_gate,
 )
 
 
-def create_browser_agent_graph(agent_instance):
-    """Create LangGraph workflow that mirrors the original Agent's for loop logic"""
-    workflow = StateGraph(BrowserAgentState)
-
-    # Create wrapper functions for all nodes
-    def check_paused_node_with_agent(state: BrowserAgentState) -> BrowserAgentState:
-        return check_paused_node(state, agent_instance)
-
-    def check_consecutive_failures_node_with_agent(state: BrowserAgentState) -> BrowserAgentState:
-        return check_consecutive_failures_node(state, agent_instance)
-
-    def check_stopped_node_with_agent(state: BrowserAgentState) -> BrowserAgentState:
-        return check_stopped_node(state, agent_instance)
-
-    async def paused_state_actions_node_with_agent(state: BrowserAgentState) -> BrowserAgentState:
-        return await paused_state_actions_node(state, agent_instance)
-
-    def consecutive_failure_actions_node_with_agent(state: BrowserAgentState) -> BrowserAgentState:
-        return consecutive_failure_actions_node(state, agent_instance)
+AGENT_CONFIG_KEY = "agent_instance"
 
-    def stopped_state_actions_node_with_agent(state: BrowserAgentState) -> BrowserAgentState:
-        return stopped_state_actions_node(state, agent_instance)
+GRAPH_MODES = ("verbose", "fast")
 
-    async def history_is_done_actions_node_with_agent(state: BrowserAgentState) -> BrowserAgentState:
-        return await history_is_done_actions_node(state, agent_instance)
+# Upper bound on supersteps per agent step, used to derive the recursion limit from max_steps
+SUPERSTEPS_PER_STEP = {"verbose": 15, "fast": 3}
 
-    async def on_step_start_node_with_agent(state: BrowserAgentState) -> BrowserAgentState:
-        return await on_step_start_node(state, agent_instance)
+_compiled_graphs = {}
 
-    # Create wrapper functions for routes
-    def route_paused_with_agent(state: BrowserAgentState) -> str:
-        return route_paused(state, agent_instance)
 
-    def route_stopped_with_agent(state: BrowserAgentState) -> str:
-        return route_stopped(state, agent_instance)
+def agent_from_config(config: RunnableConfig):
+    """Return the LangGraphBrowserAgent a graph invocation was started for"""
+    agent_instance = (config or {}).get("configurable", {}).get(AGENT_CONFIG_KEY)
+    if agent_instance is None:
+        raise ValueError(
+            f"No agent bound to this graph run; pass config={{'configurable': {{'{AGENT_CONFIG_KEY}': agent}}}} "
+            "or use create_browser_agent_graph(agent)"
+        )
+    return agent_instance
 
-    async def on_step_end_node_with_agent(state: BrowserAgentState) -> BrowserAgentState:
-        return await on_step_end_node(state, agent_instance)
 
-    async def prepare_context_node_with_agent(state: BrowserAgentState) -> BrowserAgentState:
-        return await prepare_context_node(state, agent_instance)
+def _bind_agent(fn):
+    """Adapt a `fn(state, agent_instance)` node or route to LangGraph's `(state, config)` signature"""
+    if inspect.iscoroutinefunction(fn):
+        # The injected writer, unlike get_stream_writer(), also works in async nodes before Python 3.11
+        async def bound(state: BrowserAgentState, config: RunnableConfig, writer: StreamWriter):
+            agent_instance = agent_from_config(config)
+            set_stream_writer(agent_instance, writer)
+            return await fn(state, agent_instance)
+    else:
+        def bound(state: BrowserAgentState, config: RunnableConfig):
+            return fn(state, agent_from_config(config))
+    bound.__name__ = fn.__name__
+    bound.__doc__ = fn.__doc__
+    return bound
 
-    async def get_next_action_node_with_agent(state: BrowserAgentState) -> BrowserAgentState:
-        return await get_next_action_node(state, agent_instance)
 
-    async def execute_actions_node_with_agent(state: BrowserAgentState) -> BrowserAgentState:
-        return await execute_actions_node(state, agent_instance)
-
-    async def evaluate_result_node_with_agent(state: BrowserAgentState) -> BrowserAgentState:
-        return await evaluate_result_node(state, agent_instance)
-
-    async def finalize_step_node_with_agent(state: BrowserAgentState) -> BrowserAgentState:
-        return await finalize_step_node(state, agent_instance)
-
-    async def handle_error_node_with_agent(state: BrowserAgentState) -> BrowserAgentState:
-        return await handle_error_node(state, agent_instance)
+def build_browser_agent_workflow() -> StateGraph:
+    """Build the uncompiled workflow that mirrors the original Agent's for loop logic"""
+    workflow = StateGraph(BrowserAgentState)
 
     # Add all nodes to the workflow
-    workflow.add_node("check_paused", check_paused_node_with_agent)
-    workflow.add_node("check_consecutive_failures", check_consecutive_failures_node_with_agent)
-    workflow.add_node("check_stopped", check_stopped_node_with_agent)
-    workflow.add_node("paused_state_actions", paused_state_actions_node_with_agent)
-    workflow.add_node("consecutive_failure_actions", consecutive_failure_actions_node_with_agent)
-    workflow.add_node("stopped_state_actions", stopped_state_actions_node_with_agent)
-    workflow.add_node("history_is_done_actions", history_is_done_actions_node_with_agent)
-    workflow.add_node("on_step_start", on_step_start_node_with_agent)
-    workflow.add_node("on_step_end", on_step_end_node_with_agent)
-    workflow.add_node("prepare_context", prepare_context_node_with_agent)
-    workflow.add_node("get_next_action", get_next_action_node_with_agent)
-    workflow.add_node("execute_actions", execute_actions_node_with_agent)
-    workflow.add_node("evaluate_result", evaluate_result_node_with_agent)
-    workflow.add_node("finalize_step", finalize_step_node_with_agent)
-    workflow.add_node("handle_error", handle_error_node_with_agent)
+    workflow.add_node("check_paused", _bind_agent(check_paused_node))
+    workflow.add_node("check_consecutive_failures", _bind_agent(check_consecutive_failures_node))
+    workflow.add_node("check_stopped", _bind_agent(check_stopped_node))
+    workflow.add_node("paused_state_actions", _bind_agent(paused_state_actions_node))
+    workflow.add_node("consecutive_failure_actions", _bind_agent(consecutive_failure_actions_node))
+    workflow.add_node("stopped_state_actions", _bind_agent(stopped_state_actions_node))
+    workflow.add_node("history_is_done_actions", _bind_agent(history_is_done_actions_node))
+    workflow.add_node("on_step_start", _bind_agent(on_step_start_node))
+    workflow.add_node("on_step_end", _bind_agent(on_step_end_node))
+    workflow.add_node("prepare_context", _bind_agent(prepare_context_node))
+    workflow.add_node("get_next_action", _bind_agent(get_next_action_node))
+    workflow.add_node("execute_actions", _bind_agent(execute_actions_node))
+    workflow.add_node("evaluate_result", _bind_agent(evaluate_result_node))
+    workflow.add_node("finalize_step", _bind_agent(finalize_step_node))
+    workflow.add_node("handle_error", _bind_agent(handle_error_node))
+    workflow.add_node("compact_messages", _bind_agent(compact_messages_node))
 
     # Set entry point to start with the first check
     workflow.set_entry_point("check_paused")
 
-    # Create wrapper functions for routing with agent access
-    def route_consecutive_failures_with_agent(state: BrowserAgentState) -> str:
-        return route_consecutive_failures(state, agent_instance)
-
-    def route_completion_with_agent(state: BrowserAgentState) -> str:
-        return route_completion(state, agent_instance)
-
-    def route_on_timeout_or_error_with_agent(state: BrowserAgentState) -> str:
-        return route_on_timeout_or_error(state, agent_instance)
-
     # pre-processing edges
     workflow.add_conditional_edges(
         "check_paused",
-        route_paused_with_agent,
+        _bind_agent(route_paused),
         {
             "paused": "paused_state_actions",
             "not_paused": "check_consecutive_failures"
@@ -129,7 +113,7 @@ def create_browser_agent_graph(agent_instance):
 
     workflow.add_conditional_edges(
         "check_consecutive_failures",
-        route_consecutive_failures_with_agent,
+        _bind_agent(route_consecutive_failures),
         {
             "too_many_failures": "consecutive_failure_actions",
             "ok": "check_stopped"
@@ -140,7 +124,7 @@ def create_browser_agent_graph(agent_instance):
 
     workflow.add_conditional_edges(
         "check_stopped",
-        route_stopped_with_agent,
+        _bind_agent(route_stopped),
         {
             "stopped": "stopped_state_actions",
             "not_stopped": "on_step_start"
@@ -153,7 +137,7 @@ def create_browser_agent_graph(agent_instance):
 
     workflow.add_conditional_edges(
         "prepare_context",
-        route_on_timeout_or_error_with_agent,
+        _bind_agent(route_on_timeout_or_error),
         {
             "timeout": "on_step_end",
             "error": "handle_error",
@@ -163,7 +147,7 @@ def create_browser_agent_graph(agent_instance):
 
     workflow.add_conditional_edges(
         "get_next_action",
-        route_on_timeout_or_error_with_agent,
+        _bind_agent(route_on_timeout_or_error),
         {
             "timeout": "on_step_end",
             "error": "handle_error",
@@ -173,7 +157,7 @@ def create_browser_agent_graph(agent_instance):
 
     workflow.add_conditional_edges(
         "execute_actions",
-        route_on_timeout_or_error_with_agent,
+        _bind_agent(route_on_timeout_or_error),
         {
             "timeout": "on_step_end",
             "error": "handle_error",
@@ -183,7 +167,7 @@ def create_browser_agent_graph(agent_instance):
 
     workflow.add_conditional_edges(
         "evaluate_result",
-        route_on_timeout_or_error_with_agent,
+        _bind_agent(route_on_timeout_or_error),
         {
             "timeout": "on_step_end",
             "error": "handle_error",
@@ -196,24 +180,89 @@ def create_browser_agent_graph(agent_instance):
 
     workflow.add_conditional_edges(
         "on_step_end",
-        route_completion_with_agent,
+        _bind_agent(route_step_end),
         {
             "done": "history_is_done_actions",
+            "compact": "compact_messages",
             "continue": "check_paused"
         }
     )
 
+    workflow.add_edge("compact_messages", "check_paused")
+
     workflow.add_edge("history_is_done_actions", END)
 
-    # Compile without checkpointer to avoid serialization issues
-    # For Studio visualization, use create_standalone_graph() instead
-    return workflow.compile()
+    return workflow
 
 
-def create_standalone_graph():
+def build_fast_browser_agent_workflow() -> StateGraph:
+    """Build the fused workflow: one gate node and one step node per agent step.
+
+    Same routing decisions and the same agent calls in the same order as the verbose workflow,
+    in 2 supersteps per step instead of ~10.
     """
-    Create a standalone graph for LangGraph Studio visualization.
-    This creates a mock agent instance for visualization purposes.
+    workflow = StateGraph(BrowserAgentState)
+
+    workflow.add_node("gate", _bind_agent(gate_node))
+    workflow.add_node("step", _bind_agent(step_node))
+    workflow.add_node("consecutive_failure_actions", _bind_agent(consecutive_failure_actions_node))
+    workflow.add_node("stopped_state_actions", _bind_agent(stopped_state_actions_node))
+    workflow.add_node("history_is_done_actions", _bind_agent(history_is_done_actions_node))
+
+    workflow.set_entry_point("gate")
+
+    workflow.add_conditional_edges(
+        "gate",
+        _bind_agent(route_gate),
+        {
+            "too_many_failures": "consecutive_failure_actions",
+            "stopped": "stopped_state_actions",
+            "continue": "step"
+        }
+    )
+
+    workflow.add_conditional_edges(
+        "step",
+        _bind_agent(route_completion),
+        {
+            "done": "history_is_done_actions",
+            "continue": "gate"
+        }
+    )
+
+    workflow.add_edge("consecutive_failure_actions", END)
+    workflow.add_edge("stopped_state_actions", END)
+    workflow.add_edge("history_is_done_actions", END)
+
+    return workflow
+
+
+def get_browser_agent_graph(mode: str = "verbose"):
+    """Return the process-wide compiled graph for `mode`, compiling it on first use.
+
+    The graph holds no per-agent state: nodes look the agent up in the run config, so every
+    LangGraphBrowserAgent shares this one object. "verbose" keeps one node per phase for Studio
+    visualization; "fast" is the fused topology for production runs.
+    """
+    if mode not in GRAPH_MODES:
+        raise ValueError(f"Unknown graph mode {mode!r}, expected one of {GRAPH_MODES}")
+    if mode not in _compiled_graphs:
+        build = build_fast_browser_agent_workflow if mode == "fast" else build_browser_agent_workflow
+        # Compile without checkpointer to avoid serialization issues
+        # For Studio visualization, use create_standalone_graph() instead
+        _compiled_graphs[mode] = build().compile()
+    return _compiled_graphs[mode]
+
+
+def create_browser_agent_graph(agent_instance, mode: str = "verbose"):
+    """Return the shared compiled graph with `agent_instance` bound into its default config"""
+    return get_browser_agent_graph(mode).with_config(configurable={AGENT_CONFIG_KEY: agent_instance})
+
+
+def create_mock_agent_instance(done_after: int = 3, max_steps: int = 10):
+    """
+    Create a mock LangGraphBrowserAgent whose browser-use calls are AsyncMocks.
+    history.is_done() starts returning True on its `done_after`-th call.
     """
     from unittest.mock import Mock, AsyncMock
     
@@ -222,11 +271,41 @@ def create_standalone_graph():
     
     # Mock agent attributes
     mock_agent.current_step = 0
-    mock_agent.max_steps = 10
+    mock_agent.max_steps = max_steps
     mock_agent.step_info = None
     mock_agent.last_error = None
     mock_agent.ended_due_to_break = False
     mock_agent.step_timed_out = False
+    mock_agent.phase_budgets = None
+    mock_agent.adaptive_timeouts = None
+    mock_agent._configured_timeouts = (30, None)
+    mock_agent._timeout_key = ('', '')
+    mock_agent.metrics = None
+    mock_agent.pipelined = False
+    mock_agent._prefetch = None
+    mock_agent.decision_cache = None
+    mock_agent.cache_mode = "use"
+    mock_agent.hedger = None
+    mock_agent.rate_limiter = None
+    mock_agent.priority = None
+    mock_agent.streaming_llm = None
+    mock_agent.streaming_stats = None
+    mock_agent._dispatch = None
+    mock_agent.compactor = None
+    mock_agent.compaction_stats = None
+    mock_agent._compacted_tokens = 0
+    mock_agent.pruner = None
+    mock_agent.pruning_stats = None
+    mock_agent.teardown = None
+    mock_agent._teardown_task = None
+    mock_agent._step_sink = None
+    mock_agent.step_stream_stats = None
+    mock_agent.trace_recorder = None
+    mock_agent.checkpointer = None
+    mock_agent.thread_id = None
+    mock_agent._checkpointed_items = 0
+    mock_agent.history_log = None
+    mock_agent.gif_writer = None
     mock_agent.signal_handler = Mock()
     mock_agent.signal_handler.reset = Mock()
     
@@ -238,6 +317,8 @@ def create_standalone_graph():
     mock_agent.original_agent.settings.max_failures = 3
     mock_agent.original_agent.settings.final_response_after_failure = False
     mock_agent.original_agent.settings.step_timeout = 30
+    mock_agent.original_agent.settings.enable_planning = True
+    mock_agent.original_agent.settings.loop_detection_enabled = True
     
     # Mock original agent state
     mock_agent.original_agent.state = Mock()
@@ -253,7 +334,7 @@ def create_standalone_graph():
     def mock_is_done():
         nonlocal call_count
         call_count += 1
-        return call_count >= 3  # Complete after 3 calls
+        return call_count >= done_after
     mock_agent.original_agent.history.is_done = Mock(side_effect=mock_is_done)
     
     # Mock original agent logger
@@ -281,6 +362,14 @@ def create_standalone_graph():
     mock_agent.original_agent._external_pause_event = Mock()
     mock_agent.original_agent._external_pause_event.wait = AsyncMock()
     
-    return create_browser_agent_graph(mock_agent)
+    return mock_agent
+
+
+def create_standalone_graph():
+    """
+    Create a standalone graph for LangGraph Studio visualization.
+    This creates a mock agent instance for visualization purposes.
+    """
+    return create_browser_agent_graph(create_mock_agent_instance())
 
 
@@ -0,0 +1,239 @@
+import time
+import asyncio
+import threading
+from collections import deque
+from dataclasses import dataclass, asdict
+
+from browser_use.llm.views import ChatInvokeUsage
+
+from .cache import get_next_action_with_cache
+from .metrics import percentile
+
+
+@dataclass
+class HedgeStats:
+    """How often hedged LLM requests fired, which request won, and the latency they saved"""
+    calls: int = 0
+    hedged: int = 0
+    primary_wins: int = 0
+    hedge_wins: int = 0
+    failures: int = 0
+    losers_cancelled: int = 0
+    # Prompt tokens of requests cancelled after they were sent, estimated from the prompt's text;
+    # the provider bills them but never reports their usage
+    cancelled_prompt_tokens: int = 0
+    total_latency: float = 0.0
+    time_saved: float = 0.0  # estimated from the primary's latency distribution
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedged / self.calls if self.calls else 0.0
+
+    @property
+    def hedge_win_rate(self) -> float:
+        return self.hedge_wins / self.hedged if self.hedged else 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        return self.total_latency / self.calls if self.calls else 0.0
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data['hedge_rate'] = self.hedge_rate
+        data['hedge_win_rate'] = self.hedge_win_rate
+        data['avg_latency'] = self.avg_latency
+        return data
+
+
+class LLMHedger:
+    """Races a duplicate LLM request against a primary call that is slower than usual.
+
+    The primary request is sent as normal. If it has not answered after the hedge delay, the
+    `quantile` of the primary model's recent latencies (or a fixed `delay`), the same request
+    goes to `secondary_llm` (default: the primary LLM again). The first response whose
+    completion validates as the requested output format wins and the other request is
+    cancelled, and charged an estimated prompt-token count to `token_cost_service`, if given. If
+    both fail, the primary's error is raised so browser-use's fallback handling sees it. Until `min_samples` latencies are known, `initial_delay` is used.
+    With an LLMRateLimiter, the hedge delay starts once the limiter admits the primary, and the
+    hedge, to either LLM, queues for the limiter like any other request. Share one instance
+    across agents.
+    """
+
+    def __init__(
+        self,
+        secondary_llm=None,
+        quantile: float = 95.0,
+        delay: float | None = None,
+        initial_delay: float = 5.0,
+        min_samples: int = 10,
+        window: int = 200,
+    ):
+        self.secondary_llm = secondary_llm
+        self.quantile = quantile
+        self.delay = delay
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self.window = window
+        self.stats = HedgeStats()
+        self._latencies: dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def hedge_delay(self, model: str) -> float:
+        """Seconds to wait for the primary before sending the hedge"""
+        if self.delay is not None:
+            return self.delay
+        with self._lock:
+            samples = self._latencies.get(model)
+            if samples is None or len(samples) < self.min_samples:
+                return self.initial_delay
+            return percentile(samples, self.quantile)
+
+    def observe(self, model: str, latency: float) -> None:
+        with self._lock:
+            samples = self._latencies.get(model)
+            if samples is None:
+                samples = self._latencies[model] = deque(maxlen=self.window)
+            samples.append(latency)
+
+    def estimate_saving(self, model: str, elapsed: float) -> float:
+        """Expected remaining primary latency given it had not answered after `elapsed` seconds"""
+        with self._lock:
+            slower = [latency for latency in self._latencies.get(model, ()) if latency > elapsed]
+        return sum(slower) / len(slower) - elapsed if slower else 0.0
+
+    async def ainvoke(self, primary, messages, output_format=None, token_cost_service=None, **kwargs):
+        """Call `primary.ainvoke`, hedging it with the secondary LLM if it is slow"""
+        from .ratelimit import _RateLimitedLLM
+
+        model = str(getattr(primary, 'model', ''))
+        secondary = self.secondary_llm if self.secondary_llm is not None else primary
+        if isinstance(primary, _RateLimitedLLM):
+            # Queue wait is neither a slow model nor a reason to send more requests
+            if self.secondary_llm is not None:
+                secondary = primary.wrap(self.secondary_llm)
+            reserved = await primary.admit(messages)
+            primary_call = primary.ainvoke_admitted(reserved, messages, output_format, **kwargs)
+        else:
+            primary_call = primary.ainvoke(messages, output_format, **kwargs)
+        start = time.monotonic()
+        primary_task = asyncio.ensure_future(primary_call)
+        tasks = {primary_task: 'primary'}
+        sent = {'primary': primary}
+
+        async def hedge_call():
+            if isinstance(secondary, _RateLimitedLLM):
+                reserved = await secondary.admit(messages)
+                sent['hedge'] = secondary
+                return await secondary.ainvoke_admitted(reserved, messages, output_format, **kwargs)
+            sent['hedge'] = secondary
+            return await secondary.ainvoke(messages, output_format, **kwargs)
+        try:
+            done, _ = await asyncio.wait({primary_task}, timeout=self.hedge_delay(model))
+            if done:
+                if primary_task.exception() is not None:
+                    self.stats.calls += 1
+                    self.stats.failures += 1
+                    raise primary_task.exception()
+                self._finish('primary', model, start, hedged=False)
+                return primary_task.result()
+
+            tasks[asyncio.ensure_future(hedge_call())] = 'hedge'
+            errors = {}
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # On a tie the primary's answer is kept
+                for task in sorted(done, key=lambda task: tasks[task] != 'primary'):
+                    error = task.exception()
+                    if error is None and not _valid(task.result(), output_format):
+                        error = ValueError(f'{tasks[task]} LLM response does not validate as {output_format.__name__}')
+                    if error is None:
+                        self._finish(tasks[task], model, start, hedged=True, losers=len(pending))
+                        return task.result()
+                    errors[tasks[task]] = error
+            self.stats.calls += 1
+            self.stats.hedged += 1
+            self.stats.failures += 1
+            raise errors['primary']
+        finally:
+            for task, name in tasks.items():
+                if not task.done():
+                    task.cancel()
+                    task.add_done_callback(_consume_result)
+                    if name in sent:
+                        self._charge_cancelled(sent[name], messages, token_cost_service)
+
+    def _charge_cancelled(self, llm, messages, token_cost_service) -> None:
+        from .ratelimit import estimate_prompt_tokens
+
+        tokens = estimate_prompt_tokens(messages)
+        self.stats.cancelled_prompt_tokens += tokens
+        if token_cost_service is not None:
+            token_cost_service.add_usage(str(getattr(llm, 'model', '')), ChatInvokeUsage(
+                prompt_tokens=tokens, prompt_cached_tokens=None, prompt_cache_creation_tokens=None,
+                prompt_image_tokens=None, completion_tokens=0, total_tokens=tokens,
+            ))
+
+    def _finish(self, winner: str, model: str, start: float, hedged: bool, losers: int = 0) -> None:
+        latency = time.monotonic() - start
+        stats = self.stats
+        stats.calls += 1
+        stats.total_latency += latency
+        stats.losers_cancelled += losers
+        if hedged:
+            stats.hedged += 1
+        if winner == 'primary':
+            stats.primary_wins += 1
+        else:
+            stats.hedge_wins += 1
+            stats.time_saved += self.estimate_saving(model, latency)
+        # A primary that lost took at least this long. Sampling that lower bound keeps the slow
+        # primaries in the distribution; with winners only, p95 and the hedge delay would keep falling
+        self.observe(model, latency)
+
+
+class _HedgedLLM:
+    """Stands in for the agent's LLM during get_next_action, routing ainvoke through an LLMHedger"""
+
+    def __init__(self, llm, hedger: LLMHedger, token_cost_service=None):
+        self._llm = llm
+        self._hedger = hedger
+        self._token_cost_service = token_cost_service
+
+    async def ainvoke(self, messages, output_format=None, **kwargs):
+        return await self._hedger.ainvoke(self._llm, messages, output_format, self._token_cost_service, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._llm, name)
+
+
+async def get_next_action_with_hedging(agent_instance, browser_state_summary):
+    """Run get_next_action_with_cache with the agent's LLM calls hedged by agent_instance.hedger, if set"""
+    agent = agent_instance.original_agent
+    hedger = agent_instance.hedger
+    if hedger is None:
+        return await get_next_action_with_cache(agent_instance, browser_state_summary)
+
+    if hedger.secondary_llm is not None:
+        # Idempotent; makes the secondary's usage count towards the run's token cost
+        agent.token_cost_service.register_llm(hedger.secondary_llm)
+    llm = agent.llm
+    hedged = agent.llm = _HedgedLLM(llm, hedger, agent.token_cost_service)
+    try:
+        return await get_next_action_with_cache(agent_instance, browser_state_summary)
+    finally:
+        # browser-use may have switched to its fallback LLM meanwhile; keep that switch
+        if agent.llm is hedged:
+            agent.llm = llm
+
+
+def _valid(result, output_format) -> bool:
+    if output_format is None:
+        return True
+    return isinstance(getattr(result, 'completion', None), output_format)
+
+
+def _consume_result(task: asyncio.Task) -> None:
+    # Keep cancelled or failed losers from logging "exception was never retrieved"
+    if not task.cancelled():
+        task.exception()
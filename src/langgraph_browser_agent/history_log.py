@@ -0,0 +1,285 @@
+import os
+import json
+import time
+import struct
+import asyncio
+from array import array
+from pathlib import Path
+from collections import deque
+from collections.abc import Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Any
+
+from pydantic import field_serializer
+from browser_use.agent.views import AgentHistoryList
+
+from .codec import Codec
+
+
+_FRAME = struct.Struct('>I')  # length prefix of each Codec-encoded item
+
+
+@dataclass
+class HistoryLogStats:
+    """Counters for history items spilled to disk"""
+    items_written: int = 0
+    bytes_written: int = 0
+    items_read: int = 0  # items loaded back from disk because they had left the window
+    total_write_time: float = 0.0
+    max_write_time: float = 0.0
+
+    @property
+    def avg_write_time(self) -> float:
+        return self.total_write_time / self.items_written if self.items_written else 0.0
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data['avg_write_time'] = self.avg_write_time
+        return data
+
+
+class HistoryLog:
+    """Keeps only the latest `window` AgentHistory items of a run in memory; every item is appended
+    to a per-run file under `directory` as it is added.
+
+    Items are JSON lines by default, or length-prefixed frames encoded with `codec`, and are encoded
+    and written by a single background thread so appends never block the event loop. The history
+    still reads as the full list: older items are loaded from disk on access, one at a time while
+    iterating. Share one instance across agents via LangGraphBrowserAgent(history_log=...).
+    """
+
+    def __init__(self, directory: str | os.PathLike, window: int = 50, codec: Codec | None = None):
+        if window < 1:
+            raise ValueError('HistoryLog window must be at least 1')
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.window = window
+        self.codec = codec
+        self.stats = HistoryLogStats()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='history-log')
+
+    @property
+    def suffix(self) -> str:
+        return '.history.bin' if self.codec is not None else '.history.jsonl'
+
+    def path_for(self, name: str) -> Path:
+        return self.directory / f'{name}{self.suffix}'
+
+    def open(self, name: str, output_model, items=()) -> 'SpilledHistory':
+        """Start a new log for run `name` (replacing any earlier one), holding `items` to begin with"""
+        path = self.path_for(name)
+        path.write_bytes(b'')
+        history = SpilledHistory(self, path, output_model)
+        for item in items:
+            history.append(item)
+        return history
+
+
+def _encode_item(item, codec: Codec | None) -> bytes:
+    data = item.model_dump()
+    if codec is not None:
+        body = codec.dumps(data)
+        return _FRAME.pack(len(body)) + body
+    return json.dumps(data, separators=(',', ':'), default=str).encode() + b'\n'
+
+
+def _read_item(f, codec: Codec | None, output_model):
+    """Read the item at the file's position, validated like AgentHistoryList.load_from_dict.
+
+    Raises EOFError for an item cut short, i.e. the one being written when the process died.
+    """
+    if codec is not None:
+        header = f.read(_FRAME.size)
+        length = _FRAME.unpack(header)[0] if len(header) == _FRAME.size else -1
+        body = f.read(length) if length >= 0 else b''
+        if len(body) != length:
+            raise EOFError('history log ends in a partial item')
+        data = Codec.loads(body)
+    else:
+        line = f.readline()
+        if not line.endswith(b'\n'):
+            raise EOFError('history log ends in a partial item')
+        data = json.loads(line)
+    return AgentHistoryList.load_from_dict({'history': [data]}, output_model).history[0]
+
+
+class SpilledHistory(Sequence):
+    """Append-only AgentHistory list backed by a HistoryLog file; stands in for AgentHistoryList.history.
+
+    Indexing, slicing, len() and iteration cover every item ever added. Only the newest `window`
+    items are kept in memory; the rest cost 8 bytes each (their file offset). Reading an item that
+    has left the window first waits for the pending writes.
+    """
+
+    def __init__(self, log: HistoryLog, path: Path, output_model):
+        self.log = log
+        self.path = path
+        self.output_model = output_model
+        self._count = 0
+        self._offsets = array('Q')  # filled in by the writer thread
+        self._size = 0
+        self._window: deque = deque()
+        self._file = None
+        self._pending: Future | None = None
+        self._error: Exception | None = None
+
+    @property
+    def resident(self) -> int:
+        """Items currently held in memory"""
+        return len(self._window)
+
+    def append(self, item) -> None:
+        self._count += 1
+        self._window.append(item)
+        if len(self._window) > self.log.window:
+            self._window.popleft()
+        self._pending = self.log._writer.submit(self._write, item)
+
+    def _write(self, item) -> None:
+        # Runs on the log's writer thread, one item at a time in append order
+        if self._error is not None:
+            return  # the offsets would no longer line up with the file
+        start = time.perf_counter()
+        try:
+            data = _encode_item(item, self.log.codec)
+            if self._file is None:
+                self._file = open(self.path, 'ab')
+            self._file.write(data)
+            self._file.flush()
+        except Exception as e:
+            self._error = e
+            raise
+        self._offsets.append(self._size)
+        self._size += len(data)
+
+        stats = self.log.stats
+        duration = time.perf_counter() - start
+        stats.items_written += 1
+        stats.bytes_written += len(data)
+        stats.total_write_time += duration
+        stats.max_write_time = max(stats.max_write_time, duration)
+
+    def extend(self, items) -> None:
+        for item in items:
+            self.append(item)
+
+    def flush(self) -> None:
+        """Wait until every appended item is on disk; raises the first write error, if any"""
+        pending = self._pending
+        if pending is not None:
+            pending.exception()
+        if self._error is not None:
+            raise self._error
+
+    def close(self) -> None:
+        """Flush and close the file; a later append reopens it"""
+        try:
+            self.flush()
+        finally:
+            if self._pending is not None:
+                self._pending = self.log._writer.submit(self._close_file)
+                self._pending.result()
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self._items(range(*index.indices(len(self)))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('history index out of range')
+        first_resident = len(self) - len(self._window)
+        if index >= first_resident:
+            return self._window[index - first_resident]
+        self.flush()
+        with open(self.path, 'rb') as f:
+            return self._read(f, index)
+
+    def __iter__(self):
+        return self._items(range(len(self)))
+
+    def _items(self, indices):
+        f = None
+        try:
+            for index in indices:
+                first_resident = len(self) - len(self._window)
+                if index >= first_resident:
+                    yield self._window[index - first_resident]
+                    continue
+                if f is None:
+                    self.flush()
+                    f = open(self.path, 'rb')
+                yield self._read(f, index)
+        finally:
+            if f is not None:
+                f.close()
+
+    def _read(self, f, index: int):
+        f.seek(self._offsets[index])
+        self.log.stats.items_read += 1
+        return _read_item(f, self.log.codec, self.output_model)
+
+    def __repr__(self) -> str:
+        return f'SpilledHistory({str(self.path)!r}, items={len(self)}, resident={self.resident})'
+
+
+class SpilledHistoryList(AgentHistoryList):
+    """AgentHistoryList whose `history` is a SpilledHistory; serializes it like the plain list"""
+    history: Any
+
+    @field_serializer('history')
+    def _dump_history(self, history) -> list:
+        return list(history)
+
+
+def iter_history(path: str | os.PathLike, output_model, codec: Codec | None = None):
+    """Yield the AgentHistory items of a history log file one at a time, e.g. after a crash.
+
+    A partial item at the end of the file is skipped.
+    """
+    end = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        while f.tell() < end:
+            try:
+                yield _read_item(f, codec, output_model)
+            except EOFError:
+                return
+
+
+def load_history(path: str | os.PathLike, output_model, codec: Codec | None = None) -> AgentHistoryList:
+    """Read a whole history log file back into an in-memory AgentHistoryList"""
+    return AgentHistoryList(history=list(iter_history(path, output_model, codec)), usage=None)
+
+
+def spill_history(agent_instance) -> None:
+    """Move the agent's history onto its HistoryLog, if it has one and it is not there already"""
+    log = agent_instance.history_log
+    if log is None:
+        return
+    agent = agent_instance.original_agent
+    items = agent.history.history
+    if isinstance(items, SpilledHistory) and items.log is log:
+        return
+    name = agent_instance.thread_id or agent.task_id
+    history = SpilledHistoryList(history=log.open(name, agent.AgentOutput, items), usage=agent.history.usage)
+    history._output_model_schema = agent.history._output_model_schema
+    agent.history = history
+
+
+async def close_history(agent_instance) -> None:
+    """Wait for the run's history log writes to land and close its file, off the event loop"""
+    items = agent_instance.original_agent.history.history
+    if not isinstance(items, SpilledHistory):
+        return
+    try:
+        await asyncio.to_thread(items.close)
+    except Exception as e:
+        agent_instance.original_agent.logger.error(f'📜 History log {items.path} is incomplete: {e}')
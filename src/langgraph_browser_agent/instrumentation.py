@@ -0,0 +1,192 @@
+import os
+import time
+import bisect
+import functools
+import threading
+import tempfile
+from urllib.parse import urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .steps import observe_phase, streams_steps
+
+
+# Seconds; spans a cached DOM read up to a slow LLM call
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+DURATION_METRIC = 'browser_agent_node_duration_seconds'
+INVOCATIONS_METRIC = 'browser_agent_node_invocations_total'
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (non-cumulative counts; rendered cumulatively)"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+
+class NodeMetrics:
+    """Per-node duration histograms and invocation counters for one or more agents.
+
+    Share one instance across every agent in a process, then expose it with render(),
+    write() (e.g. for node_exporter's textfile collector) or serve().
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, per_site: bool = True):
+        self.buckets = tuple(sorted(buckets))
+        self.per_site = per_site
+        self._histograms: dict[tuple, Histogram] = {}
+        self._invocations: dict[tuple, int] = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def observe(self, node: str, duration: float, outcome: str = 'ok', site: str = '') -> None:
+        key = (node, site if self.per_site else '')
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(duration)
+            counter_key = key + (outcome,)
+            self._invocations[counter_key] = self._invocations.get(counter_key, 0) + 1
+
+    def snapshot(self) -> dict:
+        """{node: {'count', 'sum', 'mean'}} aggregated over sites"""
+        summary = {}
+        with self._lock:
+            for (node, _), histogram in self._histograms.items():
+                entry = summary.setdefault(node, {'count': 0, 'sum': 0.0})
+                entry['count'] += histogram.count
+                entry['sum'] += histogram.sum
+        for entry in summary.values():
+            entry['mean'] = entry['sum'] / entry['count'] if entry['count'] else 0.0
+        return summary
+
+    def render(self, openmetrics: bool = False) -> str:
+        """Render all metrics in Prometheus text format (or OpenMetrics with a trailing # EOF)"""
+        lines = [
+            f'# HELP {DURATION_METRIC} Wall-clock duration of browser agent graph nodes.',
+            f'# TYPE {DURATION_METRIC} histogram',
+        ]
+        with self._lock:
+            for (node, site), histogram in sorted(self._histograms.items()):
+                labels = _labels(node=node, site=site)
+                for bound, total in histogram.cumulative():
+                    le = '+Inf' if bound == float('inf') else repr(float(bound))
+                    lines.append(f'{DURATION_METRIC}_bucket{{{labels},le="{le}"}} {total}')
+                lines.append(f'{DURATION_METRIC}_sum{{{labels}}} {histogram.sum}')
+                lines.append(f'{DURATION_METRIC}_count{{{labels}}} {histogram.count}')
+
+            # OpenMetrics names the counter family without the _total suffix
+            family = INVOCATIONS_METRIC[:-len('_total')] if openmetrics else INVOCATIONS_METRIC
+            lines.append(f'# HELP {family} Browser agent graph node invocations by outcome.')
+            lines.append(f'# TYPE {family} counter')
+            for (node, site, outcome), count in sorted(self._invocations.items()):
+                lines.append(f'{INVOCATIONS_METRIC}{{{_labels(node=node, site=site, outcome=outcome)}}} {count}')
+
+        if openmetrics:
+            lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str, openmetrics: bool = False) -> None:
+        """Atomically dump render() to `path` so scrapers never read a partial file"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.metrics-')
+        with os.fdopen(fd, 'w') as f:
+            f.write(self.render(openmetrics=openmetrics))
+        os.replace(tmp_path, path)
+
+    def serve(self, port: int = 9464, host: str = '127.0.0.1'):
+        """Serve /metrics from a daemon thread; returns the server (server_address has the bound port)"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                openmetrics = 'application/openmetrics-text' in self.headers.get('Accept', '')
+                body = metrics.render(openmetrics=openmetrics).encode()
+                content_type = (
+                    'application/openmetrics-text; version=1.0.0; charset=utf-8' if openmetrics
+                    else 'text/plain; version=0.0.4; charset=utf-8'
+                )
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name='node-metrics', daemon=True).start()
+        return self._server
+
+    def shutdown(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _labels(**labels) -> str:
+    return ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _site(state) -> str:
+    summary = state.get('browser_state_summary') if isinstance(state, dict) else None
+    url = getattr(summary, 'url', None)
+    return urlparse(url).netloc if isinstance(url, str) else ''
+
+
+def _outcome(agent) -> str:
+    if agent.step_timed_out is True:
+        return 'timeout'
+    if agent.last_error is not None:
+        return 'error'
+    return 'ok'
+
+
+def instrumented(node: str):
+    """Record the duration of an async `node(state, agent)` in `agent.metrics`, if set,
+    and in the step's timings while the agent streams steps"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(state, agent):
+            metrics = agent.metrics
+            if metrics is None:
+                if not streams_steps(agent):
+                    return await fn(state, agent)
+            start = time.perf_counter()
+            try:
+                state = await fn(state, agent)
+            except BaseException:
+                if metrics is not None:
+                    metrics.observe(node, time.perf_counter() - start, 'exception', _site(state))
+                raise
+            duration = time.perf_counter() - start
+            if metrics is not None:
+                metrics.observe(node, duration, _outcome(agent), _site(state))
+            observe_phase(agent, node, duration)
+            return state
+        return wrapper
+    return decorator
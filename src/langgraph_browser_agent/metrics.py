@@ -0,0 +1,16 @@
+import math
+
+
+def percentile(values, q: float) -> float:
+    """Linear-interpolated percentile of `values` for q in [0, 100]; 0.0 for an empty sequence"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return float(ordered[0])
+    rank = (len(ordered) - 1) * (q / 100.0)
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    if lower == upper:
+        return float(ordered[lower])
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
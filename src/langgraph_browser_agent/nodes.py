@@ -2,7 +2,18 @@ import time
 import inspect
 
 from .state import BrowserAgentState
-from browser_use.agent.views import AgentStepInfo, ActionResult
+from .routes import route_paused, route_on_timeout_or_error
+from .instrumentation import instrumented
+from .pipeline import start_prefetch, prepare_context_with_prefetch, discard_prefetch
+from .streaming import execute_actions_with_dispatch, discard_dispatch
+from .ratelimit import get_next_action_with_rate_limit
+from .trace import recorded
+from .checkpoint import save_checkpoint
+from .gif import queue_gif_frames
+from .compaction import observe_history_size, needs_compaction, compact_messages
+from .steps import start_step_record, emit_step_records
+from .timeouts import STEP, run_phase, mark_step_timed_out, apply_adaptive_timeouts, observe_latency
+from browser_use.agent.views import AgentStepInfo
 
 
 def check_paused_node(state: BrowserAgentState, agent_instance) -> BrowserAgentState:
@@ -18,6 +29,7 @@ def check_stopped_node(state: BrowserAgentState, agent_instance) -> BrowserAgent
 
 
 async def on_step_start_node(state: BrowserAgentState, agent_instance) -> BrowserAgentState:
+    start_step_record(agent_instance)
     if hasattr(agent_instance, 'on_step_start') and agent_instance.on_step_start is not None:
         await agent_instance.on_step_start(agent_instance.original_agent)
     return state
@@ -26,12 +38,27 @@ async def on_step_start_node(state: BrowserAgentState, agent_instance) -> Browse
 async def on_step_end_node(state: BrowserAgentState, agent_instance) -> BrowserAgentState:
     if hasattr(agent_instance, 'on_step_end') and agent_instance.on_step_end is not None:
         await agent_instance.on_step_end(agent_instance.original_agent)
+    observe_history_size(agent_instance)
+    emit_step_records(agent_instance)
+    return state
+
+
+@instrumented("compact_messages")
+async def compact_messages_node(state: BrowserAgentState, agent_instance) -> BrowserAgentState:
+    """Summarize older message history once it crosses the agent's MessageCompactor threshold"""
+    try:
+        await compact_messages(agent_instance)
+    except Exception as e:
+        # A failed compaction only leaves the prompt long; the next step can still run
+        agent_instance.original_agent.logger.warning(f'Failed to compact messages: {e}')
     return state
 
 
 async def paused_state_actions_node(state: BrowserAgentState, agent_instance) -> BrowserAgentState:
     agent = agent_instance.original_agent
     agent.logger.debug(f'⏸️ Step {agent_instance.current_step}: Agent paused, waiting to resume...')
+    # The page may change while paused, so a prefetched state would be stale
+    discard_prefetch(agent_instance)
     await agent._external_pause_event.wait()
     agent_instance.signal_handler.reset()
     return state
@@ -40,6 +67,7 @@ async def paused_state_actions_node(state: BrowserAgentState, agent_instance) ->
 def consecutive_failure_actions_node(state: BrowserAgentState, agent_instance) -> BrowserAgentState:
     agent = agent_instance.original_agent
     agent.logger.error(f'❌ Stopping due to {agent.settings.max_failures} consecutive failures')
+    discard_prefetch(agent_instance)
     agent_instance.ended_due_to_break = True
     return state
 
@@ -47,6 +75,7 @@ def consecutive_failure_actions_node(state: BrowserAgentState, agent_instance) -
 def stopped_state_actions_node(state: BrowserAgentState, agent_instance) -> BrowserAgentState:
     agent = agent_instance.original_agent
     agent.logger.info('🛑 Agent stopped')
+    discard_prefetch(agent_instance)
     agent_instance.ended_due_to_break = True
     return state
 
@@ -54,6 +83,7 @@ def stopped_state_actions_node(state: BrowserAgentState, agent_instance) -> Brow
 async def history_is_done_actions_node(state: BrowserAgentState, agent_instance) -> BrowserAgentState:
     agent = agent_instance.original_agent
     agent.logger.debug(f'🎯 Task completed after {agent_instance.current_step + 1} steps!')
+    discard_prefetch(agent_instance)
     await agent.log_completion()
     if agent.register_done_callback:
         if inspect.iscoroutinefunction(agent.register_done_callback):
@@ -65,31 +95,37 @@ async def history_is_done_actions_node(state: BrowserAgentState, agent_instance)
 
 
 def check_step_timeout(state: BrowserAgentState, agent) -> bool:
+    # A phase cancelled by run_phase has already been counted
+    if agent.step_timed_out:
+        return True
     elapsed_time = time.time() - agent.original_agent.step_start_time
     if elapsed_time > agent.original_agent.settings.step_timeout:
-        error_msg = f'Step {agent.current_step + 1} timed out after {agent.original_agent.settings.step_timeout} seconds'
-        agent.original_agent.logger.error(f'⏰ {error_msg}')
-        agent.original_agent.state.consecutive_failures += 1
-        agent.original_agent.state.last_result = [ActionResult(error=error_msg)]
-        agent.step_timed_out = True
+        mark_step_timed_out(agent, f'Step {agent.current_step + 1} timed out after {agent.original_agent.settings.step_timeout} seconds')
         return True
     return False
 
 
+@instrumented("prepare_context")
+@recorded("prepare_context")
 async def prepare_context_node(state: BrowserAgentState, agent) -> BrowserAgentState:
     agent.original_agent.logger.debug(f'🚶 Starting step {agent.current_step + 1}/{agent.max_steps}...')
+    apply_adaptive_timeouts(agent, state)
     agent.original_agent.step_start_time = time.time()
+    agent.step_timed_out = False
     print(f"🔄 Step {agent.current_step}: Preparing context...")
     try:
         step_info = AgentStepInfo(
             step_number=agent.current_step,
             max_steps=agent.max_steps
         )
-        browser_state_summary = await agent.original_agent._prepare_context(step_info)
-        state['browser_state_summary'] = browser_state_summary
-        agent.step_info = step_info
-        agent.last_error = None
-        print(f"✅ Context prepared for step {agent.current_step}")
+        browser_state_summary = await run_phase(
+            agent, 'prepare_context', prepare_context_with_prefetch(agent, step_info), on_cancel=discard_prefetch
+        )
+        if not agent.step_timed_out:
+            state['browser_state_summary'] = browser_state_summary
+            agent.step_info = step_info
+            agent.last_error = None
+            print(f"✅ Context prepared for step {agent.current_step}")
     except Exception as e:
         agent.last_error = str(e)
         print(f"❌ Error in prepare_context for step {agent.current_step}: {e}")
@@ -98,13 +134,18 @@ async def prepare_context_node(state: BrowserAgentState, agent) -> BrowserAgentS
     return state
 
 
+@instrumented("get_next_action")
+@recorded("get_next_action")
 async def get_next_action_node(state: BrowserAgentState, agent) -> BrowserAgentState:
     print(f"🤖 Step {agent.current_step}: Getting next action from LLM...")
     try:
-        await agent.original_agent._get_next_action(state['browser_state_summary'])
-        agent.last_error = None
-        state['last_model_output'] = agent.original_agent.state.last_model_output
-        print(f"✅ LLM response received for step {agent.current_step}")
+        await run_phase(
+            agent, 'get_next_action', get_next_action_with_rate_limit(agent, state['browser_state_summary']), on_cancel=discard_dispatch
+        )
+        if not agent.step_timed_out:
+            agent.last_error = None
+            state['last_model_output'] = agent.original_agent.state.last_model_output
+            print(f"✅ LLM response received for step {agent.current_step}")
     except Exception as e:
         agent.last_error = str(e)
         print(f"❌ Error in get_next_action for step {agent.current_step}: {e}")
@@ -113,13 +154,16 @@ async def get_next_action_node(state: BrowserAgentState, agent) -> BrowserAgentS
     return state
 
 
+@instrumented("execute_actions")
+@recorded("execute_actions")
 async def execute_actions_node(state: BrowserAgentState, agent) -> BrowserAgentState:
     print(f"⚡ Step {agent.current_step}: Executing actions...")
     try:
-        await agent.original_agent._execute_actions()
-        agent.last_error = None
-        state['last_result'] = agent.original_agent.state.last_result
-        print(f"✅ Actions executed for step {agent.current_step}")
+        await run_phase(agent, 'execute_actions', execute_actions_with_dispatch(agent), on_cancel=discard_dispatch)
+        if not agent.step_timed_out:
+            agent.last_error = None
+            state['last_result'] = agent.original_agent.state.last_result
+            print(f"✅ Actions executed for step {agent.current_step}")
     except Exception as e:
         agent.last_error = str(e)
         print(f"❌ Error in execute_actions for step {agent.current_step}: {e}")
@@ -128,12 +172,15 @@ async def execute_actions_node(state: BrowserAgentState, agent) -> BrowserAgentS
     return state
 
 
+@instrumented("evaluate_result")
+@recorded("evaluate_result")
 async def evaluate_result_node(state: BrowserAgentState, agent) -> BrowserAgentState:
     print(f"📊 Step {agent.current_step}: Evaluating result...")
     try:
-        await agent.original_agent._post_process()
-        agent.last_error = None
-        print(f"✅ Result evaluated for step {agent.current_step}")
+        await run_phase(agent, 'evaluate_result', agent.original_agent._post_process())
+        if not agent.step_timed_out:
+            agent.last_error = None
+            print(f"✅ Result evaluated for step {agent.current_step}")
     except Exception as e:
         agent.last_error = str(e)
         print(f"❌ Error in evaluate_result for step {agent.current_step}: {e}")
@@ -142,16 +189,24 @@ async def evaluate_result_node(state: BrowserAgentState, agent) -> BrowserAgentS
     return state
 
 
+@instrumented("finalize_step")
 async def finalize_step_node(state: BrowserAgentState, agent) -> BrowserAgentState:
     print(f"🔚 Step {agent.current_step}: Finalizing step...")
+    # Pipelined mode: capture the next step's page state while this one is finalized
+    start_prefetch(agent)
     await agent.original_agent._finalize(state['browser_state_summary'])
     agent.current_step += 1
+    await save_checkpoint(agent)
+    queue_gif_frames(agent)
     print(f"✅ Step {agent.current_step - 1} finalized, next step will be {agent.current_step}")
     if check_step_timeout(state, agent):
         print(f"⏰ Step {agent.current_step - 1} timed out in finalize_step")
+    else:
+        observe_latency(agent, STEP, time.time() - agent.original_agent.step_start_time)
     return state
 
 
+@instrumented("handle_error")
 async def handle_error_node(state: BrowserAgentState, agent) -> BrowserAgentState:
     print(f"❌ Step {agent.current_step}: Handling error...")
     try:
@@ -160,4 +215,34 @@ async def handle_error_node(state: BrowserAgentState, agent) -> BrowserAgentStat
         print(f"✅ Error handled for step {agent.current_step}")
     except Exception as e:
         print(f"❌ Error in handle_error_node for step {agent.current_step}: {e}")
-    return state
\ No newline at end of file
+    return state
+
+
+async def gate_node(state: BrowserAgentState, agent_instance) -> BrowserAgentState:
+    """Fast-graph fusion of compact_messages -> check_paused -> paused_state_actions -> the failure/stop checks"""
+    # The step's route_completion already ran; only the compaction half of route_step_end is left
+    if needs_compaction(agent_instance):
+        state = await compact_messages_node(state, agent_instance)
+    if route_paused(state, agent_instance) == "paused":
+        state = await paused_state_actions_node(state, agent_instance)
+    return state
+
+
+async def step_node(state: BrowserAgentState, agent_instance) -> BrowserAgentState:
+    """Fast-graph fusion of one agent step, from on_step_start to on_step_end.
+
+    Follows the verbose graph's edges exactly: a phase that errors goes through handle_error and
+    finalize_step, a phase that times out skips straight to on_step_end.
+    """
+    state = await on_step_start_node(state, agent_instance)
+    outcome = "continue"
+    for phase in (prepare_context_node, get_next_action_node, execute_actions_node, evaluate_result_node):
+        state = await phase(state, agent_instance)
+        outcome = route_on_timeout_or_error(state, agent_instance)
+        if outcome != "continue":
+            break
+    if outcome == "error":
+        state = await handle_error_node(state, agent_instance)
+    if outcome != "timeout":
+        state = await finalize_step_node(state, agent_instance)
+    return await on_step_end_node(state, agent_instance)
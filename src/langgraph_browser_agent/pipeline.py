@@ -0,0 +1,109 @@
+import time
+import asyncio
+from dataclasses import dataclass
+
+from .pruning import with_pruning
+
+
+@dataclass
+class _Prefetch:
+    step: int
+    task: asyncio.Task
+    started_at: float
+
+
+class _PrefetchedBrowserSession:
+    """Serves one prefetched BrowserStateSummary, delegating everything else to the real session"""
+
+    def __init__(self, session, summary):
+        object.__setattr__(self, '_session', session)
+        object.__setattr__(self, '_summary', summary)
+
+    async def get_browser_state_summary(self, *args, **kwargs):
+        summary = self._summary
+        if summary is None:
+            return await self._session.get_browser_state_summary(*args, **kwargs)
+        object.__setattr__(self, '_summary', None)
+        return summary
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._session, name, value)
+
+
+def is_pipelined(agent_instance) -> bool:
+    return agent_instance.pipelined
+
+
+def start_prefetch(agent_instance) -> None:
+    """Begin capturing the next step's browser state while the current step is finalized.
+
+    Only the browser round-trip runs early; the message-history half of _prepare_context still
+    runs in order in prepare_context_node, so _finalize never sees the next step's state.
+    """
+    if not is_pipelined(agent_instance):
+        return
+    discard_prefetch(agent_instance)
+    agent = agent_instance.original_agent
+    last_result = agent.state.last_result
+    if last_result and last_result[-1].is_done:
+        # The run is about to end; capturing another page state would be wasted work
+        return
+    task = asyncio.ensure_future(agent.browser_session.get_browser_state_summary(
+        include_screenshot=True,
+        include_recent_events=getattr(agent, 'include_recent_events', False),
+    ))
+    task.add_done_callback(_consume_result)
+    agent_instance._prefetch = _Prefetch(step=agent_instance.current_step + 1, task=task, started_at=time.time())
+
+
+async def take_prefetched_state(agent_instance):
+    """Return the prefetched BrowserStateSummary for the current step, or None to capture it normally"""
+    prefetch = agent_instance._prefetch
+    if prefetch is None:
+        return None
+    agent_instance._prefetch = None
+    if prefetch.step != agent_instance.current_step:
+        prefetch.task.cancel()
+        return None
+    try:
+        return await prefetch.task
+    except Exception as e:
+        agent_instance.original_agent.logger.debug(f'Prefetched browser state failed, capturing again: {e}')
+        return None
+
+
+async def prepare_context_with_prefetch(agent_instance, step_info):
+    """Run _prepare_context, serving it the prefetched browser state if one is ready.
+
+    With a DOMPruner, the state (prefetched or not) is pruned before _prepare_context builds
+    the step's messages from it.
+    """
+    agent = agent_instance.original_agent
+    summary = await take_prefetched_state(agent_instance)
+    session = agent.browser_session
+    serving = _PrefetchedBrowserSession(session, summary) if summary is not None else session
+    serving = with_pruning(agent_instance, serving)
+    if serving is session:
+        return await agent._prepare_context(step_info)
+    agent.browser_session = serving
+    try:
+        return await agent._prepare_context(step_info)
+    finally:
+        agent.browser_session = session
+
+
+def discard_prefetch(agent_instance) -> None:
+    """Cancel a pending prefetch because the loop is ending or pausing"""
+    prefetch = agent_instance._prefetch
+    if prefetch is not None:
+        agent_instance._prefetch = None
+        prefetch.task.cancel()
+
+
+def _consume_result(task: asyncio.Task) -> None:
+    # Keep discarded or failed prefetches from logging "exception was never retrieved"
+    if not task.cancelled():
+        task.exception()
@@ -0,0 +1,242 @@
+import time
+import asyncio
+import logging
+from urllib.parse import urlsplit
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, asdict
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PoolStats:
+    """Counters describing how a BrowserSessionPool has been used"""
+    leases: int = 0
+    reuses: int = 0
+    sessions_created: int = 0
+    sessions_discarded: int = 0
+    health_check_failures: int = 0
+    reset_failures: int = 0
+    total_wait_time: float = 0.0
+    max_wait_time: float = 0.0
+
+    @property
+    def avg_wait_time(self) -> float:
+        return self.total_wait_time / self.leases if self.leases else 0.0
+
+    @property
+    def reuse_rate(self) -> float:
+        return self.reuses / self.leases if self.leases else 0.0
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data['avg_wait_time'] = self.avg_wait_time
+        data['reuse_rate'] = self.reuse_rate
+        return data
+
+
+def _default_session_factory(**profile_kwargs):
+    from browser_use import BrowserSession, BrowserProfile
+
+    # keep_alive stops Agent.close() from killing a session that belongs to the pool
+    profile_kwargs.setdefault('keep_alive', True)
+    return BrowserSession(browser_profile=BrowserProfile(**profile_kwargs))
+
+
+def _origin(url: str) -> str | None:
+    parts = urlsplit(url or '')
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        return None
+    return f'{parts.scheme}://{parts.hostname}' + (f':{parts.port}' if parts.port else '')
+
+
+class BrowserSessionPool:
+    """Keeps a fixed number of started browser sessions warm and leases them to agent runs.
+
+    A session is reset when it is released. Chromium clears site storage (localStorage,
+    IndexedDB, service workers, caches) one origin at a time, so the pool clears every origin
+    the lease touched: those browser-use reported navigating to, those of the open frames and
+    those that set cookies. A session whose reset fails is killed and replaced, never reused.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        session_factory=None,
+        health_check_timeout: float = 5.0,
+        reset_url: str = 'about:blank',
+        **profile_kwargs,
+    ):
+        if size < 1:
+            raise ValueError('BrowserSessionPool size must be at least 1')
+        self.size = size
+        self.session_factory = session_factory or (lambda: _default_session_factory(**profile_kwargs))
+        self.health_check_timeout = health_check_timeout
+        self.reset_url = reset_url
+        self.stats = PoolStats()
+
+        self._idle: asyncio.Queue | None = None
+        self._lease_counts: dict[int, int] = {}
+        self._origins: dict[int, set[str]] = {}  # origins touched since the session's last reset
+        self._leased: set[int] = set()
+        self._started = False
+        self._closed = False
+
+    async def start(self) -> None:
+        """Launch `size` sessions up front so the first leases do not pay browser startup"""
+        if self._started:
+            return
+        self._idle = asyncio.Queue()
+        self._started = True
+        sessions = await asyncio.gather(*(self._create_session() for _ in range(self.size)))
+        for session in sessions:
+            self._idle.put_nowait(session)
+
+    async def acquire(self):
+        """Lease a healthy session, waiting for one to be released if the pool is exhausted"""
+        if self._closed:
+            raise RuntimeError('BrowserSessionPool is closed')
+        if not self._started:
+            await self.start()
+
+        wait_start = time.perf_counter()
+        # An empty slot (None) is left by a session that could not be replaced
+        session = await self._idle.get()
+        try:
+            if session is None or not await self._is_healthy(session):
+                if session is not None:
+                    self.stats.health_check_failures += 1
+                    broken, session = session, None
+                    await self._discard(broken)
+                session = await self._create_session()
+        except BaseException:
+            # Hand the slot back so a later acquire can try again
+            self._idle.put_nowait(session)
+            raise
+        wait_time = time.perf_counter() - wait_start
+
+        self.stats.leases += 1
+        self.stats.total_wait_time += wait_time
+        self.stats.max_wait_time = max(self.stats.max_wait_time, wait_time)
+        if self._lease_counts.get(id(session), 0) > 0:
+            self.stats.reuses += 1
+        self._lease_counts[id(session)] = self._lease_counts.get(id(session), 0) + 1
+        self._leased.add(id(session))
+        return session
+
+    async def release(self, session, discard: bool = False) -> None:
+        """Reset a leased session and return it to the pool (or replace it if it is broken)"""
+        self._leased.discard(id(session))
+        if self._closed:
+            await self._discard(session)
+            return
+
+        if not discard:
+            try:
+                await self._reset_session(session)
+            except Exception as e:
+                logger.debug(f'Failed to reset pooled browser session, replacing it: {e}')
+                self.stats.reset_failures += 1
+                discard = True
+
+        if discard:
+            await self._discard(session)
+            try:
+                session = await self._create_session()
+            except Exception as e:
+                # Leave the slot empty for the next acquire rather than failing the run returning the session
+                logger.error(f'Failed to replace pooled browser session: {e}')
+                session = None
+        self._idle.put_nowait(session)
+
+    @asynccontextmanager
+    async def lease(self):
+        """Async context manager around acquire()/release()"""
+        session = await self.acquire()
+        failed = False
+        try:
+            yield session
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            await self.release(session, discard=failed and not await self._is_healthy(session))
+
+    async def close(self) -> None:
+        """Kill every idle session; sessions still on lease are killed when released"""
+        self._closed = True
+        if self._idle is None:
+            return
+        while not self._idle.empty():
+            session = self._idle.get_nowait()
+            if session is not None:
+                await self._discard(session)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _create_session(self):
+        session = self.session_factory()
+        await session.start()
+        self.stats.sessions_created += 1
+        self._lease_counts[id(session)] = 0
+        self._track_origins(session)
+        return session
+
+    def _track_origins(self, session) -> None:
+        from browser_use.browser.events import AgentFocusChangedEvent, NavigationCompleteEvent, TabCreatedEvent
+
+        origins = self._origins[id(session)] = set()
+
+        def record_pool_origin(event) -> None:
+            origin = _origin(event.url)
+            if origin is not None:
+                origins.add(origin)
+
+        for event_type in (NavigationCompleteEvent, TabCreatedEvent, AgentFocusChangedEvent):
+            session.event_bus.on(event_type, record_pool_origin)
+
+    async def _discard(self, session) -> None:
+        self.stats.sessions_discarded += 1
+        self._lease_counts.pop(id(session), None)
+        self._origins.pop(id(session), None)
+        try:
+            await session.kill()
+        except Exception as e:
+            logger.debug(f'Error killing pooled browser session: {e}')
+
+    async def _is_healthy(self, session) -> bool:
+        if not getattr(session, 'is_cdp_connected', False):
+            return False
+        try:
+            await asyncio.wait_for(session.get_current_page_url(), timeout=self.health_check_timeout)
+        except Exception:
+            return False
+        return True
+
+    async def _reset_session(self, session) -> None:
+        """Bring a session back to a blank state: one tab, no cookies, no site storage; raises if it cannot"""
+        origins = self._origins.setdefault(id(session), set())
+        targets = await session.cdp_client.send.Target.getTargets()
+        for target in targets.get('targetInfos', []):
+            origin = _origin(target.get('url'))
+            if origin is not None:
+                origins.add(origin)
+        for cookie in await session.cookies():
+            domain = cookie.get('domain', '').lstrip('.')
+            if domain:
+                origins.update((f'https://{domain}', f'http://{domain}'))
+
+        tabs = await session.get_tabs()
+        for tab in tabs[1:]:
+            await session.close_page(tab.target_id)
+        await session.navigate_to(self.reset_url)
+        await session.clear_cookies()
+        for origin in sorted(origins):
+            await session.cdp_client.send.Storage.clearDataForOrigin(params={'origin': origin, 'storageTypes': 'all'})
+        origins.clear()
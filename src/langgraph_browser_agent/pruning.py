@@ -0,0 +1,303 @@
+import time
+from collections import deque
+from dataclasses import dataclass, field, asdict, replace
+
+from uuid_extensions import uuid7str
+from browser_use.dom.views import EnhancedSnapshotNode, NodeType, SerializedDOMState, SimplifiedNode
+
+
+# Structure below this depth is ignored when deciding whether two siblings repeat
+SIGNATURE_DEPTH = 3
+
+
+@dataclass
+class PruneReport:
+    """What the pruning stage did to one step's browser state"""
+    step: int
+    tokens_before: int
+    tokens_after: int
+    collapsed: int = 0  # repeated siblings folded into a placeholder
+    dropped: int = 0  # off-viewport or invisible elements over the limit
+    deduplicated: int = 0  # repeated text nodes
+    prune_time: float = 0.0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+@dataclass
+class PruningStats:
+    """Prompt DOM size before and after pruning, for one run"""
+    steps: int = 0
+    tokens_before: int = 0
+    tokens_after: int = 0
+    prune_time: float = 0.0
+    reports: deque = field(default_factory=lambda: deque(maxlen=1000))  # PruneReport per step
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+    @property
+    def reduction(self) -> float:
+        return self.tokens_saved / self.tokens_before if self.tokens_before else 0.0
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data['reports'] = [asdict(report) for report in self.reports]
+        data['tokens_saved'] = self.tokens_saved
+        data['reduction'] = self.reduction
+        return data
+
+
+class DOMPruner:
+    """Shrinks the element tree the LLM sees, without changing any element index.
+
+    Three passes over a copy of the serialized DOM tree; the page's selector map is kept
+    whole, so every index the model may still name resolves to the same element:
+
+    - runs of more than `max_repeats` structurally identical siblings (product cards, menu
+      items) keep the first `max_repeats`, the rest become one line naming their index range;
+    - interactive elements outside the viewport or invisible, past the first `max_offscreen`
+      of them in document order, are dropped along with their subtrees;
+    - text of at least `dedupe_min_chars` characters that already appeared on the page is
+      dropped, except inside interactive elements where it is the element's label.
+
+    Any pass is turned off by setting its limit to None. Holds no per-run state; share one
+    instance across agents.
+    """
+
+    def __init__(
+        self,
+        max_repeats: int | None = 3,
+        max_offscreen: int | None = 50,
+        dedupe_min_chars: int | None = 20,
+        chars_per_token: float = 4.0,
+    ):
+        self.max_repeats = max_repeats
+        self.max_offscreen = max_offscreen
+        self.dedupe_min_chars = dedupe_min_chars
+        self.chars_per_token = chars_per_token
+
+    def prune(self, summary, include_attributes: list[str] | None = None, step: int = 0):
+        """Return (a pruned copy of the BrowserStateSummary, its PruneReport)"""
+        start = time.perf_counter()
+        dom_state = summary.dom_state
+        before = self.tokens(dom_state, include_attributes)
+        report = PruneReport(step=step, tokens_before=before, tokens_after=before)
+        if dom_state._root is None:
+            return summary, report
+
+        context = _PruneContext(self, summary.page_info, report)
+        root = context.visit(dom_state._root, inside_interactive=False)
+        if context.dropped_above or context.dropped_below:
+            root = replace(root, children=root.children + [
+                _placeholder(dom_state._root.original_node, f'... ({context.dropped_above} elements above and {context.dropped_below} '
+                                              f'below the viewport omitted - scroll to reveal)')
+            ])
+        pruned = replace(summary, dom_state=SerializedDOMState(_root=root, selector_map=dom_state.selector_map))
+        report.tokens_after = self.tokens(pruned.dom_state, include_attributes)
+        report.prune_time = time.perf_counter() - start
+        return pruned, report
+
+    def tokens(self, dom_state, include_attributes: list[str] | None = None) -> int:
+        """Estimated tokens of the DOM as the LLM is shown it"""
+        return int(len(dom_state.llm_representation(include_attributes=include_attributes)) / self.chars_per_token)
+
+
+class _PruneContext:
+    """One pruning pass: the text seen so far and the off-viewport element budget"""
+
+    def __init__(self, pruner: DOMPruner, page_info, report: PruneReport):
+        self.pruner = pruner
+        self.report = report
+        self.seen_text = set()
+        self.offscreen_kept = 0
+        self.dropped_above = 0
+        self.dropped_below = 0
+        self.viewport = None
+        if page_info is not None and pruner.max_offscreen is not None:
+            self.viewport = (page_info.scroll_y, page_info.scroll_y + page_info.viewport_height)
+
+    def visit(self, node, inside_interactive: bool):
+        inside_interactive = inside_interactive or node.is_interactive
+        children = []
+        for child in node.children:
+            if self._drop(child, inside_interactive):
+                continue
+            children.append(self.visit(child, inside_interactive))
+        children = self._collapse(children)
+        if len(children) == len(node.children) and all(new is old for new, old in zip(children, node.children)):
+            return node
+        return replace(node, children=children)
+
+    def _drop(self, node, inside_interactive: bool) -> bool:
+        original = node.original_node
+        if original.node_type == NodeType.TEXT_NODE:
+            return self._duplicate_text(original, inside_interactive)
+        if not node.is_interactive or self.viewport is None:
+            return False
+        position = _offscreen(original, self.viewport)
+        if position is None:
+            return False
+        if self.offscreen_kept < self.pruner.max_offscreen or _has_onscreen_interactive(node, self.viewport):
+            self.offscreen_kept += 1
+            return False
+        self.report.dropped += 1
+        if position == 'above':
+            self.dropped_above += 1
+        else:
+            self.dropped_below += 1
+        return True
+
+    def _duplicate_text(self, original, inside_interactive: bool) -> bool:
+        min_chars = self.pruner.dedupe_min_chars
+        text = (original.node_value or '').strip()
+        if min_chars is None or inside_interactive or len(text) < min_chars:
+            return False
+        if text in self.seen_text:
+            self.report.deduplicated += 1
+            return True
+        self.seen_text.add(text)
+        return False
+
+    def _collapse(self, children):
+        max_repeats = self.pruner.max_repeats
+        if max_repeats is None or len(children) <= max_repeats:
+            return children
+        collapsed = []
+        run = []
+        run_signature = None
+        for child in children + [None]:
+            signature = _signature(child, SIGNATURE_DEPTH) if child is not None else None
+            if signature is not None and signature == run_signature:
+                run.append(child)
+                continue
+            collapsed.extend(run[:max_repeats])
+            if len(run) > max_repeats:
+                hidden = run[max_repeats:]
+                self.report.collapsed += len(hidden)
+                collapsed.append(_placeholder(hidden[0].original_node, _collapsed_text(hidden)))
+            run = [child] if child is not None else []
+            run_signature = signature
+        return collapsed
+
+
+def _signature(node, depth: int):
+    """Structural signature of an element subtree; None for nodes that never count as repeats"""
+    original = node.original_node
+    if original.node_type != NodeType.ELEMENT_NODE:
+        return None
+    if depth == 0:
+        return original.tag_name
+    return (
+        original.tag_name,
+        node.is_interactive,
+        tuple(
+            _signature(child, depth - 1) if child.original_node.node_type == NodeType.ELEMENT_NODE else child.original_node.node_type
+            for child in node.children
+        ),
+    )
+
+
+def _indices(node):
+    if node.is_interactive and node.selector_index is not None:
+        yield node.selector_index
+    for child in node.children:
+        yield from _indices(child)
+
+
+def _collapsed_text(hidden) -> str:
+    tag = hidden[0].original_node.tag_name
+    indices = [index for node in hidden for index in _indices(node)]
+    text = f'... {len(hidden)} more similar <{tag}> items'
+    if indices:
+        text += f' (indices {min(indices)}-{max(indices)})'
+    return text
+
+
+def _offscreen(original, viewport):
+    """'above' or 'below' for an element outside the viewport or invisible, else None"""
+    position = original.absolute_position
+    if original.is_visible is False:
+        return 'below' if position is None or position.y >= viewport[0] else 'above'
+    if position is None:
+        return None
+    if position.y + position.height < viewport[0]:
+        return 'above'
+    if position.y > viewport[1]:
+        return 'below'
+    return None
+
+
+def _has_onscreen_interactive(node, viewport) -> bool:
+    return any(
+        child.is_interactive and _offscreen(child.original_node, viewport) is None or _has_onscreen_interactive(child, viewport)
+        for child in node.children
+    )
+
+
+def _placeholder(template, text: str):
+    """A visible text node reading `text`, cloned from `template` so it sits in the same frame"""
+    original = replace(
+        template,
+        node_type=NodeType.TEXT_NODE,
+        node_name='#text',
+        node_value=text,
+        attributes={},
+        is_visible=True,
+        children_nodes=None,
+        shadow_roots=None,
+        content_document=None,
+        # The serializer only renders text nodes that have layout
+        snapshot_node=template.snapshot_node or EnhancedSnapshotNode(
+            is_clickable=False, cursor_style=None, bounds=None, clientRects=None, scrollRects=None,
+            computed_styles=None, paint_order=None, stacking_contexts=None,
+        ),
+        uuid=uuid7str(),
+    )
+    return SimplifiedNode(original_node=original, children=[])
+
+
+class _PrunedBrowserSession:
+    """Prunes every BrowserStateSummary it serves, delegating everything else to the session it wraps"""
+
+    def __init__(self, session, agent_instance):
+        object.__setattr__(self, '_session', session)
+        object.__setattr__(self, '_agent_instance', agent_instance)
+
+    async def get_browser_state_summary(self, *args, **kwargs):
+        summary = await self._session.get_browser_state_summary(*args, **kwargs)
+        return prune_state(self._agent_instance, summary)
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._session, name, value)
+
+
+def prune_state(agent_instance, summary):
+    """Run `summary` through the agent's DOMPruner, recording the step's PruneReport"""
+    pruner = agent_instance.pruner
+    agent = agent_instance.original_agent
+    pruned, report = pruner.prune(summary, agent.settings.include_attributes, step=agent_instance.current_step)
+    stats = agent_instance.pruning_stats
+    stats.steps += 1
+    stats.tokens_before += report.tokens_before
+    stats.tokens_after += report.tokens_after
+    stats.prune_time += report.prune_time
+    stats.reports.append(report)
+    agent.logger.debug(
+        f'✂️ Step {report.step}: pruned DOM ~{report.tokens_before} -> ~{report.tokens_after} tokens '
+        f'({report.collapsed} collapsed, {report.dropped} off-viewport dropped, {report.deduplicated} texts deduplicated)'
+    )
+    return pruned
+
+
+def with_pruning(agent_instance, session):
+    """`session`, wrapped to prune the states it serves if the agent has a DOMPruner"""
+    if agent_instance.pruner is None:
+        return session
+    return _PrunedBrowserSession(session, agent_instance)
@@ -0,0 +1,293 @@
+import time
+import heapq
+import asyncio
+import itertools
+from collections import deque
+from dataclasses import dataclass, field, asdict
+
+from browser_use.llm.exceptions import ModelRateLimitError
+from browser_use.llm.views import ChatInvokeUsage
+
+from .metrics import percentile
+from .streaming import get_next_action_with_streaming
+
+
+PRIORITIES = ('interactive', 'batch')
+
+CHARS_PER_TOKEN = 4.0
+
+
+def estimate_prompt_tokens(messages, chars_per_token: float = CHARS_PER_TOKEN) -> int:
+    """Prompt tokens of `messages`, estimated from the length of their text"""
+    chars = sum(len(str(getattr(message, 'text', ''))) for message in messages)
+    return int(chars / chars_per_token)
+
+
+@dataclass
+class QueueWaitStats:
+    """How long one priority class waited for the limiter"""
+    acquired: int = 0
+    queued: int = 0  # acquisitions that could not start at once
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    waits: deque = field(default_factory=lambda: deque(maxlen=1000))
+
+    @property
+    def avg_wait(self) -> float:
+        return self.total_wait / self.acquired if self.acquired else 0.0
+
+    @property
+    def p95_wait(self) -> float:
+        return percentile(self.waits, 95)
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        del data['waits']
+        data['avg_wait'] = self.avg_wait
+        data['p95_wait'] = self.p95_wait
+        return data
+
+
+@dataclass
+class RateLimitStats:
+    """Counters for an LLMRateLimiter shared by many agents"""
+    requests: int = 0
+    tokens_reserved: int = 0  # estimated before each request
+    tokens_used: int = 0  # reported by the provider afterwards
+    rate_limited: int = 0  # 429s that got through anyway; each pauses the limiter for its cooldown
+    max_queue: int = 0
+    priorities: dict = field(default_factory=dict)  # priority -> QueueWaitStats
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data['priorities'] = {priority: stats.as_dict() for priority, stats in self.priorities.items()}
+        return data
+
+
+class _Bucket:
+    """Token bucket refilled at `per_minute`, holding at most `burst_seconds` worth"""
+
+    def __init__(self, per_minute: float, burst_seconds: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(per_minute * burst_seconds / 60.0, 1.0)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float) -> float:
+        # A request larger than the bucket waits for a full one rather than forever
+        return max(min(amount, self.capacity) - self.level, 0.0) / self.rate
+
+
+@dataclass(order=True)
+class _Waiter:
+    rank: int
+    seq: int
+    tokens: int = field(compare=False)
+    wakeup: asyncio.Event = field(compare=False, default_factory=asyncio.Event)
+
+
+class LLMRateLimiter:
+    """Process-wide requests/min and tokens/min limits for the agents' get_next_action LLM calls.
+
+    Every LLM request made in get_next_action (browser-use's retries and hedged duplicates
+    included) first acquires one request and its estimated tokens: the prompt at
+    `chars_per_token`, plus `completion_tokens`. The estimate is corrected with the provider's
+    reported usage once the call returns. Requests that cannot start yet queue by priority
+    class, `priorities` listed highest first, then in arrival order; a waiting interactive
+    request goes before every waiting batch request. A 429 that still gets through pauses
+    all requests for `cooldown` seconds instead of letting each agent retry on its own.
+    Either limit may be None. Share one instance across the agents of one event loop.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        priorities: tuple[str, ...] = PRIORITIES,
+        default_priority: str | None = None,
+        burst_seconds: float = 10.0,
+        completion_tokens: int = 1000,
+        chars_per_token: float = CHARS_PER_TOKEN,
+        cooldown: float = 5.0,
+    ):
+        if not priorities:
+            raise ValueError('LLMRateLimiter needs at least one priority class')
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.priorities = tuple(priorities)
+        self.default_priority = default_priority or self.priorities[0]
+        self.completion_tokens = completion_tokens
+        self.chars_per_token = chars_per_token
+        self.cooldown = cooldown
+        self.stats = RateLimitStats(priorities={priority: QueueWaitStats() for priority in self.priorities})
+        self._requests = _Bucket(requests_per_minute, burst_seconds) if requests_per_minute else None
+        self._tokens = _Bucket(tokens_per_minute, burst_seconds) if tokens_per_minute else None
+        self._paused_until = 0.0
+        self._queue: list[_Waiter] = []
+        self._seq = itertools.count()
+        self.rank(self.default_priority)
+
+    @property
+    def queued(self) -> int:
+        """Requests waiting to start"""
+        return len(self._queue)
+
+    def estimate_tokens(self, messages) -> int:
+        """Tokens to reserve for a request: the prompt's text plus completion_tokens"""
+        return estimate_prompt_tokens(messages, self.chars_per_token) + self.completion_tokens
+
+    async def acquire(self, priority: str | None = None, tokens: int = 0) -> float:
+        """Wait until a request of `tokens` may start; returns the seconds spent waiting"""
+        priority = priority or self.default_priority
+        waiter = _Waiter(self.rank(priority), next(self._seq), tokens)
+        start = time.monotonic()
+        heapq.heappush(self._queue, waiter)
+        self.stats.max_queue = max(self.stats.max_queue, len(self._queue))
+        try:
+            while True:
+                now = time.monotonic()
+                delay = None
+                if self._queue[0] is waiter:
+                    delay = self._delay(tokens, now)
+                    if delay <= 0:
+                        break
+                waiter.wakeup.clear()
+                try:
+                    await asyncio.wait_for(waiter.wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            # Cancelled, e.g. by a phase timeout; let the next request in line go
+            if waiter in self._queue:
+                self._queue.remove(waiter)
+                heapq.heapify(self._queue)
+            self._wake_head()
+            raise
+        heapq.heappop(self._queue)
+        if self._requests is not None:
+            self._requests.level -= 1
+        if self._tokens is not None:
+            self._tokens.level -= tokens
+        self._wake_head()
+
+        wait = time.monotonic() - start
+        self.stats.requests += 1
+        self.stats.tokens_reserved += tokens
+        stats = self.stats.priorities[priority]
+        stats.acquired += 1
+        if wait > 0.001:
+            stats.queued += 1
+        stats.total_wait += wait
+        stats.max_wait = max(stats.max_wait, wait)
+        stats.waits.append(wait)
+        return wait
+
+    def settle(self, reserved: int, used: int) -> None:
+        """Correct a request's token reservation with its actual usage"""
+        self.stats.tokens_used += used
+        if self._tokens is not None:
+            self._tokens.level = min(self._tokens.capacity, self._tokens.level + reserved - used)
+
+    def rate_limited(self) -> None:
+        """Record a 429 from the provider and hold every queued request for the cooldown"""
+        self.stats.rate_limited += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + self.cooldown)
+
+    def rank(self, priority: str) -> int:
+        """Position of `priority` in the classes, 0 the highest; raises ValueError for an unknown class"""
+        try:
+            return self.priorities.index(priority)
+        except ValueError:
+            raise ValueError(f'Unknown priority {priority!r}, expected one of {self.priorities}') from None
+
+    def _delay(self, tokens: int, now: float) -> float:
+        delay = self._paused_until - now
+        if self._requests is not None:
+            self._requests.refill(now)
+            delay = max(delay, self._requests.delay(1))
+        if self._tokens is not None:
+            self._tokens.refill(now)
+            delay = max(delay, self._tokens.delay(tokens))
+        return delay
+
+    def _wake_head(self) -> None:
+        if self._queue:
+            self._queue[0].wakeup.set()
+
+
+class _RateLimitedLLM:
+    """Stands in for an LLM during get_next_action, acquiring from agent_instance.rate_limiter per request"""
+
+    def __init__(self, llm, agent_instance):
+        self._llm = llm
+        self._agent_instance = agent_instance
+
+    async def admit(self, messages) -> int:
+        """Wait for the limiter to admit a request for `messages`; returns the tokens reserved"""
+        agent_instance = self._agent_instance
+        limiter = agent_instance.rate_limiter
+        tokens = limiter.estimate_tokens(messages)
+        wait = await limiter.acquire(agent_instance.priority, tokens)
+        if agent_instance.metrics is not None:
+            agent_instance.metrics.observe('llm_queue_wait', wait)
+        return tokens
+
+    async def ainvoke_admitted(self, reserved: int, messages, output_format=None, **kwargs):
+        """Send a request admit() has already let through"""
+        limiter = self._agent_instance.rate_limiter
+        try:
+            result = await self._llm.ainvoke(messages, output_format, **kwargs)
+        except ModelRateLimitError:
+            limiter.rate_limited()
+            raise
+        usage = getattr(result, 'usage', None)
+        if isinstance(usage, ChatInvokeUsage):
+            limiter.settle(reserved, usage.total_tokens)
+        return result
+
+    async def ainvoke(self, messages, output_format=None, **kwargs):
+        reserved = await self.admit(messages)
+        return await self.ainvoke_admitted(reserved, messages, output_format, **kwargs)
+
+    def wrap(self, llm) -> '_RateLimitedLLM':
+        """`llm` under the same limiter and priority, e.g. an LLMHedger's secondary"""
+        return _RateLimitedLLM(llm, self._agent_instance)
+
+    async def astream(self, messages, output_format=None, **kwargs):
+        limiter = self._agent_instance.rate_limiter
+        reserved = await self.admit(messages)
+        try:
+            async for chunk in self._llm.astream(messages, output_format, **kwargs):
+                if isinstance(chunk, ChatInvokeUsage):
+                    limiter.settle(reserved, chunk.total_tokens)
+                yield chunk
+        except ModelRateLimitError:
+            limiter.rate_limited()
+            raise
+
+    def __getattr__(self, name):
+        return getattr(self._llm, name)
+
+
+async def get_next_action_with_rate_limit(agent_instance, browser_state_summary):
+    """Run get_next_action_with_streaming with each LLM request gated by agent_instance.rate_limiter, if set"""
+    agent = agent_instance.original_agent
+    if agent_instance.rate_limiter is None:
+        return await get_next_action_with_streaming(agent_instance, browser_state_summary)
+
+    llm = agent.llm
+    limited = agent.llm = _RateLimitedLLM(llm, agent_instance)
+    streaming_llm = agent_instance.streaming_llm
+    if streaming_llm is not None:
+        agent_instance.streaming_llm = _RateLimitedLLM(streaming_llm, agent_instance)
+    try:
+        return await get_next_action_with_streaming(agent_instance, browser_state_summary)
+    finally:
+        agent_instance.streaming_llm = streaming_llm
+        # browser-use may have switched to its fallback LLM meanwhile; keep that switch
+        if agent.llm is limited:
+            agent.llm = llm
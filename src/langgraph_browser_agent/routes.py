@@ -1,4 +1,5 @@
 from .state import BrowserAgentState
+from .compaction import needs_compaction
 
 
 def route_paused(state: BrowserAgentState, agent_instance) -> str:
@@ -42,3 +43,19 @@ def route_on_timeout_or_error(state: BrowserAgentState, agent_instance) -> str:
         return "continue"
 
 
+def route_step_end(state: BrowserAgentState, agent_instance) -> str:
+    """route_completion, with a detour through compact_messages when the history is over its threshold"""
+    if route_completion(state, agent_instance) == "done":
+        return "done"
+    if needs_compaction(agent_instance):
+        return "compact"
+    return "continue"
+
+
+def route_gate(state: BrowserAgentState, agent_instance) -> str:
+    """Fused check_consecutive_failures + check_stopped routing used by the fast graph"""
+    if route_consecutive_failures(state, agent_instance) == "too_many_failures":
+        return "too_many_failures"
+    if route_stopped(state, agent_instance) == "stopped":
+        return "stopped"
+    return "continue"
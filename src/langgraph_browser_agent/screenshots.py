@@ -0,0 +1,250 @@
+import os
+import mmap
+import base64
+import asyncio
+import time
+import hashlib
+import tempfile
+import threading
+from collections import Counter
+from pathlib import Path
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+
+
+@dataclass
+class ScreenshotStoreStats:
+    """Counters describing how a ScreenshotStore has been used"""
+    stored: int = 0
+    deduplicated: int = 0
+    bytes_written: int = 0
+    bytes_deduplicated: int = 0
+    reads: int = 0
+    pruned: int = 0
+    bytes_pruned: int = 0
+
+    @property
+    def dedup_rate(self) -> float:
+        total = self.stored + self.deduplicated
+        return self.deduplicated / total if total else 0.0
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data['dedup_rate'] = self.dedup_rate
+        return data
+
+
+class ScreenshotStore:
+    """Content-addressed screenshot blobs on local disk, read back through mmap.
+
+    Each image is written once under root/<sha256[:2]>/<sha256[2:]><extension>; storing the same
+    bytes again (an unchanged page, or the same page in another run) only returns the existing
+    handle. Handles are plain file paths, so browser-use's BrowserStateHistory.get_screenshot()
+    keeps working. Implements the ScreenshotService interface, so one store can be shared by
+    every agent in a process via LangGraphBrowserAgent(screenshot_store=...).
+
+    Blobs outlive runs. With `max_age` (seconds since last stored) or `max_bytes` set, prune()
+    deletes the blobs past the limits, least recently stored first; it also runs on a
+    background thread after every `prune_every` new blobs. Blobs pinned by a lease() (each
+    agent run holds one until its teardown is over) are never pruned.
+    """
+
+    def __init__(
+        self,
+        root: str | os.PathLike,
+        extension: str = '.png',
+        max_bytes: int | None = None,
+        max_age: float | None = None,
+        prune_every: int = 100,
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.extension = extension
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.prune_every = prune_every
+        self.stats = ScreenshotStoreStats()
+        self._lock = threading.Lock()
+        self._stored_since_prune = 0
+        self._pinned: Counter = Counter()  # handle -> leases holding it
+        self._prune_thread: threading.Thread | None = None
+
+    def path_for(self, digest: str) -> Path:
+        return self.root / digest[:2] / f'{digest[2:]}{self.extension}'
+
+    def put(self, data: bytes, lease: 'ScreenshotLease | None' = None) -> str:
+        """Store raw image bytes and return their handle, pinned by `lease` if given"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest)
+        handle = str(path)
+        with self._lock:
+            # Pinned before the blob is looked up, so a concurrent prune cannot remove it under us
+            if lease is not None:
+                lease._add(handle)
+            try:
+                # Storing a blob again counts as using it, for retention
+                os.utime(path)
+            except FileNotFoundError:
+                pass  # new, or pruned meanwhile; written below
+            else:
+                self.stats.deduplicated += 1
+                self.stats.bytes_deduplicated += len(data)
+                return handle
+        path.parent.mkdir(exist_ok=True)
+        # Write then rename, so concurrent writers of the same blob never expose a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.blob-')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.stats.stored += 1
+            self.stats.bytes_written += len(data)
+            self._stored_since_prune += 1
+            due = self._stored_since_prune >= self.prune_every and (self.max_bytes is not None or self.max_age is not None)
+            if due and (self._prune_thread is None or not self._prune_thread.is_alive()):
+                self._stored_since_prune = 0
+                # Off the caller's thread: put() runs inside a step's screenshot capture
+                self._prune_thread = threading.Thread(
+                    target=self.prune, kwargs={'keep': (handle,)}, name='ScreenshotStore prune', daemon=True
+                )
+                self._prune_thread.start()
+        return handle
+
+    def put_base64(self, screenshot_b64: str, lease: 'ScreenshotLease | None' = None) -> str:
+        return self.put(base64.b64decode(screenshot_b64), lease)
+
+    def lease(self) -> 'ScreenshotLease':
+        """A ScreenshotService for one run that pins every handle it stores until released"""
+        return ScreenshotLease(self)
+
+    @contextmanager
+    def open(self, handle: str):
+        """Map a stored screenshot read-only; yields a buffer (bytes-like) valid inside the block"""
+        with open(handle, 'rb') as f:
+            with self._lock:
+                self.stats.reads += 1
+            if os.fstat(f.fileno()).st_size == 0:
+                yield b''
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                yield view
+
+    def read_base64(self, handle: str | None) -> str | None:
+        # The whole image is encoded, so a plain read beats mapping it
+        try:
+            with open(handle, 'rb') as f:
+                data = f.read()
+        except (TypeError, OSError):
+            return None
+        with self._lock:
+            self.stats.reads += 1
+        return base64.b64encode(data).decode('ascii')
+
+    def iter_history(self, history):
+        """Yield (history_item, buffer or None) one screenshot at a time, unmapping each after use"""
+        for item in history.history:
+            handle = item.state.screenshot_path if item.state else None
+            if not handle or not os.path.exists(handle):
+                yield item, None
+                continue
+            with self.open(handle) as view:
+                yield item, view
+
+    def disk_usage(self) -> int:
+        return sum(path.stat().st_size for path in self.root.glob(f'*/*{self.extension}'))
+
+    def prune(self, keep=()) -> int:
+        """Delete blobs older than max_age, then the least recently stored until under max_bytes.
+
+        Handles in `keep` and those pinned by a live lease are never deleted. Returns the number
+        of blobs deleted.
+        """
+        keep = {str(handle) for handle in keep if handle}
+        blobs = []
+        for path in self.root.glob(f'*/*{self.extension}'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            blobs.append((stat.st_mtime, stat.st_size, path))
+        blobs.sort()
+        total = sum(size for _, size, _ in blobs)
+        cutoff = time.time() - self.max_age if self.max_age is not None else None
+        removed = 0
+        for mtime, size, path in blobs:
+            expired = cutoff is not None and mtime < cutoff
+            over = self.max_bytes is not None and total > self.max_bytes
+            if not expired and not over:
+                break
+            handle = str(path)
+            if handle in keep:
+                continue
+            with self._lock:
+                if self._pinned[handle]:
+                    continue
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                self.stats.pruned += 1
+                self.stats.bytes_pruned += size
+            total -= size
+            removed += 1
+        return removed
+
+    def join_prune(self, timeout: float | None = None) -> None:
+        """Wait for a background prune started by put(), if one is running"""
+        thread = self._prune_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    # browser-use ScreenshotService interface
+
+    async def store_screenshot(self, screenshot_b64: str, step_number: int) -> str:
+        return await asyncio.to_thread(self.put_base64, screenshot_b64)
+
+    async def get_screenshot(self, screenshot_path: str) -> str | None:
+        return await asyncio.to_thread(self.read_base64, screenshot_path)
+
+
+class ScreenshotLease:
+    """One run's view of a ScreenshotStore: handles it stores, or pin()s, are kept from pruning until release()"""
+
+    def __init__(self, store: ScreenshotStore):
+        self.store = store
+        self._handles: set[str] = set()
+
+    def _add(self, handle: str) -> None:
+        # Called with the store's lock held
+        if handle not in self._handles:
+            self._handles.add(handle)
+            self.store._pinned[handle] += 1
+
+    def pin(self, handles) -> None:
+        """Keep already stored handles, e.g. those of a restored history, from being pruned"""
+        with self.store._lock:
+            for handle in handles:
+                if handle:
+                    self._add(str(handle))
+
+    def release(self) -> None:
+        with self.store._lock:
+            for handle in self._handles:
+                self.store._pinned[handle] -= 1
+                if not self.store._pinned[handle]:
+                    del self.store._pinned[handle]
+            self._handles.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+    # browser-use ScreenshotService interface
+
+    async def store_screenshot(self, screenshot_b64: str, step_number: int) -> str:
+        return await asyncio.to_thread(self.store.put_base64, screenshot_b64, self)
+
+    async def get_screenshot(self, screenshot_path: str) -> str | None:
+        return await self.store.get_screenshot(screenshot_path)
@@ -0,0 +1,245 @@
+import os
+import time
+import queue
+import asyncio
+import inspect
+import logging
+import importlib
+import traceback
+import multiprocessing
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Iterable, Optional, Union
+
+from .batch import BatchStats
+
+
+logger = logging.getLogger(__name__)
+
+_RESULT_POLL_INTERVAL = 0.2
+
+
+@dataclass(frozen=True)
+class TaskSpec:
+    """Picklable description of one agent run.
+
+    Agents, LLM clients and browser sessions cannot cross a process boundary, so each worker
+    builds its own agent by calling `factory(spec)`. `factory` is a module-level callable or an
+    import path such as "my_project.tasks:build_agent", and must return a browser-use Agent or a
+    LangGraphBrowserAgent.
+    """
+    task: str
+    factory: Union[str, Callable]
+    agent_kwargs: dict = field(default_factory=dict)
+    run_kwargs: dict = field(default_factory=dict)
+    task_id: Optional[str] = None
+
+
+@dataclass
+class ShardResult:
+    """Result of a TaskSpec, shipped back to the parent as plain data"""
+    index: int
+    task_id: Optional[str] = None
+    worker: Optional[int] = None
+    error: Optional[str] = None
+    duration: float = 0.0
+    steps: int = 0
+    is_done: bool = False
+    final_result: Optional[str] = None
+    # AgentHistoryList.model_dump(); rebuild with AgentHistoryList.load_from_dict(history, AgentOutput)
+    history: Optional[dict] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def resolve_factory(factory: Union[str, Callable]) -> Callable:
+    if callable(factory):
+        return factory
+    module_name, _, attr = factory.partition(':')
+    if not attr:
+        raise ValueError(f'Factory path must look like "module:callable", got {factory!r}')
+    return getattr(importlib.import_module(module_name), attr)
+
+
+async def _execute_spec(index: int, spec: TaskSpec, worker_id: int, session_pool=None) -> ShardResult:
+    from .agent import LangGraphBrowserAgent
+
+    start = time.perf_counter()
+    result = ShardResult(index=index, task_id=spec.task_id, worker=worker_id)
+    try:
+        agent = resolve_factory(spec.factory)(spec)
+        if inspect.isawaitable(agent):
+            agent = await agent
+        if not isinstance(agent, LangGraphBrowserAgent):
+            agent = LangGraphBrowserAgent(agent, session_pool=session_pool)
+        history = await agent.run(**spec.run_kwargs)
+        result.steps = len(history.history)
+        result.is_done = bool(history.is_done())
+        result.final_result = history.final_result()
+        result.history = history.model_dump()
+    except Exception as e:
+        result.error = f'{type(e).__name__}: {e}'
+        logger.debug(traceback.format_exc())
+    result.duration = time.perf_counter() - start
+    return result
+
+
+async def _worker_loop(worker_id: int, task_queue, result_queue, concurrency: int, pool_size: int) -> None:
+    idle = asyncio.Semaphore(concurrency)
+    running: set[asyncio.Task] = set()
+    session_pool = None
+    if pool_size > 0:
+        from .pool import BrowserSessionPool
+        session_pool = BrowserSessionPool(size=pool_size)
+
+    async def run(index: int, spec: TaskSpec):
+        try:
+            result_queue.put(('result', worker_id, await _execute_spec(index, spec, worker_id, session_pool)))
+        finally:
+            idle.release()
+
+    try:
+        while True:
+            # Take a task only once a slot is free, so queued tasks stay available to idle workers
+            await idle.acquire()
+            item = await asyncio.to_thread(task_queue.get)
+            if item is None:
+                break
+            index, spec = item
+            result_queue.put(('taken', worker_id, index))
+            task = asyncio.create_task(run(index, spec))
+            running.add(task)
+            task.add_done_callback(running.discard)
+        await asyncio.gather(*running)
+    finally:
+        if session_pool is not None:
+            await session_pool.close()
+
+
+def _worker_main(worker_id: int, task_queue, result_queue, concurrency: int, pool_size: int) -> None:
+    asyncio.run(_worker_loop(worker_id, task_queue, result_queue, concurrency, pool_size))
+
+
+class ShardedExecutor:
+    """Shards TaskSpecs across worker processes, each running its own event loop of agents.
+
+    Tasks are handed out from a shared queue rather than pre-partitioned, and a worker only
+    takes one when it has a free slot, so slow tasks do not leave other cores idle. Results
+    stream back in completion order; if a worker process dies, the tasks it had taken are
+    reported as failed and the other workers keep going.
+    """
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        concurrency_per_process: int = 1,
+        session_pool_size: int = 0,
+        start_method: str = 'spawn',
+    ):
+        self.processes = processes or os.cpu_count() or 1
+        if self.processes < 1 or concurrency_per_process < 1:
+            raise ValueError('ShardedExecutor needs at least one process and one task per process')
+        self.concurrency_per_process = concurrency_per_process
+        self.session_pool_size = session_pool_size
+        self.start_method = start_method
+        self.stats = BatchStats()
+
+    async def run(self, specs: Iterable[TaskSpec]) -> AsyncIterator[ShardResult]:
+        """Yield a ShardResult for every spec as soon as it completes in any worker"""
+        specs = list(specs)
+        self.stats = BatchStats()
+        if not specs:
+            return
+
+        loop = asyncio.get_running_loop()
+        batch_start = time.perf_counter()
+        ctx = multiprocessing.get_context(self.start_method)
+        task_queue = ctx.Queue()
+        result_queue = ctx.Queue()
+        for item in enumerate(specs):
+            task_queue.put(item)
+
+        n_processes = min(self.processes, len(specs))
+        for _ in range(n_processes):
+            task_queue.put(None)
+
+        workers = {
+            worker_id: ctx.Process(
+                target=_worker_main,
+                args=(worker_id, task_queue, result_queue, self.concurrency_per_process, self.session_pool_size),
+                daemon=True,
+            )
+            for worker_id in range(n_processes)
+        }
+        for process in workers.values():
+            process.start()
+
+        in_flight: dict[int, set] = {worker_id: set() for worker_id in workers}
+        outstanding = set(range(len(specs)))
+        try:
+            while outstanding:
+                message = await loop.run_in_executor(None, _poll, result_queue)
+                if message is None:
+                    for result in self._reap_dead_workers(workers, in_flight, outstanding, specs):
+                        self._record(result, batch_start)
+                        yield result
+                    continue
+
+                kind, worker_id, payload = message
+                if kind == 'taken':
+                    in_flight[worker_id].add(payload)
+                elif payload.index in outstanding:
+                    in_flight[worker_id].discard(payload.index)
+                    outstanding.discard(payload.index)
+                    self._record(payload, batch_start)
+                    yield payload
+        finally:
+            for process in workers.values():
+                if process.is_alive():
+                    process.terminate()
+            for process in workers.values():
+                process.join(timeout=5)
+            self.stats.elapsed = time.perf_counter() - batch_start
+
+    def _reap_dead_workers(self, workers, in_flight, outstanding, specs) -> list:
+        failed = []
+        for worker_id, process in list(workers.items()):
+            if process.is_alive():
+                continue
+            if process.exitcode not in (0, None):
+                for index in sorted(in_flight[worker_id] & outstanding):
+                    failed.append(ShardResult(
+                        index=index,
+                        task_id=specs[index].task_id,
+                        worker=worker_id,
+                        error=f'Worker process exited with code {process.exitcode}',
+                    ))
+            in_flight[worker_id].clear()
+            del workers[worker_id]
+
+        if not workers:
+            # Nobody is left to pick up queued tasks
+            reported = {result.index for result in failed}
+            for index in sorted(outstanding - reported):
+                failed.append(ShardResult(index=index, task_id=specs[index].task_id, error='No live worker processes left'))
+
+        for result in failed:
+            outstanding.discard(result.index)
+        return failed
+
+    def _record(self, result: ShardResult, batch_start: float) -> None:
+        if result.ok:
+            self.stats.completed += 1
+            self.stats.step_counts.append(result.steps)
+        else:
+            self.stats.failed += 1
+        self.stats.latencies.append(result.duration)
+        self.stats.elapsed = time.perf_counter() - batch_start
+
+
+def _poll(result_queue) -> Any:
+    try:
+        return result_queue.get(timeout=_RESULT_POLL_INTERVAL)
+    except queue.Empty:
+        return None
@@ -0,0 +1,121 @@
+import time
+import asyncio
+from dataclasses import dataclass, field, asdict
+
+
+
+# Longest wait for the event bus to acknowledge the cloud session event before the task event
+EVENT_ACK_TIMEOUT = 5.0
+
+
+@dataclass
+class StartupReport:
+    """How long one run took to reach its first step, and what it spent the time on"""
+    time_to_first_step: float = 0.0
+    phases: dict = field(default_factory=dict)  # phase -> duration; phases overlap, so these sum past the total
+
+    @property
+    def critical_phase(self) -> str:
+        return max(self.phases, key=self.phases.get, default='')
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data['critical_phase'] = self.critical_phase
+        return data
+
+
+async def _timed(report: StartupReport, phase: str, awaitable):
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        report.phases[phase] = time.perf_counter() - start
+
+
+async def _log_run(agent_instance) -> None:
+    agent = agent_instance.original_agent
+    await agent._log_agent_run()
+    agent.logger.debug(
+        f'🔧 Agent setup: Agent Session ID {agent.session_id[-4:]}, Task ID {agent.task_id[-4:]}, Browser Session ID {agent.browser_session.id[-4:] if agent.browser_session else "None"} {"(connecting via CDP)" if (agent.browser_session and agent.browser_session.cdp_url) else "(launching local browser)"}'
+    )
+
+
+async def _dispatch_cloud_events(agent_instance) -> None:
+    agent = agent_instance.original_agent
+    if not agent.state.session_initialized:
+        if agent.enable_cloud_sync:
+            agent.logger.debug('📡 Dispatching CreateAgentSessionEvent...')
+            from browser_use.agent.cloud_events import CreateAgentSessionEvent
+            session_event = agent.eventbus.dispatch(CreateAgentSessionEvent.from_agent(agent))
+            # The task event must reach the cloud after its session; wait for the handlers to finish
+            try:
+                await asyncio.wait_for(session_event, EVENT_ACK_TIMEOUT)
+            except asyncio.TimeoutError:
+                agent.logger.debug(f'📡 CreateAgentSessionEvent not acknowledged after {EVENT_ACK_TIMEOUT}s, continuing')
+        agent.state.session_initialized = True
+
+    if agent.enable_cloud_sync:
+        agent.logger.debug('📡 Dispatching CreateAgentTaskEvent...')
+        from browser_use.agent.cloud_events import CreateAgentTaskEvent
+        agent.eventbus.dispatch(CreateAgentTaskEvent.from_agent(agent))
+
+
+async def _open_browser(agent_instance, report: StartupReport, run_initial_actions: bool) -> None:
+    agent = agent_instance.original_agent
+    if agent_instance.session_pool is not None:
+        await _timed(report, 'browser_start', agent_instance._lease_browser_session())
+    else:
+        await _timed(report, 'browser_start', agent.browser_session.start())
+    if run_initial_actions:
+        await _timed(report, 'initial_actions', agent._execute_initial_actions())
+
+
+async def _gather_or_cancel(*awaitables) -> None:
+    """Run `awaitables` concurrently; on the first failure cancel the rest and raise it"""
+    tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    for task in tasks:
+        if task in done and not task.cancelled() and task.exception() is not None:
+            raise task.exception()
+
+
+async def start_run(agent_instance, run_initial_actions: bool = True) -> StartupReport:
+    """Bring the agent up to its first step, overlapping the phases that do not depend on each other.
+
+    Browser launch (then the initial actions, which need the browser) runs alongside the run
+    logging (including browser-use's version check) and the cloud session/task events. The
+    report's time_to_first_step is filled in by mark_first_step().
+    """
+    agent = agent_instance.original_agent
+    report = StartupReport()
+    agent._session_start_time = time.time()
+    agent._task_start_time = agent._session_start_time
+
+    await _gather_or_cancel(
+        _timed(report, 'log_run', _log_run(agent_instance)),
+        _timed(report, 'cloud_events', _dispatch_cloud_events(agent_instance)),
+        _open_browser(agent_instance, report, run_initial_actions),
+    )
+    agent._log_first_step_startup()
+    return report
+
+
+def mark_first_step(agent_instance, report: StartupReport, run_start: float) -> None:
+    """Record time-to-first-step, from run() being called to the graph starting its first step"""
+    report.time_to_first_step = time.perf_counter() - run_start
+    if agent_instance.metrics is not None:
+        agent_instance.metrics.observe('time_to_first_step', report.time_to_first_step)
+    agent_instance.original_agent.logger.debug(
+        f'🚀 First step after {report.time_to_first_step:.2f}s ('
+        + ', '.join(f'{phase} {duration:.2f}s' for phase, duration in report.phases.items()) + ')'
+    )
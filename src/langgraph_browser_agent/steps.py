@@ -0,0 +1,190 @@
+import time
+import asyncio
+from dataclasses import dataclass, field, asdict
+from typing import AsyncIterator, Awaitable
+
+
+@dataclass
+class StepRecord:
+    """Compact summary of one finalized step, as yielded by LangGraphBrowserAgent.astream_steps()"""
+    step: int
+    url: str = ''
+    title: str = ''
+    actions: list = field(default_factory=list)  # action dumps, e.g. {'click': {'index': 3}}
+    results: list = field(default_factory=list)  # per action: extracted_content / error / is_done / success
+    duration: float = 0.0  # step start to finalized, from the history item's metadata
+    timings: dict = field(default_factory=dict)  # node -> seconds spent in it this step
+    tokens: dict = field(default_factory=dict)  # prompt/completion/total tokens of LLM calls since the previous record
+
+    @property
+    def is_done(self) -> bool:
+        return any(result.get('is_done') for result in self.results)
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data['is_done'] = self.is_done
+        return data
+
+
+@dataclass
+class StepStreamStats:
+    """Counters for one astream_steps() consumer"""
+    records: int = 0
+    max_buffered: int = 0
+    blocked_time: float = 0.0  # how long the graph waited on a full buffer, i.e. on the consumer
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class _StepSink:
+    """Bounded buffer between a run's graph stream and its astream_steps() consumer, plus the
+    per-step bookkeeping the records are built from"""
+
+    def __init__(self, buffer: int):
+        if buffer < 1:
+            raise ValueError('astream_steps buffer must be at least 1')
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer)
+        self.stats = StepStreamStats()
+        self.timings: dict[str, float] = {}
+        self.history_items = 0
+        self.usage_entries = 0
+        self.writer = None  # the running node's LangGraph stream writer
+
+    async def put(self, record: StepRecord) -> None:
+        start = time.perf_counter()
+        await self.queue.put(record)
+        self.stats.blocked_time += time.perf_counter() - start
+        self.stats.records += 1
+        self.stats.max_buffered = max(self.stats.max_buffered, self.queue.qsize())
+
+
+def _sink(agent_instance) -> _StepSink | None:
+    return agent_instance._step_sink
+
+
+def streams_steps(agent_instance) -> bool:
+    return _sink(agent_instance) is not None
+
+
+def set_stream_writer(agent_instance, writer) -> None:
+    """Hand the running node's injected stream writer to the agent's step sink, if it is streaming steps"""
+    sink = _sink(agent_instance)
+    if sink is not None:
+        sink.writer = writer
+
+
+def observe_phase(agent_instance, node: str, duration: float) -> None:
+    """Add a node's duration to the current step's timings, if the agent is streaming steps"""
+    sink = _sink(agent_instance)
+    if sink is not None:
+        sink.timings[node] = sink.timings.get(node, 0.0) + duration
+
+
+def start_step_record(agent_instance) -> None:
+    """Clear the timings left over from a step that timed out without being finalized"""
+    sink = _sink(agent_instance)
+    if sink is not None:
+        sink.timings = {}
+
+
+def _token_usage(agent_instance, sink: _StepSink) -> dict:
+    service = getattr(agent_instance.original_agent, 'token_cost_service', None)
+    usage_history = getattr(service, 'usage_history', None)
+    if not isinstance(usage_history, list):
+        return {}
+    if len(usage_history) < sink.usage_entries:  # the service was reset
+        sink.usage_entries = 0
+    entries = usage_history[sink.usage_entries:]
+    sink.usage_entries = len(usage_history)
+    return {
+        'prompt_tokens': sum(entry.usage.prompt_tokens for entry in entries),
+        'completion_tokens': sum(entry.usage.completion_tokens for entry in entries),
+        'total_tokens': sum(entry.usage.total_tokens for entry in entries),
+    }
+
+
+def _record(item, step: int, timings: dict, tokens: dict) -> StepRecord:
+    actions = [action.model_dump(exclude_none=True) for action in item.model_output.action] if item.model_output else []
+    results = [
+        {key: value for key, value in (('extracted_content', result.extracted_content), ('error', result.error),
+                                       ('is_done', result.is_done), ('success', result.success)) if value is not None}
+        for result in item.result
+    ]
+    return StepRecord(
+        step=item.metadata.step_number if item.metadata is not None else step,
+        url=item.state.url or '',
+        title=item.state.title or '',
+        actions=actions,
+        results=results,
+        duration=item.metadata.duration_seconds if item.metadata is not None else 0.0,
+        timings=timings,
+        tokens=tokens,
+    )
+
+
+def emit_step_records(agent_instance) -> None:
+    """Write a StepRecord to the graph's custom stream for each history item finalized since the last call"""
+    sink = _sink(agent_instance)
+    if sink is None:
+        return
+    history = agent_instance.original_agent.history.history
+    if sink.history_items >= len(history):
+        return
+    writer = sink.writer
+    if writer is None:
+        # Called outside a node bound by the graph; needs Python 3.11+ in async code
+        from langgraph.config import get_stream_writer
+        writer = get_stream_writer()
+    timings, sink.timings = sink.timings, {}
+    tokens = _token_usage(agent_instance, sink)
+    for item in history[sink.history_items:]:
+        writer(_record(item, agent_instance.current_step - 1, timings, tokens))
+        timings, tokens = {}, {}
+    sink.history_items = len(history)
+
+
+async def run_graph(agent_instance, initial_state, config) -> None:
+    """Run the agent's graph; while steps are streamed, through astream so a full buffer holds it back"""
+    sink = _sink(agent_instance)
+    if sink is None:
+        await agent_instance.graph.ainvoke(initial_state, config)
+        return
+    sink.history_items = len(agent_instance.original_agent.history.history)
+    async for record in agent_instance.graph.astream(initial_state, config, stream_mode='custom'):
+        await sink.put(record)
+
+
+async def stream_steps(agent_instance, run: Awaitable, buffer: int = 8) -> AsyncIterator[StepRecord]:
+    """Yield the StepRecords of `run` (the agent's run() coroutine) as its steps are finalized.
+
+    At most `buffer` records wait for the consumer; when the buffer is full the graph does not
+    start another superstep until one is taken. The run's exception, if any, is raised after the
+    records before it. Closing the generator early cancels the run.
+    """
+    sink = _StepSink(buffer)
+    agent_instance._step_sink = sink
+    agent_instance.step_stream_stats = sink.stats
+    run_task = asyncio.ensure_future(run)
+    get = None
+    try:
+        while True:
+            get = asyncio.ensure_future(sink.queue.get())
+            done, _ = await asyncio.wait({get, run_task}, return_when=asyncio.FIRST_COMPLETED)
+            if get in done:
+                yield get.result()
+                continue
+            # A cancelled get leaves its item in the queue
+            get.cancel()
+            await asyncio.gather(get, return_exceptions=True)
+            while not sink.queue.empty():
+                yield sink.queue.get_nowait()
+            run_task.result()
+            return
+    finally:
+        if get is not None and not get.done():
+            get.cancel()
+        if not run_task.done():
+            run_task.cancel()
+            await asyncio.gather(run_task, return_exceptions=True)
+        agent_instance._step_sink = None
@@ -0,0 +1,322 @@
+import json
+import time
+import asyncio
+from dataclasses import dataclass, asdict
+
+from browser_use.llm.views import ChatInvokeCompletion, ChatInvokeUsage
+
+from .hedge import get_next_action_with_hedging
+from .cache import get_next_action_with_cache
+
+
+@dataclass
+class StreamingStats:
+    """How much browser work streaming overlapped with LLM generation"""
+    streamed_calls: int = 0
+    actions_parsed: int = 0
+    actions_dispatched_early: int = 0  # started before the model finished generating
+    rollbacks: int = 0
+    overlap_time: float = 0.0  # from the first early action to the end of generation
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class ActionStreamParser:
+    """Incrementally extracts the elements of a JSON object's top-level "action" array.
+
+    feed() takes arbitrary text chunks of the model's JSON output and returns every action
+    object that became complete, decoded, in order. text holds everything fed so far.
+    """
+
+    def __init__(self, key: str = 'action'):
+        self.key = key
+        self.text = ''
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string = None
+        self._expect_array = False
+        self._array_depth = None
+        self._element_start = None
+
+    def feed(self, chunk: str) -> list[dict]:
+        self.text += chunk
+        text = self.text
+        completed = []
+        for i in range(self._pos, len(text)):
+            char = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_string = text[self._string_start:i]
+                continue
+            if char == '"':
+                self._in_string = True
+                self._string_start = i + 1
+            elif char == ':':
+                self._expect_array = self._depth == 1 and self._last_string == self.key
+            elif char in '{[':
+                if char == '[' and self._expect_array and self._array_depth is None:
+                    self._array_depth = self._depth + 1
+                elif char == '{' and self._depth == self._array_depth:
+                    self._element_start = i
+                self._expect_array = False
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == self._array_depth and self._element_start is not None:
+                    try:
+                        completed.append(json.loads(text[self._element_start:i + 1]))
+                    except ValueError:
+                        completed.append(None)  # left for the final validation to reject
+                    self._element_start = None
+                elif self._array_depth is not None and self._depth == self._array_depth - 1:
+                    # Array closed; later "action" keys (e.g. nested) are ignored
+                    self._array_depth = -1
+            elif not char.isspace():
+                self._expect_array = False
+        self._pos = len(text)
+        return completed
+
+
+class _Dispatch:
+    """Executes one step's actions as they stream in, with browser-use's multi_act guards"""
+
+    def __init__(self, agent_instance):
+        self.agent_instance = agent_instance
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.results = []
+        self.executed = []
+        self.parsed = 0  # position in the streamed action list, empty actions included
+        self.dispatched = 0
+        self.output = None  # the completion the dispatched actions were parsed from
+        self.stopped = False
+        self.stream_end = None
+        self.first_start = None
+        self.task = asyncio.ensure_future(self._run())
+
+    def put(self, action) -> None:
+        self.parsed += 1
+        if action.model_dump(exclude_unset=True):
+            self.dispatched += 1
+            self.queue.put_nowait(action)
+
+    async def finish(self):
+        """Run nothing further after what is queued and return the results"""
+        self.queue.put_nowait(None)
+        return await self.task
+
+    async def _run(self):
+        agent = self.agent_instance.original_agent
+        session = agent.browser_session
+        stats = self.agent_instance.streaming_stats
+        while True:
+            action = await self.queue.get()
+            if action is None:
+                return self.results
+            index = len(self.results)
+            if self.stopped or index >= agent.settings.max_actions_per_step:
+                self.stopped = True
+                continue
+            action_data = action.model_dump(exclude_unset=True)
+            action_name = next(iter(action_data.keys())) if action_data else 'unknown'
+            if index > 0:
+                # Same rules as multi_act: done only as a single action, pause between actions
+                if action_data.get('done') is not None:
+                    self.stopped = True
+                    continue
+                await asyncio.sleep(agent.browser_profile.wait_between_actions)
+
+            pre_action_url = await session.get_current_page_url()
+            pre_action_focus = session.agent_focus_target_id
+            started = time.monotonic()
+            if self.stream_end is None:
+                stats.actions_dispatched_early += 1
+                if self.first_start is None:
+                    self.first_start = started
+            results = await agent.multi_act([action])
+            self.results.extend(results)
+            self.executed.append(action)
+            if not results or results[-1].is_done or results[-1].error:
+                self.stopped = True
+                continue
+
+            registered_action = agent.tools.registry.registry.actions.get(action_name)
+            if registered_action and registered_action.terminates_sequence:
+                agent.logger.info(f'Action "{action_name}" terminates sequence — skipping remaining streamed action(s)')
+                self.stopped = True
+                continue
+            if await session.get_current_page_url() != pre_action_url or session.agent_focus_target_id != pre_action_focus:
+                agent.logger.info(f'Page changed after "{action_name}" — skipping remaining streamed action(s)')
+                self.stopped = True
+
+    def end_of_stream(self) -> None:
+        self.stream_end = time.monotonic()
+        if self.first_start is not None:
+            self.agent_instance.streaming_stats.overlap_time += self.stream_end - self.first_start
+
+
+class _StreamingLLM:
+    """Stands in for the agent's LLM during get_next_action, streaming from agent_instance.streaming_llm"""
+
+    def __init__(self, llm, agent_instance):
+        self._llm = llm
+        self._agent_instance = agent_instance
+        self.urls_replaced = {}
+
+    async def ainvoke(self, messages, output_format=None, **kwargs):
+        agent_instance = self._agent_instance
+        agent = agent_instance.original_agent
+        stream_llm = agent_instance.streaming_llm
+        stats = agent_instance.streaming_stats
+        stats.streamed_calls += 1
+        dispatch = agent_instance._dispatch
+        if dispatch is None:
+            dispatch = agent_instance._dispatch = _Dispatch(agent_instance)
+        # browser-use asks again after an output with no actions; a dispatch that already has
+        # actions from an earlier generation is left alone and invalidated once executed
+        owner = dispatching = dispatch.dispatched == 0
+        if owner:
+            dispatch.parsed = 0
+            dispatch.stopped = False
+
+        parser = ActionStreamParser()
+        usage = None
+        try:
+            async for chunk in stream_llm.astream(messages, output_format, **kwargs):
+                if isinstance(chunk, ChatInvokeUsage):
+                    usage = chunk
+                    continue
+                for item in parser.feed(chunk):
+                    stats.actions_parsed += 1
+                    if not dispatching:
+                        continue
+                    try:
+                        action = agent.ActionModel.model_validate(item)
+                    except Exception:
+                        # Leave it and everything after it to the validated output
+                        dispatching = False
+                        continue
+                    if self.urls_replaced:
+                        agent._recursive_process_all_strings_inside_pydantic_model(action, self.urls_replaced)
+                    dispatch.put(action)
+        except BaseException:
+            # browser-use may regenerate the output (fallback LLM); nothing more of this one runs
+            dispatch.stopped = True
+            raise
+        if owner:
+            dispatch.end_of_stream()
+
+        if usage is not None:
+            agent.token_cost_service.add_usage(str(getattr(stream_llm, 'model', self._llm.model)), usage)
+        completion = output_format.model_validate_json(parser.text) if output_format is not None else parser.text
+        if owner:
+            dispatch.output = completion
+        return ChatInvokeCompletion(completion=completion, usage=usage)
+
+    def __getattr__(self, name):
+        return getattr(self._llm, name)
+
+
+async def get_next_action_with_streaming(agent_instance, browser_state_summary):
+    """Run get_next_action, dispatching actions from agent_instance.streaming_llm as they stream in, if set.
+
+    Streaming replaces hedging for the call; a decision cache hit does not stream. If the
+    output fails validation, nothing further is dispatched, the action in flight is allowed
+    to finish and its results are discarded; the error names the actions that already ran.
+    An output regenerated after the stream (browser-use's fallback LLM) invalidates the
+    dispatch the same way when the actions are executed.
+    If the phase is cancelled (timeout), the dispatch is cancelled with it.
+    """
+    agent = agent_instance.original_agent
+    if agent_instance.streaming_llm is None:
+        return await get_next_action_with_hedging(agent_instance, browser_state_summary)
+
+    # A step that timed out between phases never collected its dispatch
+    discard_dispatch(agent_instance)
+    llm = agent.llm
+    streaming = agent.llm = _StreamingLLM(llm, agent_instance)
+    replace_urls = agent._process_messsages_and_replace_long_urls_shorter_ones
+
+    def capture_replaced_urls(input_messages):
+        streaming.urls_replaced = replace_urls(input_messages)
+        return streaming.urls_replaced
+
+    agent._process_messsages_and_replace_long_urls_shorter_ones = capture_replaced_urls
+    try:
+        return await get_next_action_with_cache(agent_instance, browser_state_summary)
+    except asyncio.CancelledError:
+        discard_dispatch(agent_instance)
+        raise
+    except Exception as e:
+        executed = await rollback_dispatch(agent_instance)
+        if executed:
+            raise RuntimeError(f'{e} (already executed from the partial output: {", ".join(executed)})') from e
+        raise
+    finally:
+        agent._process_messsages_and_replace_long_urls_shorter_ones = replace_urls
+        if agent.llm is streaming:
+            agent.llm = llm
+
+
+async def execute_actions_with_dispatch(agent_instance):
+    """Finish the step's streamed dispatch with any actions it has not seen, or run _execute_actions"""
+    agent = agent_instance.original_agent
+    dispatch = agent_instance._dispatch
+    if dispatch is None:
+        return await agent._execute_actions()
+    agent_instance._dispatch = None
+    if agent.state.last_model_output is None:
+        await _stop(dispatch)
+        raise ValueError('No model output to execute actions from')
+    if agent.state.last_model_output is not dispatch.output:
+        # Regenerated after the stream, e.g. by browser-use's fallback LLM: what was parsed is stale
+        agent_instance.streaming_stats.rollbacks += 1
+        await _stop(dispatch)
+        if dispatch.executed:
+            executed = ', '.join(next(iter(action.model_dump(exclude_unset=True)), 'unknown') for action in dispatch.executed)
+            raise RuntimeError(f'Model output was regenerated after streamed actions already ran: {executed}')
+        return await agent._execute_actions()
+    # Actions the parser never saw, e.g. browser-use's noop done after an empty output
+    for action in agent.state.last_model_output.action[dispatch.parsed:]:
+        dispatch.put(action)
+    try:
+        agent.state.last_result = await dispatch.finish()
+    except BaseException:
+        dispatch.task.cancel()
+        raise
+
+
+async def rollback_dispatch(agent_instance) -> list[str]:
+    """Stop a streamed dispatch whose output was rejected; returns the names of actions that already ran"""
+    dispatch = agent_instance._dispatch
+    if dispatch is None:
+        return []
+    agent_instance._dispatch = None
+    agent_instance.streaming_stats.rollbacks += 1
+    await _stop(dispatch)
+    return [next(iter(action.model_dump(exclude_unset=True)), 'unknown') for action in dispatch.executed]
+
+
+def discard_dispatch(agent_instance) -> None:
+    """Cancel a streamed dispatch outright, e.g. when its phase timed out"""
+    dispatch = agent_instance._dispatch
+    if dispatch is not None:
+        agent_instance._dispatch = None
+        dispatch.task.cancel()
+
+
+async def _stop(dispatch: _Dispatch) -> None:
+    dispatch.stopped = True
+    try:
+        await dispatch.finish()
+    except Exception:
+        pass
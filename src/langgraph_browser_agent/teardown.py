@@ -0,0 +1,117 @@
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, asdict
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TeardownStats:
+    """Counters for run teardowns moved off the critical path"""
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    cancelled: int = 0
+    max_in_flight: int = 0
+    total_time: float = 0.0  # summed teardown durations, i.e. tail latency runs no longer wait for
+    max_time: float = 0.0
+
+    @property
+    def avg_time(self) -> float:
+        finished = self.completed + self.failed + self.timed_out
+        return self.total_time / finished if finished else 0.0
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data['avg_time'] = self.avg_time
+        return data
+
+
+class BackgroundTeardown:
+    """Runs agent teardowns in tracked background tasks so run() can return as soon as the graph ends.
+
+    A LangGraphBrowserAgent given one hands it the end-of-run work (usage summary logging,
+    telemetry, cloud sync, GIF trailer, event bus shutdown, closing or returning the browser
+    session) instead of awaiting it. At most `max_concurrency` teardowns run at once, each
+    cancelled after `timeout` seconds; the rest wait their turn. Call drain() before the
+    process or event loop exits. Share one instance across agents.
+    """
+
+    def __init__(self, max_concurrency: int = 4, timeout: float | None = 60.0):
+        if max_concurrency < 1:
+            raise ValueError('BackgroundTeardown max_concurrency must be at least 1')
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.stats = TeardownStats()
+        self._tasks: set[asyncio.Task] = set()
+        self._semaphore: asyncio.Semaphore | None = None
+        self._running = 0
+
+    @property
+    def pending(self) -> int:
+        """Teardowns submitted and not yet finished, running or waiting"""
+        return len(self._tasks)
+
+    def submit(self, coro, name: str = 'teardown') -> asyncio.Task:
+        """Schedule `coro` to run in the background; returns its task"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.stats.submitted += 1
+        task = asyncio.ensure_future(self._run(coro, name))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def drain(self, timeout: float | None = None) -> bool:
+        """Wait for every pending teardown, including ones submitted meanwhile.
+
+        Returns True if all finished. After `timeout` seconds the remaining ones are cancelled
+        and False is returned.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self._tasks:
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                break
+            await asyncio.wait(set(self._tasks), timeout=remaining)
+        if not self._tasks:
+            return True
+        tasks = set(self._tasks)
+        logger.warning(f'Cancelling {len(tasks)} teardown(s) still running after {timeout}s')
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return False
+
+    async def _run(self, coro, name: str) -> None:
+        try:
+            async with self._semaphore:
+                self._running += 1
+                self.stats.max_in_flight = max(self.stats.max_in_flight, self._running)
+                start = time.perf_counter()
+                try:
+                    if self.timeout is not None:
+                        await asyncio.wait_for(coro, self.timeout)
+                    else:
+                        await coro
+                    self.stats.completed += 1
+                except asyncio.TimeoutError:
+                    self.stats.timed_out += 1
+                    logger.error(f'{name} did not finish within {self.timeout}s and was cancelled')
+                except Exception as e:
+                    self.stats.failed += 1
+                    logger.error(f'{name} failed: {e}', exc_info=True)
+                finally:
+                    self._running -= 1
+                    duration = time.perf_counter() - start
+                    self.stats.total_time += duration
+                    self.stats.max_time = max(self.stats.max_time, duration)
+        except asyncio.CancelledError:
+            self.stats.cancelled += 1
+            raise
+        finally:
+            # A teardown cancelled while waiting for a slot never started its coroutine
+            coro.close()
@@ -0,0 +1,282 @@
+import os
+import json
+import time
+import asyncio
+import tempfile
+import threading
+from collections import deque
+from dataclasses import dataclass, asdict, replace
+
+from browser_use.agent.views import ActionResult
+
+from .instrumentation import _site
+from .metrics import percentile
+
+
+# Step phases that run under a cancellation deadline, in step order
+PHASES = ('prepare_context', 'get_next_action', 'execute_actions', 'evaluate_result')
+
+# Latency key for a whole step (start of prepare_context to the end of finalize_step)
+STEP = 'step'
+
+# Samples for any domain, used until a domain has enough of its own
+ANY_DOMAIN = '*'
+
+ADAPTIVE_FORMAT_VERSION = 1
+
+
+@dataclass
+class PhaseBudgets:
+    """Per-phase time caps in seconds, on top of the shared step deadline (step_timeout).
+
+    Each phase is cancelled when it reaches min(its budget, time left in the step); a phase
+    with no budget (None) may use whatever the step has left. LangGraphBrowserAgent.run()
+    takes these as `phase_budgets`.
+    """
+    prepare_context: float | None = None
+    get_next_action: float | None = None
+    execute_actions: float | None = None
+    evaluate_result: float | None = None
+
+    def limit(self, phase: str, remaining: float) -> tuple[float, bool]:
+        """(seconds the phase may run, whether that limit is the phase budget rather than the step deadline)"""
+        budget = getattr(self, phase, None)
+        if budget is not None and budget < remaining:
+            return budget, True
+        return remaining, False
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class TimeoutDecision:
+    """The timeouts AdaptiveTimeouts chose for one step"""
+    domain: str
+    model: str
+    step_timeout: float
+    phase_budgets: PhaseBudgets
+    adaptive: tuple[str, ...] = ()  # phases (and 'step') whose value was learned rather than configured
+    samples: int = 0  # fewest samples behind any learned value
+
+    def describe(self) -> str:
+        budgets = ', '.join(
+            f'{phase} {budget:.1f}s' for phase in PHASES if (budget := getattr(self.phase_budgets, phase)) is not None
+        )
+        return f'step {self.step_timeout:.1f}s' + (f' ({budgets})' if budgets else '')
+
+
+class AdaptiveTimeouts:
+    """Learns step and phase timeouts from observed latency, per domain and model.
+
+    Every phase that finishes, and every step that finalizes, adds its duration to a rolling
+    window of `window` samples keyed by (phase, domain, model). A phase that is cancelled adds
+    the time it was given, so repeated timeouts raise its budget. Once a key has `min_samples`,
+    its timeout becomes percentile(`quantile`) * `multiplier` + `margin`, clamped to
+    [`min_timeout`, `max_timeout`]. Until then it falls back to the model's samples for any
+    domain, then to the configured step_timeout / PhaseBudgets. Share one instance across
+    agents; with a `path` the samples are loaded on creation and written back by save().
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        quantile: float = 99.0,
+        multiplier: float = 1.5,
+        margin: float = 1.0,
+        min_samples: int = 20,
+        window: int = 200,
+        min_timeout: float = 1.0,
+        max_timeout: float = 300.0,
+    ):
+        self.path = path
+        self.quantile = quantile
+        self.multiplier = multiplier
+        self.margin = margin
+        self.min_samples = min_samples
+        self.window = window
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self._samples: dict[tuple[str, str, str], deque] = {}
+        self._timeouts: dict[tuple[str, str, str], int] = {}
+        self._logged: dict[tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def observe(self, phase: str, domain: str, model: str, duration: float, timed_out: bool = False) -> None:
+        with self._lock:
+            for key in {(phase, domain, model), (phase, ANY_DOMAIN, model)}:
+                samples = self._samples.get(key)
+                if samples is None:
+                    samples = self._samples[key] = deque(maxlen=self.window)
+                samples.append(duration)
+                if timed_out:
+                    self._timeouts[key] = self._timeouts.get(key, 0) + 1
+
+    def timeout(self, phase: str, domain: str, model: str) -> tuple[float, int] | None:
+        """(learned timeout, samples behind it) for a phase or STEP, or None while there are too few samples"""
+        with self._lock:
+            for key in ((phase, domain, model), (phase, ANY_DOMAIN, model)):
+                samples = self._samples.get(key)
+                if samples is not None and len(samples) >= self.min_samples:
+                    value = percentile(samples, self.quantile) * self.multiplier + self.margin
+                    return min(max(value, self.min_timeout), self.max_timeout), len(samples)
+        return None
+
+    def decide(self, domain: str, model: str, step_timeout: float, phase_budgets: PhaseBudgets | None = None) -> TimeoutDecision:
+        """Timeouts for the next step, falling back to the configured ones where nothing is learned yet"""
+        budgets = phase_budgets or PhaseBudgets()
+        learned = {}
+        for phase in PHASES + (STEP,):
+            result = self.timeout(phase, domain, model)
+            if result is not None:
+                learned[phase] = result
+        if STEP in learned:
+            step_timeout = learned[STEP][0]
+        budgets = replace(budgets, **{phase: value for phase, (value, _) in learned.items() if phase != STEP})
+        return TimeoutDecision(
+            domain=domain,
+            model=model,
+            step_timeout=step_timeout,
+            phase_budgets=budgets,
+            adaptive=tuple(learned),
+            samples=min((count for _, count in learned.values()), default=0),
+        )
+
+    def stats(self) -> dict:
+        """{'phase domain model': {'samples', 'timeouts', 'p50', 'p99'}}"""
+        with self._lock:
+            return {
+                ' '.join(key): {
+                    'samples': len(samples),
+                    'timeouts': self._timeouts.get(key, 0),
+                    'p50': percentile(samples, 50),
+                    'p99': percentile(samples, 99),
+                }
+                for key, samples in sorted(self._samples.items())
+            }
+
+    def save(self, path: str | None = None) -> None:
+        """Atomically write the samples as JSON to `path` (default: the path given at creation)"""
+        path = path or self.path
+        if path is None:
+            return
+        with self._lock:
+            data = {
+                'version': ADAPTIVE_FORMAT_VERSION,
+                'entries': [
+                    {'phase': phase, 'domain': domain, 'model': model, 'samples': list(samples), 'timeouts': self._timeouts.get((phase, domain, model), 0)}
+                    for (phase, domain, model), samples in self._samples.items()
+                ],
+            }
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.timeouts-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> None:
+        with open(path) as f:
+            data = json.load(f)
+        if data.get('version') != ADAPTIVE_FORMAT_VERSION:
+            raise ValueError(f'Unsupported adaptive timeouts version {data.get("version")!r}, expected {ADAPTIVE_FORMAT_VERSION}')
+        with self._lock:
+            for entry in data['entries']:
+                key = (entry['phase'], entry['domain'], entry['model'])
+                self._samples[key] = deque(entry['samples'], maxlen=self.window)
+                self._timeouts[key] = entry.get('timeouts', 0)
+
+    def _should_log(self, decision: TimeoutDecision) -> bool:
+        """Log a decision the first time it is learned for a key and whenever the step timeout moves by 10%+"""
+        key = (decision.domain, decision.model)
+        previous = self._logged.get(key)
+        if not decision.adaptive or (previous is not None and abs(decision.step_timeout - previous) < 0.1 * previous):
+            return False
+        self._logged[key] = decision.step_timeout
+        return True
+
+
+def _timeout_key(agent_instance, state) -> tuple[str, str]:
+    return _site(state), str(getattr(agent_instance.original_agent.llm, 'model', ''))
+
+
+def apply_adaptive_timeouts(agent_instance, state) -> None:
+    """At step start, set step_timeout and phase_budgets from the agent's AdaptiveTimeouts, if it has one"""
+    controller = agent_instance.adaptive_timeouts
+    if controller is None:
+        return
+    agent = agent_instance.original_agent
+    domain, model = agent_instance._timeout_key = _timeout_key(agent_instance, state)
+    step_timeout, phase_budgets = agent_instance._configured_timeouts
+    decision = controller.decide(domain, model, step_timeout, phase_budgets)
+    agent.settings.step_timeout = decision.step_timeout
+    agent_instance.phase_budgets = decision.phase_budgets
+    if controller._should_log(decision):
+        agent.logger.info(
+            f'⏱️ Adaptive timeouts for {domain or "(no page)"} with {model or "(unknown model)"}: {decision.describe()}, '
+            f'learned {", ".join(decision.adaptive)} from {decision.samples}+ samples (configured step_timeout {step_timeout}s)'
+        )
+
+
+def observe_latency(agent_instance, phase: str, duration: float, timed_out: bool = False) -> None:
+    """Feed a phase or step duration to the agent's AdaptiveTimeouts, if it has one"""
+    controller = agent_instance.adaptive_timeouts
+    if controller is not None:
+        domain, model = agent_instance._timeout_key
+        controller.observe(phase, domain, model, duration, timed_out)
+
+
+def mark_step_timed_out(agent_instance, error_msg: str) -> None:
+    """Record a timed-out step the way browser-use does: one failure, the error as the last result"""
+    agent = agent_instance.original_agent
+    agent.logger.error(f'⏰ {error_msg}')
+    agent.state.consecutive_failures += 1
+    agent.state.last_result = [ActionResult(error=error_msg)]
+    agent_instance.step_timed_out = True
+    observe_latency(agent_instance, STEP, time.time() - agent.step_start_time, timed_out=True)
+
+
+async def run_phase(agent_instance, phase: str, awaitable, on_cancel=None):
+    """Await `awaitable` under the phase's share of the step deadline.
+
+    Returns the awaitable's result. If the deadline is reached the awaitable is cancelled (its
+    finally blocks run), `on_cancel(agent_instance)` releases anything else the phase held,
+    agent_instance.step_timed_out is set and None is returned. Exceptions raised by the
+    awaitable, including its own TimeoutErrors, propagate unchanged.
+    """
+    agent = agent_instance.original_agent
+    step_timeout = agent.settings.step_timeout
+    remaining = agent.step_start_time + step_timeout - time.time()
+    budgets = agent_instance.phase_budgets
+    if budgets is not None:
+        limit, from_budget = budgets.limit(phase, remaining)
+    else:
+        limit, from_budget = remaining, False
+
+    start = time.monotonic()
+    scope = None
+    try:
+        if hasattr(asyncio, 'timeout'):
+            async with asyncio.timeout(limit) as scope:
+                result = await awaitable
+        else:
+            result = await asyncio.wait_for(awaitable, limit)
+    except asyncio.TimeoutError:
+        if scope is not None and not scope.expired():
+            raise
+        if scope is None and time.monotonic() - start < limit:
+            raise
+    else:
+        observe_latency(agent_instance, phase, time.monotonic() - start)
+        return result
+
+    if on_cancel is not None:
+        on_cancel(agent_instance)
+    observe_latency(agent_instance, phase, max(limit, 0.0), timed_out=True)
+    if from_budget:
+        error_msg = f'Step {agent_instance.current_step + 1} timed out in {phase} after its {limit:g} second budget'
+    else:
+        error_msg = f'Step {agent_instance.current_step + 1} timed out after {step_timeout} seconds'
+    mark_step_timed_out(agent_instance, error_msg)
+    return None
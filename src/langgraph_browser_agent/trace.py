@@ -0,0 +1,397 @@
+import gzip
+import json
+import time
+import asyncio
+import logging
+import functools
+from dataclasses import dataclass, field
+
+from browser_use import Agent
+from browser_use.agent.views import ActionResult, AgentHistoryList, AgentOutput, AgentSettings, AgentState
+from browser_use.browser.views import BrowserStateSummary, PageInfo, TabInfo
+from browser_use.tools.registry.views import ActionModel
+from pydantic import create_model
+
+from .steps import run_graph
+
+
+logger = logging.getLogger(__name__)
+
+TRACE_FORMAT = 'langgraph-browser-agent-trace'
+TRACE_VERSION = 1
+
+def dump_browser_state(summary, include_screenshot: bool = False) -> dict:
+    """Serialize a BrowserStateSummary, keeping the DOM as the text the LLM was shown"""
+    dom_state = summary.dom_state
+    page_info = summary.page_info
+    return {
+        'url': summary.url,
+        'title': summary.title,
+        # TabInfo's serializer shortens target ids, so copy its fields as-is
+        'tabs': [{name: getattr(tab, name) for name in TabInfo.model_fields} for tab in summary.tabs],
+        'dom': dom_state.llm_representation() if dom_state is not None else '',
+        'screenshot': summary.screenshot if include_screenshot else None,
+        'page_info': page_info.model_dump(mode='json') if page_info is not None else None,
+        'pixels_above': summary.pixels_above,
+        'pixels_below': summary.pixels_below,
+        'browser_errors': list(summary.browser_errors),
+        'is_pdf_viewer': summary.is_pdf_viewer,
+        'recent_events': summary.recent_events,
+    }
+
+
+class ReplayedDOMState:
+    """Stands in for SerializedDOMState on replay: the recorded LLM text and no live elements"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.selector_map = {}
+
+    def llm_representation(self, include_attributes=None) -> str:
+        return self.text
+
+
+def load_browser_state(data: dict) -> BrowserStateSummary:
+    return BrowserStateSummary(
+        dom_state=ReplayedDOMState(data['dom']),
+        url=data['url'],
+        title=data['title'],
+        tabs=[TabInfo.model_validate(tab) for tab in data['tabs']],
+        screenshot=data.get('screenshot'),
+        page_info=PageInfo.model_validate(data['page_info']) if data.get('page_info') else None,
+        pixels_above=data.get('pixels_above', 0),
+        pixels_below=data.get('pixels_below', 0),
+        browser_errors=data.get('browser_errors', []),
+        is_pdf_viewer=data.get('is_pdf_viewer', False),
+        recent_events=data.get('recent_events'),
+    )
+
+
+def _capture(phase: str, state, include_screenshot: bool):
+    if phase == 'prepare_context':
+        return dump_browser_state(state['browser_state_summary'], include_screenshot)
+    if phase == 'get_next_action':
+        return state['last_model_output'].model_dump(mode='json', exclude_unset=True)
+    if phase == 'execute_actions':
+        return [result.model_dump(mode='json', exclude_none=True) for result in state['last_result']]
+    return None
+
+
+class TraceRecorder:
+    """Writes every recorded phase outcome of a run to a gzipped JSON-lines trace file.
+
+    The first line is a header (task, graph mode, settings); each following line is one phase:
+    {"seq", "step", "phase", "duration", "data", "error", "timed_out"}. `seq` increases with every
+    record, so a step retried after a timeout keeps both attempts, in order.
+    """
+
+    def __init__(self, path: str, include_screenshots: bool = False):
+        self.path = path
+        self.include_screenshots = include_screenshots
+        self._file = None
+        self.events_recorded = 0
+
+    def start(self, agent_instance, max_steps: int) -> None:
+        settings = agent_instance.original_agent.settings
+        self._file = gzip.open(self.path, 'wt', encoding='utf-8')
+        self._write({
+            'format': TRACE_FORMAT,
+            'version': TRACE_VERSION,
+            'recorded_at': time.time(),
+            'task': agent_instance.original_agent.task,
+            'graph_mode': agent_instance.graph_mode,
+            'max_steps': max_steps,
+            'settings': {
+                'max_failures': settings.max_failures,
+                'final_response_after_failure': settings.final_response_after_failure,
+                'step_timeout': settings.step_timeout,
+                'enable_planning': settings.enable_planning,
+                'loop_detection_enabled': settings.loop_detection_enabled,
+            },
+        })
+
+    def record(self, step: int, phase: str, duration: float, data=None, error: str | None = None, timed_out: bool = False) -> None:
+        if self._file is None:
+            return
+        self._write({
+            'seq': self.events_recorded, 'step': step, 'phase': phase, 'duration': duration,
+            'data': data, 'error': error, 'timed_out': timed_out,
+        })
+        self.events_recorded += 1
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, record: dict) -> None:
+        self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+
+def recorded(phase: str):
+    """Record the outcome of an async `phase(state, agent)` node in `agent.trace_recorder`, if set"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(state, agent):
+            recorder = agent.trace_recorder
+            if recorder is None:
+                return await fn(state, agent)
+            step = agent.current_step
+            start = time.perf_counter()
+            state = await fn(state, agent)
+            duration = time.perf_counter() - start
+            error = agent.last_error
+            timed_out = agent.step_timed_out is True
+            data = None
+            # A phase cancelled at its deadline left stale state behind; there is nothing to capture
+            if error is None and not timed_out:
+                try:
+                    data = _capture(phase, state, recorder.include_screenshots)
+                except Exception as e:
+                    logger.debug(f'Could not record {phase} for step {step}: {e}')
+            recorder.record(step, phase, duration, data=data, error=error, timed_out=timed_out)
+            return state
+        return wrapper
+    return decorator
+
+
+@dataclass
+class Trace:
+    """A loaded trace: the header and each step's phase records, in the order they were recorded"""
+    meta: dict
+    events: dict = field(default_factory=dict)  # step -> [event, ...]
+
+    @property
+    def steps(self) -> int:
+        return len(self.events)
+
+    def iter_events(self):
+        for step_events in self.events.values():
+            yield from step_events
+
+    def action_names(self) -> set[str]:
+        names = set()
+        for event in self.iter_events():
+            if event['phase'] == 'get_next_action' and event['data']:
+                for action in event['data'].get('action', []):
+                    names.update(action)
+        return names
+
+
+def load_trace(path: str) -> Trace:
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        lines = iter(f)
+        meta = json.loads(next(lines, 'null') or 'null')
+        if not isinstance(meta, dict) or meta.get('format') != TRACE_FORMAT:
+            raise ValueError(f'{path} is not a {TRACE_FORMAT} file')
+        if meta.get('version') != TRACE_VERSION:
+            raise ValueError(f'Unsupported trace version {meta.get("version")!r}, expected {TRACE_VERSION}')
+        trace = Trace(meta=meta)
+        for position, line in enumerate(lines):
+            if line.strip():
+                event = json.loads(line)
+                event.setdefault('seq', position)
+                trace.events.setdefault(event['step'], []).append(event)
+    for step_events in trace.events.values():
+        step_events.sort(key=lambda event: event['seq'])
+    return trace
+
+
+class ReplayDivergedError(RuntimeError):
+    """The replayed run asked for a phase the recorded run never reached"""
+
+
+class _ReplayedBrowserSession:
+    """The parts of a BrowserSession that browser_use.Agent reads after a step; there is no browser"""
+    id = 'replay'
+    agent_focus_target_id = None
+    is_reconnecting = False
+    is_cdp_connected = False
+    _cdp_client_root = None
+    downloaded_files: list = []
+
+    async def send_demo_mode_log(self, message, level='info', metadata=None):
+        pass
+
+
+class _ReplayedLLM:
+    model = 'replay'
+    provider = 'replay'
+
+
+class _ReplayedScreenshots:
+    """Screenshots replay no I/O: history items get no screenshot path"""
+
+    async def store_screenshot(self, screenshot_b64: str, step_number: int):
+        return None
+
+
+class _ReplayedFileSystem:
+    def get_state(self):
+        return None
+
+
+class _ReplayedEventBus:
+    def dispatch(self, event):
+        pass
+
+
+class _ReplayedMessageManager:
+    last_state_message_text = None
+
+
+class _ReplayedBrowserUseAgent(Agent):
+    """A browser_use.Agent answering every phase from a Trace.
+
+    Only the phases that reach the browser or the LLM are replaced. Post-processing, finalizing the
+    history item, error handling and the completion log are browser-use's own, run against stubs for
+    the browser session, LLM, screenshot service, file system and event bus.
+    """
+
+    def __init__(self, trace: Trace, owner, realtime: bool):
+        # Agent.__init__ would start a browser and an LLM client, so set up only what the phases use
+        self.trace = trace
+        self.owner = owner
+        self.realtime = realtime
+        self.task = trace.meta['task']
+        self.task_id = 'replay'
+        self.settings = AgentSettings(**trace.meta.get('settings', {}))
+        self.state = AgentState()
+        self.history = AgentHistoryList(history=[], usage=None)
+        self.browser_session = _ReplayedBrowserSession()
+        self.llm = _ReplayedLLM()
+        self.screenshot_service = _ReplayedScreenshots()
+        self.file_system = _ReplayedFileSystem()
+        self.eventbus = _ReplayedEventBus()
+        self._message_manager = _ReplayedMessageManager()
+        self.cloud_sync = None
+        self.has_downloads_path = False
+        self._demo_mode_enabled = False
+        self.register_done_callback = None
+        self.step_start_time = time.time()
+        self._replayed = {}  # step -> events consumed so far
+        self._external_pause_event = asyncio.Event()
+        self._external_pause_event.set()
+        replay_actions = create_model(
+            'ReplayActionModel',
+            __base__=ActionModel,
+            **{name: (dict | None, None) for name in sorted(trace.action_names())},
+        )
+        self.ActionModel = replay_actions
+        self.AgentOutput = AgentOutput.type_with_custom_actions(replay_actions)
+
+    async def _replay(self, phase: str) -> dict:
+        # A step retried after a timeout has one record per attempt; take them in recorded order
+        step = self.owner.current_step
+        step_events = self.trace.events.get(step, [])
+        position = self._replayed.get(step, 0)
+        event = step_events[position] if position < len(step_events) else None
+        if event is None or event['phase'] != phase:
+            self.state.stopped = True
+            raise ReplayDivergedError(f'Trace has no {phase} record for step {step}')
+        self._replayed[step] = position + 1
+        if self.realtime:
+            await asyncio.sleep(event['duration'])
+        if event['timed_out']:
+            # Makes check_step_timeout fire right after this phase, as it did when recorded
+            self.step_start_time = 0
+        if event['error'] is not None:
+            raise RuntimeError(event['error'])
+        return event
+
+    async def _prepare_context(self, step_info):
+        event = await self._replay('prepare_context')
+        return load_browser_state(event['data']) if event['data'] is not None else None
+
+    async def _get_next_action(self, browser_state_summary):
+        event = await self._replay('get_next_action')
+        if event['data'] is not None:
+            self.state.last_model_output = self.AgentOutput.model_validate(event['data'])
+
+    async def _execute_actions(self):
+        event = await self._replay('execute_actions')
+        if event['data'] is not None:
+            self.state.last_result = [ActionResult.model_validate(result) for result in event['data']]
+
+    async def _post_process(self):
+        await self._replay('evaluate_result')
+        await super()._post_process()
+
+
+class _NoSignals:
+    def reset(self):
+        pass
+
+
+class ReplayAgent:
+    """Drives the shared browser agent graph from a recorded trace, with no browser and no LLM"""
+
+    def __init__(self, trace: Trace, graph_mode: str | None = None, realtime: bool = False, metrics=None):
+        from .graph import get_browser_agent_graph
+
+        self.trace = trace
+        self.graph_mode = graph_mode or trace.meta.get('graph_mode', 'verbose')
+        self.graph = get_browser_agent_graph(self.graph_mode)
+        self.original_agent = _ReplayedBrowserUseAgent(trace, self, realtime)
+        self.current_step = 0
+        self.max_steps = trace.meta.get('max_steps', trace.steps)
+        self.step_info = None
+        self.last_error = None
+        self.ended_due_to_break = False
+        self.step_timed_out = False
+        self.phase_budgets = None
+        self.adaptive_timeouts = None
+        self._configured_timeouts = (None, None)
+        self._timeout_key = ('', '')
+        self.signal_handler = _NoSignals()
+        self.on_step_start = None
+        self.on_step_end = None
+        self.metrics = metrics
+        self.pipelined = False
+        self._prefetch = None
+        self.decision_cache = None
+        self.cache_mode = 'off'
+        self.hedger = None
+        self.rate_limiter = None
+        self.priority = None
+        self.streaming_llm = None
+        self.streaming_stats = None
+        self._dispatch = None
+        self.compactor = None
+        self.compaction_stats = None
+        self._compacted_tokens = 0
+        self.pruner = None
+        self.pruning_stats = None
+        self.teardown = None
+        self._teardown_task = None
+        self._step_sink = None
+        self.step_stream_stats = None
+        self.trace_recorder = None
+        self.checkpointer = None
+        self.thread_id = None
+        self._checkpointed_items = 0
+        self.history_log = None
+        self.gif_writer = None
+
+    async def run(self) -> AgentHistoryList:
+        from .graph import AGENT_CONFIG_KEY, SUPERSTEPS_PER_STEP
+        from .history_log import close_history
+
+        initial_state = {'task': self.original_agent.task, 'browser_state_summary': None, 'last_model_output': None, 'last_result': None}
+        config = {
+            'recursion_limit': self.max_steps * SUPERSTEPS_PER_STEP[self.graph_mode],
+            'configurable': {AGENT_CONFIG_KEY: self},
+        }
+        try:
+            await run_graph(self, initial_state, config)
+        finally:
+            await close_history(self)
+        return self.original_agent.history
+
+
+async def replay_trace(path: str, graph_mode: str | None = None, realtime: bool = False, metrics=None) -> AgentHistoryList:
+    """Replay a trace written by TraceRecorder through the same graph topology, offline.
+
+    realtime=True sleeps for each recorded phase duration, to reproduce a slow run's timing.
+    """
+    return await ReplayAgent(load_trace(path), graph_mode=graph_mode, realtime=realtime, metrics=metrics).run()
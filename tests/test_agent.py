@@ -89,6 +89,14 @@ class TestLangGraphBrowserAgent:
         assert agent.step_timed_out is False
 
 
+    def test_agents_share_compiled_graph(self):
+        """Test that every agent uses the same compiled graph object."""
+        agent1 = LangGraphBrowserAgent(Mock())
+        agent2 = LangGraphBrowserAgent(Mock())
+
+        assert agent1.graph is agent2.graph
+
+
 class TestLangGraphBrowserAgentRun:
     """Test LangGraphBrowserAgent.run method."""
     
@@ -0,0 +1,156 @@
+"""Tests for the bounded-concurrency batch runner."""
+import asyncio
+import pytest
+from unittest.mock import Mock
+
+from langgraph_browser_agent import LangGraphBrowserAgent
+from langgraph_browser_agent.batch import BatchRunner, BatchStats, run_many
+from langgraph_browser_agent.metrics import percentile
+
+
+class FakeAgent(LangGraphBrowserAgent):
+    """LangGraphBrowserAgent whose run() only sleeps and returns a fake history."""
+
+    active = 0
+    peak = 0
+
+    def __init__(self, delay, steps=2, fail=False):
+        super().__init__(Mock())
+        self.delay = delay
+        self.steps = steps
+        self.fail = fail
+
+    async def run(self, **kwargs):
+        FakeAgent.active += 1
+        FakeAgent.peak = max(FakeAgent.peak, FakeAgent.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail:
+                raise RuntimeError('boom')
+            history = Mock()
+            history.history = [Mock()] * self.steps
+            return history
+        finally:
+            FakeAgent.active -= 1
+
+
+@pytest.fixture(autouse=True)
+def reset_counters():
+    FakeAgent.active = 0
+    FakeAgent.peak = 0
+
+
+class TestBatchRunner:
+    """Test BatchRunner streaming, isolation and concurrency."""
+
+    @pytest.mark.asyncio
+    async def test_results_stream_in_completion_order(self):
+        """Test that fast tasks are yielded before slow ones."""
+        tasks = [FakeAgent(0.05), FakeAgent(0.0), FakeAgent(0.02)]
+        runner = BatchRunner(concurrency=3)
+
+        order = [result.index async for result in runner.run(tasks)]
+
+        assert order == [1, 2, 0]
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        """Test that no more than `concurrency` runs are live at once."""
+        tasks = [FakeAgent(0.01) for _ in range(10)]
+
+        results = [result async for result in run_many(tasks, concurrency=3)]
+
+        assert len(results) == 10
+        assert FakeAgent.peak == 3
+
+    @pytest.mark.asyncio
+    async def test_failures_are_isolated(self):
+        """Test that a failing task does not affect the others."""
+        tasks = [FakeAgent(0.0), FakeAgent(0.0, fail=True), FakeAgent(0.0, steps=5)]
+        runner = BatchRunner(concurrency=2)
+
+        results = {result.index: result async for result in runner.run(tasks)}
+
+        assert results[0].ok and results[2].ok
+        assert not results[1].ok
+        assert isinstance(results[1].error, RuntimeError)
+        assert runner.stats.completed == 2
+        assert runner.stats.failed == 1
+        assert runner.stats.total_steps == 7
+
+    @pytest.mark.asyncio
+    async def test_factories_are_called_lazily(self):
+        """Test that task factories (sync and async) are resolved when a slot frees up."""
+        calls = []
+
+        def make(i):
+            def factory():
+                calls.append(i)
+                return FakeAgent(0.0)
+            return factory
+
+        async def async_factory():
+            calls.append('async')
+            return FakeAgent(0.0)
+
+        results = [result async for result in run_many([make(0), make(1), async_factory], concurrency=1)]
+
+        assert all(result.ok for result in results)
+        assert calls == [0, 1, 'async']
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_holds_workers_back(self):
+        """Test that finished results do not pile up while the consumer is busy."""
+        started = []
+
+        def make(i):
+            def factory():
+                started.append(i)
+                return FakeAgent(0.0)
+            return factory
+
+        runner = BatchRunner(concurrency=2)
+        agen = runner.run([make(i) for i in range(20)])
+        await agen.__anext__()
+        await asyncio.sleep(0.05)
+        held_back = len(started)
+        rest = [result async for result in agen]
+
+        assert held_back <= 2 * runner.concurrency + 1  # queued results plus one blocked put per worker
+        assert len(rest) == 19
+
+    @pytest.mark.asyncio
+    async def test_early_exit_cancels_workers(self):
+        """Test that breaking out of the stream cancels in-flight runs."""
+        runner = BatchRunner(concurrency=2)
+        agen = runner.run([FakeAgent(0.0), FakeAgent(10.0), FakeAgent(10.0)])
+        first = await agen.__anext__()
+        await agen.aclose()
+
+        assert first.index == 0
+        assert FakeAgent.active == 0
+
+    def test_invalid_concurrency(self):
+        """Test that zero concurrency is rejected."""
+        with pytest.raises(ValueError):
+            BatchRunner(concurrency=0)
+
+
+class TestBatchStats:
+    """Test aggregate throughput figures."""
+
+    def test_throughput(self):
+        """Test tasks/min and latency percentiles."""
+        stats = BatchStats(completed=3, failed=1, elapsed=30.0, latencies=[1.0, 2.0, 3.0, 4.0], step_counts=[2, 4, 6])
+
+        assert stats.tasks_per_minute == 8.0
+        assert stats.p50_latency == 2.5
+        assert stats.avg_steps == 4.0
+        assert stats.as_dict()['total_steps'] == 12
+
+    def test_percentile(self):
+        """Test the interpolated percentile helper."""
+        assert percentile([], 95) == 0.0
+        assert percentile([5], 95) == 5.0
+        assert percentile([1, 2, 3, 4, 5], 50) == 3.0
+        assert percentile(list(range(101)), 95) == 95.0
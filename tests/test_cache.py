@@ -0,0 +1,283 @@
+"""Tests for the LLM decision cache."""
+import threading
+import pytest
+from unittest.mock import Mock, AsyncMock
+
+from browser_use.agent.views import AgentOutput
+from browser_use.tools.registry.views import ActionModel
+
+from langgraph_browser_agent.cache import (
+    CacheStats,
+    DecisionCache,
+    MemoryDecisionCache,
+    SQLiteDecisionCache,
+    get_next_action_with_cache,
+)
+
+
+class ClickAction(ActionModel):
+    click: dict | None = None
+
+
+CachedAgentOutput = AgentOutput.type_with_custom_actions(ClickAction)
+
+
+def make_summary(url='https://example.com/', dom='[1]<button>Go</button>'):
+    """Create a minimal BrowserStateSummary stand-in."""
+    summary = Mock()
+    summary.url = url
+    summary.title = 'Example'
+    summary.tabs = []
+    summary.dom_state.llm_representation = Mock(return_value=dom)
+    return summary
+
+
+def make_agent(cache, task='Click the button', cache_mode='use'):
+    """Create a mock agent instance whose _get_next_action goes through _get_model_output_with_retry."""
+    agent_instance = Mock()
+    agent_instance.current_step = 0
+    agent_instance.decision_cache = cache
+    agent_instance.cache_mode = cache_mode
+    original = agent_instance.original_agent
+    original.task = task
+    original.llm.model = 'test-model'
+    original.ActionModel = ClickAction
+    original.AgentOutput = CachedAgentOutput
+    original.settings.include_attributes = None
+    original.history.history = []
+    original._get_model_output_with_retry = AsyncMock(
+        return_value=CachedAgentOutput(next_goal='click', action=[ClickAction(click={'index': 1})])
+    )
+
+    async def get_next_action(browser_state_summary):
+        original.state.last_model_output = await original._get_model_output_with_retry([])
+    original._get_next_action = AsyncMock(side_effect=get_next_action)
+    return agent_instance
+
+
+class TestCacheKey:
+    """Test content-addressed key derivation."""
+
+    def test_whitespace_is_normalized(self):
+        """Test that formatting-only differences map to the same key."""
+        cache = MemoryDecisionCache()
+        a = make_agent(cache, task='Click  the\nbutton').original_agent
+        b = make_agent(cache, task=' Click the button ').original_agent
+
+        assert cache.make_key(a, make_summary(dom='[1]<button>Go</button>\n')) == cache.make_key(b, make_summary())
+
+    def test_key_depends_on_page_task_and_history(self):
+        """Test that a different page, task or action history changes the key."""
+        cache = MemoryDecisionCache()
+        agent = make_agent(cache).original_agent
+        base = cache.make_key(agent, make_summary())
+
+        assert cache.make_key(agent, make_summary(url='https://example.org/')) != base
+        assert cache.make_key(agent, make_summary(dom='[2]<a>Next</a>')) != base
+        assert cache.make_key(make_agent(cache, task='Other task').original_agent, make_summary()) != base
+
+        item = Mock()
+        item.model_output = CachedAgentOutput(action=[ClickAction(click={'index': 3})])
+        item.result = [Mock(error=None)]
+        agent.history.history = [item]
+        assert cache.make_key(agent, make_summary()) != base
+
+    def test_screenshot_is_ignored(self):
+        """Test that volatile fields do not affect the key."""
+        cache = MemoryDecisionCache()
+        agent = make_agent(cache).original_agent
+        summary = make_summary()
+        key = cache.make_key(agent, summary)
+        summary.screenshot = 'different-base64'
+
+        assert cache.make_key(agent, summary) == key
+
+
+class TestMemoryDecisionCache:
+    """Test the in-memory LRU backend."""
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted."""
+        cache = MemoryDecisionCache(max_entries=2)
+        cache.store('a', {'v': 1})
+        cache.store('b', {'v': 2})
+        cache.lookup('a')
+        cache.store('c', {'v': 3})
+
+        assert cache.lookup('b') is None
+        assert cache.lookup('a') == {'v': 1}
+        assert len(cache) == 2
+        assert cache.stats.evictions == 1
+
+    def test_ttl_expiry(self, monkeypatch):
+        """Test that entries older than the TTL are misses."""
+        now = [1000.0]
+        monkeypatch.setattr('langgraph_browser_agent.cache.time.time', lambda: now[0])
+        cache = MemoryDecisionCache(ttl=10)
+        cache.store('a', {'v': 1})
+        now[0] += 11
+
+        assert cache.lookup('a') is None
+        assert cache.stats.expired == 1
+        assert len(cache) == 0
+
+    def test_invalid_size(self):
+        """Test that a non-positive size is rejected."""
+        with pytest.raises(ValueError):
+            MemoryDecisionCache(max_entries=0)
+
+
+class TestSQLiteDecisionCache:
+    """Test the on-disk backend."""
+
+    def test_persists_across_instances(self, tmp_path):
+        """Test that a second cache over the same file sees earlier entries."""
+        path = str(tmp_path / 'decisions.db')
+        first = SQLiteDecisionCache(path)
+        first.store('a', {'action': [{'click': {'index': 1}}]})
+        first.close()
+
+        second = SQLiteDecisionCache(path)
+        assert second.lookup('a') == {'action': [{'click': {'index': 1}}]}
+        assert len(second) == 1
+        second.close()
+
+    def test_prune(self, tmp_path, monkeypatch):
+        """Test that prune() removes expired entries."""
+        now = [1000.0]
+        monkeypatch.setattr('langgraph_browser_agent.cache.time.time', lambda: now[0])
+        cache = SQLiteDecisionCache(str(tmp_path / 'decisions.db'), ttl=10)
+        cache.store('old', {})
+        now[0] += 20
+        cache.store('new', {})
+
+        assert cache.prune() == 1
+        assert cache.lookup('new') == {}
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_io_runs_off_event_loop(self, tmp_path):
+        """Test that a step's SQLite reads and writes run on a worker thread, not the event loop's."""
+        cache = SQLiteDecisionCache(str(tmp_path / 'decisions.db'))
+        threads = []
+        for name in ('_get', '_set'):
+            method = getattr(cache, name)
+
+            def spy(*args, method=method):
+                threads.append(threading.get_ident())
+                return method(*args)
+            setattr(cache, name, spy)
+
+        await get_next_action_with_cache(make_agent(cache), make_summary())
+        second = make_agent(cache)
+        await get_next_action_with_cache(second, make_summary())
+
+        assert second.original_agent._get_model_output_with_retry.await_count == 0
+        assert len(threads) == 3
+        assert threading.get_ident() not in threads
+        cache.close()
+
+    def test_backend_methods_are_abstract(self):
+        """Test that a backend missing part of the storage interface cannot be created."""
+        class NoDelete(DecisionCache):
+            def clear(self):
+                pass
+
+            def _get(self, key):
+                return None
+
+            def _set(self, key, value, stored_at):
+                pass
+
+        with pytest.raises(TypeError):
+            DecisionCache()
+        with pytest.raises(TypeError, match='_delete'):
+            NoDelete()
+
+
+class TestGetNextActionWithCache:
+    """Test serving get_next_action from the cache."""
+
+    @pytest.mark.asyncio
+    async def test_second_run_hits(self):
+        """Test that the same task on the same page skips the LLM the second time."""
+        cache = MemoryDecisionCache()
+        first, second = make_agent(cache), make_agent(cache)
+
+        await get_next_action_with_cache(first, make_summary())
+        await get_next_action_with_cache(second, make_summary())
+
+        assert first.original_agent._get_model_output_with_retry.await_count == 1
+        assert second.original_agent._get_model_output_with_retry.await_count == 0
+        output = second.original_agent.state.last_model_output
+        assert isinstance(output, CachedAgentOutput)
+        assert output.action[0].click == {'index': 1}
+        assert cache.stats.as_dict()['hit_rate'] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_method_restored(self):
+        """Test that the model call is restored after the step."""
+        cache = MemoryDecisionCache()
+        agent = make_agent(cache)
+        llm_call = agent.original_agent._get_model_output_with_retry
+
+        await get_next_action_with_cache(agent, make_summary())
+
+        assert agent.original_agent._get_model_output_with_retry is llm_call
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('mode, stores', [('off', 0), ('refresh', 2)])
+    async def test_bypass_modes(self, mode, stores):
+        """Test that "off" skips the cache and "refresh" only writes to it."""
+        cache = MemoryDecisionCache()
+        agents = [make_agent(cache, cache_mode=mode) for _ in range(2)]
+
+        for agent in agents:
+            await get_next_action_with_cache(agent, make_summary())
+
+        assert all(a.original_agent._get_model_output_with_retry.await_count == 1 for a in agents)
+        assert cache.stats.hits == 0
+        assert cache.stats.stores == stores
+
+    @pytest.mark.asyncio
+    async def test_stale_entry_falls_back_to_llm(self):
+        """Test that an entry that no longer validates is replaced by a fresh decision."""
+        cache = MemoryDecisionCache()
+        agent = make_agent(cache)
+        key = cache.make_key(agent.original_agent, make_summary())
+        cache.store(key, {'action': [{'unknown_action': {}}]})
+
+        await get_next_action_with_cache(agent, make_summary())
+
+        assert agent.original_agent._get_model_output_with_retry.await_count == 1
+        assert cache.stats.errors == 1
+        assert cache.lookup(key)['action'] == [{'click': {'index': 1}}]
+
+    @pytest.mark.asyncio
+    async def test_broken_backend_does_not_fail_step(self):
+        """Test that backend errors are counted and the LLM is called."""
+        cache = MemoryDecisionCache()
+        cache._get = Mock(side_effect=OSError('disk full'))
+        cache._set = Mock(side_effect=OSError('disk full'))
+        agent = make_agent(cache)
+
+        await get_next_action_with_cache(agent, make_summary())
+
+        assert agent.original_agent._get_model_output_with_retry.await_count == 1
+        assert cache.stats.errors == 2
+
+    @pytest.mark.asyncio
+    async def test_no_cache_calls_through(self):
+        """Test that agents without a cache call _get_next_action directly."""
+        agent = make_agent(None)
+
+        await get_next_action_with_cache(agent, make_summary())
+
+        agent.original_agent._get_next_action.assert_awaited_once()
+
+
+def test_stats_as_dict():
+    """Test derived stats."""
+    stats = CacheStats(hits=3, misses=1)
+    assert stats.as_dict()['lookups'] == 4
+    assert stats.hit_rate == 0.75
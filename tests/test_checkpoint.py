@@ -0,0 +1,175 @@
+"""Tests for step checkpointing and crash-resume."""
+import gzip
+import json
+import pytest
+from unittest.mock import Mock
+
+from langgraph_browser_agent.checkpoint import SQLiteCheckpointer, StepCheckpointer, restore_checkpoint, save_checkpoint
+from langgraph_browser_agent.instrumentation import NodeMetrics
+from langgraph_browser_agent.trace import TRACE_FORMAT, TRACE_VERSION, ReplayAgent, load_trace
+
+
+TASK = 'Read five pages'
+
+
+def write_trace(path, steps=5):
+    """Write a trace of `steps` successful steps, the last of which is done."""
+    lines = [{
+        'format': TRACE_FORMAT, 'version': TRACE_VERSION, 'task': TASK, 'graph_mode': 'fast', 'max_steps': 10,
+        'settings': {'max_failures': 3, 'final_response_after_failure': False, 'step_timeout': 30},
+    }]
+    for step in range(steps):
+        last = step == steps - 1
+        page = {'url': f'https://example.com/{step}', 'title': f'Page {step}', 'tabs': [], 'dom': f'[{step}]<a>Next</a>'}
+        action = {'done': {'text': 'all read'}} if last else {'click': {'index': step}}
+        result = {'is_done': True, 'success': True, 'extracted_content': 'all read'} if last else {'extracted_content': f'read {step}'}
+        for phase, data in (('prepare_context', page), ('get_next_action', {'next_goal': 'read', 'action': [action]}),
+                            ('execute_actions', [result]), ('evaluate_result', None)):
+            lines.append({'step': step, 'phase': phase, 'duration': 0.0, 'data': data, 'error': None, 'timed_out': False})
+    with gzip.open(path, 'wt') as f:
+        f.writelines(json.dumps(line) + '\n' for line in lines)
+    return str(path)
+
+
+def make_agent(trace_path, checkpointer, thread_id='thread-1'):
+    """Create an offline agent (replayed from a trace) that checkpoints to `checkpointer`."""
+    agent = ReplayAgent(load_trace(trace_path))
+    agent.checkpointer = checkpointer
+    agent.thread_id = thread_id
+    agent._checkpointed_items = 0
+    return agent
+
+
+class CrashAfter(Exception):
+    pass
+
+
+class TestSQLiteCheckpointer:
+    """Test the SQLite store."""
+
+    def test_incremental_history(self, tmp_path):
+        """Test that history items written across checkpoints are loaded in order."""
+        checkpointer = SQLiteCheckpointer(str(tmp_path / 'runs.db'))
+        checkpointer._write('t', 1, TASK, '{}', None, 0, ['{"i": 0}'])
+        checkpointer._write('t', 2, TASK, '{"n_steps": 3}', '{"action": []}', 1, ['{"i": 1}'])
+
+        checkpoint = checkpointer.load('t')
+
+        assert checkpoint.step == 2
+        assert checkpoint.agent_state == {'n_steps': 3}
+        assert checkpoint.last_model_output == {'action': []}
+        assert checkpoint.history == [{'i': 0}, {'i': 1}]
+        assert checkpointer.threads() == ['t']
+        assert checkpointer.load('other') is None
+
+    def test_history_beyond_checkpoint_is_ignored(self, tmp_path):
+        """Test that items past the committed history length (from a rewound run) are not loaded."""
+        checkpointer = SQLiteCheckpointer(str(tmp_path / 'runs.db'))
+        checkpointer._write('t', 2, TASK, '{}', None, 0, ['{"i": 0}', '{"i": 1}'])
+        checkpointer._write('t', 1, TASK, '{}', None, 0, ['{"i": 0}'])
+
+        assert checkpointer.load('t').history == [{'i': 0}]
+
+    def test_delete(self, tmp_path):
+        """Test that delete() removes the thread and its history."""
+        checkpointer = SQLiteCheckpointer(str(tmp_path / 'runs.db'))
+        checkpointer._write('t', 1, TASK, '{}', None, 0, ['{}'])
+        checkpointer.delete('t')
+
+        assert checkpointer.load('t') is None
+
+    def test_store_methods_are_abstract(self):
+        """Test that a checkpointer missing part of the storage interface cannot be created."""
+        class NoWrite(StepCheckpointer):
+            def load(self, thread_id):
+                return None
+
+            def delete(self, thread_id):
+                pass
+
+        with pytest.raises(TypeError):
+            StepCheckpointer()
+        with pytest.raises(TypeError, match='_write'):
+            NoWrite()
+
+
+class TestCrashResume:
+    """Test checkpointing during graph runs and resuming after a crash."""
+
+    @pytest.mark.asyncio
+    async def test_checkpoint_per_finalized_step(self, tmp_path):
+        """Test that every finalized step writes one checkpoint with only its new history item."""
+        checkpointer = SQLiteCheckpointer(str(tmp_path / 'runs.db'))
+        metrics = NodeMetrics()
+        agent = make_agent(write_trace(tmp_path / 'run.trace.gz'), checkpointer)
+        agent.metrics = metrics
+
+        history = await agent.run()
+
+        assert history.is_done()
+        assert checkpointer.stats.writes == 5
+        assert checkpointer.stats.history_items_written == 5
+        assert checkpointer.stats.failures == 0
+        assert checkpointer.stats.as_dict()['avg_write_time'] > 0
+        assert metrics.snapshot()['checkpoint']['count'] == 5
+        checkpoint = checkpointer.load('thread-1')
+        assert checkpoint.step == 5
+        assert len(checkpoint.history) == 5
+
+    @pytest.mark.asyncio
+    async def test_resume_after_crash(self, tmp_path):
+        """Test that a run crashed after step 2 resumes at step 3 and ends with the full history."""
+        trace_path = write_trace(tmp_path / 'run.trace.gz')
+        checkpointer = SQLiteCheckpointer(str(tmp_path / 'runs.db'))
+        crashed = make_agent(trace_path, checkpointer)
+
+        async def crash(original_agent):
+            if crashed.current_step == 3:
+                raise CrashAfter()
+        crashed.on_step_end = crash
+        with pytest.raises(CrashAfter):
+            await crashed.run()
+
+        resumed = make_agent(trace_path, SQLiteCheckpointer(str(tmp_path / 'runs.db')))
+        restore_checkpoint(resumed, resumed.checkpointer.load('thread-1'))
+        assert resumed.current_step == 3
+        assert resumed.original_agent.state.n_steps == crashed.original_agent.state.n_steps
+        history = await resumed.run()
+
+        assert history.is_done()
+        assert history.urls() == [f'https://example.com/{step}' for step in range(5)]
+        # Only the two steps after the crash were written by the resumed run
+        assert resumed.checkpointer.stats.history_items_written == 2
+
+    @pytest.mark.asyncio
+    async def test_resume_rejects_other_task(self, tmp_path):
+        """Test that a checkpoint is not restored into an agent running a different task."""
+        checkpointer = SQLiteCheckpointer(str(tmp_path / 'runs.db'))
+        await make_agent(write_trace(tmp_path / 'run.trace.gz', steps=2), checkpointer).run()
+
+        other = make_agent(write_trace(tmp_path / 'run.trace.gz', steps=2), checkpointer)
+        other.original_agent.task = 'Something else'
+
+        with pytest.raises(ValueError):
+            restore_checkpoint(other, checkpointer.load('thread-1'))
+
+    @pytest.mark.asyncio
+    async def test_failed_write_does_not_fail_step(self, tmp_path):
+        """Test that a broken store is counted and the run continues."""
+        checkpointer = SQLiteCheckpointer(str(tmp_path / 'runs.db'))
+        checkpointer._write = Mock(side_effect=OSError('disk full'))
+        agent = make_agent(write_trace(tmp_path / 'run.trace.gz', steps=2), checkpointer)
+
+        history = await agent.run()
+
+        assert history.is_done()
+        assert checkpointer.stats.failures == 2
+        assert agent._checkpointed_items == 0
+
+    @pytest.mark.asyncio
+    async def test_no_checkpointer_is_noop(self):
+        """Test that agents without a checkpointer skip saving."""
+        agent = Mock()
+        agent.checkpointer = None
+
+        await save_checkpoint(agent)
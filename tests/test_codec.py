@@ -0,0 +1,128 @@
+"""Tests for the compact binary codec."""
+import base64
+import json
+import pytest
+
+from browser_use.agent.views import ActionResult, AgentHistory, AgentHistoryList, AgentOutput, StepMetadata
+from browser_use.browser.views import BrowserStateHistory, BrowserStateSummary, TabInfo
+from browser_use.tools.registry.views import ActionModel
+
+from langgraph_browser_agent.codec import Codec, decode_history, decode_state, encode_history, encode_state
+from langgraph_browser_agent.trace import ReplayedDOMState
+
+
+class ClickAction(ActionModel):
+    click: dict | None = None
+
+
+CodecOutput = AgentOutput.type_with_custom_actions(ClickAction)
+
+SCREENSHOT = base64.b64encode(bytes(range(256)) * 64).decode()
+
+
+def make_state():
+    """Create a BrowserAgentState with a screenshot, a model output and results."""
+    return {
+        'task': 'Find the pricing page',
+        'browser_state_summary': BrowserStateSummary(
+            dom_state=ReplayedDOMState('[1]<a>Pricing</a>\n[2]<a>Docs</a>'),
+            url='https://example.com/',
+            title='Example',
+            tabs=[TabInfo(url='https://example.com/', title='Example', target_id='0123456789ABCDEF')],
+            screenshot=SCREENSHOT,
+        ),
+        'last_model_output': CodecOutput(next_goal='open pricing', action=[ClickAction(click={'index': 1})]),
+        'last_result': [ActionResult(extracted_content='clicked pricing')],
+    }
+
+
+def make_history(steps=20):
+    """Create an AgentHistoryList whose items repeat URLs and titles."""
+    items = []
+    for step in range(steps):
+        items.append(AgentHistory(
+            model_output=CodecOutput(memory='Looking for the pricing page', action=[ClickAction(click={'index': step})]),
+            result=[ActionResult(extracted_content=f'clicked element {step} on https://example.com/pricing')],
+            state=BrowserStateHistory(
+                url='https://example.com/pricing', title='Pricing - Example', tabs=[], interacted_element=[None], screenshot_path=None,
+            ),
+            metadata=StepMetadata(step_number=step, step_start_time=1000.0 + step, step_end_time=1000.5 + step),
+        ))
+    return AgentHistoryList(history=items, usage=None)
+
+
+class TestCodec:
+    """Test generic encoding."""
+
+    @pytest.mark.parametrize('compression', [None, 'zlib', 'zstd'])
+    def test_round_trip(self, compression):
+        """Test that JSON-like data survives every compression mode."""
+        if compression == 'zstd':
+            pytest.importorskip('zstandard')
+        data = {'a': ['https://example.com/long', 'https://example.com/long', 1, 2.5, None, True], 'b': {'c': 'short'}}
+
+        assert Codec.loads(Codec(compression=compression).dumps(data)) == data
+
+    def test_repeated_strings_are_interned(self):
+        """Test that a repeated long string is stored once."""
+        text = 'x' * 1000
+        encoded = Codec().dumps([text] * 50)
+
+        assert len(encoded) < 1200
+        assert Codec.loads(encoded) == [text] * 50
+
+    def test_screenshot_stored_raw(self):
+        """Test that base64 screenshots are stored as raw bytes and restored as identical base64."""
+        encoded = Codec().dumps({'screenshot': SCREENSHOT})
+
+        assert len(encoded) < len(SCREENSHOT) * 0.8
+        assert Codec.loads(encoded) == {'screenshot': SCREENSHOT}
+
+    def test_non_base64_screenshot_field_kept(self):
+        """Test that a screenshot field holding something else round-trips unchanged."""
+        data = {'screenshot': 'not base64!'}
+
+        assert Codec.loads(Codec().dumps(data)) == data
+
+    def test_rejects_foreign_data(self):
+        """Test that other data is rejected instead of misdecoded."""
+        with pytest.raises(ValueError):
+            Codec.loads(b'{"json": true}')
+
+    def test_unknown_compression(self):
+        """Test that an unknown compression is rejected."""
+        with pytest.raises(ValueError):
+            Codec(compression='lz4')
+
+
+class TestStateAndHistory:
+    """Test the BrowserAgentState and AgentHistoryList helpers."""
+
+    def test_state_round_trip(self):
+        """Test that the state dict decodes to equivalent browser-use objects."""
+        state = make_state()
+
+        decoded = decode_state(encode_state(state), CodecOutput)
+
+        assert decoded['task'] == state['task']
+        assert decoded['browser_state_summary'].screenshot == SCREENSHOT
+        assert decoded['browser_state_summary'].tabs == state['browser_state_summary'].tabs
+        assert decoded['browser_state_summary'].dom_state.llm_representation() == '[1]<a>Pricing</a>\n[2]<a>Docs</a>'
+        assert decoded['last_model_output'] == state['last_model_output']
+        assert decoded['last_result'] == state['last_result']
+
+    def test_empty_state(self):
+        """Test the state before the first step."""
+        state = {'task': 't', 'browser_state_summary': None, 'last_model_output': None, 'last_result': None}
+
+        assert decode_state(encode_state(state), CodecOutput) == state
+
+    def test_history_round_trip(self):
+        """Test that a history decodes to the same model_dump() and is smaller than JSON."""
+        history = make_history()
+
+        encoded = encode_history(history)
+        decoded = decode_history(encoded, CodecOutput)
+
+        assert decoded.model_dump() == history.model_dump()
+        assert len(encoded) < len(json.dumps(history.model_dump()))
@@ -0,0 +1,198 @@
+"""Tests for message-history compaction between steps."""
+import pytest
+from unittest.mock import Mock
+
+from browser_use.agent.message_manager.service import MessageManager
+from browser_use.agent.message_manager.views import HistoryItem
+from browser_use.llm.messages import SystemMessage
+from browser_use.llm.views import ChatInvokeCompletion, ChatInvokeUsage
+from browser_use.tokens.service import TokenCost
+
+from langgraph_browser_agent.compaction import (
+    CompactionStats,
+    MessageCompactor,
+    compact_messages,
+    needs_compaction,
+    observe_history_size,
+)
+from langgraph_browser_agent.graph import create_browser_agent_graph, create_mock_agent_instance
+
+
+class SummaryLLM:
+    """LLM that answers every compaction request with a short summary, or raises `error`."""
+
+    model = 'summary'
+    provider = 'fake'
+
+    def __init__(self, error=None, usage=None):
+        self.error = error
+        self.usage = usage
+        self.calls = 0
+
+    async def ainvoke(self, messages, output_format=None, **kwargs):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return ChatInvokeCompletion(completion='Visited pages 1..n; still searching.', usage=self.usage)
+
+
+def compacting_agent(compactor, steps=0):
+    """Create an agent instance with a real message manager holding `steps` history items."""
+    agent_instance = Mock()
+    agent_instance.compactor = compactor
+    agent_instance.compaction_stats = CompactionStats()
+    agent_instance._compacted_tokens = 0
+    agent_instance.current_step = 0
+    agent_instance.max_steps = 100
+    original = agent_instance.original_agent
+    original._message_manager = MessageManager(task='task', system_message=SystemMessage(content='system'), file_system=Mock())
+    original.settings.page_extraction_llm = None
+    original.llm = SummaryLLM()
+    for _ in range(steps):
+        add_step(agent_instance)
+    return agent_instance
+
+
+def add_step(agent_instance, size=400):
+    """Append one step's history item of about `size` characters."""
+    agent_instance.current_step += 1
+    agent_instance.original_agent._message_manager.state.agent_history_items.append(
+        HistoryItem(step_number=agent_instance.current_step, memory='m' * size, next_goal='next')
+    )
+
+
+class TestMessageCompactor:
+    """Test the compaction threshold and summary."""
+
+    def test_threshold(self):
+        """Test that compaction is needed only once the history crosses trigger_tokens."""
+        compactor = MessageCompactor(trigger_tokens=1000)
+        agent_instance = compacting_agent(compactor, steps=5)
+
+        assert not needs_compaction(agent_instance)
+        add_step(agent_instance, size=4000)
+        assert needs_compaction(agent_instance)
+
+    def test_no_compactor(self):
+        """Test that an agent without a compactor never compacts."""
+        agent_instance = compacting_agent(None, steps=50)
+
+        assert not needs_compaction(agent_instance)
+
+    @pytest.mark.asyncio
+    async def test_keeps_last_steps_and_records_savings(self):
+        """Test that older steps are summarized, the last K kept verbatim and the savings recorded."""
+        compactor = MessageCompactor(trigger_tokens=1000, keep_last=3)
+        agent_instance = compacting_agent(compactor, steps=20)
+        message_manager = agent_instance.original_agent._message_manager
+        kept = message_manager.state.agent_history_items[-3:]
+
+        assert await compact_messages(agent_instance)
+
+        assert message_manager.state.agent_history_items[1:] == kept
+        assert 'still searching' in message_manager.agent_history_description
+        stats = agent_instance.compaction_stats
+        assert stats.compactions == 1
+        assert stats.tokens_removed > 0
+        observe_history_size(agent_instance)
+        assert stats.prompt_tokens_saved == stats.tokens_removed
+
+    @pytest.mark.asyncio
+    async def test_compaction_llm_usage_counted(self):
+        """Test that a separate compaction LLM's calls count towards the agent's token cost, once each."""
+        usage = ChatInvokeUsage(prompt_tokens=900, prompt_cached_tokens=None, prompt_cache_creation_tokens=None,
+                                prompt_image_tokens=None, completion_tokens=50, total_tokens=950)
+        compactor = MessageCompactor(trigger_tokens=1000, keep_last=3, compaction_llm=SummaryLLM(usage=usage))
+        agent_instance = compacting_agent(compactor, steps=20)
+        token_cost = agent_instance.original_agent.token_cost_service = TokenCost()
+
+        assert await compact_messages(agent_instance)
+        for _ in range(20):
+            add_step(agent_instance)
+        assert await compact_messages(agent_instance)
+
+        assert [entry.usage.total_tokens for entry in token_cost.usage_history] == [950, 950]
+
+    @pytest.mark.asyncio
+    async def test_failed_summary_keeps_history(self):
+        """Test that a failing summary call leaves the history as it was."""
+        compactor = MessageCompactor(trigger_tokens=1000, compaction_llm=SummaryLLM(error=RuntimeError('down')))
+        agent_instance = compacting_agent(compactor, steps=20)
+        items = list(agent_instance.original_agent._message_manager.state.agent_history_items)
+
+        assert not await compact_messages(agent_instance)
+
+        assert agent_instance.original_agent._message_manager.state.agent_history_items == items
+        assert agent_instance.compaction_stats.failures == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_summary_backs_off(self):
+        """Test that after a failed summary the next attempts wait longer and longer, then resume on success."""
+        summarizer = SummaryLLM(error=RuntimeError('down'))
+        compactor = MessageCompactor(trigger_tokens=1000, retry_after=2, max_retry_after=8, compaction_llm=summarizer)
+        agent_instance = compacting_agent(compactor, steps=20)
+
+        attempted = []
+        for _ in range(30):
+            if needs_compaction(agent_instance):
+                attempted.append(agent_instance.current_step)
+                await compact_messages(agent_instance)
+            add_step(agent_instance)
+
+        assert attempted == [20, 22, 26, 34, 42]
+        assert summarizer.calls == len(attempted)
+        assert agent_instance.compaction_stats.failures == len(attempted)
+
+        summarizer.error = None
+        while not needs_compaction(agent_instance):
+            add_step(agent_instance)
+        assert await compact_messages(agent_instance)
+        assert agent_instance.compaction_stats.consecutive_failures == 0
+        add_step(agent_instance, size=8000)
+        assert needs_compaction(agent_instance)
+
+    @pytest.mark.asyncio
+    async def test_history_stays_bounded(self):
+        """Test that over a long run the history size stays under the threshold plus one step."""
+        compactor = MessageCompactor(trigger_tokens=2000, keep_last=4)
+        agent_instance = compacting_agent(compactor)
+
+        for _ in range(100):
+            add_step(agent_instance)
+            observe_history_size(agent_instance)
+            if needs_compaction(agent_instance):
+                await compact_messages(agent_instance)
+
+        stats = agent_instance.compaction_stats
+        assert stats.compactions >= 5
+        assert stats.max_history_tokens < 2000 + 200
+        assert stats.as_dict()['p95_history_tokens'] < 2000 + 200
+
+
+class TestCompactionNode:
+    """Test routing through compact_messages between steps."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('mode', ['verbose', 'fast'])
+    async def test_graph_compacts_between_steps(self, mode):
+        """Test that both graphs compact once the threshold is crossed and then carry on."""
+        compactor = MessageCompactor(trigger_tokens=500, keep_last=2)
+        mock_agent = create_mock_agent_instance(done_after=6)
+        mock_agent.compactor = compactor
+        mock_agent.compaction_stats = CompactionStats()
+        source = compacting_agent(compactor)
+        mock_agent.original_agent._message_manager = source.original_agent._message_manager
+        mock_agent.original_agent.settings.page_extraction_llm = SummaryLLM()
+
+        def finalize(*args):
+            source.current_step = mock_agent.current_step
+            add_step(source)
+        mock_agent.original_agent._finalize.side_effect = finalize
+
+        graph = create_browser_agent_graph(mock_agent, mode=mode)
+        state = {'task': 'test', 'browser_state_summary': None, 'last_model_output': None, 'last_result': None}
+        await graph.ainvoke(state, {'recursion_limit': 100})
+
+        assert mock_agent.compaction_stats.compactions >= 1
+        assert mock_agent.original_agent.settings.page_extraction_llm.calls == mock_agent.compaction_stats.compactions
+        assert mock_agent.current_step == 6
@@ -0,0 +1,115 @@
+"""Tests for the streaming history GIF writer."""
+import base64
+import pytest
+from unittest.mock import Mock
+
+from PIL import Image
+from browser_use.agent.gif import create_history_gif
+from browser_use.agent.views import ActionResult, AgentHistory, AgentHistoryList
+from browser_use.browser.views import PLACEHOLDER_4PX_SCREENSHOT, BrowserStateHistory
+
+from langgraph_browser_agent.gif import StreamingGifWriter, queue_gif_frames
+from langgraph_browser_agent.instrumentation import NodeMetrics
+
+
+def write_png(path, color, size=(320, 200)):
+    """Write a solid-color PNG screenshot."""
+    Image.new('RGB', size, color).save(path)
+    return str(path)
+
+
+def history_item(screenshot_path, url='https://example.com/'):
+    """Create a history item without model output pointing at `screenshot_path`."""
+    return AgentHistory(
+        model_output=None,
+        result=[ActionResult()],
+        state=BrowserStateHistory(url=url, title='Example', tabs=[], interacted_element=[None], screenshot_path=screenshot_path),
+        metadata=None,
+    )
+
+
+def make_history(tmp_path):
+    """Three real screenshots plus a missing, a placeholder and a new-tab screenshot."""
+    placeholder = tmp_path / 'placeholder.png'
+    placeholder.write_bytes(base64.b64decode(PLACEHOLDER_4PX_SCREENSHOT))
+    return AgentHistoryList(history=[
+        history_item(write_png(tmp_path / '0.png', 'red')),
+        history_item(None),
+        history_item(str(placeholder)),
+        history_item(write_png(tmp_path / '1.png', 'green'), url='chrome://newtab/'),
+        history_item(write_png(tmp_path / '2.png', 'blue', size=(640, 400))),
+        history_item(write_png(tmp_path / '3.png', 'white')),
+    ], usage=None)
+
+
+def n_frames(path):
+    with Image.open(path) as image:
+        return image.n_frames
+
+
+class TestStreamingGifWriter:
+    """Test incremental encoding."""
+
+    @pytest.mark.asyncio
+    async def test_same_frames_as_create_history_gif(self, tmp_path):
+        """Test that the streamed GIF has the task frame and the same step frames as browser-use's."""
+        history = make_history(tmp_path)
+        create_history_gif(task='Browse', history=history, output_path=str(tmp_path / 'expected.gif'))
+        writer = StreamingGifWriter(str(tmp_path / 'streamed.gif'), task='Browse')
+
+        assert await writer.finish(history)
+
+        assert n_frames(tmp_path / 'streamed.gif') == n_frames(tmp_path / 'expected.gif') == 4
+        assert writer.stats.frames == 3
+        assert writer.stats.skipped == 3
+        assert writer.stats.errors == 0
+        with Image.open(tmp_path / 'streamed.gif') as image:
+            assert image.size == (320, 200)
+        assert not (tmp_path / 'streamed.gif.partial').exists()
+
+    @pytest.mark.asyncio
+    async def test_incremental_queueing(self, tmp_path):
+        """Test that each step only queues the history items added since the last one."""
+        history = make_history(tmp_path)
+        agent = Mock()
+        agent.original_agent.history = AgentHistoryList(history=history.history[:2], usage=None)
+        agent.gif_writer = StreamingGifWriter(str(tmp_path / 'run.gif'), metrics=NodeMetrics())
+
+        queue_gif_frames(agent)
+        agent.original_agent.history.history.extend(history.history[2:])
+        queue_gif_frames(agent)
+        queue_gif_frames(agent)
+        await agent.gif_writer.finish(agent.original_agent.history)
+
+        assert agent.gif_writer._queued == 6
+        assert n_frames(tmp_path / 'run.gif') == 3
+        assert agent.gif_writer.metrics.snapshot()['gif_frame']['count'] == 3
+        assert agent.gif_writer.stats.loop_time < agent.gif_writer.stats.encode_time
+
+    @pytest.mark.asyncio
+    async def test_broken_screenshot_is_counted(self, tmp_path):
+        """Test that an undecodable screenshot is skipped and counted instead of failing the run."""
+        broken = tmp_path / 'broken.png'
+        broken.write_bytes(b'not an image')
+        history = AgentHistoryList(history=[history_item(str(broken)), history_item(write_png(tmp_path / '0.png', 'red'))], usage=None)
+        writer = StreamingGifWriter(str(tmp_path / 'run.gif'))
+
+        assert await writer.finish(history)
+
+        assert writer.stats.errors == 1
+        assert n_frames(tmp_path / 'run.gif') == 1
+
+    @pytest.mark.asyncio
+    async def test_no_screenshots(self, tmp_path):
+        """Test that a history without screenshots writes no file."""
+        writer = StreamingGifWriter(str(tmp_path / 'run.gif'), task='Browse')
+
+        assert not await writer.finish(AgentHistoryList(history=[history_item(None)], usage=None))
+        assert not (tmp_path / 'run.gif').exists()
+
+    def test_agents_without_writer(self):
+        """Test that queueing is a no-op for agents without a writer."""
+        agent = Mock()
+        agent.gif_writer = None
+
+        queue_gif_frames(agent)
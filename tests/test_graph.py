@@ -2,7 +2,14 @@
 import pytest
 from unittest.mock import Mock
 
-from langgraph_browser_agent.graph import create_browser_agent_graph, create_standalone_graph
+from langgraph_browser_agent.graph import (
+    AGENT_CONFIG_KEY,
+    agent_from_config,
+    create_browser_agent_graph,
+    create_mock_agent_instance,
+    create_standalone_graph,
+    get_browser_agent_graph,
+)
 
 
 class TestCreateBrowserAgentGraph:
@@ -64,6 +71,44 @@ class TestCreateBrowserAgentGraph:
         assert graph1 != graph2  # Different instances should create different graphs
 
 
+class TestSharedGraph:
+    """Test the compile-once graph shared by all agents."""
+
+    def test_graph_is_compiled_once(self):
+        """Test that the module-level graph is reused."""
+        assert get_browser_agent_graph() is get_browser_agent_graph()
+
+    def test_bound_graphs_share_compiled_nodes(self):
+        """Test that binding an agent does not recompile the graph."""
+        graph = create_browser_agent_graph(Mock())
+        assert graph.builder is get_browser_agent_graph().builder
+
+    def test_agent_from_config(self):
+        """Test that nodes find their agent in the run config."""
+        agent = Mock()
+        assert agent_from_config({'configurable': {AGENT_CONFIG_KEY: agent}}) is agent
+
+    def test_agent_from_config_missing(self):
+        """Test that an unbound run fails with a helpful error."""
+        with pytest.raises(ValueError, match=AGENT_CONFIG_KEY):
+            agent_from_config({'configurable': {}})
+
+
+class TestMockAgentInstance:
+    """Test the mock agent instance the standalone graph runs on."""
+
+    def test_sets_every_agent_attribute(self):
+        """Test that the mock turns off every feature a LangGraphBrowserAgent has, rather than leaving Mock attributes."""
+        from langgraph_browser_agent import LangGraphBrowserAgent
+
+        # Copies of the browser-use agent, and what only run() itself uses
+        run_only = {'browser_session', 'tools', 'llm', '_message_manager', 'settings', 'logger', 'graph', 'graph_mode',
+                    'original_agent', 'session_pool', '_leased_session', 'screenshot_store', '_screenshot_lease', 'startup_report'}
+        expected = set(vars(LangGraphBrowserAgent(Mock()))) - run_only
+
+        assert expected <= set(vars(create_mock_agent_instance()))
+
+
 class TestCreateStandaloneGraph:
     """Test create_standalone_graph function."""
     
@@ -95,3 +140,109 @@ class TestCreateStandaloneGraph:
         # Verify graph compiles successfully
         assert graph is not None
         assert hasattr(graph, 'ainvoke')
+
+    @pytest.mark.asyncio
+    async def test_standalone_graph_runs_to_completion(self):
+        """Test that the mock Studio graph can actually be invoked."""
+        graph = create_standalone_graph()
+        state = {'task': 'test', 'browser_state_summary': None, 'last_model_output': None, 'last_result': None}
+
+        final_state = await graph.ainvoke(state, {'recursion_limit': 100})
+
+        assert final_state['task'] == 'test'
+
+
+def record_calls(mock_agent):
+    """Record the order of browser-use calls made by a mock agent's graph run."""
+    calls = []
+    original = mock_agent.original_agent
+    for name in ('_prepare_context', '_get_next_action', '_execute_actions', '_post_process',
+                 '_finalize', '_handle_step_error', 'log_completion'):
+        method = getattr(original, name)
+        method.side_effect = (lambda n, previous: lambda *a, **k: calls.append(n) or (previous(*a, **k) if previous else None))(
+            name, method.side_effect)
+    return calls
+
+
+async def run_mode(mode, configure=None):
+    """Run a mock agent through the graph in `mode` and return its call log."""
+    mock_agent = create_mock_agent_instance(done_after=3)
+    if configure:
+        configure(mock_agent)
+    calls = record_calls(mock_agent)
+    graph = create_browser_agent_graph(mock_agent, mode=mode)
+    state = {'task': 'test', 'browser_state_summary': None, 'last_model_output': None, 'last_result': None}
+    await graph.ainvoke(state, {'recursion_limit': 100})
+    return calls, mock_agent
+
+
+class TestFastGraph:
+    """Test the fused fast-path topology."""
+
+    def test_fast_graph_nodes(self):
+        """Test that the fast graph fuses the pipeline into gate/step nodes."""
+        graph = get_browser_agent_graph('fast')
+
+        for node in ('gate', 'step', 'consecutive_failure_actions', 'stopped_state_actions', 'history_is_done_actions'):
+            assert node in graph.nodes
+        assert 'check_paused' not in graph.nodes
+        assert graph is get_browser_agent_graph('fast')
+        assert graph is not get_browser_agent_graph('verbose')
+
+    def test_unknown_mode(self):
+        """Test that an unknown mode is rejected."""
+        with pytest.raises(ValueError):
+            get_browser_agent_graph('turbo')
+
+    @pytest.mark.asyncio
+    async def test_same_calls_as_verbose_graph(self):
+        """Test that both topologies make the same agent calls in the same order."""
+        verbose_calls, verbose_agent = await run_mode('verbose')
+        fast_calls, fast_agent = await run_mode('fast')
+
+        assert fast_calls == verbose_calls
+        assert fast_agent.current_step == verbose_agent.current_step == 3
+        assert fast_agent.ended_due_to_break is True
+
+    @pytest.mark.asyncio
+    async def test_error_path_matches_verbose_graph(self):
+        """Test that a failing phase goes through handle_error and finalize in both modes."""
+        def configure(mock_agent):
+            failures = [RuntimeError('llm down')]
+
+            def fail_once(*args, **kwargs):
+                if failures:
+                    raise failures.pop()
+            mock_agent.original_agent._get_next_action.side_effect = fail_once
+
+        verbose_calls, _ = await run_mode('verbose', configure)
+        fast_calls, _ = await run_mode('fast', configure)
+
+        assert fast_calls == verbose_calls
+        assert fast_calls[:4] == ['_prepare_context', '_get_next_action', '_handle_step_error', '_finalize']
+
+    @pytest.mark.asyncio
+    async def test_timeout_path_matches_verbose_graph(self):
+        """Test that a timed-out phase skips finalize in both modes."""
+        def configure(mock_agent):
+            def time_out(*args, **kwargs):
+                mock_agent.original_agent.step_start_time = 0
+            mock_agent.original_agent._execute_actions.side_effect = time_out
+            mock_agent.original_agent.state.consecutive_failures = 0
+
+        verbose_calls, _ = await run_mode('verbose', configure)
+        fast_calls, _ = await run_mode('fast', configure)
+
+        assert fast_calls == verbose_calls
+        assert '_finalize' not in fast_calls[:4]
+
+    @pytest.mark.asyncio
+    async def test_stopped_agent_ends_without_stepping(self):
+        """Test that the gate routes a stopped agent straight to END."""
+        def configure(mock_agent):
+            mock_agent.original_agent.state.stopped = True
+
+        fast_calls, fast_agent = await run_mode('fast', configure)
+
+        assert fast_calls == []
+        assert fast_agent.ended_due_to_break is True
@@ -0,0 +1,167 @@
+"""Tests for hedged LLM requests."""
+import asyncio
+import pytest
+from unittest.mock import Mock
+
+from browser_use.agent.views import AgentOutput
+from browser_use.llm.messages import UserMessage
+from browser_use.llm.views import ChatInvokeCompletion, ChatInvokeUsage
+from browser_use.tokens.service import TokenCost
+from browser_use.tools.registry.views import ActionModel
+
+from langgraph_browser_agent.hedge import LLMHedger, get_next_action_with_hedging
+
+
+class ClickAction(ActionModel):
+    click: dict | None = None
+
+
+HedgedAgentOutput = AgentOutput.type_with_custom_actions(ClickAction)
+
+
+class FakeLLM:
+    """LLM that answers after `delay` seconds, or raises `error`."""
+
+    provider = 'fake'
+
+    def __init__(self, model, delay=0.0, error=None, completion=None):
+        self.model = model
+        self.delay = delay
+        self.error = error
+        self.completion = completion
+        self.calls = 0
+        self.cancelled = 0
+
+    async def ainvoke(self, messages, output_format=None, **kwargs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error is not None:
+            raise self.error
+        completion = self.completion or output_format(next_goal=self.model, action=[ClickAction(click={'index': 1})])
+        usage = ChatInvokeUsage(prompt_tokens=10, prompt_cached_tokens=None, prompt_cache_creation_tokens=None,
+                                prompt_image_tokens=None, completion_tokens=5, total_tokens=15)
+        return ChatInvokeCompletion(completion=completion, usage=usage)
+
+
+class TestLLMHedger:
+    """Test racing a hedge against a slow primary."""
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_not_hedged(self):
+        """Test that a primary answering before the delay never sends a hedge."""
+        hedger = LLMHedger(secondary_llm=FakeLLM('secondary'), delay=1.0)
+
+        result = await hedger.ainvoke(FakeLLM('primary'), [], HedgedAgentOutput)
+
+        assert result.completion.next_goal == 'primary'
+        assert hedger.secondary_llm.calls == 0
+        assert hedger.stats.as_dict()['hedge_rate'] == 0.0
+        assert hedger.stats.primary_wins == 1
+
+    @pytest.mark.asyncio
+    async def test_hedge_wins_and_primary_cancelled(self):
+        """Test that a slow primary is beaten by the hedge and then cancelled."""
+        primary = FakeLLM('primary', delay=5.0)
+        hedger = LLMHedger(secondary_llm=FakeLLM('secondary', delay=0.01), delay=0.02)
+        for _ in range(5):
+            hedger.observe('primary', 1.0)
+
+        result = await hedger.ainvoke(primary, [UserMessage(content='x' * 400)], HedgedAgentOutput)
+        await asyncio.sleep(0)
+
+        assert result.completion.next_goal == 'secondary'
+        assert primary.cancelled == 1
+        assert hedger.stats.hedge_wins == 1
+        assert hedger.stats.losers_cancelled == 1
+        assert hedger.stats.cancelled_prompt_tokens == 100
+        assert hedger.stats.avg_latency < 1.0
+        assert hedger.stats.time_saved == pytest.approx(1.0 - hedger.stats.total_latency)
+
+    @pytest.mark.asyncio
+    async def test_invalid_hedge_ignored(self):
+        """Test that a hedge whose completion does not validate loses to the primary."""
+        hedger = LLMHedger(secondary_llm=FakeLLM('secondary', completion='not an AgentOutput'), delay=0.01)
+
+        result = await hedger.ainvoke(FakeLLM('primary', delay=0.05), [], HedgedAgentOutput)
+
+        assert result.completion.next_goal == 'primary'
+        assert hedger.stats.hedged == 1
+        assert hedger.stats.primary_wins == 1
+
+    @pytest.mark.asyncio
+    async def test_both_fail_raises_primary_error(self):
+        """Test that the primary's error is raised when both requests fail."""
+        primary_error = RuntimeError('primary down')
+        hedger = LLMHedger(secondary_llm=FakeLLM('secondary', error=RuntimeError('secondary down')), delay=0.01)
+
+        with pytest.raises(RuntimeError, match='primary down'):
+            await hedger.ainvoke(FakeLLM('primary', delay=0.05, error=primary_error), [], HedgedAgentOutput)
+        assert hedger.stats.failures == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_from_outside(self):
+        """Test that cancelling the call (e.g. a phase timeout) cancels both requests."""
+        primary, secondary = FakeLLM('primary', delay=5.0), FakeLLM('secondary', delay=5.0)
+        hedger = LLMHedger(secondary_llm=secondary, delay=0.01)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(hedger.ainvoke(primary, [], HedgedAgentOutput), 0.05)
+        await asyncio.sleep(0)
+
+        assert (primary.cancelled, secondary.cancelled) == (1, 1)
+
+    def test_delay_from_percentile(self):
+        """Test that the hedge delay follows the primary's latency percentile once there are enough samples."""
+        hedger = LLMHedger(quantile=90, initial_delay=7.0, min_samples=10)
+        assert hedger.hedge_delay('primary') == 7.0
+
+        for latency in range(1, 11):
+            hedger.observe('primary', float(latency))
+
+        assert hedger.hedge_delay('primary') == pytest.approx(9.1)
+
+    @pytest.mark.asyncio
+    async def test_lost_primaries_keep_delay_from_shrinking(self):
+        """Test that a primary beaten by the hedge is still sampled, at its elapsed time, so the delay does not drift down."""
+        hedger = LLMHedger(secondary_llm=FakeLLM('secondary', delay=0.05), quantile=50, min_samples=3)
+        for _ in range(3):
+            hedger.observe('primary', 0.01)
+
+        for _ in range(5):
+            await hedger.ainvoke(FakeLLM('primary', delay=5.0), [], HedgedAgentOutput)
+
+        assert hedger.stats.hedge_wins == 5
+        assert hedger.hedge_delay('primary') >= 0.05
+
+
+class TestGetNextActionWithHedging:
+    """Test hedging inside get_next_action."""
+
+    @pytest.mark.asyncio
+    async def test_hedged_call_and_token_accounting(self):
+        """Test that the agent's LLM is hedged for the step, restored after, and both requests' tokens counted."""
+        token_cost = TokenCost()
+        primary = token_cost.register_llm(FakeLLM('primary', delay=5.0))
+        hedger = LLMHedger(secondary_llm=FakeLLM('secondary'), delay=0.01)
+        agent_instance = Mock()
+        agent_instance.hedger = hedger
+        agent_instance.decision_cache = None
+        original = agent_instance.original_agent
+        original.llm = primary
+        original.token_cost_service = token_cost
+
+        async def get_next_action(browser_state_summary):
+            response = await original.llm.ainvoke([UserMessage(content='x' * 400)], HedgedAgentOutput)
+            original.state.last_model_output = response.completion
+        original._get_next_action = get_next_action
+
+        await get_next_action_with_hedging(agent_instance, Mock())
+
+        assert original.state.last_model_output.next_goal == 'secondary'
+        assert original.llm is primary
+        assert [entry.model for entry in token_cost.usage_history] == ['secondary', 'primary']
+        assert token_cost.usage_history[1].usage.prompt_tokens == 100  # the cancelled primary, estimated
@@ -0,0 +1,210 @@
+"""Tests for spilling agent history to disk."""
+import gzip
+import json
+import threading
+import pytest
+from unittest.mock import Mock
+
+from browser_use.agent.views import ActionResult, AgentHistory, AgentHistoryList, AgentOutput
+from browser_use.browser.views import BrowserStateHistory
+from browser_use.tools.registry.views import ActionModel
+
+from langgraph_browser_agent.codec import Codec
+from langgraph_browser_agent.history_log import (
+    HistoryLog,
+    SpilledHistory,
+    SpilledHistoryList,
+    iter_history,
+    load_history,
+    spill_history,
+)
+from langgraph_browser_agent.trace import TRACE_FORMAT, TRACE_VERSION, ReplayAgent, load_trace
+
+
+class LoggedAction(ActionModel):
+    click: dict | None = None
+    done: dict | None = None
+
+
+LoggedOutput = AgentOutput.type_with_custom_actions(LoggedAction)
+
+
+def history_item(step, done=False):
+    """An AgentHistory item for page `step`, clicking through or finishing."""
+    action = LoggedAction(done={'text': 'finished'}) if done else LoggedAction(click={'index': step})
+    result = ActionResult(is_done=True, success=True, extracted_content='finished') if done else ActionResult(extracted_content=f'clicked {step}')
+    return AgentHistory(
+        model_output=LoggedOutput(next_goal='advance', action=[action]),
+        result=[result],
+        state=BrowserStateHistory(url=f'https://example.com/{step}', title=f'Page {step}', tabs=[], interacted_element=[None],
+                                  screenshot_path=None),
+        metadata=None,
+    )
+
+
+def write_trace(path, steps):
+    """Write a trace of `steps` successful steps, the last of which is done."""
+    lines = [{
+        'format': TRACE_FORMAT, 'version': TRACE_VERSION, 'task': 'Click through', 'graph_mode': 'fast', 'max_steps': 20,
+        'settings': {'max_failures': 3, 'final_response_after_failure': False, 'step_timeout': 30},
+    }]
+    for step in range(steps):
+        last = step == steps - 1
+        page = {'url': f'https://example.com/{step}', 'title': f'Page {step}', 'tabs': [], 'dom': f'[{step}]<a>Next</a>'}
+        action = {'done': {'text': 'finished'}} if last else {'click': {'index': step}}
+        result = {'is_done': True, 'success': True, 'extracted_content': 'finished'} if last else {'extracted_content': f'clicked {step}'}
+        for phase, data in (('prepare_context', page), ('get_next_action', {'next_goal': 'advance', 'action': [action]}),
+                            ('execute_actions', [result]), ('evaluate_result', None)):
+            lines.append({'step': step, 'phase': phase, 'duration': 0.0, 'data': data, 'error': None, 'timed_out': False})
+    with gzip.open(path, 'wt') as f:
+        f.writelines(json.dumps(line) + '\n' for line in lines)
+    return str(path)
+
+
+def spilled(tmp_path, steps, window=5, codec=None):
+    """An AgentHistoryList of `steps` items whose history lives in a HistoryLog, all written out."""
+    log = HistoryLog(tmp_path, window=window, codec=codec)
+    history = SpilledHistoryList(history=log.open('run', LoggedOutput), usage=None)
+    for step in range(steps):
+        history.add_item(history_item(step, done=step == steps - 1))
+    history.history.close()
+    return log, history
+
+
+class TestSpilledHistory:
+    """Test the windowed, disk-backed history list."""
+
+    @pytest.mark.parametrize('codec', [None, Codec()])
+    def test_window_bounds_memory(self, tmp_path, codec):
+        """Test that only the window stays in memory while every item can still be read back in order."""
+        log, history = spilled(tmp_path, 40, window=5, codec=codec)
+
+        assert history.history.resident == 5
+        assert len(history) == 40
+        assert history.history[0].state.url == 'https://example.com/0'
+        assert [item.state.url for item in history.history[8:11]] == [f'https://example.com/{i}' for i in (8, 9, 10)]
+        assert history.urls() == [f'https://example.com/{i}' for i in range(40)]
+        assert log.stats.items_written == 40
+        assert log.stats.items_read > 0
+
+    def test_history_methods(self, tmp_path):
+        """Test that AgentHistoryList's own methods see the whole run."""
+        _, history = spilled(tmp_path, 12, window=3)
+        reference = AgentHistoryList(history=[history_item(step, done=step == 11) for step in range(12)], usage=None)
+
+        assert history.is_done() and history.is_successful()
+        assert history.final_result() == 'finished'
+        assert history.model_actions() == reference.model_actions()
+        assert history.extracted_content() == reference.extracted_content()
+        assert history.model_dump() == reference.model_dump()
+        assert json.loads(history.model_dump_json()) == json.loads(reference.model_dump_json())
+
+    def test_writes_happen_off_the_callers_thread(self, tmp_path, monkeypatch):
+        """Test that appending only queues the item, and the writer thread encodes and writes it."""
+        import langgraph_browser_agent.history_log as history_log
+
+        threads = []
+        encode = history_log._encode_item
+
+        def recording_encode(item, codec):
+            threads.append(threading.current_thread())
+            return encode(item, codec)
+
+        monkeypatch.setattr(history_log, '_encode_item', recording_encode)
+        log = HistoryLog(tmp_path, window=2)
+        items = log.open('run', LoggedOutput)
+        for step in range(4):
+            items.append(history_item(step))
+        items.close()
+
+        assert len(threads) == 4 and threading.current_thread() not in threads
+        assert items[0].state.url == 'https://example.com/0'
+        assert len(items.path.read_text().splitlines()) == 4
+
+    def test_window_items_are_not_reloaded(self, tmp_path):
+        """Test that the latest items are served from memory as the same objects."""
+        log, history = spilled(tmp_path, 10, window=4)
+        last = history.history[-1]
+
+        assert history.history[-1] is last
+        assert history.history[6:] == list(history.history)[6:]
+        assert log.stats.items_read == 6  # only the list() call went to disk
+
+    def test_window_must_be_positive(self, tmp_path):
+        """Test that a window of zero is rejected."""
+        with pytest.raises(ValueError):
+            HistoryLog(tmp_path, window=0)
+
+
+class TestRecovery:
+    """Test reading a log back, e.g. after a crash."""
+
+    def test_log_is_jsonl(self, tmp_path):
+        """Test that the default format is one JSON object per item."""
+        _, history = spilled(tmp_path, 3)
+
+        lines = history.history.path.read_text().splitlines()
+
+        assert [json.loads(line)['state']['url'] for line in lines] == [f'https://example.com/{i}' for i in range(3)]
+
+    @pytest.mark.parametrize('codec', [None, Codec(compression='zlib')])
+    def test_partial_last_item_is_skipped(self, tmp_path, codec):
+        """Test that an item cut short by a crash is dropped and the items before it load."""
+        _, history = spilled(tmp_path, 6, codec=codec)
+        path = history.history.path
+        path.write_bytes(path.read_bytes()[:-10])
+
+        recovered = load_history(path, LoggedOutput, codec=codec)
+
+        assert recovered.urls() == [f'https://example.com/{i}' for i in range(5)]
+        assert [item.result[0].extracted_content for item in iter_history(path, LoggedOutput, codec=codec)][-1] == 'clicked 4'
+
+
+class TestAgentHistoryLog:
+    """Test spilling during graph runs."""
+
+    @pytest.mark.asyncio
+    async def test_run_appends_each_finalized_step(self, tmp_path):
+        """Test that each finalized step lands on disk and the run ends with a bounded window."""
+        agent = ReplayAgent(load_trace(write_trace(tmp_path / 'run.trace.gz', steps=8)))
+        agent.history_log = HistoryLog(tmp_path / 'history', window=3)
+        agent.thread_id = None
+        agent.original_agent.task_id = 'task-0001'
+
+        spill_history(agent)
+        history = await agent.run()
+
+        assert isinstance(history.history, SpilledHistory)
+        assert history.history.resident == 3
+        assert history.is_done()
+        assert len(agent.history_log.path_for('task-0001').read_text().splitlines()) == 8
+        assert len(json.loads(history.model_dump_json())['history']) == 8
+
+    def test_spill_keeps_existing_items(self, tmp_path):
+        """Test that items already in the history move onto the log, and a second call is a no-op."""
+        agent_instance = Mock()
+        agent_instance.history_log = HistoryLog(tmp_path, window=2)
+        agent_instance.thread_id = 'thread-1'
+        original = agent_instance.original_agent
+        original.AgentOutput = LoggedOutput
+        original.history = AgentHistoryList(history=[history_item(step) for step in range(4)], usage=None)
+
+        spill_history(agent_instance)
+        items = original.history.history
+        spill_history(agent_instance)
+
+        items.close()
+
+        assert original.history.history is items
+        assert len(items) == 4 and items.resident == 2
+        assert items.path == tmp_path / 'thread-1.history.jsonl'
+
+    def test_no_history_log_is_noop(self):
+        """Test that an agent without a HistoryLog keeps its plain list."""
+        agent_instance = Mock()
+        agent_instance.history_log = None
+        history = agent_instance.original_agent.history
+
+        spill_history(agent_instance)
+
+        assert agent_instance.original_agent.history is history
@@ -0,0 +1,131 @@
+"""Tests for per-node latency instrumentation."""
+import time
+import urllib.request
+import pytest
+from unittest.mock import Mock, AsyncMock
+
+from langgraph_browser_agent.instrumentation import Histogram, NodeMetrics, instrumented
+from langgraph_browser_agent.graph import create_mock_agent_instance
+from langgraph_browser_agent.nodes import prepare_context_node, get_next_action_node
+
+
+def make_agent(metrics):
+    """Create a mock agent instance wired to `metrics`."""
+    agent = create_mock_agent_instance()
+    agent.metrics = metrics
+    agent.original_agent.step_start_time = time.time()
+    return agent
+
+
+class TestHistogram:
+    """Test the fixed-bucket histogram."""
+
+    def test_observe(self):
+        """Test bucket placement and cumulative counts."""
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 5.0):
+            histogram.observe(value)
+
+        assert histogram.count == 4
+        assert histogram.sum == pytest.approx(5.65)
+        assert list(histogram.cumulative()) == [(0.1, 2), (1.0, 3), (float('inf'), 4)]
+
+
+class TestNodeMetrics:
+    """Test NodeMetrics aggregation and export."""
+
+    def test_render_prometheus(self):
+        """Test the Prometheus text exposition."""
+        metrics = NodeMetrics(buckets=(0.5,))
+        metrics.observe('get_next_action', 0.2, site='example.com')
+        metrics.observe('get_next_action', 0.7, outcome='error', site='example.com')
+
+        text = metrics.render()
+
+        assert '# TYPE browser_agent_node_duration_seconds histogram' in text
+        assert 'browser_agent_node_duration_seconds_bucket{node="get_next_action",site="example.com",le="0.5"} 1' in text
+        assert 'browser_agent_node_duration_seconds_bucket{node="get_next_action",site="example.com",le="+Inf"} 2' in text
+        assert 'browser_agent_node_duration_seconds_count{node="get_next_action",site="example.com"} 2' in text
+        assert 'browser_agent_node_invocations_total{node="get_next_action",site="example.com",outcome="error"} 1' in text
+        assert not text.rstrip().endswith('# EOF')
+
+    def test_render_openmetrics(self):
+        """Test that OpenMetrics output ends with # EOF."""
+        metrics = NodeMetrics()
+        metrics.observe('prepare_context', 0.1)
+        assert metrics.render(openmetrics=True).endswith('# EOF\n')
+
+    def test_sites_can_be_collapsed(self):
+        """Test that per_site=False aggregates across sites."""
+        metrics = NodeMetrics(per_site=False)
+        metrics.observe('prepare_context', 0.1, site='a.com')
+        metrics.observe('prepare_context', 0.3, site='b.com')
+
+        assert metrics.snapshot() == {'prepare_context': {'count': 2, 'sum': 0.4, 'mean': 0.2}}
+        assert 'site=""' in metrics.render()
+
+    def test_write(self, tmp_path):
+        """Test the file dump."""
+        metrics = NodeMetrics()
+        metrics.observe('finalize_step', 0.01)
+        path = tmp_path / 'agent.prom'
+
+        metrics.write(str(path))
+
+        assert path.read_text() == metrics.render()
+
+    def test_serve(self):
+        """Test the local /metrics endpoint."""
+        metrics = NodeMetrics()
+        metrics.observe('execute_actions', 0.02)
+        server = metrics.serve(port=0)
+        try:
+            url = f'http://127.0.0.1:{server.server_address[1]}/metrics'
+            body = urllib.request.urlopen(url, timeout=5).read().decode()
+        finally:
+            metrics.shutdown()
+
+        assert 'node="execute_actions"' in body
+
+
+class TestInstrumentedNodes:
+    """Test that graph nodes report into agent.metrics."""
+
+    @pytest.mark.asyncio
+    async def test_nodes_record_duration_and_site(self):
+        """Test that prepare_context is timed and labelled with the page's site."""
+        metrics = NodeMetrics()
+        agent = make_agent(metrics)
+        agent.original_agent._prepare_context = AsyncMock(return_value=Mock(url='https://shop.example.com/cart'))
+        state = {'task': 'test', 'browser_state_summary': None, 'last_model_output': None, 'last_result': None}
+
+        await prepare_context_node(state, agent)
+
+        assert metrics.snapshot()['prepare_context']['count'] == 1
+        assert 'site="shop.example.com"' in metrics.render()
+
+    @pytest.mark.asyncio
+    async def test_error_outcome(self):
+        """Test that a failing phase is counted with outcome="error"."""
+        metrics = NodeMetrics()
+        agent = make_agent(metrics)
+        agent.original_agent._get_next_action = AsyncMock(side_effect=RuntimeError('llm down'))
+        state = {'task': 'test', 'browser_state_summary': None, 'last_model_output': None, 'last_result': None}
+
+        await get_next_action_node(state, agent)
+
+        assert 'outcome="error"' in metrics.render()
+
+    @pytest.mark.asyncio
+    async def test_without_metrics_is_passthrough(self):
+        """Test that agents without a NodeMetrics are not instrumented."""
+        calls = []
+
+        @instrumented('custom')
+        async def node(state, agent):
+            calls.append(state)
+            return state
+
+        agent = create_mock_agent_instance()  # agent.metrics is None
+        assert await node({'task': 't'}, agent) == {'task': 't'}
+        assert calls == [{'task': 't'}]
@@ -176,6 +176,7 @@ class TestStepTimeout:
         mock_agent = Mock()
         mock_agent.current_step = 0
         mock_agent.step_timed_out = False
+        mock_agent.adaptive_timeouts = None
         mock_agent.original_agent.step_start_time = time.time() - 40  # 40 seconds ago
         mock_agent.original_agent.settings.step_timeout = 30  # 30 second timeout
         mock_agent.original_agent.logger = Mock()
@@ -0,0 +1,159 @@
+"""Tests for pipelined browser-state prefetching."""
+import asyncio
+import pytest
+from unittest.mock import Mock, AsyncMock
+
+from langgraph_browser_agent.graph import create_browser_agent_graph, create_mock_agent_instance
+from langgraph_browser_agent.pipeline import _PrefetchedBrowserSession, discard_prefetch, start_prefetch
+
+
+def make_pipelined_agent(done_after=3, capture_delay=0.0):
+    """Create a mock agent whose _prepare_context captures state through its browser session."""
+    mock_agent = create_mock_agent_instance(done_after=done_after)
+    mock_agent.pipelined = True
+    original = mock_agent.original_agent
+    events = []
+    captured = []
+
+    async def get_browser_state_summary(**kwargs):
+        events.append('capture_start')
+        await asyncio.sleep(capture_delay)
+        events.append('capture_end')
+        summary = Mock(name=f'summary-{len(captured)}')
+        captured.append(summary)
+        return summary
+
+    async def prepare_context(step_info):
+        return await original.browser_session.get_browser_state_summary(include_screenshot=True)
+
+    async def finalize(summary):
+        events.append('finalize_start')
+        await asyncio.sleep(capture_delay)
+        events.append('finalize_end')
+
+    original.browser_session = Mock()
+    original.browser_session.get_browser_state_summary = AsyncMock(side_effect=get_browser_state_summary)
+    original._prepare_context = AsyncMock(side_effect=prepare_context)
+    original._finalize = AsyncMock(side_effect=finalize)
+    original.include_recent_events = False
+    return mock_agent, events, captured
+
+
+async def run_graph(mock_agent, mode='verbose'):
+    state = {'task': 'test', 'browser_state_summary': None, 'last_model_output': None, 'last_result': None}
+    return await create_browser_agent_graph(mock_agent, mode=mode).ainvoke(state, {'recursion_limit': 100})
+
+
+class TestPipelinedRun:
+    """Test prefetching across whole graph runs."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('mode', ['verbose', 'fast'])
+    async def test_prefetched_state_is_used_by_next_step(self, mode):
+        """Test that steps after the first consume the state captured during finalize."""
+        mock_agent, events, captured = make_pipelined_agent(done_after=3)
+        summaries = []
+        original_prepare = mock_agent.original_agent._prepare_context.side_effect
+
+        async def record(step_info):
+            summary = await original_prepare(step_info)
+            summaries.append(summary)
+            return summary
+        mock_agent.original_agent._prepare_context.side_effect = record
+
+        await run_graph(mock_agent, mode)
+
+        # 3 steps: one capture for step 0, a prefetch for steps 1 and 2, and one discarded after the last step
+        assert summaries == captured[:3]
+        assert mock_agent._prefetch is None
+        assert mock_agent.original_agent.browser_session.get_browser_state_summary.await_count <= 4
+
+    @pytest.mark.asyncio
+    async def test_capture_overlaps_finalize(self):
+        """Test that the next capture starts before the current step is finalized."""
+        mock_agent, events, _ = make_pipelined_agent(done_after=2, capture_delay=0.01)
+
+        await run_graph(mock_agent)
+
+        # Step 0 captures normally; the prefetch for step 1 starts while step 0 is finalizing
+        assert events[:2] == ['capture_start', 'capture_end']
+        assert events.index('capture_start', 2) < events.index('finalize_end')
+
+    @pytest.mark.asyncio
+    async def test_prefetch_discarded_when_stopped(self):
+        """Test that stopping the agent cancels the pending prefetch."""
+        mock_agent, _, _ = make_pipelined_agent(done_after=10, capture_delay=0.05)
+
+        async def stop(original_agent):
+            original_agent.state.stopped = True
+        mock_agent.on_step_end = stop
+
+        await run_graph(mock_agent)
+
+        assert mock_agent._prefetch is None
+        assert mock_agent.current_step == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_prefetch_falls_back_to_capture(self):
+        """Test that a failed prefetch is replaced by a normal capture."""
+        mock_agent, _, captured = make_pipelined_agent(done_after=2)
+        session = mock_agent.original_agent.browser_session
+        real_capture = session.get_browser_state_summary.side_effect
+        calls = []
+
+        async def flaky(**kwargs):
+            calls.append(kwargs)
+            if len(calls) == 2:
+                raise RuntimeError('target detached')
+            return await real_capture(**kwargs)
+        session.get_browser_state_summary.side_effect = flaky
+
+        await run_graph(mock_agent)
+
+        assert mock_agent.last_error is None
+        assert len(calls) >= 3
+
+
+class TestPrefetchHelpers:
+    """Test the prefetch helpers directly."""
+
+    def test_not_pipelined_is_noop(self):
+        """Test that agents without pipelined=True never prefetch."""
+        agent = create_mock_agent_instance()
+        start_prefetch(agent)
+        assert agent._prefetch is None
+
+    @pytest.mark.asyncio
+    async def test_no_prefetch_after_done(self):
+        """Test that a step whose result is done does not prefetch."""
+        mock_agent, _, _ = make_pipelined_agent()
+        mock_agent.original_agent.state.last_result = [Mock(is_done=True)]
+
+        start_prefetch(mock_agent)
+
+        assert mock_agent._prefetch is None
+
+    @pytest.mark.asyncio
+    async def test_discard_cancels_task(self):
+        """Test that discard_prefetch cancels the capture."""
+        mock_agent, _, _ = make_pipelined_agent(capture_delay=1.0)
+        start_prefetch(mock_agent)
+        task = mock_agent._prefetch.task
+
+        discard_prefetch(mock_agent)
+        await asyncio.sleep(0)
+
+        assert task.cancelled()
+        assert mock_agent._prefetch is None
+
+    @pytest.mark.asyncio
+    async def test_proxy_serves_summary_once(self):
+        """Test that the session proxy serves the prefetched summary once, then delegates."""
+        session = Mock()
+        session.get_browser_state_summary = AsyncMock(return_value='fresh')
+        session.id = 'session-id'
+        proxy = _PrefetchedBrowserSession(session, 'prefetched')
+
+        assert await proxy.get_browser_state_summary() == 'prefetched'
+        assert await proxy.get_browser_state_summary() == 'fresh'
+        assert proxy.id == 'session-id'
@@ -0,0 +1,198 @@
+"""Tests for the warm browser session pool."""
+import asyncio
+import pytest
+from unittest.mock import Mock, AsyncMock
+
+from langgraph_browser_agent import LangGraphBrowserAgent
+from langgraph_browser_agent.pool import BrowserSessionPool, PoolStats
+
+
+def make_fake_session():
+    """Create a mock BrowserSession that looks healthy."""
+    session = Mock()
+    session.is_cdp_connected = True
+    session.start = AsyncMock()
+    session.kill = AsyncMock()
+    session.get_current_page_url = AsyncMock(return_value='about:blank')
+    session.get_tabs = AsyncMock(return_value=[Mock(target_id='tab-1'), Mock(target_id='tab-2')])
+    session.close_page = AsyncMock()
+    session.navigate_to = AsyncMock()
+    session.clear_cookies = AsyncMock()
+    session.cookies = AsyncMock(return_value=[])
+    session.cdp_client.send.Target.getTargets = AsyncMock(return_value={'targetInfos': []})
+    session.cdp_client.send.Storage.clearDataForOrigin = AsyncMock()
+    session.event_bus.stop = AsyncMock()
+    return session
+
+
+def cleared_origins(session):
+    """The origins whose site storage was cleared on `session`."""
+    return {call.kwargs['params']['origin'] for call in session.cdp_client.send.Storage.clearDataForOrigin.call_args_list}
+
+
+class TestBrowserSessionPool:
+    """Test BrowserSessionPool leasing and bookkeeping."""
+
+    @pytest.mark.asyncio
+    async def test_start_warms_sessions(self):
+        """Test that start() launches `size` sessions."""
+        pool = BrowserSessionPool(size=3, session_factory=make_fake_session)
+        await pool.start()
+
+        assert pool.stats.sessions_created == 3
+
+    @pytest.mark.asyncio
+    async def test_release_resets_and_reuses_session(self):
+        """Test that a released session is reset and handed out again."""
+        pool = BrowserSessionPool(size=1, session_factory=make_fake_session)
+
+        session = await pool.acquire()
+        await pool.release(session)
+        again = await pool.acquire()
+
+        assert again is session
+        session.close_page.assert_called_once_with('tab-2')
+        session.navigate_to.assert_called_once_with('about:blank')
+        session.clear_cookies.assert_called_once()
+        assert pool.stats.leases == 2
+        assert pool.stats.reuses == 1
+        assert pool.stats.reuse_rate == 0.5
+        session.kill.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_unhealthy_session_is_replaced(self):
+        """Test that a session failing its health check is discarded on acquire."""
+        pool = BrowserSessionPool(size=1, session_factory=make_fake_session)
+        await pool.start()
+        session = await pool.acquire()
+        session.is_cdp_connected = False
+        await pool.release(session)
+
+        replacement = await pool.acquire()
+
+        assert replacement is not session
+        session.kill.assert_called_once()
+        assert pool.stats.health_check_failures == 1
+        assert pool.stats.sessions_created == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_reset_replaces_session(self):
+        """Test that a session that cannot be reset is not returned to the pool."""
+        pool = BrowserSessionPool(size=1, session_factory=make_fake_session)
+        session = await pool.acquire()
+        session.navigate_to.side_effect = RuntimeError('target crashed')
+
+        await pool.release(session)
+
+        assert pool.stats.reset_failures == 1
+        assert await pool.acquire() is not session
+
+    @pytest.mark.asyncio
+    async def test_reset_clears_each_touched_origin(self):
+        """Test that site storage is cleared per origin: navigated to, open in a frame, or setting cookies."""
+        pool = BrowserSessionPool(size=1, session_factory=make_fake_session)
+        session = await pool.acquire()
+        record_origin = session.event_bus.on.call_args.args[1]
+        record_origin(Mock(url='https://shop.example.com/cart?id=1'))
+        record_origin(Mock(url='about:blank'))
+        session.cdp_client.send.Target.getTargets.return_value = {'targetInfos': [
+            {'type': 'page', 'url': 'http://localhost:8000/app'}, {'type': 'iframe', 'url': 'https://ads.example.net/frame'},
+        ]}
+        session.cookies.return_value = [{'name': 'sid', 'domain': '.tracker.io'}]
+
+        await pool.release(session)
+
+        assert cleared_origins(session) == {
+            'https://shop.example.com', 'http://localhost:8000', 'https://ads.example.net',
+            'https://tracker.io', 'http://tracker.io',
+        }
+        assert await pool.acquire() is session
+
+        session.cdp_client.send.Storage.clearDataForOrigin.reset_mock()
+        session.cookies.return_value = []
+        session.cdp_client.send.Target.getTargets.return_value = {'targetInfos': []}
+        await pool.release(session)
+        assert cleared_origins(session) == set()
+
+    @pytest.mark.asyncio
+    async def test_failed_storage_clear_replaces_session(self):
+        """Test that a session whose site storage cannot be cleared is killed instead of reused."""
+        pool = BrowserSessionPool(size=1, session_factory=make_fake_session)
+        session = await pool.acquire()
+        session.cookies.return_value = [{'name': 'sid', 'domain': 'example.com'}]
+        session.cdp_client.send.Storage.clearDataForOrigin.side_effect = RuntimeError('Invalid origin')
+
+        await pool.release(session)
+
+        assert pool.stats.reset_failures == 1
+        session.kill.assert_called_once()
+        assert await pool.acquire() is not session
+
+    @pytest.mark.asyncio
+    async def test_failed_replacement_frees_slot(self):
+        """Test that a slot whose unhealthy session cannot be replaced on acquire is handed back."""
+        failing = False
+
+        def factory():
+            if failing:
+                raise RuntimeError('browser did not start')
+            return make_fake_session()
+
+        pool = BrowserSessionPool(size=1, session_factory=factory)
+        session = await pool.acquire()
+        await pool.release(session)
+        session.is_cdp_connected = False
+        failing = True
+
+        with pytest.raises(RuntimeError, match='did not start'):
+            await pool.acquire()
+        failing = False
+        replacement = await asyncio.wait_for(pool.acquire(), 1.0)
+
+        assert replacement.is_cdp_connected
+
+    @pytest.mark.asyncio
+    async def test_lease_context_manager(self):
+        """Test lease() acquires and releases around the block."""
+        async with BrowserSessionPool(size=1, session_factory=make_fake_session) as pool:
+            async with pool.lease() as session:
+                assert session.start.called
+            assert pool._idle.qsize() == 1
+
+    def test_invalid_size(self):
+        """Test that an empty pool is rejected."""
+        with pytest.raises(ValueError):
+            BrowserSessionPool(size=0)
+
+    def test_stats_as_dict(self):
+        """Test that stats include derived wait and reuse figures."""
+        stats = PoolStats(leases=4, reuses=3, total_wait_time=2.0)
+        data = stats.as_dict()
+        assert data['avg_wait_time'] == 0.5
+        assert data['reuse_rate'] == 0.75
+
+
+class TestAgentWithSessionPool:
+    """Test LangGraphBrowserAgent's use of a session pool."""
+
+    @pytest.mark.asyncio
+    async def test_lease_and_return(self):
+        """Test that the agent swaps in a pooled session and returns it."""
+        pool = BrowserSessionPool(size=1, session_factory=make_fake_session)
+        mock_original_agent = Mock()
+        mock_original_agent.skill_service = None
+        agent = LangGraphBrowserAgent(mock_original_agent, session_pool=pool)
+
+        await agent._lease_browser_session()
+        leased = agent._leased_session
+        assert mock_original_agent.browser_session is leased
+        assert agent.browser_session is leased
+
+        await agent._return_browser_session()
+        assert agent._leased_session is None
+        assert pool._idle.qsize() == 1
+        leased.kill.assert_not_called()
+        # Cleaned up like a keep_alive session after Agent.close()
+        assert leased.event_bus.stop.call_args.kwargs['clear'] is False
+        assert leased.event_bus.event_queue is None
+        assert leased.event_bus._on_idle is None
@@ -0,0 +1,152 @@
+"""Tests for the DOM pruning stage."""
+import itertools
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from browser_use.browser.views import BrowserStateSummary, PageInfo
+from browser_use.dom.views import DOMRect, EnhancedDOMTreeNode, EnhancedSnapshotNode, NodeType, SerializedDOMState, SimplifiedNode
+
+from langgraph_browser_agent.pipeline import prepare_context_with_prefetch
+from langgraph_browser_agent.pruning import DOMPruner, PruningStats
+
+
+_ids = itertools.count(1)
+SNAPSHOT = EnhancedSnapshotNode(is_clickable=None, cursor_style=None, bounds=None, clientRects=None, scrollRects=None,
+                                computed_styles=None, paint_order=None, stacking_contexts=None)
+
+
+def dom_node(node_type, name, value='', y=0.0, visible=True):
+    """Create an EnhancedDOMTreeNode laid out at page offset `y`."""
+    node_id = next(_ids)
+    return EnhancedDOMTreeNode(
+        node_id=node_id, backend_node_id=node_id, node_type=node_type, node_name=name, node_value=value,
+        attributes={}, is_scrollable=False, is_visible=visible, absolute_position=DOMRect(x=0, y=y, width=100, height=20),
+        target_id='target', frame_id=None, session_id=None, content_document=None, shadow_root_type=None,
+        shadow_roots=None, parent_node=None, children_nodes=[], ax_node=None, snapshot_node=SNAPSHOT,
+    )
+
+
+def element(tag, *children, index=None, y=0.0, visible=True):
+    """Create a SimplifiedNode element, interactive when it has an `index`."""
+    return SimplifiedNode(original_node=dom_node(NodeType.ELEMENT_NODE, tag.upper(), y=y, visible=visible),
+                          children=list(children), is_interactive=index is not None, selector_index=index)
+
+
+def text(value, y=0.0):
+    """Create a visible SimplifiedNode text node."""
+    return SimplifiedNode(original_node=dom_node(NodeType.TEXT_NODE, '#text', value, y=y), children=[])
+
+
+def summary(root, scroll_y=0, viewport_height=1000):
+    """Create a BrowserStateSummary for the tree under `root`, with every interactive node in its selector map."""
+    selector_map = {}
+
+    def collect(node):
+        if node.is_interactive:
+            selector_map[node.selector_index] = node.original_node
+        for child in node.children:
+            collect(child)
+    collect(root)
+    page_info = PageInfo(viewport_width=1000, viewport_height=viewport_height, page_width=1000, page_height=100000,
+                         scroll_x=0, scroll_y=scroll_y, pixels_above=scroll_y, pixels_below=0, pixels_left=0, pixels_right=0)
+    return BrowserStateSummary(dom_state=SerializedDOMState(_root=root, selector_map=selector_map),
+                               url='https://example.com/', title='Example', tabs=[], page_info=page_info)
+
+
+def product_card(index, y=0.0):
+    """A product card: a title, a price and an add-to-cart button."""
+    return element('div', text(f'Product number {index}', y=y), text(f'${index}.99', y=y),
+                   element('button', text('Add to cart', y=y), index=index, y=y), y=y)
+
+
+class TestDOMPruner:
+    """Test the three pruning passes."""
+
+    def test_collapses_repeated_siblings(self):
+        """Test that a long run of identical cards keeps the first few and names the rest's indices."""
+        state = summary(element('html', element('body', *(product_card(i, y=i) for i in range(1, 21)))))
+
+        pruned, report = DOMPruner(max_repeats=3).prune(state)
+        rendered = pruned.dom_state.llm_representation()
+
+        assert 'Product number 3' in rendered and 'Product number 4' not in rendered
+        assert '17 more similar <div> items (indices 4-20)' in rendered
+        assert report.collapsed == 17
+        assert report.tokens_after < report.tokens_before
+
+    def test_indices_stay_stable(self):
+        """Test that the selector map is untouched and kept elements keep their indices."""
+        state = summary(element('html', element('body', *(product_card(i, y=i) for i in range(1, 21)))))
+
+        pruned, _ = DOMPruner(max_repeats=3).prune(state)
+
+        assert pruned.dom_state.selector_map == state.dom_state.selector_map
+        assert '[2]<button' in pruned.dom_state.llm_representation()
+        # The original tree is not modified
+        assert 'Product number 20' in state.dom_state.llm_representation()
+
+    def test_drops_offscreen_elements_over_limit(self):
+        """Test that off-viewport interactive elements past the limit are dropped, on-screen ones never."""
+        links = [element('a', text(f'link {i}', y=i * 100), index=i, y=i * 100) for i in range(1, 31)]
+        mixed = [element('span', link) for link in links]  # distinct wrappers so nothing collapses
+        state = summary(element('html', *mixed), viewport_height=1000)
+
+        pruned, report = DOMPruner(max_repeats=None, max_offscreen=5).prune(state)
+        rendered = pruned.dom_state.llm_representation()
+
+        assert all(f'[{i}]<a' in rendered for i in range(1, 16))  # on screen, then the 5 allowed off screen
+        assert '[16]<a' not in rendered
+        assert report.dropped == 15
+        assert '0 elements above and 15 below the viewport omitted' in rendered
+
+    def test_dedupes_text_outside_interactive_elements(self):
+        """Test that repeated long text is dropped once seen, but button labels are kept."""
+        footer = 'Copyright 2024 Example Corp. All rights reserved.'
+        root = element('html', element('p', text(footer)), element('div', text(footer)),
+                       element('button', text(footer), index=1), element('button', text(footer), index=2))
+
+        pruned, report = DOMPruner(max_repeats=None).prune(summary(root))
+
+        assert pruned.dom_state.llm_representation().count(footer) == 3
+        assert report.deduplicated == 1
+
+    def test_disabled_passes_leave_tree_alone(self):
+        """Test that with every pass off the same tree is returned."""
+        root = element('html', *(product_card(i) for i in range(10)))
+        state = summary(root)
+
+        pruned, report = DOMPruner(max_repeats=None, max_offscreen=None, dedupe_min_chars=None).prune(state)
+
+        assert pruned.dom_state._root is root
+        assert report.tokens_after == report.tokens_before
+
+
+class TestPruningStage:
+    """Test pruning inside prepare_context."""
+
+    @pytest.mark.asyncio
+    async def test_messages_built_from_pruned_state(self):
+        """Test that _prepare_context sees the pruned state and the step's token counts are recorded."""
+        state = summary(element('html', element('body', *(product_card(i) for i in range(1, 21)))))
+        agent_instance = Mock()
+        agent_instance._prefetch = None
+        agent_instance.current_step = 4
+        agent_instance.pruner = DOMPruner()
+        agent_instance.pruning_stats = PruningStats()
+        original = agent_instance.original_agent
+        original.settings.include_attributes = None
+        session = original.browser_session
+        session.get_browser_state_summary = AsyncMock(return_value=state)
+
+        async def prepare_context(step_info):
+            return await original.browser_session.get_browser_state_summary(include_screenshot=True)
+        original._prepare_context = prepare_context
+
+        seen = await prepare_context_with_prefetch(agent_instance, Mock())
+
+        assert 'Product number 4' not in seen.dom_state.llm_representation()
+        assert original.browser_session is session
+        report = agent_instance.pruning_stats.reports[0]
+        assert report.step == 4
+        assert report.tokens_after < report.tokens_before
+        assert agent_instance.pruning_stats.as_dict()['reduction'] > 0.5
@@ -0,0 +1,231 @@
+"""Tests for the shared LLM rate limiter."""
+import time
+import asyncio
+import pytest
+from collections import deque
+from unittest.mock import Mock
+
+from browser_use.llm.exceptions import ModelRateLimitError
+from browser_use.llm.messages import UserMessage
+from browser_use.llm.views import ChatInvokeCompletion, ChatInvokeUsage
+
+from langgraph_browser_agent import LangGraphBrowserAgent
+from langgraph_browser_agent.hedge import LLMHedger
+from langgraph_browser_agent.instrumentation import NodeMetrics
+from langgraph_browser_agent.ratelimit import LLMRateLimiter, get_next_action_with_rate_limit
+
+
+class StandInLLM:
+    """A local stand-in for a provider: answers after `latency`, with a 429 past `requests_per_second`."""
+
+    model = 'stand-in'
+
+    def __init__(self, requests_per_second=None, latency=0.0, total_tokens=100):
+        self.requests_per_second = requests_per_second
+        self.latency = latency
+        self.total_tokens = total_tokens
+        self.calls = 0
+        self.rejected = 0
+        self._recent = deque()
+
+    async def ainvoke(self, messages, output_format=None, **kwargs):
+        self.calls += 1
+        now = time.monotonic()
+        while self._recent and now - self._recent[0] > 1.0:
+            self._recent.popleft()
+        if self.requests_per_second is not None and len(self._recent) >= self.requests_per_second:
+            self.rejected += 1
+            raise ModelRateLimitError('Too many requests', model=self.model)
+        self._recent.append(now)
+        await asyncio.sleep(self.latency)
+        usage = ChatInvokeUsage(prompt_tokens=self.total_tokens - 10, completion_tokens=10, total_tokens=self.total_tokens,
+                                prompt_cached_tokens=None, prompt_cache_creation_tokens=None, prompt_image_tokens=None)
+        return ChatInvokeCompletion(completion='ok', usage=usage)
+
+
+def limited_agent(limiter, llm, priority=None, metrics=None, hedger=None):
+    """An agent instance whose _get_next_action makes one LLM call."""
+    agent_instance = Mock()
+    agent_instance.rate_limiter = limiter
+    agent_instance.hedger = hedger
+    agent_instance.priority = priority or limiter.default_priority if limiter is not None else None
+    agent_instance.streaming_llm = None
+    agent_instance.metrics = metrics
+    original = agent_instance.original_agent
+    original.llm = llm
+
+    async def get_next_action(browser_state_summary):
+        return await original.llm.ainvoke([UserMessage(content='x' * 400)])
+    original._get_next_action = get_next_action
+    return agent_instance
+
+
+class TestLLMRateLimiter:
+    """Test the limiter on its own."""
+
+    @pytest.mark.asyncio
+    async def test_requests_per_minute(self):
+        """Test that requests past the burst start no faster than the rate."""
+        limiter = LLMRateLimiter(requests_per_minute=6000, burst_seconds=0.01)  # 100/s, one at a time
+
+        start = time.perf_counter()
+        await asyncio.gather(*(limiter.acquire() for _ in range(11)))
+
+        assert time.perf_counter() - start >= 0.09
+        assert limiter.stats.requests == 11
+        assert limiter.stats.max_queue == 10  # the first starts at once
+
+    @pytest.mark.asyncio
+    async def test_interactive_goes_first(self):
+        """Test that a waiting interactive request starts before batch requests queued earlier."""
+        limiter = LLMRateLimiter(requests_per_minute=1200, burst_seconds=0.01)
+        await limiter.acquire('batch')  # empties the bucket
+        order = []
+
+        async def request(priority, name):
+            await limiter.acquire(priority)
+            order.append(name)
+
+        tasks = [asyncio.ensure_future(request('batch', 'batch-1')), asyncio.ensure_future(request('batch', 'batch-2'))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.ensure_future(request('interactive', 'interactive')))
+        await asyncio.gather(*tasks)
+
+        assert order == ['interactive', 'batch-1', 'batch-2']
+        waits = limiter.stats.as_dict()['priorities']
+        assert waits['batch']['max_wait'] > waits['interactive']['max_wait']
+        assert waits['batch']['queued'] == 2
+
+    @pytest.mark.asyncio
+    async def test_token_usage_is_settled(self):
+        """Test that usage above the estimate makes the next request wait for the difference."""
+        limiter = LLMRateLimiter(tokens_per_minute=60000, burst_seconds=1.0)  # 1000 tokens/s, bucket of 1000
+
+        assert await limiter.acquire(tokens=100) < 0.01
+        limiter.settle(reserved=100, used=1000)
+        wait = await limiter.acquire(tokens=100)
+
+        assert 0.05 <= wait < 0.5
+        assert limiter.stats.tokens_used == 1000
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_queue(self):
+        """Test that a request cancelled while queued (a phase timeout) lets the next one through."""
+        limiter = LLMRateLimiter(requests_per_minute=600, burst_seconds=0.1)  # 10/s
+        await limiter.acquire('batch')
+        first = asyncio.ensure_future(limiter.acquire('interactive'))
+        second = asyncio.ensure_future(limiter.acquire('batch'))
+        await asyncio.sleep(0.01)
+
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        await asyncio.wait_for(second, 1.0)
+
+        assert limiter.queued == 0
+        assert limiter.stats.priorities['interactive'].acquired == 0
+
+    @pytest.mark.asyncio
+    async def test_429_pauses_everyone(self):
+        """Test that a 429 holds every request for the cooldown."""
+        limiter = LLMRateLimiter(requests_per_minute=60000, cooldown=0.1)
+
+        limiter.rate_limited()
+        wait = await limiter.acquire()
+
+        assert wait >= 0.09
+        assert limiter.stats.rate_limited == 1
+
+    def test_unknown_priority(self):
+        """Test that an agent with a priority class the limiter does not have is rejected."""
+        limiter = LLMRateLimiter(requests_per_minute=60)
+        original = Mock()
+
+        with pytest.raises(ValueError, match='Unknown priority'):
+            LangGraphBrowserAgent(original, rate_limiter=limiter, priority='urgent')
+        assert LangGraphBrowserAgent(original, rate_limiter=limiter).priority == 'interactive'
+
+
+class TestRateLimitedAgents:
+    """Test agents sharing a limiter against the stand-in provider."""
+
+    @pytest.mark.asyncio
+    async def test_shared_limiter_avoids_429s(self):
+        """Test that agents over the provider's limit get 429s alone and none through a shared limiter."""
+        unlimited = StandInLLM(requests_per_second=20)
+        await asyncio.gather(*(get_next_action_with_rate_limit(limited_agent(None, unlimited), None) for _ in range(40)),
+                             return_exceptions=True)
+        assert unlimited.rejected > 0
+
+        llm = StandInLLM(requests_per_second=20)
+        # A burst of one plus 18/s stays under the provider's 20 in any one-second window
+        limiter = LLMRateLimiter(requests_per_minute=60 * 18, burst_seconds=0.05)
+        metrics = NodeMetrics()
+        agents = [limited_agent(limiter, llm, priority='batch' if i % 2 else 'interactive', metrics=metrics) for i in range(40)]
+
+        results = await asyncio.gather(*(get_next_action_with_rate_limit(agent, None) for agent in agents))
+
+        assert all(result.completion == 'ok' for result in results)
+        assert llm.rejected == 0
+        assert limiter.stats.tokens_used == 40 * 100
+        assert metrics.snapshot()['llm_queue_wait']['count'] == 40
+        waits = limiter.stats.priorities
+        assert waits['batch'].avg_wait > waits['interactive'].avg_wait
+
+    @pytest.mark.asyncio
+    async def test_llm_restored(self):
+        """Test that the agent's LLM is put back after the call."""
+        llm = StandInLLM()
+        agent = limited_agent(LLMRateLimiter(requests_per_minute=600), llm)
+
+        await get_next_action_with_rate_limit(agent, None)
+
+        assert agent.original_agent.llm is llm
+        assert agent.rate_limiter.stats.requests == 1
+
+
+class TestRateLimitedHedging:
+    """Test hedged requests under a shared limiter."""
+
+    @pytest.mark.asyncio
+    async def test_queue_wait_does_not_trigger_hedge(self):
+        """Test that a primary held up by the limiter is not hedged and its wait is not sampled as latency."""
+        limiter = LLMRateLimiter(requests_per_minute=600, burst_seconds=0.1)  # 10/s, one at a time
+        await limiter.acquire()  # the next request queues for ~0.1 s
+        hedger = LLMHedger(delay=0.05)
+        llm = StandInLLM(latency=0.01)
+
+        await get_next_action_with_rate_limit(limited_agent(limiter, llm, hedger=hedger), None)
+
+        assert limiter.stats.priorities['interactive'].max_wait >= 0.05
+        assert hedger.stats.hedged == 0
+        assert llm.calls == 1
+        assert max(hedger._latencies['stand-in']) < 0.05
+
+    @pytest.mark.asyncio
+    async def test_secondary_goes_through_limiter(self):
+        """Test that a hedge sent to the hedger's secondary LLM is admitted and settled by the limiter."""
+        limiter = LLMRateLimiter(requests_per_minute=6000)
+        primary = StandInLLM(latency=1.0)
+        secondary = StandInLLM(total_tokens=300)
+        hedger = LLMHedger(secondary_llm=secondary, delay=0.02)
+
+        await get_next_action_with_rate_limit(limited_agent(limiter, primary, hedger=hedger), None)
+
+        assert hedger.stats.hedge_wins == 1
+        assert secondary.calls == 1
+        assert limiter.stats.requests == 2
+        assert limiter.stats.tokens_used == 300
+
+    @pytest.mark.asyncio
+    async def test_queued_hedge_is_not_charged(self):
+        """Test that a hedge cancelled while still queued for the limiter adds no estimated tokens."""
+        limiter = LLMRateLimiter(requests_per_minute=600, burst_seconds=0.1)  # 10/s, one at a time
+        llm = StandInLLM(latency=0.05)
+        hedger = LLMHedger(delay=0.02)
+
+        await get_next_action_with_rate_limit(limited_agent(limiter, llm, hedger=hedger), None)
+
+        assert hedger.stats.primary_wins == 1
+        assert hedger.stats.losers_cancelled == 1
+        assert llm.calls == 1
+        assert hedger.stats.cancelled_prompt_tokens == 0
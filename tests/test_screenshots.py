@@ -0,0 +1,214 @@
+"""Tests for the content-addressed screenshot store."""
+import os
+import time
+import base64
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+from browser_use.agent.views import AgentHistory, AgentHistoryList, ActionResult
+from browser_use.browser.views import BrowserStateHistory
+
+from langgraph_browser_agent import LangGraphBrowserAgent
+from langgraph_browser_agent.screenshots import ScreenshotStore
+
+
+PNG = b'\x89PNG\r\n\x1a\n' + bytes(range(256)) * 16
+
+
+def history_item(screenshot_path):
+    """Create a history item pointing at `screenshot_path`."""
+    return AgentHistory(
+        model_output=None,
+        result=[ActionResult()],
+        state=BrowserStateHistory(url='https://example.com/', title='Example', tabs=[], interacted_element=[None], screenshot_path=screenshot_path),
+        metadata=None,
+    )
+
+
+class TestScreenshotStore:
+    """Test storing and reading screenshots."""
+
+    def test_deduplicates_identical_screenshots(self, tmp_path):
+        """Test that identical bytes are written once and share a handle."""
+        store = ScreenshotStore(tmp_path)
+
+        first = store.put(PNG)
+        second = store.put(PNG)
+        other = store.put(PNG + b'!')
+
+        assert first == second != other
+        assert store.stats.stored == 2
+        assert store.stats.deduplicated == 1
+        assert store.stats.bytes_deduplicated == len(PNG)
+        assert store.disk_usage() == 2 * len(PNG) + 1
+
+    def test_mmap_read(self, tmp_path):
+        """Test that a stored screenshot reads back byte for byte through mmap."""
+        store = ScreenshotStore(tmp_path)
+        handle = store.put(PNG)
+
+        with store.open(handle) as view:
+            assert bytes(view) == PNG
+
+    def test_empty_blob(self, tmp_path):
+        """Test that an empty screenshot can be stored and read."""
+        store = ScreenshotStore(tmp_path)
+
+        with store.open(store.put(b'')) as view:
+            assert bytes(view) == b''
+
+    def test_concurrent_writers(self, tmp_path):
+        """Test that threads storing the same screenshot end with one complete blob."""
+        store = ScreenshotStore(tmp_path)
+
+        with ThreadPoolExecutor(8) as pool:
+            handles = set(pool.map(lambda _: store.put(PNG), range(32)))
+
+        assert len(handles) == 1
+        assert store.disk_usage() == len(PNG)
+        assert not list(tmp_path.glob('*/.blob-*'))
+
+    def test_iter_history(self, tmp_path):
+        """Test that history screenshots are streamed one at a time, with None for missing ones."""
+        store = ScreenshotStore(tmp_path)
+        history = AgentHistoryList(history=[history_item(store.put(PNG)), history_item(None)], usage=None)
+
+        frames = [(item, bytes(view) if view is not None else None) for item, view in store.iter_history(history)]
+
+        assert [frame for _, frame in frames] == [PNG, None]
+
+
+class TestRetention:
+    """Test pruning the store so it does not grow without bound."""
+
+    @staticmethod
+    def age(handle, seconds):
+        """Backdate a blob's last store time by `seconds`."""
+        stamp = time.time() - seconds
+        os.utime(handle, (stamp, stamp))
+
+    def test_prune_by_age(self, tmp_path):
+        """Test that blobs not stored for longer than max_age are deleted, unless kept."""
+        store = ScreenshotStore(tmp_path, max_age=60)
+        old, kept, fresh = store.put(PNG), store.put(PNG + b'1'), store.put(PNG + b'2')
+        self.age(old, 120)
+        self.age(kept, 120)
+
+        assert store.prune(keep=[kept]) == 1
+
+        assert not os.path.exists(old)
+        assert os.path.exists(kept) and os.path.exists(fresh)
+        assert store.stats.pruned == 1
+        assert store.stats.bytes_pruned == len(PNG)
+
+    def test_prune_by_size_oldest_first(self, tmp_path):
+        """Test that the least recently stored blobs go first until the store fits max_bytes."""
+        store = ScreenshotStore(tmp_path, max_bytes=2 * len(PNG) + 10)
+        handles = [store.put(PNG + bytes([i])) for i in range(4)]
+        for i, handle in enumerate(handles):
+            self.age(handle, 100 - i)
+        self.age(store.put(PNG + bytes([0])), 0)  # stored again: now the most recent
+
+        store.prune()
+
+        assert [os.path.exists(handle) for handle in handles] == [True, False, False, True]
+        assert store.disk_usage() <= store.max_bytes
+
+    def test_prunes_every_n_new_blobs(self, tmp_path):
+        """Test that storing prune_every new blobs prunes without an explicit call, never the blob just stored."""
+        store = ScreenshotStore(tmp_path, max_bytes=1, prune_every=3)
+
+        handles = [store.put(PNG + bytes([i])) for i in range(3)]
+        store.join_prune()
+
+        assert os.path.exists(handles[-1])
+        assert store.stats.pruned == 2
+
+    def test_automatic_prune_runs_off_the_callers_thread(self, tmp_path):
+        """Test that put() hands the automatic prune to a background thread instead of running it inline."""
+        store = ScreenshotStore(tmp_path, max_bytes=1, prune_every=1)
+        release = threading.Event()
+        prune = store.prune
+        threads = []
+
+        def blocking_prune(keep=()):
+            threads.append(threading.current_thread())
+            release.wait(5)
+            return prune(keep)
+        store.prune = blocking_prune
+
+        handle = store.put(PNG)
+        assert store.stats.pruned == 0  # put() returned while the prune is still waiting
+        release.set()
+        store.join_prune()
+
+        assert threads and threads[0] is not threading.current_thread()
+        assert os.path.exists(handle)
+
+    @pytest.mark.asyncio
+    async def test_leased_handles_survive_pruning(self, tmp_path):
+        """Test that a run's leased and pinned handles are never pruned, and are once the lease is released."""
+        store = ScreenshotStore(tmp_path, max_bytes=1, prune_every=1)
+        restored = store.put(PNG + b'restored')
+        lease = store.lease()
+        lease.pin([restored])
+
+        handles = [await lease.store_screenshot(base64.b64encode(PNG + bytes([i])).decode(), step_number=i) for i in range(3)]
+        store.join_prune()
+        store.prune()
+
+        assert all(os.path.exists(handle) for handle in handles + [restored])
+        other = store.lease()
+        with other:
+            other.pin([restored])
+            lease.release()
+            store.prune()
+            assert os.path.exists(restored)
+            assert not any(os.path.exists(handle) for handle in handles)
+        store.prune()
+        assert not os.path.exists(restored)
+
+    def test_no_limits_keeps_everything(self, tmp_path):
+        """Test that a store without limits never deletes."""
+        store = ScreenshotStore(tmp_path, prune_every=1)
+        handle = store.put(PNG)
+        self.age(handle, 10 ** 6)
+
+        assert store.prune() == 0
+        assert os.path.exists(handle)
+
+
+class TestScreenshotServiceInterface:
+    """Test the browser-use ScreenshotService interface."""
+
+    @pytest.mark.asyncio
+    async def test_store_and_get(self, tmp_path):
+        """Test that base64 screenshots round-trip through the async interface."""
+        store = ScreenshotStore(tmp_path)
+        screenshot_b64 = base64.b64encode(PNG).decode()
+
+        handle = await store.store_screenshot(screenshot_b64, step_number=3)
+
+        assert await store.get_screenshot(handle) == screenshot_b64
+        assert await store.get_screenshot(str(tmp_path / 'missing.png')) is None
+
+    @pytest.mark.asyncio
+    async def test_history_reads_handles(self, tmp_path):
+        """Test that browser-use history reads screenshots back from store handles."""
+        store = ScreenshotStore(tmp_path)
+        handle = await store.store_screenshot(base64.b64encode(PNG).decode(), step_number=1)
+        history = AgentHistoryList(history=[history_item(handle)], usage=None)
+
+        assert history.screenshots() == [base64.b64encode(PNG).decode()]
+
+    def test_agent_uses_store(self, tmp_path):
+        """Test that LangGraphBrowserAgent installs the store as the agent's screenshot service."""
+        store = ScreenshotStore(tmp_path)
+        original_agent = Mock()
+
+        agent = LangGraphBrowserAgent(original_agent, screenshot_store=store)
+
+        assert agent.screenshot_store is store
+        assert original_agent.screenshot_service is store
@@ -0,0 +1,129 @@
+"""Tests for the process-sharded executor."""
+import os
+import asyncio
+import pickle
+import pytest
+from unittest.mock import Mock
+
+from langgraph_browser_agent import LangGraphBrowserAgent
+from langgraph_browser_agent.sharding import ShardedExecutor, TaskSpec, resolve_factory
+
+
+class FakeHistory:
+    """Minimal stand-in for AgentHistoryList."""
+
+    def __init__(self, task):
+        self.history = [None, None]
+        self.task = task
+
+    def is_done(self):
+        return True
+
+    def final_result(self):
+        return f'done: {self.task}'
+
+    def model_dump(self):
+        return {'history': [], 'task': self.task}
+
+
+class FakeAgent(LangGraphBrowserAgent):
+    """LangGraphBrowserAgent whose run() returns immediately."""
+
+    def __init__(self, task):
+        super().__init__(Mock())
+        self.task = task
+
+    async def run(self, **kwargs):
+        if self.task == 'fail':
+            raise RuntimeError('task failed')
+        return FakeHistory(self.task)
+
+
+async def crash_later():
+    """Kill the worker process while its task is running."""
+    await asyncio.sleep(1)
+    os._exit(3)
+
+
+def fake_factory(spec):
+    """Module-level factory so spawned workers can import it."""
+    if spec.task == 'crash':
+        os._exit(3)
+    if spec.task == 'crash-later':
+        return crash_later()
+    return FakeAgent(spec.task)
+
+
+class TestTaskSpec:
+    """Test TaskSpec and factory resolution."""
+
+    def test_spec_is_picklable(self):
+        """Test that a spec survives a round trip through pickle."""
+        spec = TaskSpec(task='t', factory='test_sharding:fake_factory', run_kwargs={'max_steps': 5})
+        assert pickle.loads(pickle.dumps(spec)) == spec
+
+    def test_resolve_factory_from_path(self):
+        """Test resolving "module:callable" import paths."""
+        assert resolve_factory('os.path:join') is os.path.join
+        assert resolve_factory(fake_factory) is fake_factory
+
+    def test_resolve_factory_rejects_bad_path(self):
+        """Test that a path without a callable name is rejected."""
+        with pytest.raises(ValueError):
+            resolve_factory('os.path')
+
+
+class TestShardedExecutor:
+    """Test ShardedExecutor across real worker processes."""
+
+    @pytest.mark.asyncio
+    async def test_results_stream_back(self):
+        """Test that every spec produces a result with its history."""
+        specs = [TaskSpec(task=f'task-{i}', factory=fake_factory, task_id=str(i)) for i in range(6)]
+        executor = ShardedExecutor(processes=2, concurrency_per_process=2)
+
+        results = [result async for result in executor.run(specs)]
+
+        assert sorted(result.index for result in results) == list(range(6))
+        assert all(result.ok for result in results)
+        assert {result.worker for result in results} <= {0, 1}
+        assert results[0].final_result.startswith('done: task-')
+        assert executor.stats.completed == 6
+        assert executor.stats.total_steps == 12
+
+    @pytest.mark.asyncio
+    async def test_task_failure_is_isolated(self):
+        """Test that an exception in one run is reported only on its result."""
+        specs = [TaskSpec(task='ok', factory=fake_factory), TaskSpec(task='fail', factory=fake_factory)]
+
+        results = {result.index: result async for result in ShardedExecutor(processes=1).run(specs)}
+
+        assert results[0].ok
+        assert 'task failed' in results[1].error
+
+    @pytest.mark.asyncio
+    async def test_worker_crash_fails_in_flight_tasks(self):
+        """Test that a dying worker reports its task as failed instead of hanging."""
+        specs = [TaskSpec(task='crash', factory=fake_factory)]
+
+        results = [result async for result in ShardedExecutor(processes=1).run(specs)]
+
+        assert len(results) == 1
+        assert not results[0].ok
+        assert results[0].error
+
+    @pytest.mark.asyncio
+    async def test_busy_worker_does_not_take_queued_tasks(self):
+        """Test that a worker with no free slot leaves queued tasks to others, so its crash loses only its own task."""
+        specs = [TaskSpec(task='crash-later', factory=fake_factory)] + [TaskSpec(task=f'task-{i}', factory=fake_factory) for i in range(4)]
+
+        results = {result.index: result async for result in ShardedExecutor(processes=2).run(specs)}
+
+        assert 'exited with code 3' in results[0].error
+        assert all(results[index].ok for index in range(1, 5))
+        assert {results[index].worker for index in range(1, 5)} == {1 - results[0].worker}
+
+    def test_invalid_configuration(self):
+        """Test that empty process pools are rejected."""
+        with pytest.raises(ValueError):
+            ShardedExecutor(processes=1, concurrency_per_process=0)
@@ -0,0 +1,108 @@
+"""Tests for overlapped run startup."""
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from langgraph_browser_agent import LangGraphBrowserAgent
+from langgraph_browser_agent.instrumentation import NodeMetrics
+from langgraph_browser_agent.startup import start_run
+
+
+def slow(delay, calls=None, name=None, error=None):
+    """An AsyncMock that takes `delay` seconds, optionally logging `name` to `calls` when it finishes."""
+    async def effect(*args, **kwargs):
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        if calls is not None:
+            calls.append(name)
+    return AsyncMock(side_effect=effect)
+
+
+def starting_agent(metrics=None, log_delay=0.2, browser_delay=0.2, initial_delay=0.1, browser_error=None):
+    """Create an agent whose startup phases take the given times and whose graph ends at once."""
+    calls = []
+    original = Mock()
+    original.settings.generate_gif = False
+    original.session_id = 'session-0001'
+    original.task_id = 'task-0001'
+    original.browser_session.id = 'browser-0001'
+    original.browser_session.cdp_url = None
+    original.state.session_initialized = False
+    original.enable_cloud_sync = False
+    original._log_agent_run = slow(log_delay, calls, 'log_run')
+    original.browser_session.start = slow(browser_delay, calls, 'browser_start', browser_error)
+    original._execute_initial_actions = slow(initial_delay, calls, 'initial_actions')
+    original._log_first_step_startup = Mock(side_effect=lambda: calls.append('first_step_log'))
+    original.token_cost_service.get_usage_summary = AsyncMock()
+    original.token_cost_service.log_usage_summary = AsyncMock()
+    original.history._output_model_schema = None
+    original.output_model_schema = None
+    original.eventbus.stop = AsyncMock()
+    original.close = AsyncMock()
+
+    agent = LangGraphBrowserAgent(original, metrics=metrics)
+
+    async def run_graph(state, config):
+        agent.ended_due_to_break = True
+        return state
+    agent.graph = Mock(ainvoke=AsyncMock(side_effect=run_graph))
+    return agent, calls
+
+
+class TestStartRun:
+    """Test the startup scheduler."""
+
+    @pytest.mark.asyncio
+    async def test_browser_start_overlaps_logging(self):
+        """Test that the browser launches while the run is logged, and initial actions wait for the browser."""
+        agent, calls = starting_agent()
+
+        start = time.perf_counter()
+        report = await start_run(agent)
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.2 + 0.2 + 0.1
+        assert calls.index('browser_start') < calls.index('initial_actions')
+        assert calls[-1] == 'first_step_log'
+        assert set(report.phases) == {'log_run', 'cloud_events', 'browser_start', 'initial_actions'}
+        assert agent.original_agent.state.session_initialized is True
+
+    @pytest.mark.asyncio
+    async def test_resumed_run_skips_initial_actions(self):
+        """Test that initial actions are left out when asked."""
+        agent, calls = starting_agent()
+
+        report = await start_run(agent, run_initial_actions=False)
+
+        assert 'initial_actions' not in calls
+        assert 'initial_actions' not in report.phases
+
+    @pytest.mark.asyncio
+    async def test_failure_cancels_other_phases(self):
+        """Test that a failed browser launch cancels the phases still running and is raised."""
+        agent, calls = starting_agent(log_delay=10.0, browser_delay=0.01, browser_error=RuntimeError('no chrome'))
+
+        with pytest.raises(RuntimeError, match='no chrome'):
+            await asyncio.wait_for(start_run(agent), 1.0)
+
+        assert 'log_run' not in calls
+
+
+class TestTimeToFirstStep:
+    """Test the time-to-first-step metric."""
+
+    @pytest.mark.asyncio
+    async def test_reported_and_observed(self):
+        """Test that run() records time-to-first-step on the agent and in NodeMetrics."""
+        metrics = NodeMetrics()
+        agent, _ = starting_agent(metrics=metrics, log_delay=0.05, browser_delay=0.1, initial_delay=0.05)
+
+        await agent.run()
+
+        report = agent.startup_report
+        assert 0.15 <= report.time_to_first_step < 0.2 + 0.1
+        assert report.critical_phase == 'browser_start'
+        assert metrics.snapshot()['time_to_first_step']['count'] == 1
+        assert report.as_dict()['phases']['browser_start'] >= 0.1
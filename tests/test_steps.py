@@ -0,0 +1,131 @@
+"""Tests for streaming per-step records."""
+import asyncio
+import gzip
+import json
+import pytest
+from datetime import datetime
+from unittest.mock import Mock, patch
+
+from browser_use.llm.views import ChatInvokeUsage
+from browser_use.tokens.views import TokenUsageEntry
+
+from langgraph_browser_agent.steps import StepRecord, stream_steps
+from langgraph_browser_agent.trace import TRACE_FORMAT, TRACE_VERSION, ReplayAgent, load_trace
+
+
+def write_trace(path, steps=5, graph_mode='fast'):
+    """Write a trace of `steps` successful steps, the last of which is done."""
+    lines = [{
+        'format': TRACE_FORMAT, 'version': TRACE_VERSION, 'task': 'Read pages', 'graph_mode': graph_mode, 'max_steps': 10,
+        'settings': {'max_failures': 3, 'final_response_after_failure': False, 'step_timeout': 30},
+    }]
+    for step in range(steps):
+        last = step == steps - 1
+        page = {'url': f'https://example.com/{step}', 'title': f'Page {step}', 'tabs': [], 'dom': f'[{step}]<a>Next</a>'}
+        action = {'done': {'text': 'all read'}} if last else {'click': {'index': step}}
+        result = {'is_done': True, 'success': True, 'extracted_content': 'all read'} if last else {'extracted_content': f'read {step}'}
+        for phase, data in (('prepare_context', page), ('get_next_action', {'next_goal': 'read', 'action': [action]}),
+                            ('execute_actions', [result]), ('evaluate_result', None)):
+            lines.append({'step': step, 'phase': phase, 'duration': 0.0, 'data': data, 'error': None, 'timed_out': False})
+    with gzip.open(path, 'wt') as f:
+        f.writelines(json.dumps(line) + '\n' for line in lines)
+    return str(path)
+
+
+def usage_entry(prompt, completion):
+    """A token usage entry as recorded by browser-use's TokenCost for one LLM call."""
+    usage = ChatInvokeUsage(prompt_tokens=prompt, completion_tokens=completion, total_tokens=prompt + completion,
+                            prompt_cached_tokens=None, prompt_cache_creation_tokens=None, prompt_image_tokens=None)
+    return TokenUsageEntry(model='test-model', timestamp=datetime.now(), usage=usage)
+
+
+class TestStreamSteps:
+    """Test records streamed out of real graph runs."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('mode', ['verbose', 'fast'])
+    async def test_one_record_per_step(self, tmp_path, mode):
+        """Test that each finalized step yields its URL, actions, results and timings, in order."""
+        agent = ReplayAgent(load_trace(write_trace(tmp_path / 'run.trace.gz', graph_mode=mode)))
+
+        records = [record async for record in stream_steps(agent, agent.run())]
+
+        assert [record.step for record in records] == [1, 2, 3, 4, 5]
+        assert records[0].url == 'https://example.com/0'
+        assert records[0].actions == [{'click': {'index': 0}}]
+        assert records[0].results == [{'extracted_content': 'read 0', 'is_done': False}]
+        assert records[-1].is_done and not records[0].is_done
+        assert {'prepare_context', 'get_next_action', 'execute_actions', 'finalize_step'} <= set(records[0].timings)
+        assert agent.step_stream_stats.records == 5
+        assert agent._step_sink is None
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('mode', ['verbose', 'fast'])
+    async def test_records_without_context_writer(self, tmp_path, mode):
+        """Test that records reach the stream without get_stream_writer(), which async nodes lack before Python 3.11."""
+        agent = ReplayAgent(load_trace(write_trace(tmp_path / 'run.trace.gz', graph_mode=mode)))
+
+        with patch('langgraph.config.get_stream_writer', side_effect=RuntimeError('Called get_config outside of a runnable context')):
+            records = [record async for record in stream_steps(agent, agent.run())]
+
+        assert [record.step for record in records] == [1, 2, 3, 4, 5]
+
+    @pytest.mark.asyncio
+    async def test_token_usage_per_step(self, tmp_path):
+        """Test that each record carries the tokens of the LLM calls made since the previous one."""
+        agent = ReplayAgent(load_trace(write_trace(tmp_path / 'run.trace.gz', steps=3)))
+        agent.original_agent.token_cost_service = Mock(usage_history=[])
+
+        async def on_step_start(original_agent):
+            step = agent.current_step + 1
+            original_agent.token_cost_service.usage_history.append(usage_entry(1000 * step, 10 * step))
+        agent.on_step_start = on_step_start
+
+        records = [record async for record in stream_steps(agent, agent.run())]
+
+        assert [record.tokens['prompt_tokens'] for record in records] == [1000, 2000, 3000]
+        assert records[1].as_dict()['tokens'] == {'prompt_tokens': 2000, 'completion_tokens': 20, 'total_tokens': 2020}
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_holds_back_graph(self, tmp_path):
+        """Test that with a full buffer the graph waits, so records never pile up past the buffer."""
+        agent = ReplayAgent(load_trace(write_trace(tmp_path / 'run.trace.gz', steps=8)))
+        ahead = []
+
+        async for record in stream_steps(agent, agent.run(), buffer=2):
+            ahead.append(len(agent.original_agent.history.history) - record.step)
+            await asyncio.sleep(0.02)
+
+        assert max(ahead) <= 2 + 1  # the buffer plus the record being put
+        assert agent.step_stream_stats.max_buffered <= 2
+        assert agent.step_stream_stats.blocked_time > 0
+
+    @pytest.mark.asyncio
+    async def test_early_close_cancels_run(self, tmp_path):
+        """Test that leaving the loop after the first record stops the run."""
+        agent = ReplayAgent(load_trace(write_trace(tmp_path / 'run.trace.gz', steps=8)))
+        steps = stream_steps(agent, agent.run(), buffer=1)
+
+        first = await steps.__anext__()
+        await steps.aclose()
+
+        assert first.step == 1
+        assert len(agent.original_agent.history.history) < 8
+        assert agent._step_sink is None
+
+    @pytest.mark.asyncio
+    async def test_run_error_raised_after_records(self):
+        """Test that the run's exception reaches the consumer once the records before it are taken."""
+        agent = Mock()
+
+        async def run():
+            for step in (1, 2):
+                await agent._step_sink.put(StepRecord(step=step))
+            raise RuntimeError('browser crashed')
+
+        records = []
+        with pytest.raises(RuntimeError, match='browser crashed'):
+            async for record in stream_steps(agent, run(), buffer=4):
+                records.append(record.step)
+
+        assert records == [1, 2]
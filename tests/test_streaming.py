@@ -0,0 +1,255 @@
+"""Tests for streaming LLM output with early action dispatch."""
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from browser_use.agent.views import ActionResult, AgentOutput
+from browser_use.llm.exceptions import ModelRateLimitError
+from browser_use.llm.views import ChatInvokeUsage
+from browser_use.tokens.service import TokenCost
+from browser_use.tools.registry.views import ActionModel
+
+from langgraph_browser_agent.streaming import (
+    ActionStreamParser,
+    StreamingStats,
+    get_next_action_with_streaming,
+    execute_actions_with_dispatch,
+)
+
+
+class StreamedAction(ActionModel):
+    click: dict | None = None
+    done: dict | None = None
+
+
+StreamedAgentOutput = AgentOutput.type_with_custom_actions(StreamedAction)
+
+USAGE = ChatInvokeUsage(prompt_tokens=10, prompt_cached_tokens=None, prompt_cache_creation_tokens=None,
+                        prompt_image_tokens=None, completion_tokens=5, total_tokens=15)
+
+
+def model_output(*actions, goal='goal'):
+    """JSON text of an AgentOutput with `actions`."""
+    return json.dumps({
+        'evaluation_previous_goal': '', 'memory': '', 'next_goal': goal, 'action': list(actions),
+    })
+
+
+class FakeStreamingLLM:
+    """Streams `text` in `chunk_size` pieces, pausing `pause` seconds between them, then raises `error` if set."""
+
+    model = 'stream'
+
+    def __init__(self, text, chunk_size=8, pause=0.0, error=None):
+        self.text = text
+        self.error = error
+        self.chunk_size = chunk_size
+        self.pause = pause
+        self.finished_at = None
+
+    async def astream(self, messages, output_format=None, **kwargs):
+        for i in range(0, len(self.text), self.chunk_size):
+            yield self.text[i:i + self.chunk_size]
+            await asyncio.sleep(self.pause)
+        if self.error is not None:
+            raise self.error
+        self.finished_at = asyncio.get_running_loop().time()
+        yield USAGE
+
+
+def streaming_agent(streaming_llm, results=None):
+    """Create an agent instance whose original agent runs actions through a recording multi_act."""
+    agent_instance = Mock()
+    agent_instance.streaming_llm = streaming_llm
+    agent_instance.streaming_stats = StreamingStats()
+    agent_instance.decision_cache = None
+    agent_instance.hedger = None
+    agent_instance._dispatch = None
+    original = agent_instance.original_agent
+    original.llm = Mock(model='base')
+    original.ActionModel = StreamedAction
+    original.token_cost_service = TokenCost()
+    original.settings.max_actions_per_step = 10
+    original.browser_profile.wait_between_actions = 0
+    original.browser_session.get_current_page_url = AsyncMock(return_value='https://example.com/')
+    original.browser_session.agent_focus_target_id = 'target'
+    original.tools.registry.registry.actions = {}
+    original._process_messsages_and_replace_long_urls_shorter_ones = Mock(return_value={})
+
+    executed = []
+    results = list(results or [])
+
+    async def multi_act(actions):
+        executed.append((actions[0].model_dump(exclude_unset=True), asyncio.get_running_loop().time()))
+        return [results.pop(0) if results else ActionResult()]
+    original.multi_act = multi_act
+
+    async def get_next_action(browser_state_summary):
+        response = await original.llm.ainvoke([], StreamedAgentOutput)
+        original.state.last_model_output = response.completion
+    original._get_next_action = get_next_action
+    return agent_instance, executed
+
+
+class TestActionStreamParser:
+    """Test extracting actions from partial JSON."""
+
+    def test_actions_complete_as_they_close(self):
+        """Test that each action is returned by the chunk that closes it, whatever the chunking."""
+        text = model_output({'click': {'index': 1}}, {'click': {'index': 2}})
+        for chunk_size in (1, 3, 7, len(text)):
+            parser = ActionStreamParser()
+            seen = []
+            for i in range(0, len(text), chunk_size):
+                seen.extend(parser.feed(text[i:i + chunk_size]))
+            assert seen == [{'click': {'index': 1}}, {'click': {'index': 2}}]
+            assert parser.text == text
+
+    def test_strings_with_braces_and_escapes(self):
+        """Test that braces, brackets and escaped quotes inside strings do not end an action."""
+        text = json.dumps({
+            'memory': 'an "action": [ {',
+            'action': [{'input_text': {'index': 1, 'text': 'say "}]" \\ {ok}'}}],
+        })
+        parser = ActionStreamParser()
+
+        seen = [action for char in text for action in parser.feed(char)]
+
+        assert seen == [{'input_text': {'index': 1, 'text': 'say "}]" \\ {ok}'}}]
+
+    def test_nested_action_key_ignored(self):
+        """Test that only the top-level action array is parsed."""
+        parser = ActionStreamParser()
+
+        seen = parser.feed(json.dumps({'memory': {'action': [{'x': 1}]}, 'action': [{'y': 2}]}))
+
+        assert seen == [{'y': 2}]
+
+
+class TestEarlyDispatch:
+    """Test running actions while the model is still generating."""
+
+    @pytest.mark.asyncio
+    async def test_first_action_runs_before_stream_ends(self):
+        """Test that the first action starts before generation ends and the step gets every result."""
+        streaming_llm = FakeStreamingLLM(model_output({'click': {'index': 1}}, {'click': {'index': 2}}), pause=0.01)
+        agent_instance, executed = streaming_agent(streaming_llm)
+        original = agent_instance.original_agent
+
+        await get_next_action_with_streaming(agent_instance, Mock())
+        await execute_actions_with_dispatch(agent_instance)
+
+        assert [action for action, _ in executed] == [{'click': {'index': 1}}, {'click': {'index': 2}}]
+        assert executed[0][1] < streaming_llm.finished_at
+        assert len(original.state.last_result) == 2
+        assert original.llm.model == 'base'
+        assert agent_instance.streaming_stats.actions_dispatched_early == 2
+        assert agent_instance.streaming_stats.overlap_time > 0
+        assert [entry.model for entry in original.token_cost_service.usage_history] == ['stream']
+
+    @pytest.mark.asyncio
+    async def test_error_stops_remaining_actions(self):
+        """Test that an action error skips the rest of the streamed actions, as multi_act does."""
+        streaming_llm = FakeStreamingLLM(model_output({'click': {'index': 1}}, {'click': {'index': 2}}))
+        agent_instance, executed = streaming_agent(streaming_llm, results=[ActionResult(error='no element')])
+
+        await get_next_action_with_streaming(agent_instance, Mock())
+        await execute_actions_with_dispatch(agent_instance)
+
+        assert len(executed) == 1
+        assert agent_instance.original_agent.state.last_result[0].error == 'no element'
+
+    @pytest.mark.asyncio
+    async def test_done_only_as_single_action(self):
+        """Test that a done after another action is not executed."""
+        streaming_llm = FakeStreamingLLM(model_output({'click': {'index': 1}}, {'done': {'text': 'ok'}}))
+        agent_instance, executed = streaming_agent(streaming_llm)
+
+        await get_next_action_with_streaming(agent_instance, Mock())
+        await execute_actions_with_dispatch(agent_instance)
+
+        assert [action for action, _ in executed] == [{'click': {'index': 1}}]
+
+    @pytest.mark.asyncio
+    async def test_invalid_output_rolls_back(self):
+        """Test that output failing validation stops dispatch and names the actions that already ran."""
+        text = model_output({'click': {'index': 1}}, {'click': {'index': 2}})[:-1] + ', "next_goal": 5}'
+        agent_instance, executed = streaming_agent(FakeStreamingLLM(text, pause=0.01))
+
+        with pytest.raises(RuntimeError, match='already executed from the partial output: click'):
+            await get_next_action_with_streaming(agent_instance, Mock())
+
+        assert len(executed) >= 1
+        assert agent_instance._dispatch is None
+        assert agent_instance.streaming_stats.rollbacks == 1
+
+    @pytest.mark.asyncio
+    async def test_empty_actions_not_dispatched(self):
+        """Test that empty {} actions are skipped, including a whole empty output browser-use asks again for."""
+        streaming_llm = FakeStreamingLLM(model_output({}))
+        agent_instance, executed = streaming_agent(streaming_llm)
+        original = agent_instance.original_agent
+
+        async def get_next_action(browser_state_summary):
+            # browser-use's _get_model_output_with_retry: ask again after an output with no actions
+            response = await original.llm.ainvoke([], StreamedAgentOutput)
+            streaming_llm.text = model_output({}, {'click': {'index': 1}})
+            response = await original.llm.ainvoke([], StreamedAgentOutput)
+            original.state.last_model_output = response.completion
+        original._get_next_action = get_next_action
+
+        await get_next_action_with_streaming(agent_instance, Mock())
+        await execute_actions_with_dispatch(agent_instance)
+
+        assert [action for action, _ in executed] == [{'click': {'index': 1}}]
+        assert len(original.state.last_result) == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('ran', [True, False])
+    async def test_regenerated_output_invalidates_dispatch(self, ran):
+        """Test that an output regenerated by a fallback LLM after the stream failed is not mixed with the streamed actions."""
+        text = model_output({'click': {'index': 1}}, {'click': {'index': 2}})
+        streaming_llm = FakeStreamingLLM(text[:text.index('}}') + 2 if ran else 20], error=ModelRateLimitError('Too many requests'))
+        agent_instance, executed = streaming_agent(streaming_llm)
+        original = agent_instance.original_agent
+        fallback_output = StreamedAgentOutput.model_validate_json(model_output({'click': {'index': 3}}))
+        original._execute_actions = AsyncMock()
+
+        async def get_next_action(browser_state_summary):
+            # browser-use's get_model_output: switch to the fallback LLM after a provider error
+            try:
+                await original.llm.ainvoke([], StreamedAgentOutput)
+            except ModelRateLimitError:
+                original.state.last_model_output = fallback_output
+        original._get_next_action = get_next_action
+
+        await get_next_action_with_streaming(agent_instance, Mock())
+        if ran:
+            with pytest.raises(RuntimeError, match='regenerated after streamed actions already ran: click'):
+                await execute_actions_with_dispatch(agent_instance)
+            original._execute_actions.assert_not_awaited()
+        else:
+            await execute_actions_with_dispatch(agent_instance)
+            original._execute_actions.assert_awaited_once()
+        assert [action for action, _ in executed] == ([{'click': {'index': 1}}] if ran else [])
+        assert agent_instance._dispatch is None
+        assert agent_instance.streaming_stats.rollbacks == 1
+
+    @pytest.mark.asyncio
+    async def test_without_streaming_llm(self):
+        """Test that without a streaming source the step runs as before."""
+        agent_instance = Mock()
+        agent_instance.streaming_llm = None
+        agent_instance.hedger = None
+        agent_instance.decision_cache = None
+        agent_instance._dispatch = None
+        original = agent_instance.original_agent
+        original._get_next_action = AsyncMock()
+        original._execute_actions = AsyncMock()
+
+        await get_next_action_with_streaming(agent_instance, Mock())
+        await execute_actions_with_dispatch(agent_instance)
+
+        original._get_next_action.assert_awaited_once()
+        original._execute_actions.assert_awaited_once()
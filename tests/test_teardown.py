@@ -0,0 +1,150 @@
+"""Tests for background run teardown."""
+import asyncio
+import base64
+import time
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from langgraph_browser_agent import LangGraphBrowserAgent
+from langgraph_browser_agent.screenshots import ScreenshotStore
+from langgraph_browser_agent.teardown import BackgroundTeardown
+
+
+def finished_agent(teardown=None, close_delay=0.2, screenshot_store=None):
+    """Create an agent whose graph finishes immediately and whose browser takes `close_delay` seconds to close."""
+    original = Mock()
+    original.settings.generate_gif = False
+    original.session_id = 'session-0001'
+    original.task_id = 'task-0001'
+    original.browser_session.id = 'browser-0001'
+    original.browser_session.cdp_url = None
+    original.browser_session.start = AsyncMock()
+    original.state.session_initialized = True
+    original.enable_cloud_sync = False
+    original._log_agent_run = AsyncMock()
+    original._execute_initial_actions = AsyncMock()
+    original.token_cost_service.get_usage_summary = AsyncMock()
+    original.token_cost_service.log_usage_summary = AsyncMock()
+    original.history._output_model_schema = None
+    original.output_model_schema = None
+    original.eventbus.stop = AsyncMock()
+
+    async def close():
+        await asyncio.sleep(close_delay)
+    original.close = AsyncMock(side_effect=close)
+
+    agent = LangGraphBrowserAgent(original, teardown=teardown, screenshot_store=screenshot_store)
+
+    async def run_graph(state, config):
+        if screenshot_store is not None:
+            await original.screenshot_service.store_screenshot(base64.b64encode(b'screenshot').decode(), 1)
+        agent.ended_due_to_break = True
+        return state
+    agent.graph = Mock(ainvoke=AsyncMock(side_effect=run_graph))
+    return agent
+
+
+class TestBackgroundTeardown:
+    """Test the background task tracker."""
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        """Test that no more than max_concurrency teardowns run at once and drain waits for all."""
+        teardown = BackgroundTeardown(max_concurrency=2)
+
+        for _ in range(6):
+            teardown.submit(asyncio.sleep(0.02))
+
+        assert teardown.pending == 6
+        assert await teardown.drain()
+        assert teardown.pending == 0
+        assert teardown.stats.completed == 6
+        assert teardown.stats.max_in_flight == 2
+
+    @pytest.mark.asyncio
+    async def test_failures_and_timeouts_are_contained(self):
+        """Test that a failing or hanging teardown is counted and does not raise."""
+        teardown = BackgroundTeardown(timeout=0.05)
+
+        async def fail():
+            raise RuntimeError('eventbus gone')
+
+        teardown.submit(fail())
+        teardown.submit(asyncio.sleep(10))
+
+        assert await teardown.drain()
+        assert teardown.stats.failed == 1
+        assert teardown.stats.timed_out == 1
+
+    @pytest.mark.asyncio
+    async def test_drain_timeout_cancels(self):
+        """Test that drain() cancels teardowns still running after its timeout."""
+        teardown = BackgroundTeardown(max_concurrency=1, timeout=None)
+        teardown.submit(asyncio.sleep(10))
+        teardown.submit(asyncio.sleep(10))
+
+        assert not await teardown.drain(timeout=0.05)
+        assert teardown.pending == 0
+        assert teardown.stats.cancelled == 2
+
+    def test_invalid_concurrency(self):
+        """Test that max_concurrency must be positive."""
+        with pytest.raises(ValueError):
+            BackgroundTeardown(max_concurrency=0)
+
+
+class TestAgentTeardown:
+    """Test run() returning before its teardown."""
+
+    @pytest.mark.asyncio
+    async def test_run_returns_before_teardown(self):
+        """Test that run() returns the history while the browser is still closing, and drain() finishes it."""
+        teardown = BackgroundTeardown()
+        agent = finished_agent(teardown, close_delay=0.3)
+
+        start = time.perf_counter()
+        history = await agent.run()
+        elapsed = time.perf_counter() - start
+
+        assert history is agent.original_agent.history
+        assert elapsed < 0.3
+        assert teardown.pending == 1
+        assert await teardown.drain()
+        agent.original_agent.close.assert_awaited_once()
+        agent.original_agent.eventbus.stop.assert_awaited_once()
+        agent.original_agent.token_cost_service.log_usage_summary.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_without_teardown_run_waits(self):
+        """Test that without a BackgroundTeardown run() closes the browser before returning."""
+        agent = finished_agent(close_delay=0.05)
+
+        await agent.run()
+
+        agent.original_agent.close.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_next_run_waits_for_previous_teardown(self):
+        """Test that a second run of the same agent waits until the first run's teardown is done."""
+        teardown = BackgroundTeardown()
+        agent = finished_agent(teardown, close_delay=0.1)
+
+        await agent.run()
+        await agent.run()
+
+        assert agent.original_agent.close.await_count == 1
+        await teardown.drain()
+        assert agent.original_agent.close.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_screenshots_pinned_until_teardown_ends(self, tmp_path):
+        """Test that the run's screenshots cannot be pruned while its background teardown may still read them."""
+        store = ScreenshotStore(tmp_path, max_bytes=1)
+        teardown = BackgroundTeardown()
+        agent = finished_agent(teardown=teardown, screenshot_store=store)
+
+        await agent.run()
+        assert store.prune() == 0
+
+        assert await teardown.drain()
+        assert store.prune() == 1
@@ -0,0 +1,226 @@
+"""Tests for cancellation-based step and phase timeouts."""
+import time
+import asyncio
+import pytest
+from unittest.mock import Mock
+
+from browser_use.browser.views import BrowserStateSummary
+
+from langgraph_browser_agent.graph import create_browser_agent_graph, create_mock_agent_instance
+from langgraph_browser_agent.nodes import execute_actions_node, get_next_action_node, prepare_context_node
+from langgraph_browser_agent.routes import route_on_timeout_or_error
+from langgraph_browser_agent.timeouts import AdaptiveTimeouts, PhaseBudgets, apply_adaptive_timeouts, run_phase
+
+
+def make_state():
+    return {'task': 'test', 'browser_state_summary': None, 'last_model_output': None, 'last_result': None}
+
+
+async def hang(*args, **kwargs):
+    await asyncio.sleep(30)
+
+
+def make_agent(step_timeout=30, phase_budgets=None):
+    """Create a mock agent whose current step started now."""
+    agent = create_mock_agent_instance()
+    agent.original_agent.settings.step_timeout = step_timeout
+    agent.original_agent.step_start_time = time.time()
+    agent.phase_budgets = phase_budgets
+    return agent
+
+
+class TestRunPhase:
+    """Test cancelling a phase at its deadline."""
+
+    @pytest.mark.asyncio
+    async def test_hung_phase_cancelled_at_step_deadline(self):
+        """Test that a phase that never returns is cancelled when the step runs out of time."""
+        agent = make_agent(step_timeout=0.1)
+        cleaned_up = []
+
+        async def hang_until_cancelled():
+            try:
+                await asyncio.sleep(30)
+            finally:
+                cleaned_up.append(True)
+
+        start = time.monotonic()
+        result = await run_phase(agent, 'get_next_action', hang_until_cancelled())
+
+        assert time.monotonic() - start < 1
+        assert result is None
+        assert cleaned_up == [True]
+        assert agent.step_timed_out is True
+        assert agent.original_agent.state.consecutive_failures == 1
+        assert 'timed out after 0.1 seconds' in agent.original_agent.state.last_result[0].error
+
+    @pytest.mark.asyncio
+    async def test_phase_budget(self):
+        """Test that a phase budget below the step deadline cancels the phase and calls on_cancel."""
+        agent = make_agent(phase_budgets=PhaseBudgets(execute_actions=0.05))
+        on_cancel = Mock()
+
+        await run_phase(agent, 'execute_actions', asyncio.sleep(30), on_cancel=on_cancel)
+
+        on_cancel.assert_called_once_with(agent)
+        assert 'timed out in execute_actions after its 0.05 second budget' in agent.original_agent.state.last_result[0].error
+
+    @pytest.mark.asyncio
+    async def test_finished_phase_returns_result(self):
+        """Test that a phase within its budget returns its result untouched."""
+        agent = make_agent(phase_budgets=PhaseBudgets(prepare_context=5))
+
+        async def ready():
+            return 'summary'
+
+        assert await run_phase(agent, 'prepare_context', ready()) == 'summary'
+        assert agent.step_timed_out is False
+
+    @pytest.mark.asyncio
+    async def test_own_timeout_error_propagates(self):
+        """Test that a TimeoutError raised by the phase itself is an error, not a step timeout."""
+        agent = make_agent()
+
+        async def client_timeout():
+            raise asyncio.TimeoutError('read timed out')
+
+        with pytest.raises(asyncio.TimeoutError):
+            await run_phase(agent, 'get_next_action', client_timeout())
+        assert agent.step_timed_out is False
+
+
+class TestNodes:
+    """Test timeouts through the phase nodes and the graph."""
+
+    @pytest.mark.asyncio
+    async def test_node_routes_timeout(self):
+        """Test that a hung LLM call routes the step to timeout instead of error."""
+        agent = make_agent(step_timeout=0.05)
+        agent.original_agent._get_next_action.side_effect = hang
+
+        await get_next_action_node(make_state(), agent)
+
+        assert agent.last_error is None
+        assert route_on_timeout_or_error(make_state(), agent) == 'timeout'
+        assert agent.original_agent.state.consecutive_failures == 1
+
+    @pytest.mark.asyncio
+    async def test_timeout_flag_reset_each_step(self):
+        """Test that a timed-out step does not leak its timeout into the next step."""
+        agent = make_agent(step_timeout=0.05)
+        agent.original_agent._execute_actions.side_effect = hang
+        await execute_actions_node(make_state(), agent)
+        assert agent.step_timed_out is True
+
+        agent.original_agent.settings.step_timeout = 30
+        await prepare_context_node(make_state(), agent)
+
+        assert agent.step_timed_out is False
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('mode', ['verbose', 'fast'])
+    async def test_hung_actions_bound_run_time(self, mode):
+        """Test that hung actions end the run after max_failures step timeouts, not when the call returns."""
+        agent = create_mock_agent_instance(done_after=1000)
+        agent.original_agent.settings.step_timeout = 0.05
+        agent.original_agent._execute_actions.side_effect = hang
+        graph = create_browser_agent_graph(agent, mode=mode)
+
+        start = time.monotonic()
+        await graph.ainvoke(make_state(), {'recursion_limit': 100})
+
+        assert time.monotonic() - start < 2
+        assert agent.original_agent.state.consecutive_failures == 3
+        assert agent.ended_due_to_break is True
+
+
+def learned(controller, phase='get_next_action', domain='example.com', model='gpt-4o', durations=(2.0,) * 20):
+    for duration in durations:
+        controller.observe(phase, domain, model, duration)
+    return controller
+
+
+class TestAdaptiveTimeouts:
+    """Test timeouts learned from observed latency."""
+
+    def test_configured_until_enough_samples(self):
+        """Test that the configured timeouts are kept while a key has fewer than min_samples."""
+        controller = learned(AdaptiveTimeouts(min_samples=20), durations=(2.0,) * 19)
+
+        decision = controller.decide('example.com', 'gpt-4o', 30, PhaseBudgets(execute_actions=10))
+
+        assert decision.step_timeout == 30
+        assert decision.phase_budgets == PhaseBudgets(execute_actions=10)
+        assert decision.adaptive == ()
+
+    def test_budget_from_percentile(self):
+        """Test that a learned budget is the percentile times the multiplier plus the margin."""
+        controller = learned(AdaptiveTimeouts(quantile=99, multiplier=1.5, margin=1.0))
+        learned(controller, phase='step', durations=(10.0,) * 20)
+
+        decision = controller.decide('example.com', 'gpt-4o', 30)
+
+        assert decision.phase_budgets.get_next_action == pytest.approx(4.0)
+        assert decision.step_timeout == pytest.approx(16.0)
+        assert set(decision.adaptive) == {'get_next_action', 'step'}
+        assert decision.samples == 20
+
+    def test_other_domain_uses_model_samples(self):
+        """Test that a new domain starts from the model's samples for any domain, clamped to max_timeout."""
+        controller = learned(AdaptiveTimeouts(max_timeout=3.0), domain='slow.example.com', durations=(60.0,) * 20)
+
+        assert controller.decide('new.example.com', 'gpt-4o', 30).phase_budgets.get_next_action == 3.0
+        assert controller.decide('new.example.com', 'other-model', 30).adaptive == ()
+
+    def test_timeouts_raise_budget(self):
+        """Test that repeated cancellations push the budget up instead of failing forever."""
+        controller = learned(AdaptiveTimeouts(min_samples=5), durations=(1.0,) * 5)
+        before = controller.timeout('get_next_action', 'example.com', 'gpt-4o')[0]
+
+        for _ in range(5):
+            controller.observe('get_next_action', 'example.com', 'gpt-4o', before, timed_out=True)
+
+        assert controller.timeout('get_next_action', 'example.com', 'gpt-4o')[0] > before
+        assert controller.stats()['get_next_action example.com gpt-4o']['timeouts'] == 5
+
+    def test_persisted_across_instances(self, tmp_path):
+        """Test that samples saved by one controller are loaded by the next."""
+        path = str(tmp_path / 'timeouts.json')
+        learned(AdaptiveTimeouts(path=path)).save()
+
+        controller = AdaptiveTimeouts(path=path)
+
+        assert controller.decide('example.com', 'gpt-4o', 30).phase_budgets.get_next_action == pytest.approx(4.0)
+
+    def test_applied_and_logged_at_step_start(self):
+        """Test that a step starts with the decision for its page's domain, logged once."""
+        agent = make_agent()
+        agent.original_agent.llm.model = 'gpt-4o'
+        agent.adaptive_timeouts = learned(AdaptiveTimeouts())
+        learned(agent.adaptive_timeouts, phase='step', durations=(10.0,) * 20)
+        agent._configured_timeouts = (30, None)
+        state = make_state()
+        state['browser_state_summary'] = BrowserStateSummary(dom_state=None, url='https://example.com/a', title='', tabs=[])
+
+        apply_adaptive_timeouts(agent, state)
+        apply_adaptive_timeouts(agent, state)
+
+        assert agent.original_agent.settings.step_timeout == pytest.approx(16.0)
+        assert agent.phase_budgets.get_next_action == pytest.approx(4.0)
+        assert agent.original_agent.logger.info.call_count == 1
+        assert 'example.com with gpt-4o' in agent.original_agent.logger.info.call_args[0][0]
+
+    @pytest.mark.asyncio
+    async def test_phases_observed(self):
+        """Test that finished and cancelled phases are both recorded."""
+        agent = make_agent(step_timeout=0.05)
+        agent.adaptive_timeouts = AdaptiveTimeouts()
+        agent._timeout_key = ('example.com', 'gpt-4o')
+
+        await run_phase(agent, 'prepare_context', asyncio.sleep(0))
+        await run_phase(agent, 'execute_actions', hang())
+
+        stats = agent.adaptive_timeouts.stats()
+        assert stats['prepare_context example.com gpt-4o']['samples'] == 1
+        assert stats['execute_actions example.com gpt-4o']['timeouts'] == 1
+        assert stats['step example.com gpt-4o']['timeouts'] == 1
@@ -0,0 +1,246 @@
+"""Tests for trace recording and offline replay."""
+import gzip
+import json
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from browser_use.agent.views import ActionResult, AgentOutput
+from browser_use.browser.views import BrowserStateSummary, TabInfo
+from browser_use.tools.registry.views import ActionModel
+
+from langgraph_browser_agent.graph import create_browser_agent_graph, create_mock_agent_instance
+from langgraph_browser_agent.trace import (
+    ReplayAgent,
+    ReplayedDOMState,
+    TraceRecorder,
+    dump_browser_state,
+    load_browser_state,
+    load_trace,
+    replay_trace,
+)
+
+
+class RecordedAction(ActionModel):
+    click: dict | None = None
+    done: dict | None = None
+
+
+RecordedOutput = AgentOutput.type_with_custom_actions(RecordedAction)
+
+
+def make_summary(step):
+    """Create a BrowserStateSummary for page `step`."""
+    return BrowserStateSummary(
+        dom_state=ReplayedDOMState(f'[{step}]<button>Next</button>'),
+        url=f'https://example.com/{step}',
+        title=f'Page {step}',
+        tabs=[TabInfo(url=f'https://example.com/{step}', title=f'Page {step}', target_id='0123456789ABCDEF')],
+    )
+
+
+def make_recording_agent(tmp_path, fail_step=None, steps=3, timeout_step=None):
+    """Create a mock agent whose phases produce real browser-use objects, recording to a trace.
+
+    The first attempt at `timeout_step` hangs in execute_actions past the step timeout.
+    """
+    mock_agent = create_mock_agent_instance(done_after=steps + (timeout_step is not None))
+    timed_out = set()
+    mock_agent.graph_mode = 'verbose'
+    mock_agent.trace_recorder = TraceRecorder(str(tmp_path / 'run.trace.gz'))
+    original = mock_agent.original_agent
+    original.task = 'Click through to the end'
+    original.settings.final_response_after_failure = False
+
+    async def prepare_context(step_info):
+        return make_summary(mock_agent.current_step)
+
+    async def get_next_action(summary):
+        if mock_agent.current_step == fail_step:
+            raise RuntimeError('model overloaded')
+        last = mock_agent.current_step == steps - 1
+        action = RecordedAction(done={'text': 'finished'}) if last else RecordedAction(click={'index': mock_agent.current_step})
+        original.state.last_model_output = RecordedOutput(next_goal='advance', action=[action])
+
+    async def execute_actions():
+        if mock_agent.current_step == timeout_step and timeout_step not in timed_out:
+            timed_out.add(timeout_step)
+            await asyncio.sleep(10)
+        last = mock_agent.current_step == steps - 1
+        original.state.last_result = [
+            ActionResult(is_done=True, success=True, extracted_content='finished') if last
+            else ActionResult(extracted_content=f'clicked {mock_agent.current_step}')
+        ]
+
+    original._prepare_context = AsyncMock(side_effect=prepare_context)
+    original._get_next_action = AsyncMock(side_effect=get_next_action)
+    original._execute_actions = AsyncMock(side_effect=execute_actions)
+    return mock_agent
+
+
+async def record(mock_agent, max_steps=10):
+    mock_agent.trace_recorder.start(mock_agent, max_steps)
+    try:
+        state = {'task': 'test', 'browser_state_summary': None, 'last_model_output': None, 'last_result': None}
+        await create_browser_agent_graph(mock_agent).ainvoke(state, {'recursion_limit': 100})
+    finally:
+        mock_agent.trace_recorder.close()
+    return mock_agent.trace_recorder.path
+
+
+class TestBrowserStateSerialization:
+    """Test BrowserStateSummary round-tripping."""
+
+    def test_round_trip(self):
+        """Test that the fields the graph and LLM use survive serialization."""
+        summary = make_summary(4)
+        summary.screenshot = 'base64-png'
+        restored = load_browser_state(json.loads(json.dumps(dump_browser_state(summary))))
+
+        assert restored.url == summary.url
+        assert restored.tabs == summary.tabs
+        assert restored.dom_state.llm_representation() == '[4]<button>Next</button>'
+        assert restored.screenshot is None
+
+    def test_screenshots_opt_in(self):
+        """Test that screenshots are only kept when requested."""
+        summary = make_summary(0)
+        summary.screenshot = 'base64-png'
+
+        assert dump_browser_state(summary, include_screenshot=True)['screenshot'] == 'base64-png'
+
+
+class TestRecording:
+    """Test TraceRecorder output."""
+
+    @pytest.mark.asyncio
+    async def test_trace_contents(self, tmp_path):
+        """Test that every phase of every step is recorded after a header."""
+        path = await record(make_recording_agent(tmp_path))
+
+        with gzip.open(path, 'rt') as f:
+            lines = [json.loads(line) for line in f]
+        assert lines[0]['task'] == 'Click through to the end'
+        assert lines[0]['settings']['max_failures'] == 3
+        assert [(line['step'], line['phase']) for line in lines[1:5]] == [
+            (0, 'prepare_context'), (0, 'get_next_action'), (0, 'execute_actions'), (0, 'evaluate_result'),
+        ]
+        trace = load_trace(path)
+        assert trace.steps == 3
+        assert trace.action_names() == {'click', 'done'}
+
+    @pytest.mark.asyncio
+    async def test_errors_recorded(self, tmp_path):
+        """Test that a failing phase records its error and no data."""
+        trace = load_trace(await record(make_recording_agent(tmp_path, fail_step=1, steps=4)))
+
+        phases = {event['phase']: event for event in trace.events[1]}
+        assert phases['get_next_action']['error'] == 'model overloaded'
+        assert phases['get_next_action']['data'] is None
+        assert 'execute_actions' not in phases
+
+    @pytest.mark.asyncio
+    async def test_retried_step_keeps_every_attempt(self, tmp_path):
+        """Test that a step retried after a timeout keeps both attempts' records, in order."""
+        mock_agent = make_recording_agent(tmp_path, timeout_step=1)
+        mock_agent.original_agent.settings.step_timeout = 1
+
+        trace = load_trace(await record(mock_agent))
+
+        assert mock_agent.trace_recorder.events_recorded == 15
+        assert sum(len(events) for events in trace.events.values()) == 15
+        assert [(event['phase'], event['timed_out']) for event in trace.events[1]] == [
+            ('prepare_context', False), ('get_next_action', False), ('execute_actions', True),
+            ('prepare_context', False), ('get_next_action', False), ('execute_actions', False), ('evaluate_result', False),
+        ]
+        assert [event['seq'] for event in trace.iter_events()] == list(range(15))
+
+    def test_rejects_other_files(self, tmp_path):
+        """Test that load_trace refuses files that are not traces."""
+        path = tmp_path / 'other.gz'
+        with gzip.open(path, 'wt') as f:
+            f.write('{"hello": "world"}\n')
+
+        with pytest.raises(ValueError):
+            load_trace(str(path))
+
+
+class TestReplay:
+    """Test replaying traces through the graph with no browser or LLM."""
+
+    @pytest.mark.asyncio
+    async def test_replay_agent_sets_every_agent_attribute(self, tmp_path):
+        """Test that a ReplayAgent has every feature attribute of a LangGraphBrowserAgent, turned off."""
+        from langgraph_browser_agent import LangGraphBrowserAgent
+
+        trace = load_trace(await record(make_recording_agent(tmp_path)))
+        run_only = {'browser_session', 'tools', 'llm', '_message_manager', 'settings', 'logger', 'graph', 'graph_mode',
+                    'original_agent', 'session_pool', '_leased_session', 'screenshot_store', '_screenshot_lease', 'startup_report'}
+
+        assert set(vars(LangGraphBrowserAgent(Mock()))) - run_only <= set(vars(ReplayAgent(trace)))
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('mode', ['verbose', 'fast'])
+    async def test_replay_reproduces_history(self, tmp_path, mode):
+        """Test that replay rebuilds the recorded run's history."""
+        path = await record(make_recording_agent(tmp_path))
+
+        history = await replay_trace(path, graph_mode=mode)
+
+        assert history.is_done()
+        assert history.final_result() == 'finished'
+        assert history.urls() == ['https://example.com/0', 'https://example.com/1', 'https://example.com/2']
+        assert history.model_actions()[0]['click'] == {'index': 0}
+
+    @pytest.mark.asyncio
+    async def test_replay_runs_browser_use_step_handling(self, tmp_path):
+        """Test that post-processing, finalizing and error handling are browser-use's own, not copies."""
+        from browser_use import Agent
+
+        agent = ReplayAgent(load_trace(await record(make_recording_agent(tmp_path, fail_step=1, steps=4))))
+        original = agent.original_agent
+        history = await agent.run()
+
+        assert type(original)._finalize is Agent._finalize
+        assert type(original)._handle_step_error is Agent._handle_step_error
+        assert history.history[1].metadata.step_interval is not None  # only browser-use's _finalize sets it
+        assert len(original.state.loop_detector.recent_action_hashes) == 2  # the two clicks; done is exempt
+        assert original.state.consecutive_failures == 0
+
+    @pytest.mark.asyncio
+    async def test_replay_reproduces_errors(self, tmp_path):
+        """Test that a recorded error goes through the error path on replay."""
+        path = await record(make_recording_agent(tmp_path, fail_step=1, steps=4))
+
+        history = await replay_trace(path)
+
+        assert history.is_done()
+        assert any('model overloaded' in (error or '') for error in history.errors())
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('mode', ['verbose', 'fast'])
+    async def test_replay_reproduces_timeout_and_retry(self, tmp_path, mode):
+        """Test that a step that timed out and was retried replays the timeout, then the retry."""
+        mock_agent = make_recording_agent(tmp_path, timeout_step=1)
+        mock_agent.original_agent.settings.step_timeout = 1
+        path = await record(mock_agent)
+
+        history = await replay_trace(path, graph_mode=mode)
+
+        assert history.is_done()
+        assert history.urls() == ['https://example.com/0', 'https://example.com/1', 'https://example.com/2']
+        assert history.model_actions()[1]['click'] == {'index': 1}
+
+    @pytest.mark.asyncio
+    async def test_truncated_trace_stops(self, tmp_path):
+        """Test that replay stops cleanly when the trace runs out."""
+        path = await record(make_recording_agent(tmp_path))
+        with gzip.open(path, 'rt') as f:
+            lines = f.readlines()
+        with gzip.open(path, 'wt') as f:
+            f.writelines(lines[:5])
+
+        history = await replay_trace(path)
+
+        assert not history.is_done()
+        assert 'no prepare_context record for step 1' in history.history[-1].result[0].error